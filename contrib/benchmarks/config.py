@@ -0,0 +1,129 @@
+# coding=utf-8
+"""Benchmark for reading settings from the config
+
+Some settings are read for every line the bot receives (``nick_blocks``,
+``host_blocks``) or every message it sends (flood settings). Settings cache
+their parsed value until the config is modified: the same settings are read
+from a config with the cache, and from a config using a plain
+``RawConfigParser``, as it used to be, to compare the two.
+
+With ``--modify-every``, an option is set every N reads, which invalidates
+the cache, to see what a config modified often costs.
+
+Usage::
+
+    python contrib/benchmarks/config.py --reads 200000 --repeat 5
+
+"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from sopel import config as sopel_config  # noqa: E402
+from sopel.config import core_section  # noqa: E402
+
+if sys.version_info.major >= 3:
+    from configparser import RawConfigParser
+else:
+    from ConfigParser import RawConfigParser
+
+
+CONFIG = """\
+[core]
+owner = Exirel
+nick = Sopel
+host = irc.example.com
+nick_blocks =
+    Baddie.*
+    Troll[0-9]+
+    spam.*bot
+host_blocks =
+    .*\\.example\\.net
+    bad\\.example\\.org
+flood_burst_lines = 4
+flood_refill_rate = 1
+auto_url_schemes =
+    http
+    https
+    ftp
+"""
+
+SETTINGS = [
+    'nick_blocks',
+    'host_blocks',
+    'flood_burst_lines',
+    'flood_refill_rate',
+    'auto_url_schemes',
+]
+
+
+def load_config(filename, cached):
+    config = sopel_config.Config(filename)
+    if not cached:
+        # settings don't cache values read from a parser without a version
+        config.parser = RawConfigParser(allow_no_value=True)
+        config.parser.read(filename)
+        config.define_section('core', core_section.CoreSection)
+    return config
+
+
+def run(config, setting, reads, modify_every, repeat):
+    core = config.core
+
+    if modify_every:
+        state = {'count': 0}
+
+        def read():
+            state['count'] += 1
+            if state['count'] % modify_every == 0:
+                config.parser.set('core', 'prefix', '\\.')
+            return getattr(core, setting)
+    else:
+        def read():
+            return getattr(core, setting)
+
+    best = min(timeit.repeat(read, number=reads, repeat=repeat))
+    return best / reads
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reads', type=int, default=100000,
+                        help='Reads per setting and run')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--modify-every', type=int, default=0,
+                        help='Modify the config every N reads (0: never)')
+    options = parser.parse_args(argv)
+
+    homedir = tempfile.mkdtemp(prefix='sopel-benchmark-')
+    try:
+        filename = os.path.join(homedir, 'benchmark.cfg')
+        with open(filename, 'w') as fd:
+            fd.write(CONFIG)
+
+        configs = [('uncached', load_config(filename, cached=False)),
+                   ('cached', load_config(filename, cached=True))]
+
+        print('%-20s %10s %10s' % ('setting', 'uncached', 'cached'))
+        for setting in SETTINGS:
+            durations = [
+                run(config, setting, options.reads, options.modify_every,
+                    options.repeat)
+                for _name, config in configs
+            ]
+            print('%-20s %8.2fus %8.2fus' % (
+                setting, durations[0] * 1e6, durations[1] * 1e6))
+    finally:
+        shutil.rmtree(homedir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,348 @@
+# coding=utf-8
+"""Synthetic IRC traffic, and raw logs, for Sopel's benchmarks
+
+The synthetic corpus is what a bot sees on a big and busy channel: a burst
+of NAMES and WHO replies when it joins, then a mix of chat (with commands,
+URLs, and ``s/old/new/`` corrections), MODE storms, and users joining,
+leaving, and changing nicks. The same seed always gives the same corpus.
+
+Raw logs written by Sopel (see its ``log_raw`` and ``log_raw_format``
+settings), in text or ndjson format, can be read as well, so recorded
+traffic can be used instead.
+
+Usage::
+
+    python contrib/benchmarks/corpus.py --users 2000 --lines 20000 \\
+        --output big.raw.log
+
+"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import argparse
+import collections
+from datetime import datetime
+import io
+import json
+import random
+import time
+import zlib
+
+
+RawLine = collections.namedtuple('RawLine', ['time', 'direction', 'line'])
+"""A line of a raw log: when, in which direction (``<<`` for received,
+``>>`` for sent), and the raw IRC line. Its time can be ``None``."""
+
+SERVER = 'irc.example.com'
+TEXT_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+WORDS = (
+    'spam eggs ham bacon sausage beans toast tomato lobster thermidor '
+    'crevettes mornay sauce truffle pate brandy fried egg on top and with '
+    'the a of to is it that this for was are be have not you but what'
+).split()
+
+COMMANDS = [
+    '.choose spam, eggs, ham',
+    '.rand 1 100',
+    '.roll 3d6+2',
+    '.c 2 + 2 * 10',
+    '.seen {nick}',
+    '.u 2603',
+    '.shrug',
+    '.help',
+]
+
+URLS = [
+    'https://example.com/',
+    'https://www.example.org/some/path?query=value',
+    'http://example.net/article/{number}.html',
+    'https://example.com/watch?v={number}',
+]
+
+
+def _parse_text_time(timestamp):
+    # default format of Python's logging: 2019-10-21 14:07:44,272
+    timestamp, _, milliseconds = timestamp.partition(',')
+    try:
+        parsed = datetime.strptime(timestamp.strip(), TEXT_DATE_FORMAT)
+    except ValueError:
+        return None
+    return (time.mktime(parsed.timetuple()) +
+            int(milliseconds or 0) / 1000)
+
+
+def parse_raw_line(text):
+    """Parse a line of a raw log, in text or ndjson format.
+
+    :param str text: a line of the raw log
+    :return: the parsed line, or ``None`` if it isn't a raw IRC line
+    :rtype: :class:`RawLine`
+
+    The time of a line in text format can be parsed only if the log uses
+    the default date format of Python's :mod:`logging`.
+    """
+    text = text.rstrip('\r\n')
+    if text.startswith('{'):
+        data = json.loads(text)
+        return RawLine(data.get('time'), data['direction'], data['line'])
+
+    prefix, tab, line = text.partition('\t')
+    if not tab:
+        return None
+    timestamp, _, direction = prefix.rpartition(' ')
+    if direction not in ('<<', '>>'):
+        return None
+    return RawLine(_parse_text_time(timestamp), direction, line)
+
+
+def read_raw_log(filename, direction=None):
+    """Read the raw IRC lines of the raw log ``filename``.
+
+    :param str filename: the raw log to read
+    :param str direction: to read only the lines received (``<<``) or only
+                          the lines sent (``>>``) (optional)
+    :return: the raw log's lines, in order
+    :rtype: list of :class:`RawLine`
+    """
+    lines = []
+    with io.open(filename, encoding='utf-8', errors='replace') as raw_log:
+        for text in raw_log:
+            raw_line = parse_raw_line(text)
+            if raw_line is None:
+                continue
+            if direction is None or raw_line.direction == direction:
+                lines.append(raw_line)
+    return lines
+
+
+def write_raw_log(lines, filename):
+    """Write ``lines`` to the raw log ``filename``, in ndjson format.
+
+    :param lines: the lines to write
+    :type lines: iterable of :class:`RawLine`
+    :param str filename: where to write them
+    """
+    with io.open(filename, 'w', encoding='utf-8') as raw_log:
+        for raw_line in lines:
+            raw_log.write(json.dumps({
+                'time': raw_line.time,
+                'direction': raw_line.direction,
+                'line': raw_line.line,
+            }) + '\n')
+
+
+class _Generator(object):
+    def __init__(self, nick, channel, users, seed, rate, start):
+        self.nick = nick
+        self.channel = channel
+        self.random = random.Random(seed)
+        self.rate = rate
+        self.time = start
+        self.nicks = ['user%04d' % index for index in range(users)]
+        self.guests = []
+        self.guest_count = 0
+        self.recent = {}
+
+    def line(self, text, delay=True):
+        if delay:
+            self.time = self.time + self.random.expovariate(self.rate)
+        return RawLine(round(self.time, 3), '<<', text)
+
+    def hostmask(self, nick):
+        return '%s!~%s@host%d.example.com' % (
+            nick, nick[:9], zlib.crc32(nick.encode('utf-8')) % 1000)
+
+    def sentence(self, length=None):
+        length = length or self.random.randint(3, 20)
+        return ' '.join(self.random.choice(WORDS) for _ in range(length))
+
+    def welcome(self):
+        yield self.line(
+            ':%s 001 %s :Welcome to the benchmark network %s' % (
+                SERVER, self.nick, self.nick), delay=False)
+        yield self.line(
+            ':%s JOIN %s' % (self.hostmask(self.nick), self.channel),
+            delay=False)
+
+    def names_burst(self):
+        names = [
+            self.random.choice(['', '', '', '+', '@']) + nick
+            for nick in self.nicks
+        ]
+        for index in range(0, len(names), 40):
+            yield self.line(':%s 353 %s = %s :%s' % (
+                SERVER, self.nick, self.channel,
+                ' '.join(names[index:index + 40])), delay=False)
+        yield self.line(':%s 366 %s %s :End of /NAMES list.' % (
+            SERVER, self.nick, self.channel), delay=False)
+
+    def who_burst(self):
+        for nick in self.nicks:
+            status = self.random.choice(['H', 'H', 'G', 'H@', 'H+'])
+            user, _, host = self.hostmask(nick).partition('!')[2].partition('@')
+            yield self.line(':%s 352 %s %s %s %s %s %s %s :0 %s' % (
+                SERVER, self.nick, self.channel, user, host, SERVER, nick,
+                status, nick.capitalize()), delay=False)
+        yield self.line(':%s 315 %s %s :End of /WHO list.' % (
+            SERVER, self.nick, self.channel), delay=False)
+
+    def privmsg(self, nick, text):
+        return self.line(':%s PRIVMSG %s :%s' % (
+            self.hostmask(nick), self.channel, text))
+
+    def chat(self):
+        nick = self.random.choice(self.nicks)
+        text = self.sentence()
+        self.recent[nick] = text
+        yield self.privmsg(nick, text)
+
+    def command(self):
+        nick = self.random.choice(self.nicks)
+        command = self.random.choice(COMMANDS).format(
+            nick=self.random.choice(self.nicks))
+        yield self.privmsg(nick, command)
+
+    def url(self):
+        nick = self.random.choice(self.nicks)
+        url = self.random.choice(URLS).format(
+            number=self.random.randint(1, 10 ** 6))
+        yield self.privmsg(nick, '%s %s %s' % (
+            self.sentence(3), url, self.sentence(3)))
+
+    def correction(self):
+        if not self.recent:
+            return
+        nick = self.random.choice(list(self.recent))
+        word = self.random.choice(self.recent[nick].split())
+        yield self.privmsg(nick, 's/%s/%s/' % (word, self.random.choice(WORDS)))
+
+    def mode_storm(self):
+        op = self.random.choice(self.nicks)
+        for _ in range(self.random.randint(5, 20)):
+            changes = [self.random.choice(['+o', '-o', '+v', '-v'])
+                       for _ in range(3)]
+            targets = self.random.sample(self.nicks, 3)
+            yield self.line(':%s MODE %s %s %s' % (
+                self.hostmask(op), self.channel, ''.join(changes),
+                ' '.join(targets)))
+
+    def join_part(self):
+        if self.guests and self.random.random() < 0.5:
+            guest = self.guests.pop(self.random.randrange(len(self.guests)))
+            action = self.random.choice(['part', 'quit', 'nick'])
+            if action == 'part':
+                yield self.line(':%s PART %s :%s' % (
+                    self.hostmask(guest), self.channel, self.sentence(3)))
+            elif action == 'quit':
+                yield self.line(':%s QUIT :Quit: %s' % (
+                    self.hostmask(guest), self.sentence(3)))
+            else:
+                new_nick = guest + '_'
+                yield self.line(':%s NICK :%s' % (
+                    self.hostmask(guest), new_nick))
+                self.guests.append(new_nick)
+        else:
+            self.guest_count = self.guest_count + 1
+            guest = 'guest%d' % self.guest_count
+            self.guests.append(guest)
+            yield self.line(':%s JOIN %s' % (
+                self.hostmask(guest), self.channel))
+
+    def traffic(self, count):
+        scenarios = [
+            (self.chat, 60),
+            (self.command, 8),
+            (self.url, 10),
+            (self.correction, 5),
+            (self.mode_storm, 2),
+            (self.join_part, 15),
+        ]
+        functions = [function for function, weight in scenarios]
+        weights = [weight for function, weight in scenarios]
+        total = sum(weights)
+        produced = 0
+        while produced < count:
+            pick = self.random.uniform(0, total)
+            for function, weight in zip(functions, weights):
+                pick -= weight
+                if pick <= 0:
+                    break
+            for raw_line in function():
+                if produced >= count:
+                    return
+                produced = produced + 1
+                yield raw_line
+            if self.random.random() < 0.01:
+                produced = produced + 1
+                yield self.line('PING :%s' % SERVER)
+
+
+def generate(nick='Sopel', channel='#benchmark', users=2000, lines=20000,
+             seed=0, rate=50.0, start=1500000000.0):
+    """Generate a synthetic corpus of IRC lines received by a bot.
+
+    :param str nick: the bot's nick
+    :param str channel: the channel the bot joins
+    :param int users: how many users are in the channel
+    :param int lines: how many lines of traffic follow the join
+    :param int seed: seed of the random generator
+    :param float rate: how many lines are received per second, on average
+    :param float start: time of the first line
+    :return: the lines, in order
+    :rtype: list of :class:`RawLine`
+
+    The corpus starts with the server's welcome, the bot's join, and the
+    NAMES and WHO bursts for ``users`` users, then come ``lines`` lines of
+    traffic.
+    """
+    generator = _Generator(nick, channel, users, seed, rate, start)
+    corpus = list(generator.welcome())
+    corpus.extend(generator.names_burst())
+    corpus.extend(generator.who_burst())
+    corpus.extend(generator.traffic(lines))
+    return corpus
+
+
+def add_corpus_arguments(parser):
+    """Add the options of a synthetic corpus to ``parser``."""
+    parser.add_argument('--nick', default='Sopel',
+                        help='Nick of the bot (default: %(default)s)')
+    parser.add_argument('--channel', default='#benchmark',
+                        help='Channel of the traffic (default: %(default)s)')
+    parser.add_argument('--users', type=int, default=2000,
+                        help='Users in the channel (default: %(default)s)')
+    parser.add_argument('--lines', type=int, default=20000,
+                        help='Lines of traffic (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Seed of the random generator '
+                             '(default: %(default)s)')
+    parser.add_argument('--rate', type=float, default=50.0,
+                        help='Lines per second, on average '
+                             '(default: %(default)s)')
+
+
+def generate_from_options(options):
+    """Generate a synthetic corpus from the options of a parser."""
+    return generate(
+        nick=options.nick,
+        channel=options.channel,
+        users=options.users,
+        lines=options.lines,
+        seed=options.seed,
+        rate=options.rate)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    add_corpus_arguments(parser)
+    parser.add_argument('-o', '--output', required=True,
+                        help='Raw log to write, in ndjson format')
+    options = parser.parse_args(argv)
+
+    corpus = generate_from_options(options)
+    write_raw_log(corpus, options.output)
+    print('%d lines written to %s' % (len(corpus), options.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,288 @@
+# coding=utf-8
+"""Parsing and dispatch benchmark, replaying IRC traffic through a bot
+
+Each line of a corpus (synthetic by default, see ``corpus.py``, or a raw log
+with ``--corpus``) is:
+
+1. parsed into a ``PreTrigger``, to measure the parser alone,
+2. then received by a bot, with its plugins loaded (every built-in plugin
+   by default) and a mock backend: the line is parsed and dispatched to the
+   plugins, as it would be from the server.
+
+The benchmark is offline: the network is disabled, so plugins that use it
+fail quickly instead. It reports lines per second, the latency of each line
+(percentiles), and the peak memory. The results can be saved as JSON, and
+compared with the results of another run (e.g. of another commit)::
+
+    python contrib/benchmarks/dispatch.py --json before.json
+    git checkout my-branch
+    python contrib/benchmarks/dispatch.py --compare before.json
+
+"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:
+    # not available on Windows
+    resource = None
+
+try:
+    import tracemalloc
+except ImportError:
+    # TODO: Remove when dropping Python 2 support
+    tracemalloc = None
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+sys.path.insert(0, ROOT)
+
+import corpus  # noqa: E402
+
+from sopel import bot, config  # noqa: E402
+from sopel.tests.mocks import MockIRCBackend  # noqa: E402
+from sopel.trigger import PreTrigger  # noqa: E402
+
+
+BENCHMARK_CONFIG = """
+[core]
+nick = {nick}
+owner = BenchmarkOwner
+host = irc.example.com
+# the benchmark measures the bot, not its flood protection
+flood_burst_lines = 1000000
+flood_empty_wait = 0
+"""
+
+
+class CountingHandler(logging.Handler):
+    """Count the log records, by level."""
+    def __init__(self):
+        super(CountingHandler, self).__init__()
+        self.counts = {}
+
+    def emit(self, record):
+        self.counts[record.levelname] = (
+            self.counts.get(record.levelname, 0) + 1)
+
+
+def disable_network():
+    """Make every connection fail immediately."""
+    def no_network(*args, **kwargs):
+        raise socket.error('network disabled by the benchmark')
+
+    socket.getaddrinfo = no_network
+    socket.socket.connect = no_network
+    socket.socket.connect_ex = no_network
+
+
+def get_commit():
+    try:
+        output = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode('utf-8').strip()
+
+
+def get_max_rss():
+    """Get the peak resident memory of the process, in MiB."""
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        # bytes on macOS, kilobytes elsewhere
+        return max_rss / 1024 / 1024
+    return max_rss / 1024
+
+
+def percentile(ordered, percent):
+    rank = int(round(percent / 100 * (len(ordered) - 1)))
+    return ordered[rank]
+
+
+def summarize(latencies, elapsed):
+    ordered = sorted(latencies)
+    return {
+        'lines': len(ordered),
+        'seconds': elapsed,
+        'lines_per_second': len(ordered) / elapsed if elapsed else None,
+        'latency_ms': {
+            'p50': percentile(ordered, 50) * 1000,
+            'p95': percentile(ordered, 95) * 1000,
+            'p99': percentile(ordered, 99) * 1000,
+            'max': ordered[-1] * 1000,
+        },
+    }
+
+
+def run_parse(lines, nick, url_schemes):
+    latencies = []
+    start = time.time()
+    for line in lines:
+        line_start = time.time()
+        PreTrigger(nick, line, url_schemes=url_schemes)
+        latencies.append(time.time() - line_start)
+    return summarize(latencies, time.time() - start)
+
+
+def create_bot(homedir, nick, plugins):
+    filename = os.path.join(homedir, 'benchmark.cfg')
+    with io.open(filename, 'w', encoding='utf-8') as config_file:
+        config_file.write(BENCHMARK_CONFIG.format(nick=nick))
+    settings = config.Config(filename)
+    if plugins is not None:
+        settings.core.enable = ['coretasks'] + plugins
+
+    sopel = bot.Sopel(settings, daemon=False)
+    sopel.backend = MockIRCBackend(sopel)
+    sopel.setup_plugins()
+    return sopel
+
+
+def run_dispatch(sopel, lines):
+    latencies = []
+    start = time.time()
+    for index, line in enumerate(lines):
+        line_start = time.time()
+        sopel.on_message(line)
+        latencies.append(time.time() - line_start)
+        if index % 1000 == 0:
+            # don't count what the mock backend keeps in memory
+            sopel.backend.message_sent = []
+    elapsed = time.time() - start
+
+    # plugins' threads are not part of the latency, but they must end
+    for thread in sopel.running_triggers:
+        thread.join(10)
+    result = summarize(latencies, elapsed)
+    result['threads_wait_seconds'] = time.time() - start - elapsed
+    return result
+
+
+def print_result(name, result, baseline=None):
+    line = '%-9s %8d lines %8.3fs %10.0f lines/s' % (
+        name, result['lines'], result['seconds'], result['lines_per_second'])
+    if baseline:
+        line += ' (%+.1f%%)' % (
+            (result['lines_per_second'] / baseline['lines_per_second'] - 1)
+            * 100)
+    print(line)
+
+    latencies = result['latency_ms']
+    print('          latency (ms): ' + ', '.join(
+        '%s %.3f%s' % (
+            key, latencies[key],
+            ' (%+.1f%%)' % ((latencies[key] / baseline['latency_ms'][key] - 1)
+                            * 100)
+            if baseline and baseline['latency_ms'][key] else '')
+        for key in ['p50', 'p95', 'p99', 'max']))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    corpus.add_corpus_arguments(parser)
+    parser.add_argument('--corpus',
+                        help='Raw log to replay instead of a synthetic corpus')
+    parser.add_argument('--plugins',
+                        help='Comma-separated plugins to load '
+                             '(default: every built-in plugin)')
+    parser.add_argument('--trace-memory', action='store_true',
+                        help='Measure the peak of Python allocations '
+                             '(slower)')
+    parser.add_argument('--json', help='Save the results to this file')
+    parser.add_argument('--compare',
+                        help='Compare with the results saved in this file')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='Show the logs of the bot')
+    options = parser.parse_args(argv)
+
+    if options.corpus:
+        raw_lines = corpus.read_raw_log(options.corpus, direction='<<')
+        corpus_name = os.path.basename(options.corpus)
+    else:
+        raw_lines = corpus.generate_from_options(options)
+        corpus_name = 'synthetic (users=%d, lines=%d, seed=%d)' % (
+            options.users, options.lines, options.seed)
+    lines = [raw_line.line for raw_line in raw_lines]
+    plugins = None
+    if options.plugins is not None:
+        plugins = [name.strip() for name in options.plugins.split(',')
+                   if name.strip()]
+
+    disable_network()
+    counter = CountingHandler()
+    sopel_logger = logging.getLogger('sopel')
+    sopel_logger.addHandler(counter)
+    if not options.verbose:
+        sopel_logger.propagate = False
+
+    homedir = tempfile.mkdtemp(prefix='sopel-benchmark-')
+    try:
+        sopel = create_bot(homedir, options.nick, plugins)
+        if options.trace_memory and tracemalloc is not None:
+            tracemalloc.start()
+        results = {
+            'parse': run_parse(
+                lines, sopel.nick, sopel.settings.core.auto_url_schemes),
+            'dispatch': run_dispatch(sopel, lines),
+        }
+        if options.trace_memory and tracemalloc is not None:
+            results['peak_traced_mib'] = (
+                tracemalloc.get_traced_memory()[1] / 1024 / 1024)
+            tracemalloc.stop()
+        sopel._shutdown()
+    finally:
+        shutil.rmtree(homedir, ignore_errors=True)
+
+    results.update({
+        'commit': get_commit(),
+        'python': platform.python_version(),
+        'corpus': corpus_name,
+        'plugins': len(sopel._plugins),
+        'peak_rss_mib': get_max_rss(),
+        'log_records': counter.counts,
+    })
+
+    baseline = None
+    if options.compare:
+        with io.open(options.compare, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        print('Compared with %s (commit %s)' % (
+            options.compare, baseline.get('commit')))
+
+    print('Corpus: %s, %d plugins, commit %s, Python %s' % (
+        corpus_name, results['plugins'], results['commit'],
+        results['python']))
+    print_result('parse', results['parse'],
+                 baseline and baseline.get('parse'))
+    print_result('dispatch', results['dispatch'],
+                 baseline and baseline.get('dispatch'))
+    if results['peak_rss_mib'] is not None:
+        print('Peak memory: %.1f MiB (RSS)' % results['peak_rss_mib'])
+    if 'peak_traced_mib' in results:
+        print('Peak memory: %.1f MiB (Python allocations)'
+              % results['peak_traced_mib'])
+    print('Log records: %s' % (', '.join(
+        '%s %d' % item for item in sorted(counter.counts.items())) or 'none'))
+
+    if options.json:
+        with io.open(options.json, 'w', encoding='utf-8') as json_file:
+            json_file.write(json.dumps(results, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,355 @@
+# coding=utf-8
+"""Fake IRC server replaying a raw log to a real bot
+
+The server replays the lines a bot received (``<<``) in a raw log written by
+Sopel (see its ``log_raw`` setting), or in a synthetic corpus (see
+``corpus.py``), to each bot connecting to it: at their original pace, faster
+(``--speed``), or as fast as possible (``--speed 0``). It answers the bot's
+PINGs, and records what the bot sends.
+
+For each command it replays (a PRIVMSG starting with ``--prefix``), it
+measures how long the bot takes to respond: the time until the bot's first
+PRIVMSG or NOTICE to the command's channel (or to its sender, in private)
+that responds to it. A message responds to the oldest command waiting in its
+channel whose sender it names (as ``bot.reply`` does); a message that names
+no one responds to a command only if it is the only one waiting in its
+channel. Other messages are counted as unmatched: they may be responses to
+commands sent close together, or not be responses at all (e.g. URL titles).
+When the replay is over, it reports these latencies per command.
+
+Run the bot with a configuration pointing to the server (``host`` and
+``port``), with the nick used in the raw log::
+
+    python contrib/benchmarks/fakeserver.py --raw-log sopel.raw.log \\
+        --port 6667 --speed 10
+
+With ``--tls``, the connection is encrypted with a self-signed certificate,
+created with ``openssl`` unless ``--certfile`` and ``--keyfile`` are given.
+The bot must then use ``use_ssl = true``, and either ``verify_ssl = false``
+or ``ca_certs`` set to the certificate.
+"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import argparse
+import collections
+import os
+import shutil
+import socket
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+
+import corpus
+
+
+class LatencyStats(object):
+    """Response latencies of the bot, per command."""
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+        self.latencies = collections.defaultdict(list)
+        self.missing = collections.defaultdict(int)
+        self.unmatched = 0
+        self._pending = collections.defaultdict(list)
+        self._lock = threading.Lock()
+
+    def command_sent(self, target, command, nick, sent_at):
+        with self._lock:
+            self._pending[target.lower()].append((command, nick, sent_at))
+
+    def response_received(self, target, text, received_at):
+        with self._lock:
+            pending = self._pending.get(target.lower())
+            # commands waiting for too long won't get a response
+            while pending and received_at - pending[0][2] > self.timeout:
+                self.missing[pending.pop(0)[0]] += 1
+            if not pending:
+                self.unmatched += 1
+                return
+
+            words = set(
+                word.strip(':,').lower() for word in text.split())
+            index = next(
+                (index for index, (command, nick, sent_at)
+                 in enumerate(pending) if nick.lower() in words),
+                None)
+            if index is None:
+                if len(pending) > 1:
+                    # can't tell which command it responds to, if any
+                    self.unmatched += 1
+                    return
+                index = 0
+
+            command, nick, sent_at = pending.pop(index)
+            self.latencies[command].append(received_at - sent_at)
+
+    def finish(self):
+        """Count the commands still waiting for a response as missing."""
+        with self._lock:
+            for pending in self._pending.values():
+                for command, nick, sent_at in pending:
+                    self.missing[command] += 1
+            self._pending.clear()
+
+    def get_report(self):
+        commands = sorted(set(self.latencies) | set(self.missing))
+        if not commands:
+            return ['No command replayed.']
+        lines = ['%-16s %6s %6s %9s %9s %9s' % (
+            'command', 'sent', 'no rsp', 'p50 (ms)', 'p95 (ms)', 'max (ms)')]
+        for command in commands:
+            latencies = sorted(self.latencies[command])
+            count = len(latencies) + self.missing[command]
+            if latencies:
+                p50, p95, maximum = (
+                    latencies[int(round(0.50 * (len(latencies) - 1)))] * 1000,
+                    latencies[int(round(0.95 * (len(latencies) - 1)))] * 1000,
+                    latencies[-1] * 1000)
+                lines.append('%-16s %6d %6d %9.1f %9.1f %9.1f' % (
+                    command, count, self.missing[command], p50, p95, maximum))
+            else:
+                lines.append('%-16s %6d %6d %9s %9s %9s' % (
+                    command, count, self.missing[command], '-', '-', '-'))
+        if self.unmatched:
+            lines.append('%d messages not matched to a command' % (
+                self.unmatched))
+        return lines
+
+
+def parse_line(line):
+    """Get the source's nick, the command, and the arguments of ``line``."""
+    source = None
+    if line.startswith(':'):
+        source, _, line = line[1:].partition(' ')
+    head, separator, trailing = line.partition(' :')
+    args = head.split()
+    if separator:
+        args.append(trailing)
+    nick = source.split('!')[0] if source else None
+    return nick, args[0].upper() if args else '', args[1:]
+
+
+class Session(object):
+    """Replay the raw log to one bot."""
+    def __init__(self, conn, address, lines, options, record=None):
+        self.conn = conn
+        self.address = address
+        self.lines = lines
+        self.options = options
+        self.record = record
+        self.stats = LatencyStats(options.timeout)
+        self.registered = threading.Event()
+        self.closed = threading.Event()
+        self.received = 0
+        self._send_lock = threading.Lock()
+
+    def send(self, line):
+        with self._send_lock:
+            self.conn.sendall((line + '\r\n').encode('utf-8'))
+
+    def handle(self, line):
+        now = time.time()
+        self.received += 1
+        if self.record is not None:
+            self.record.append(corpus.RawLine(round(now, 3), '>>', line))
+        nick, command, args = parse_line(line)
+        if command == 'PING':
+            self.send('PONG %s :%s' % (
+                corpus.SERVER, args[-1] if args else corpus.SERVER))
+        elif command in ('NICK', 'USER'):
+            if command == 'USER':
+                self.registered.set()
+        elif command in ('PRIVMSG', 'NOTICE') and len(args) == 2:
+            self.stats.response_received(args[0], args[1], now)
+        elif command == 'QUIT':
+            self.closed.set()
+
+    def read_forever(self):
+        data = b''
+        while not self.closed.is_set():
+            try:
+                chunk = self.conn.recv(4096)
+            except (socket.error, ssl.SSLError):
+                break
+            if not chunk:
+                break
+            data += chunk
+            while b'\n' in data:
+                raw, data = data.split(b'\n', 1)
+                self.handle(raw.rstrip(b'\r').decode('utf-8', 'replace'))
+        self.closed.set()
+
+    def replay(self):
+        speed = self.options.speed
+        prefix = self.options.prefix
+        start = time.time()
+        first_time = next(
+            (raw_line.time for raw_line in self.lines
+             if raw_line.time is not None), None)
+
+        for raw_line in self.lines:
+            if self.closed.is_set():
+                return
+            if speed and raw_line.time is not None:
+                delay = (start + (raw_line.time - first_time) / speed -
+                         time.time())
+                if delay > 0 and self.closed.wait(delay):
+                    return
+
+            nick, command, args = parse_line(raw_line.line)
+            sent_at = time.time()
+            if (command == 'PRIVMSG' and len(args) == 2 and
+                    args[1].startswith(prefix)):
+                name = args[1][len(prefix):].split(' ', 1)[0]
+                target = args[0] if args[0][:1] in '#&+!' else nick
+                if name and target:
+                    self.stats.command_sent(target, name, nick, sent_at)
+            try:
+                self.send(raw_line.line)
+            except (socket.error, ssl.SSLError):
+                return
+
+    def run(self):
+        reader = threading.Thread(target=self.read_forever)
+        reader.daemon = True
+        reader.start()
+
+        if not self.registered.wait(self.options.timeout):
+            print('%s:%d did not register' % self.address[:2])
+            return
+        start = time.time()
+        self.replay()
+        replay_time = time.time() - start
+
+        # wait for the last responses
+        self.closed.wait(self.options.linger)
+        try:
+            self.send('ERROR :Closing Link: replay is over')
+        except (socket.error, ssl.SSLError):
+            pass
+        self.closed.set()
+        self.conn.close()
+        self.stats.finish()
+
+        print('%s:%d: %d lines replayed in %.3fs, %d lines received' % (
+            self.address[0], self.address[1], len(self.lines), replay_time,
+            self.received))
+        for line in self.stats.get_report():
+            print('  ' + line)
+
+
+def create_certificate(directory):
+    """Create a self-signed certificate for ``localhost`` with ``openssl``."""
+    certfile = os.path.join(directory, 'fakeserver.crt')
+    keyfile = os.path.join(directory, 'fakeserver.key')
+    subprocess.check_call([
+        'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+        '-days', '1', '-subj', '/CN=localhost',
+        '-keyout', keyfile, '-out', certfile,
+    ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    return certfile, keyfile
+
+
+def create_tls_context(certfile, keyfile):
+    protocol = getattr(ssl, 'PROTOCOL_TLS_SERVER', ssl.PROTOCOL_SSLv23)
+    context = ssl.SSLContext(protocol)
+    context.load_cert_chain(certfile, keyfile)
+    return context
+
+
+def serve(options, lines):
+    tls_context = None
+    tmpdir = None
+    if options.tls:
+        certfile, keyfile = options.certfile, options.keyfile
+        if not certfile:
+            tmpdir = tempfile.mkdtemp(prefix='sopel-fakeserver-')
+            certfile, keyfile = create_certificate(tmpdir)
+        tls_context = create_tls_context(certfile, keyfile)
+        print('TLS certificate: %s' % certfile)
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((options.host, options.port))
+    listener.listen(5)
+    print('Replaying %d lines on %s:%d%s' % (
+        len(lines), options.host, listener.getsockname()[1],
+        ' (TLS)' if tls_context else ''))
+
+    record = [] if options.record else None
+    sessions = []
+    try:
+        while options.connections == 0 or len(sessions) < options.connections:
+            conn, address = listener.accept()
+            if tls_context is not None:
+                try:
+                    conn = tls_context.wrap_socket(conn, server_side=True)
+                except (socket.error, ssl.SSLError) as error:
+                    print('TLS handshake failed: %s' % error)
+                    conn.close()
+                    continue
+            print('Bot connected from %s:%d' % address[:2])
+            session = Session(conn, address, lines, options, record)
+            thread = threading.Thread(target=session.run)
+            thread.start()
+            sessions.append(thread)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for thread in sessions:
+            thread.join()
+        listener.close()
+        if tmpdir is not None:
+            shutil.rmtree(tmpdir, ignore_errors=True)
+
+    if record is not None:
+        corpus.write_raw_log(record, options.record)
+        print('%d lines sent by the bot written to %s' % (
+            len(record), options.record))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    corpus.add_corpus_arguments(parser)
+    parser.add_argument('--raw-log',
+                        help='Raw log to replay instead of a synthetic corpus')
+    parser.add_argument('--host', default='127.0.0.1',
+                        help='Address to listen on (default: %(default)s)')
+    parser.add_argument('--port', type=int, default=6667,
+                        help='Port to listen on (default: %(default)s)')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Replay speed: 1 for the original pace, 10 for '
+                             'ten times faster, 0 for as fast as possible '
+                             '(default: %(default)s)')
+    parser.add_argument('--prefix', default='.',
+                        help='Prefix of the commands to measure '
+                             '(default: %(default)s)')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='How long to wait for a response (or for the '
+                             'bot to register), in seconds '
+                             '(default: %(default)s)')
+    parser.add_argument('--linger', type=float, default=5,
+                        help='How long to wait for the last responses '
+                             '(default: %(default)s)')
+    parser.add_argument('--connections', type=int, default=1,
+                        help='How many bots to serve before stopping, '
+                             '0 for no limit (default: %(default)s)')
+    parser.add_argument('--record',
+                        help='Write the lines sent by the bot to this raw log')
+    parser.add_argument('--tls', action='store_true',
+                        help='Encrypt the connections with TLS')
+    parser.add_argument('--certfile',
+                        help='TLS certificate (default: a self-signed one)')
+    parser.add_argument('--keyfile', help='TLS private key')
+    options = parser.parse_args(argv)
+
+    if options.raw_log:
+        lines = corpus.read_raw_log(options.raw_log, direction='<<')
+    else:
+        lines = corpus.generate_from_options(options)
+    serve(options, lines)
+
+
+if __name__ == '__main__':
+    main()
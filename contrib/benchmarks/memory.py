@@ -0,0 +1,123 @@
+# coding=utf-8
+"""Contention benchmark for ``bot.memory``
+
+Many threads (as many plugin callables running at the same time) read and
+write the same ``SopelMemory``: each thread mostly reads, and sometimes
+writes its own keys, or increments a shared counter. The same workload runs
+against a ``dict`` with one lock for every write, as ``SopelMemory`` used to
+be, to compare the two.
+
+Usage::
+
+    python contrib/benchmarks/memory.py --threads 32 --operations 20000
+
+"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from sopel.tools import SopelMemory  # noqa: E402
+
+
+class SingleLockMemory(dict):
+    """``SopelMemory`` as it was: one lock for every write, and ``in``."""
+    def __init__(self, *args):
+        dict.__init__(self, *args)
+        self.lock = threading.Lock()
+
+    def __setitem__(self, key, value):
+        with self.lock:
+            return dict.__setitem__(self, key, value)
+
+    def __contains__(self, key):
+        with self.lock:
+            return dict.__contains__(self, key)
+
+    def setdefault(self, key, default=None):
+        with self.lock:
+            return dict.setdefault(self, key, default)
+
+    def get_or_create(self, key, factory):
+        with self.lock:
+            if not dict.__contains__(self, key):
+                dict.__setitem__(self, key, factory())
+            return dict.__getitem__(self, key)
+
+    def compare_and_set(self, key, expected, value):
+        with self.lock:
+            if dict.get(self, key) != expected:
+                return False
+            dict.__setitem__(self, key, value)
+            return True
+
+
+def get_write_every(write_ratio):
+    return max(1, int(1 / write_ratio)) if write_ratio else 0
+
+
+def worker(memory, index, operations, write_ratio):
+    write_every = get_write_every(write_ratio)
+    own_key = 'plugin-%d' % index
+    for operation in range(operations):
+        if write_every and operation % write_every == 0:
+            memory[own_key] = operation
+            count = memory.setdefault('count', 0)
+            while not memory.compare_and_set('count', count, count + 1):
+                count = memory['count']
+        else:
+            memory.get_or_create('cache-%d' % (operation % 64), dict)
+            'seen' in memory
+            memory.get(own_key)
+
+
+def run(memory_class, threads, operations, write_ratio):
+    memory = memory_class()
+    workers = [
+        threading.Thread(
+            target=worker, args=(memory, index, operations, write_ratio))
+        for index in range(threads)
+    ]
+    start = time.time()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    duration = time.time() - start
+
+    write_every = get_write_every(write_ratio)
+    expected = 0
+    if write_every:
+        expected = threads * len(range(0, operations, write_every))
+    assert memory.get('count', 0) == expected, 'lost updates'
+    return duration
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--operations', type=int, default=10000,
+                        help='Operations per thread')
+    parser.add_argument('--write-ratio', type=float, default=0.1,
+                        help='Share of operations writing to the memory')
+    parser.add_argument('--repeat', type=int, default=3)
+    options = parser.parse_args(argv)
+
+    total = options.threads * options.operations
+    for name, memory_class in [('single lock', SingleLockMemory),
+                               ('SopelMemory', SopelMemory)]:
+        best = min(
+            run(memory_class, options.threads, options.operations,
+                options.write_ratio)
+            for _ in range(options.repeat))
+        print('%-12s %8.3fs  %10.0f ops/s' % (name, best, total / best))
+
+
+if __name__ == '__main__':
+    main()
@@ -10,9 +10,11 @@ from __future__ import unicode_literals, absolute_import, print_function, divisi
 
 from ast import literal_eval
 import collections
+import contextlib
 from datetime import datetime
 import itertools
 import logging
+import os
 import re
 import sys
 import threading
@@ -21,7 +23,11 @@ import time
 from sopel import irc, logger, plugins, tools
 from sopel.db import SopelDB
 from sopel.tools import Identifier, deprecated
+import sopel.tools.commands
+import sopel.tools.datasets
 import sopel.tools.jobs
+import sopel.tools.metrics
+import sopel.tools.profiling
 from sopel.trigger import Trigger
 from sopel.module import NOLIMIT
 import sopel.loader
@@ -55,9 +61,23 @@ class Sopel(irc.AbstractBot):
             'medium': collections.defaultdict(list),
             'low': collections.defaultdict(list)
         }
+        # the dispatch tables above are never modified in place: see
+        # the `_update_callables` method
+        self._echo_callables = self._index_echo_callables(self._callables)
+        self._callables_lock = threading.RLock()
+        self._callables_update = None
         self._plugins = {}
+        self._logging_channel_handler = None
 
-        self.doc = {}
+        self.command_index = sopel.tools.commands.CommandIndex()
+        """Index of the commands and their documentation, for help.
+
+        See :class:`sopel.tools.commands.CommandIndex`.
+
+        .. versionadded:: 7.0
+        """
+
+        self.doc = self.command_index.docs
         """A dictionary of command names to their documentation.
 
         Each command is mapped to its docstring and any available examples, if
@@ -66,9 +86,13 @@ class Sopel(irc.AbstractBot):
         .. versionchanged:: 3.2
             Use the first item in each callable's commands list as the key,
             instead of the function name as declared in the source code.
+
+        .. versionchanged:: 7.0
+            The documentation of a plugin's commands is removed when the
+            plugin is unloaded.
         """
 
-        self._command_groups = collections.defaultdict(list)
+        self._command_groups = self.command_index.groups
         """A mapping of plugin names to a list of commands in it."""
 
         self._times = {}
@@ -128,9 +152,55 @@ class Sopel(irc.AbstractBot):
         self.shutdown_methods = []
         """List of methods to call on shutdown."""
 
-        self.scheduler = sopel.tools.jobs.JobScheduler(self)
+        self.scheduler = sopel.tools.jobs.JobScheduler(
+            self, metrics=self.metrics)
         """Job Scheduler. See :func:`sopel.module.interval`."""
 
+        self.datasets = sopel.tools.datasets.DatasetManager()
+        """Dataset Manager, for files downloaded by plugins.
+
+        See :class:`sopel.tools.datasets.DatasetManager`.
+        """
+
+        self.startup_profile = sopel.tools.profiling.StartupProfile()
+        """Timings of the bot's startup phases and of each plugin's startup.
+
+        See :class:`sopel.tools.profiling.StartupProfile`.
+        """
+
+        self.callable_timings = sopel.tools.profiling.CallableTimings()
+        """Execution times of the plugins' callables.
+
+        See :class:`sopel.tools.profiling.CallableTimings`.
+
+        .. versionadded:: 7.0
+        """
+
+        self.sampling_profiler = sopel.tools.profiling.SamplingProfiler(
+            self.settings.core.sampling_profiler_interval)
+        """Sampling profiler, off until the bot's owner starts it.
+
+        See :meth:`start_sampling_profiler` and
+        :class:`sopel.tools.profiling.SamplingProfiler`.
+
+        .. versionadded:: 7.0
+        """
+
+        self._metric_call = self.metrics.histogram(
+            'sopel_callable_seconds',
+            'Time spent running plugin callables.', ['callable'])
+        self._metric_rate_limited = self.metrics.counter(
+            'sopel_rate_limited_total',
+            'Calls prevented by a rate limit.', ['callable', 'limit'])
+        self.metrics.gauge(
+            'sopel_trigger_threads',
+            'Threads running triggered callables.',
+        ).set_function(lambda: len(self.running_triggers))
+        self.metrics.gauge(
+            'sopel_threads', 'Threads alive in the process.',
+        ).set_function(threading.active_count)
+        self._metrics_server = None
+
         # Set up block lists
         # Default to empty
         if not self.settings.core.nick_blocks:
@@ -140,8 +210,13 @@ class Sopel(irc.AbstractBot):
 
     @property
     def command_groups(self):
-        """A mapping of plugin names to a list of commands in it."""
-        # This was supposed to be deprecated, but the help command uses this
+        """A mapping of plugin names to a list of commands in it.
+
+        .. seealso::
+
+            The :attr:`command_index`, used by the help command.
+
+        """
         return self._command_groups
 
     @property
@@ -158,20 +233,170 @@ class Sopel(irc.AbstractBot):
 
         return self.users.get(self.nick).hostmask
 
-    def setup(self):
+    def setup(self, with_logging=True):
         """Set up Sopel bot before it can run
 
+        :param bool with_logging: whether to setup logging (default to
+                                  ``True``)
+
         The setup phase manages to:
 
         * setup logging (configure Python's built-in :mod:`logging`),
+        * serve and/or write the bot's metrics, if enabled
+        * check the database, in the background
         * setup the bot's plugins (load, setup, and register)
+        * watch the plugins' source files, if enabled
         * start the job scheduler
 
+        .. versionchanged:: 7.0
+
+            The ``with_logging`` parameter: logging is global to the process,
+            so when several bots run in the same process (see
+            :class:`sopel.supervisor.Supervisor`), only one of them sets it up.
         """
-        self.setup_logging()
-        self.setup_plugins()
+        profile = self.startup_profile
+        if with_logging:
+            with profile.phase('logging setup'):
+                self.setup_logging()
+        if self.settings.core.metrics:
+            self.setup_metrics()
+        self.setup_database_check()
+        with profile.phase('plugins'):
+            self.setup_plugins()
+        if self.settings.core.watch_plugins:
+            with profile.phase('plugins watcher'):
+                self.setup_plugins_watcher()
         self.scheduler.start()
 
+    def start_sampling_profiler(self):
+        """Start the :attr:`sampling_profiler`.
+
+        :raise RuntimeError: when the profiler is already running
+
+        .. versionadded:: 7.0
+        """
+        self.sampling_profiler.start()
+        LOGGER.info(
+            'Sampling profiler started (interval: %.3fs).',
+            self.sampling_profiler.interval)
+
+    def stop_sampling_profiler(self):
+        """Stop the :attr:`sampling_profiler`, and write its samples.
+
+        :return: the file where the samples are written, as collapsed stacks
+        :rtype: str
+        :raise RuntimeError: when the profiler is not running
+
+        The file is in the :attr:`~sopel.config.core_section.CoreSection.logdir`
+        directory, and its name is made of the configuration's basename and
+        the time the profiler was started.
+
+        .. versionadded:: 7.0
+        """
+        if not self.sampling_profiler.is_running:
+            raise RuntimeError('The profiler is not running.')
+        self.sampling_profiler.stop()
+        filename = os.path.join(
+            self.settings.core.logdir,
+            '%s.%s.collapsed' % (
+                self.settings.basename,
+                time.strftime(
+                    '%Y%m%d-%H%M%S',
+                    time.localtime(self.sampling_profiler.started))))
+        self.sampling_profiler.write(filename)
+        LOGGER.info(
+            'Sampling profiler stopped: %d samples written to %s',
+            self.sampling_profiler.sample_count, filename)
+        return filename
+
+    def setup_metrics(self):
+        """Serve and/or write the bot's metrics.
+
+        The bot records the time taken by its database queries, and serves
+        its :attr:`metrics` on
+        :attr:`~sopel.config.core_section.CoreSection.metrics_port` (if set),
+        and writes them to
+        :attr:`~sopel.config.core_section.CoreSection.metrics_file` (if set)
+        every :attr:`~sopel.config.core_section.CoreSection.metrics_file_interval`
+        seconds, with a job of the bot's scheduler.
+
+        .. versionadded:: 7.0
+        """
+        core = self.settings.core
+        self.db.record_metrics(self.metrics)
+
+        if core.metrics_port:
+            try:
+                server = sopel.tools.metrics.MetricsServer(
+                    self.metrics, core.metrics_host, core.metrics_port)
+            except (IOError, OSError) as error:
+                LOGGER.error('Unable to serve metrics: %s', error)
+            else:
+                server.start()
+                self._metrics_server = server
+                LOGGER.info(
+                    'Serving metrics on http://%s:%d/metrics', *server.address)
+
+        if core.metrics_file:
+            filename = core.metrics_file
+            interval = max(1, core.metrics_file_interval)
+
+            @sopel.module.thread(False)
+            def write_metrics(bot):
+                try:
+                    self.metrics.write(filename)
+                except (IOError, OSError) as error:
+                    LOGGER.error('Unable to write metrics: %s', error)
+
+            self.scheduler.add_job(
+                sopel.tools.jobs.Job(interval, write_metrics))
+            LOGGER.info(
+                'Writing metrics to %s every %ds', filename, interval)
+
+    def setup_database_check(self):
+        """Initialize and check the database in a background thread.
+
+        The database is initialized (see
+        :meth:`sopel.db.SopelDB.initialize`) and its latency is logged, or an
+        error if it can't be reached, without delaying the connection to the
+        IRC server.
+
+        .. versionadded:: 7.0
+        """
+        thread = threading.Thread(
+            target=self._check_database, name='sopel-db-check')
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def _check_database(self):
+        try:
+            latency = self.db.get_latency()
+        except Exception as error:
+            LOGGER.error('Database unavailable: %s', error)
+        else:
+            LOGGER.info('Database ready (latency: %.1fms)', latency * 1000)
+
+    def setup_plugins_watcher(self):
+        """Reload plugins when their source files change.
+
+        The plugins' source files are checked every
+        :attr:`~sopel.config.core_section.CoreSection.watch_plugins_interval`
+        seconds by a job of the bot's scheduler.
+
+        .. seealso::
+
+            The :class:`sopel.plugins.watcher.PluginWatcher` class.
+
+        .. versionadded:: 7.0
+        """
+        watcher = plugins.watcher.PluginWatcher()
+        # reference sources: plugins as they have just been loaded
+        watcher.get_changed_plugins(self)
+        interval = max(1, self.settings.core.watch_plugins_interval)
+        self.scheduler.add_job(sopel.tools.jobs.Job(interval, watcher.check))
+        LOGGER.info('Watching plugins for changes every %ds', interval)
+
     def setup_logging(self):
         logger.setup_logging(self.settings)
         base_level = self.settings.core.logging_level or 'INFO'
@@ -189,35 +414,109 @@ class Sopel(irc.AbstractBot):
             if channel_datefmt:
                 channel_params['datefmt'] = channel_datefmt
             formatter = logger.ChannelOutputFormatter(**channel_params)
-            handler = logger.IrcLoggingHandler(self, channel_level)
+            handler = logger.IrcLoggingHandler(
+                self, channel_level,
+                interval=max(1, self.settings.core.logging_channel_interval),
+                max_lines=max(1, self.settings.core.logging_channel_lines))
             handler.setFormatter(formatter)
 
             # set channel handler to `sopel` logger
             LOGGER = logging.getLogger('sopel')
             LOGGER.addHandler(handler)
+            self._logging_channel_handler = handler
+
+    def setup_plugins(self, save_manifest=True):
+        """Load, set up, and register the enabled plugins.
+
+        :param bool save_manifest: save the plugin manifest, when plugins are
+                                   loaded lazily (the default)
 
-    def setup_plugins(self):
+        .. versionchanged:: 7.0
+            The ``save_manifest`` parameter was added.
+        """
         load_success = 0
         load_error = 0
         load_disabled = 0
 
         LOGGER.info('Loading plugins...')
-        usable_plugins = plugins.get_usable_plugins(self.settings)
+        started = time.time()
+        lazy = self.settings.core.lazy_plugins
+        manifest = None
+        if lazy:
+            # the manifest is only useful (and written) to load lazily
+            manifest = plugins.manifest.PluginManifest.from_settings(
+                self.settings)
+            manifest.load()
+        usable_plugins = plugins.get_usable_plugins(self.settings, manifest)
+
+        # coretasks must handle the connection as soon as it starts
+        lazy_excluded = set(self.settings.core.lazy_plugins_exclude)
+        lazy_excluded.add('coretasks')
+
+        loaded = collections.OrderedDict()
+        load_times = {}
         for name, info in usable_plugins.items():
             plugin, is_enabled = info
             if not is_enabled:
                 load_disabled = load_disabled + 1
                 continue
 
+            metadata = None
+            if manifest is not None:
+                metadata = manifest.get(plugin)
+            if (name not in lazy_excluded and metadata is not None and
+                    not metadata.get('dependencies')):
+                plugin = plugins.handlers.LazyPlugin(plugin, metadata)
+
+            start = time.time()
             try:
                 plugin.load()
             except Exception as e:
                 load_error = load_error + 1
                 LOGGER.exception('Error loading %s: %s', name, e)
             else:
+                loaded[name] = (plugin, metadata)
+            load_times[name] = time.time() - start
+
+        # a lazy plugin's setup is deferred: the plugins that others depend
+        # on must be loaded now, to be set up before their dependents
+        required = set()
+        for plugin, metadata in loaded.values():
+            required.update(plugin.get_dependencies())
+        for name in [name for name in loaded if name in required]:
+            plugin, metadata = loaded[name]
+            if not isinstance(plugin, plugins.handlers.LazyPlugin):
+                continue
+
+            plugin = plugin.plugin
+            start = time.time()
+            try:
+                plugin.load()
+            except Exception as e:
+                load_error = load_error + 1
+                LOGGER.exception('Error loading %s: %s', name, e)
+                del loaded[name]
+            else:
+                loaded[name] = (plugin, metadata)
+            load_times[name] = load_times[name] + time.time() - start
+
+        # run setups, in parallel when plugins allow it
+        runner = plugins.startup.SetupRunner(
+            self, self.settings.core.plugins_setup_workers)
+        setup_results = runner.run(collections.OrderedDict(
+            (name, plugin)
+            for name, (plugin, metadata) in loaded.items()))
+
+        # register plugins in the main thread, in the loading order
+        with self._update_callables():
+            for name, (plugin, metadata) in loaded.items():
+                result = setup_results.get(name)
+                if result is not None and result.error is not None:
+                    # the error is already logged by the setup runner
+                    load_error = load_error + 1
+                    continue
+
                 try:
-                    if plugin.has_setup():
-                        plugin.setup(self)
                     plugin.register(self)
                 except Exception as e:
                     load_error = load_error + 1
@@ -226,6 +525,18 @@ class Sopel(irc.AbstractBot):
                     load_success = load_success + 1
                     LOGGER.info('Plugin loaded: %s', name)
 
+                    if manifest is not None and metadata is None:
+                        # store metadata for the next start
+                        try:
+                            manifest.set(
+                                plugin, plugin.get_metadata(self.settings))
+                        except Exception as e:
+                            LOGGER.debug(
+                                'Unable to get metadata of %s: %s', name, e)
+
+        if manifest is not None and save_manifest:
+            manifest.save()
+
         total = sum([load_success, load_error, load_disabled])
         if total and load_success:
             LOGGER.info(
@@ -236,6 +547,22 @@ class Sopel(irc.AbstractBot):
         else:
             LOGGER.warning("Warning: Couldn't load any plugins")
 
+        self._log_startup_times(
+            load_times, setup_results, time.time() - started)
+
+    def _log_startup_times(self, load_times, setup_results, elapsed):
+        for name, load_time in load_times.items():
+            result = setup_results.get(name)
+            setup_time = result.duration if result is not None else 0
+            self.startup_profile.add_plugin(name, load_time, setup_time)
+
+        timings = self.startup_profile.get_plugin_times()
+        for total, name, load_time, setup_time in timings:
+            LOGGER.info(
+                'Plugin %s started in %.3fs (load: %.3fs, setup: %.3fs)',
+                name, total, load_time, setup_time)
+        LOGGER.info('Plugins started in %.3fs', elapsed)
+
     def reload_plugin(self, name):
         """Reload a plugin
 
@@ -249,14 +576,16 @@ class Sopel(irc.AbstractBot):
             raise plugins.exceptions.PluginNotRegistered(name)
 
         plugin = self._plugins[name]
-        # tear down
-        plugin.shutdown(self)
-        plugin.unregister(self)
-        LOGGER.info('Unloaded plugin %s', name)
-        # reload & setup
-        plugin.reload()
-        plugin.setup(self)
-        plugin.register(self)
+        # dispatch sees either the old or the new callables, never a mix
+        with self._update_callables():
+            # tear down
+            plugin.shutdown(self)
+            plugin.unregister(self)
+            LOGGER.info('Unloaded plugin %s', name)
+            # reload & setup
+            plugin.reload()
+            plugin.setup(self)
+            plugin.register(self)
         LOGGER.info('Reloaded plugin %s', name)
 
     def reload_plugins(self):
@@ -267,18 +596,19 @@ class Sopel(irc.AbstractBot):
         again.
         """
         registered = list(self._plugins.items())
-        # tear down all plugins
-        for name, plugin in registered:
-            plugin.shutdown(self)
-            plugin.unregister(self)
-            LOGGER.info('Unloaded plugin %s', name)
-
-        # reload & setup all plugins
-        for name, plugin in registered:
-            plugin.reload()
-            plugin.setup(self)
-            plugin.register(self)
-            LOGGER.info('Reloaded plugin %s', name)
+        with self._update_callables():
+            # tear down all plugins
+            for name, plugin in registered:
+                plugin.shutdown(self)
+                plugin.unregister(self)
+                LOGGER.info('Unloaded plugin %s', name)
+
+            # reload & setup all plugins
+            for name, plugin in registered:
+                plugin.reload()
+                plugin.setup(self)
+                plugin.register(self)
+                LOGGER.info('Reloaded plugin %s', name)
 
     def add_plugin(self, plugin, callables, jobs, shutdowns, urls):
         """Add a loaded plugin to the bot's registry"""
@@ -292,8 +622,9 @@ class Sopel(irc.AbstractBot):
             raise plugins.exceptions.PluginNotRegistered(name)
 
         # remove commands, jobs, and shutdown functions
-        for func in itertools.chain(callables, jobs, shutdowns):
-            self.unregister(func)
+        with self._update_callables():
+            for func in itertools.chain(callables, jobs, shutdowns):
+                self.unregister(func)
 
         # remove URL callback handlers
         if "url_callbacks" in self.memory:
@@ -311,26 +642,90 @@ class Sopel(irc.AbstractBot):
         """Tell if the bot has registered this plugin by its name"""
         return name in self._plugins
 
+    @contextlib.contextmanager
+    def _update_callables(self):
+        # Changes are made to a copy of the dispatch tables, which replaces
+        # them once all changes are done (i.e. when the outermost update
+        # ends), so a dispatch never sees a partially (un)registered plugin.
+        with self._callables_lock:
+            if self._callables_update is not None:
+                # nested update: changes go to the same copy
+                yield self._callables_update
+                return
+
+            update = dict(
+                (priority, collections.defaultdict(list, (
+                    (regex, list(funcs))
+                    for regex, funcs in table.items())))
+                for priority, table in self._callables.items())
+            self._callables_update = update
+            try:
+                yield update
+                # only reached without error: otherwise, the changes (e.g.
+                # a partially registered plugin) are discarded
+                self._callables = update
+                self._echo_callables = self._index_echo_callables(update)
+            finally:
+                self._callables_update = None
+
+    @staticmethod
+    def _index_echo_callables(callables):
+        # the subset of the dispatch tables with only the callables that
+        # handle echo-messages: the only ones the bot's messages can trigger
+        index = {}
+        for priority, table in callables.items():
+            index[priority] = collections.defaultdict(list)
+            for regex, funcs in table.items():
+                echo_funcs = [
+                    func for func in funcs if getattr(func, 'echo', False)]
+                if echo_funcs:
+                    index[priority][regex] = echo_funcs
+        return index
+
+    def has_echo_callables(self):
+        """Tell if any callable handles echo-messages.
+
+        :return: ``True`` if at least one registered callable is decorated
+                 with :func:`sopel.module.echo`
+        :rtype: bool
+
+        .. versionadded:: 7.0
+        """
+        return any(self._echo_callables.values())
+
     def unregister(self, obj):
         """Unregister a callable.
 
         :param obj: the callable to unregister
         :type obj: :term:`object`
+
+        .. versionchanged:: 7.0
+
+            The dispatch tables are updated with a copy-on-write: callables
+            being dispatched are not affected. The callable's commands are
+            removed from the :attr:`command_index`.
         """
         if not callable(obj):
             LOGGER.warning('Cannot unregister obj %r: not a callable', obj)
             return
         callable_name = getattr(obj, "__name__", 'UNKNOWN')
 
-        if hasattr(obj, 'rule'):  # commands and intents have it added
-            for rule in obj.rule:
-                callb_list = self._callables[obj.priority][rule]
-                if obj in callb_list:
-                    callb_list.remove(obj)
-            LOGGER.debug(
-                'Rule callable "%s" unregistered for "%s"',
-                callable_name,
-                rule.pattern)
+        priority = getattr(obj, 'priority', None)
+        if priority in self._callables:
+            # callables without rules are registered with a "match any" rule
+            rules = getattr(obj, 'rule', None) or [re.compile('.*')]
+            with self._update_callables() as all_callables:
+                table = all_callables[priority]
+                for rule in rules:
+                    callb_list = table.get(rule)
+                    if callb_list and obj in callb_list:
+                        callb_list.remove(obj)
+                        if not callb_list:
+                            del table[rule]
+                        LOGGER.debug(
+                            'Rule callable "%s" unregistered for "%s"',
+                            callable_name,
+                            rule.pattern)
 
         if hasattr(obj, 'interval'):
             self.scheduler.remove_callable_job(obj)
@@ -339,6 +734,8 @@ class Sopel(irc.AbstractBot):
         if callable_name == "shutdown" and obj in self.shutdown_methods:
             self.shutdown_methods.remove(obj)
 
+        self.command_index.remove(obj)
+
     def register(self, callables, jobs, shutdowns, urls):
         """Register rules, jobs, shutdown methods, and URL callbacks.
 
@@ -364,10 +761,39 @@ class Sopel(irc.AbstractBot):
         commands configured. It should not be possible to have a callable with
         commands or nick commands but without rules. Callables without rules
         are usually event handlers.
+
+        .. versionchanged:: 7.0
+
+            The dispatch tables are updated with a copy-on-write: callables
+            being dispatched are not affected, and the new callables are
+            all dispatched at once.
         """
         # Append plugin's shutdown function to the bot's list of functions to
         # call on shutdown
         self.shutdown_methods += shutdowns
+        with self._update_callables() as all_callables:
+            self._register_callables(all_callables, callables)
+
+        for func in jobs:
+            for interval in func.interval:
+                job = sopel.tools.jobs.Job(interval, func)
+                self.scheduler.add_job(job)
+                callable_name = getattr(func, "__name__", 'UNKNOWN')
+                LOGGER.debug(
+                    'Job added "%s", will run every %d seconds',
+                    callable_name,
+                    interval)
+
+        for func in urls:
+            for regex in func.url_regex:
+                self.register_url_callback(regex, func)
+                callable_name = getattr(func, "__name__", 'UNKNOWN')
+                LOGGER.debug(
+                    'URL Callback added "%s" for URL pattern "%s"',
+                    callable_name,
+                    regex)
+
+    def _register_callables(self, all_callables, callables):
         match_any = re.compile('.*')
         for callbl in callables:
             callable_name = getattr(callbl, "__name__", 'UNKNOWN')
@@ -380,7 +806,7 @@ class Sopel(irc.AbstractBot):
 
             if rules:
                 for rule in rules:
-                    self._callables[callbl.priority][rule].append(callbl)
+                    all_callables[callbl.priority][rule].append(callbl)
                     if is_rule_only:
                         # Command & Nick Command are logged later:
                         # here we log rule only callable
@@ -409,7 +835,7 @@ class Sopel(irc.AbstractBot):
                         callable_name,
                         '|'.join(events))
             else:
-                self._callables[callbl.priority][match_any].append(callbl)
+                all_callables[callbl.priority][match_any].append(callbl)
                 if events:
                     LOGGER.debug(
                         'Event callable "%s" registered '
@@ -421,34 +847,7 @@ class Sopel(irc.AbstractBot):
                         'Rule callable "%s" registered with "match any" rule',
                         callable_name)
 
-            if commands:
-                plugin_name = callbl.__module__.rsplit('.', 1)[-1]
-                # TODO doc and make decorator for this. Not sure if this is how
-                # it should work yet, so not making it public for 6.0.
-                category = getattr(callbl, 'category', plugin_name)
-                self._command_groups[category].append(commands[0])
-
-            for command, docs in callbl._docs.items():
-                self.doc[command] = docs
-
-        for func in jobs:
-            for interval in func.interval:
-                job = sopel.tools.jobs.Job(interval, func)
-                self.scheduler.add_job(job)
-                callable_name = getattr(func, "__name__", 'UNKNOWN')
-                LOGGER.debug(
-                    'Job added "%s", will run every %d seconds',
-                    callable_name,
-                    interval)
-
-        for func in urls:
-            for regex in func.url_regex:
-                self.register_url_callback(regex, func)
-                callable_name = getattr(func, "__name__", 'UNKNOWN')
-                LOGGER.debug(
-                    'URL Callback added "%s" for URL pattern "%s"',
-                    callable_name,
-                    regex)
+            self.command_index.add(callbl)
 
     @deprecated
     def msg(self, recipient, text, max_messages=1):
@@ -467,6 +866,12 @@ class Sopel(irc.AbstractBot):
         :type sopel: :class:`SopelWrapper`
         :param Trigger trigger: the Trigger object for the line from the server
                                 that triggered this call
+
+        .. versionchanged:: 7.0
+
+            The time taken by ``func`` is recorded in
+            :attr:`callable_timings`, and a warning is logged when it exceeds
+            :attr:`~sopel.config.core_section.CoreSection.slow_callable_threshold`.
         """
         nick = trigger.nick
         current_time = time.time()
@@ -481,6 +886,9 @@ class Sopel(irc.AbstractBot):
             if func in self._times[nick]:
                 usertimediff = current_time - self._times[nick][func]
                 if func.rate > 0 and usertimediff < func.rate:
+                    self._metric_rate_limited.labels(
+                        '%s.%s' % (func.__module__, func.__name__),
+                        'user').inc()
                     LOGGER.info(
                         "%s prevented from using %s in %s due to user limit: %d < %d",
                         trigger.nick, func.__name__, trigger.sender, usertimediff,
@@ -490,6 +898,9 @@ class Sopel(irc.AbstractBot):
             if func in self._times[self.nick]:
                 globaltimediff = current_time - self._times[self.nick][func]
                 if func.global_rate > 0 and globaltimediff < func.global_rate:
+                    self._metric_rate_limited.labels(
+                        '%s.%s' % (func.__module__, func.__name__),
+                        'global').inc()
                     LOGGER.info(
                         "%s prevented from using %s in %s due to global limit: %d < %d",
                         trigger.nick, func.__name__, trigger.sender, globaltimediff,
@@ -500,6 +911,9 @@ class Sopel(irc.AbstractBot):
             if not trigger.is_privmsg and func in self._times[trigger.sender]:
                 chantimediff = current_time - self._times[trigger.sender][func]
                 if func.channel_rate > 0 and chantimediff < func.channel_rate:
+                    self._metric_rate_limited.labels(
+                        '%s.%s' % (func.__module__, func.__name__),
+                        'channel').inc()
                     LOGGER.info(
                         "%s prevented from using %s in %s due to channel limit: %d < %d",
                         trigger.nick, func.__name__, trigger.sender, chantimediff,
@@ -529,11 +943,28 @@ class Sopel(irc.AbstractBot):
                     if func.__name__ in disabled_commands[func.__module__]:
                         return
 
+        start = time.time()
         try:
             exit_code = func(sopel, trigger)
         except Exception as error:  # TODO: Be specific
             exit_code = None
             self.error(trigger, exception=error)
+        duration = time.time() - start
+
+        function_name = '%s.%s' % (func.__module__, func.__name__)
+        self.callable_timings.add(function_name, duration)
+        if self.metrics.enabled:
+            self._metric_call.labels(function_name).observe(duration)
+
+        threshold = self.settings.core.slow_callable_threshold
+        if threshold and duration >= threshold:
+            LOGGER.warning(
+                'Slow callable %s (plugin %s, %s) took %.3fs%s',
+                function_name,
+                func.__module__,
+                self._describe_match(func, trigger),
+                duration,
+                '' if func.thread else ', blocking the bot')
 
         if exit_code != NOLIMIT:
             self._times[nick][func] = current_time
@@ -541,6 +972,24 @@ class Sopel(irc.AbstractBot):
             if not trigger.is_privmsg:
                 self._times[trigger.sender][func] = current_time
 
+    @staticmethod
+    def _describe_match(func, trigger, max_length=60):
+        # what triggered ``func``, readable in one line of log: the command,
+        # or the rule's pattern (which can be a long verbose regex)
+        commands = set()
+        for attribute in ('commands', 'nickname_commands', 'action_commands'):
+            commands.update(getattr(func, attribute, []))
+        # with a command's regex, the first group is the command's name
+        if commands and trigger.match.re.groups:
+            name = trigger.group(1)
+            if name is not None and name.lower() in commands:
+                return 'command %r' % name
+
+        pattern = ' '.join(trigger.match.re.pattern.split())
+        if len(pattern) > max_length:
+            pattern = pattern[:max_length - 3] + '...'
+        return 'rule %r' % pattern
+
     def get_triggered_callables(self, priority, pretrigger, blocked):
         """Get triggered callables by priority.
 
@@ -584,11 +1033,13 @@ class Sopel(irc.AbstractBot):
         user_obj = self.users.get(nick)
         account = user_obj.account if user_obj else None
 
-        # get a copy of the list of (regex, function) to prevent race-condition
-        # e.g. when a callable wants to remove callable (other or itself)
-        # from the bot, Python won't (and must not) allow to modify a dict
-        # while it iterates over this very same dict.
-        items = list(self._callables[priority].items())
+        # no need to copy the dispatch table: (un)registering callables (even
+        # a callable removing itself) replaces it instead of modifying it
+        if is_echo_message:
+            # only these callables can be triggered by the bot's messages
+            items = self._echo_callables[priority].items()
+        else:
+            items = self._callables[priority].items()
 
         for regexp, funcs in items:
             match = regexp.match(text)
@@ -787,19 +1238,40 @@ class Sopel(irc.AbstractBot):
         return False
 
     def _shutdown(self):
+        # Stop dispatching echo-messages
+        self._stop_echo_thread()
+
+        # Stop serving metrics
+        if self._metrics_server is not None:
+            self._metrics_server.stop()
+            self._metrics_server = None
+        self.db.stop_recording_metrics()
+
+        # Stop sampling, and keep what was sampled
+        if self.sampling_profiler.is_running:
+            try:
+                self.stop_sampling_profiler()
+            except (IOError, OSError) as error:
+                LOGGER.error('Unable to write the profiler samples: %s', error)
+
         # Stop Job Scheduler
         LOGGER.info('Stopping the Job Scheduler.')
         self.scheduler.stop()
 
-        try:
-            self.scheduler.join(timeout=15)
-        except RuntimeError:
-            LOGGER.exception('Unable to stop the Job Scheduler.')
-        else:
-            LOGGER.info('Job Scheduler stopped.')
+        if self.scheduler.is_alive():
+            try:
+                self.scheduler.join(timeout=15)
+            except RuntimeError:
+                LOGGER.exception('Unable to stop the Job Scheduler.')
+            else:
+                LOGGER.info('Job Scheduler stopped.')
 
         self.scheduler.clear_jobs()
 
+        # Stop downloading datasets
+        LOGGER.info('Stopping the Dataset Manager.')
+        self.datasets.stop()
+
         # Shutdown plugins
         LOGGER.info(
             'Calling shutdown for %d plugins.', len(self.shutdown_methods))
@@ -842,8 +1314,11 @@ class Sopel(irc.AbstractBot):
                 bot.register_url_callback(regex, callback)
 
         """
-        if 'url_callbacks' not in self.memory:
-            self.memory['url_callbacks'] = tools.SopelMemory()
+        url_callbacks = self.memory.get('url_callbacks')
+        if not isinstance(url_callbacks, tools.SopelURLCallbacks):
+            # also upgrade any SopelMemory created manually by a plugin
+            self.memory['url_callbacks'] = tools.SopelURLCallbacks(
+                url_callbacks or {})
 
         if isinstance(pattern, basestring):
             pattern = re.compile(pattern)
@@ -908,16 +1383,41 @@ class Sopel(irc.AbstractBot):
         .. __: https://docs.python.org/3.6/library/re.html#re.search
         .. __: https://docs.python.org/3.6/library/re.html#match-objects
 
+        .. note::
+
+            Callbacks are indexed by the hostname their pattern requires (see
+            :class:`sopel.tools.SopelURLCallbacks`), so the ``url`` is only
+            tested against patterns that could match it.
+
         """
         if 'url_callbacks' not in self.memory:
             # nothing to search
             return
 
-        for regex, function in tools.iteritems(self.memory['url_callbacks']):
+        url_callbacks = self.memory['url_callbacks']
+        if isinstance(url_callbacks, tools.SopelURLCallbacks):
+            for function, match in url_callbacks.search(url):
+                yield function, match
+            return
+
+        # URL callbacks managed manually by a plugin: no index available
+        for regex, function in tools.iteritems(url_callbacks):
             match = regex.search(url)
             if match:
                 yield function, match
 
+    def quit(self, message):
+        """Disconnect from IRC and close the bot.
+
+        .. versionchanged:: 7.0
+
+            The log messages waiting to be sent to the logging channel are
+            sent first (for a few seconds at most).
+        """
+        if self._logging_channel_handler is not None:
+            self._logging_channel_handler.flush()
+        super(Sopel, self).quit(message)
+
     def restart(self, message):
         """Disconnect from IRC and restart the bot."""
         self.wantsrestart = True
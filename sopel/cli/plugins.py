@@ -6,7 +6,8 @@ import argparse
 import inspect
 import operator
 
-from sopel import plugins, tools
+from sopel import bot, plugins, tools
+from sopel.tools import profiling
 
 from . import utils
 
@@ -55,6 +56,12 @@ def build_parser():
             from ``sopel.plugins`` entry points, or Sopel's plugin directories.
 
             Enabled plugins are displayed in green; disabled, in red.
+
+            When plugins are loaded lazily (``core.lazy_plugins``), they are
+            described from the plugin manifest when their source hasn't
+            changed since the bot last loaded them, without importing them:
+            their status is marked as "unverified". Use ``--load`` to import
+            every plugin and check it loads.
         """))
     utils.add_common_arguments(list_parser)
     list_parser.add_argument(
@@ -76,6 +83,12 @@ def build_parser():
         dest='disabled_only',
         action='store_true',
         default=False)
+    list_parser.add_argument(
+        '-L', '--load',
+        help='Import every plugin instead of using the plugin manifest',
+        dest='load',
+        action='store_true',
+        default=False)
     list_parser.add_argument(
         '-n', '--name-only',
         help='Display only plugin names',
@@ -146,9 +159,41 @@ def build_parser():
             It makes sure the plugin is added to the ``core.enable`` list.
         """))
 
+    # sopel-plugins profile
+    profile_parser = subparsers.add_parser(
+        'profile',
+        formatter_class=argparse.RawTextHelpFormatter,
+        help="Measure how long plugins take to start",
+        description=inspect.cleandoc("""
+            Import and set up the enabled plugins, like Sopel does when it
+            starts (without connecting to IRC), and report how long each
+            plugin took, the slowest first.
+        """))
+    utils.add_common_arguments(profile_parser)
+    profile_parser.add_argument(
+        '-o', '--output',
+        dest='output',
+        metavar='FILENAME',
+        help='Write a cProfile of the plugins\' startup to this file.')
+    profile_parser.add_argument(
+        '-l', '--limit',
+        dest='limit',
+        type=int,
+        default=None,
+        help='Report only the N slowest plugins.')
+
     return parser
 
 
+def _load_manifest(settings):
+    # read-only: the manifest is updated by the bot, not by this command
+    if not settings.core.lazy_plugins:
+        return None  # the bot doesn't use the manifest
+    manifest = plugins.manifest.PluginManifest.from_settings(settings)
+    manifest.load()
+    return manifest
+
+
 def handle_list(options):
     """List Sopel plugins"""
     settings = utils.load_settings(options)
@@ -156,11 +201,13 @@ def handle_list(options):
     name_only = options.name_only
     enabled_only = options.enabled_only
     disabled_only = options.disabled_only
+    manifest = _load_manifest(settings)
 
     # get usable plugins
     items = (
         (name, info[0], info[1])
-        for name, info in plugins.get_usable_plugins(settings).items()
+        for name, info in plugins.get_usable_plugins(
+            settings, manifest).items()
     )
     items = (
         (name, plugin, is_enabled)
@@ -190,7 +237,16 @@ def handle_list(options):
 
         # optional meta description from the plugin itself
         try:
-            plugin.load()
+            metadata = None
+            if manifest is not None and not options.load:
+                metadata = manifest.get(plugin)
+            if metadata is not None:
+                # no need to import the plugin to describe it, but it may
+                # not load anymore (e.g. if a dependency has been removed)
+                plugin = plugins.handlers.LazyPlugin(plugin, metadata)
+                description['status'] += ', unverified'
+            else:
+                plugin.load()
             description.update(plugin.get_meta_description())
 
             # colorize name for display purpose
@@ -230,7 +286,8 @@ def handle_show(options):
     """Show plugin details"""
     plugin_name = options.name
     settings = utils.load_settings(options)
-    usable_plugins = plugins.get_usable_plugins(settings)
+    usable_plugins = plugins.get_usable_plugins(
+        settings, _load_manifest(settings))
 
     # plugin does not exist
     if plugin_name not in usable_plugins:
@@ -270,12 +327,40 @@ def handle_show(options):
         return 1
 
     print('Loaded successfully')
+    if description.get('load_time') is not None:
+        print('Load time:', '%.3fs' % description['load_time'])
     print('Setup:', 'yes' if plugin.has_setup() else 'no')
     print('Shutdown:', 'yes' if plugin.has_shutdown() else 'no')
     print('Configure:', 'yes' if plugin.has_configure() else 'no')
     return 0  # successful operation
 
 
+def handle_profile(options):
+    """Profile the plugins' startup"""
+    profile = profiling.StartupProfile()
+    with profile.phase('configuration'):
+        settings = utils.load_settings(options)
+
+    if options.output:
+        profile.start_profiler()
+
+    with profile.phase('bot instance'):
+        instance = bot.Sopel(settings)
+    instance.startup_profile = profile
+
+    try:
+        with profile.phase('plugins'):
+            instance.setup_plugins(save_manifest=False)
+    finally:
+        if options.output:
+            profile.stop_profiler(options.output)
+        # stop what plugins may have started (threads, downloads, etc.)
+        instance._shutdown()
+
+    print('\n'.join(profile.get_report(limit=options.limit)))
+    return 0
+
+
 def handle_configure(options):
     """Configure a Sopel plugin with a config wizard"""
     plugin_name = options.name
@@ -503,6 +588,8 @@ def main():
         return handle_list(options)
     elif action == 'show':
         return handle_show(options)
+    elif action == 'profile':
+        return handle_profile(options)
     elif action == 'configure':
         return handle_configure(options)
     elif action == 'disable':
@@ -18,7 +18,8 @@ import signal
 import sys
 import time
 
-from sopel import bot, config, logger, tools, __version__
+from sopel import bot, config, logger, supervisor, tools, __version__
+from sopel.tools import profiling
 from . import utils
 
 if sys.version_info < (2, 7):
@@ -46,7 +47,7 @@ encounters such an error case.
 """
 
 
-def run(settings, pid_file, daemon=False):
+def run(settings, pid_file, daemon=False, profile=None, profile_output=None):
     delay = 20
 
     # Acts as a welcome message, showing the program and platform version at start
@@ -70,7 +71,13 @@ def run(settings, pid_file, daemon=False):
         if p and p.hasquit:  # Check if `hasquit` was set for bot during disconnected phase
             break
         try:
-            p = bot.Sopel(settings, daemon=daemon)
+            if profile is not None and profile_output:
+                profile.start_profiler()
+            startup_profile = profile or profiling.StartupProfile()
+            with startup_profile.phase('bot instance'):
+                p = bot.Sopel(settings, daemon=daemon)
+            # the bot records its setup in the same profile
+            p.startup_profile = startup_profile
             if hasattr(signal, 'SIGUSR1'):
                 signal.signal(signal.SIGUSR1, signal_handler)
             if hasattr(signal, 'SIGTERM'):
@@ -82,6 +89,12 @@ def run(settings, pid_file, daemon=False):
             if hasattr(signal, 'SIGILL'):
                 signal.signal(signal.SIGILL, signal_handler)
             p.setup()
+            if profile is not None:
+                if profile_output:
+                    profile.stop_profiler(profile_output)
+                print('\n'.join(profile.get_report()))
+                # profile the first start only, not reconnections
+                profile = None
         except KeyboardInterrupt:
             break
         except Exception:
@@ -108,6 +121,7 @@ def run(settings, pid_file, daemon=False):
             # This one is much harder to test, so until that one's sorted it
             # isn't worth the risk of trying to remove this one.
             os.unlink(pid_file)
+            logger.shutdown_logging()
             os._exit(1)
 
         if not isinstance(delay, int):
@@ -122,6 +136,61 @@ def run(settings, pid_file, daemon=False):
     # All we should need here is a return value, but making this
     # a return makes Sopel hang on ^C after it says "Closed!"
     os.unlink(pid_file)
+    logger.shutdown_logging()
+    os._exit(0)
+
+
+def run_many(settings, pid_file, daemon=False):
+    """Run one bot per configuration, in the same process.
+
+    :param list settings: the configuration of each bot, the main one first
+    :param str pid_file: path to the PID file
+    :param bool daemon: whether the bots run as a daemon
+    :return: ``-1`` if a restart has been asked
+
+    .. versionadded:: 7.0
+
+    .. seealso::
+
+        The :class:`sopel.supervisor.Supervisor` class runs the bots.
+
+    """
+    print_version()
+
+    if not settings[0].core.ca_certs:
+        tools.stderr(
+            'Could not open CA certificates file. SSL will not work properly!')
+
+    supervised = supervisor.Supervisor(settings, daemon=daemon)
+
+    def signal_handler(sig, frame):
+        if sig == signal.SIGUSR1 or sig == signal.SIGTERM or sig == signal.SIGINT:
+            LOGGER.warning('Got quit signal, shutting down.')
+            supervised.quit('Closing')
+        elif sig == signal.SIGUSR2 or sig == signal.SIGILL:
+            LOGGER.warning('Got restart signal, shutting down and restarting.')
+            supervised.restart('Restarting')
+
+    for name in ['SIGUSR1', 'SIGTERM', 'SIGINT', 'SIGUSR2', 'SIGILL']:
+        if hasattr(signal, name):
+            signal.signal(getattr(signal, name), signal_handler)
+
+    try:
+        supervised.setup()
+    except Exception:
+        # see `run`: the user should have direct access to the traceback
+        tools.stderr('Unexpected error in bot setup')
+        raise
+
+    try:
+        if supervised.run() == -1:
+            return -1
+    except KeyboardInterrupt:
+        pass
+
+    # TODO: This should be handled by command_start (see `run`)
+    os.unlink(pid_file)
+    logger.shutdown_logging()
     os._exit(0)
 
 
@@ -220,6 +289,29 @@ def build_parser():
         action="store_true",
         dest="quiet",
         help="Suppress all output")
+    parser_start.add_argument(
+        '--profile-startup',
+        action='store_true',
+        default=False,
+        dest='profile_startup',
+        help='Print how long each phase of the startup, and each plugin\'s '
+             'import and setup, took.')
+    parser_start.add_argument(
+        '--profile-output',
+        dest='profile_output',
+        metavar='FILENAME',
+        help='Write a cProfile of the startup to this file (implies '
+             '--profile-startup).')
+    parser_start.add_argument(
+        '--with-config',
+        action='append',
+        dest='with_configs',
+        default=[],
+        metavar='CONFIG',
+        help='Also run the bot of this configuration, in the same process '
+             '(can be used more than once). The bots share their plugins, '
+             'and their database when they use the same. '
+             'Logging is configured by the main configuration only.')
     utils.add_common_arguments(parser_start)
 
     # manage `configure` subcommand
@@ -352,6 +444,28 @@ def get_configuration(options):
     return settings
 
 
+def get_other_configurations(options):
+    """Get the configurations of the other bots to run from ``options``.
+
+    :param options: argument parser's options
+    :type options: ``argparse.Namespace``
+    :return: a configuration object for each ``--with-config`` option
+    :rtype: list of :class:`sopel.config.Config`
+
+    This may raise a :exc:`sopel.config.ConfigurationError` if a
+    configuration file is invalid or can't be found.
+
+    .. versionadded:: 7.0
+    """
+    configs = []
+    for name in getattr(options, 'with_configs', None) or []:
+        settings = utils.load_settings(
+            argparse.Namespace(config=name, configdir=options.configdir))
+        settings._is_daemonized = options.daemonize
+        configs.append(settings)
+    return configs
+
+
 def get_pid_filename(options, pid_dir):
     """Get the pid file name in ``pid_dir`` from the given ``options``.
 
@@ -396,9 +510,12 @@ def get_running_pid(filename):
 
 def command_start(opts):
     """Start a Sopel instance"""
+    profile = profiling.StartupProfile()
+
     # Step One: Get the configuration file and prepare to run
     try:
-        config_module = get_configuration(opts)
+        with profile.phase('configuration'):
+            config_module = get_configuration(opts)
     except config.ConfigurationError as e:
         tools.stderr(e)
         return ERR_CODE_NO_RESTART
@@ -407,6 +524,25 @@ def command_start(opts):
         tools.stderr('Bot is not configured, can\'t start')
         return ERR_CODE_NO_RESTART
 
+    try:
+        other_configs = get_other_configurations(opts)
+    except config.ConfigurationError as e:
+        tools.stderr(e)
+        return ERR_CODE_NO_RESTART
+
+    names = [settings.basename
+             for settings in [config_module] + other_configs]
+    if len(set(names)) != len(names):
+        tools.stderr('Each configuration must have a different name, '
+                     'can\'t start')
+        return ERR_CODE_NO_RESTART
+
+    for settings in other_configs:
+        if settings.core.not_configured:
+            tools.stderr('Bot %s is not configured, can\'t start'
+                         % settings.basename)
+            return ERR_CODE_NO_RESTART
+
     # Step Two: Handle process-lifecycle options and manage the PID file
     pid_dir = config_module.core.pid_dir
     pid_file_path = get_pid_filename(opts, pid_dir)
@@ -428,13 +564,26 @@ def command_start(opts):
         pid_file.write(str(os.getpid()))
 
     # Step Three: Run Sopel
-    ret = run(config_module, pid_file_path)
+    if not opts.profile_startup and not opts.profile_output:
+        # --profile-output implies --profile-startup
+        profile = None
+    if other_configs:
+        if profile is not None:
+            tools.stderr('Warning: startup profile is not available '
+                         'with --with-config')
+        ret = run_many([config_module] + other_configs, pid_file_path,
+                       daemon=opts.daemonize)
+    else:
+        ret = run(config_module, pid_file_path,
+                  profile=profile,
+                  profile_output=opts.profile_output)
 
     # Step Four: Shutdown Clean-Up
     os.unlink(pid_file_path)
 
     if ret == -1:
         # Restart
+        logger.shutdown_logging()
         os.execv(sys.executable, ['python'] + sys.argv)
     else:
         # Quit
@@ -648,6 +797,7 @@ def command_legacy(opts):
     ret = run(config_module, pid_file_path)
     os.unlink(pid_file_path)
     if ret == -1:
+        logger.shutdown_logging()
         os.execv(sys.executable, ['python'] + sys.argv)
     else:
         return ret
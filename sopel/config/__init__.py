@@ -75,6 +75,45 @@ __all__ = [
 DEFAULT_HOMEDIR = os.path.join(os.path.expanduser('~'), '.sopel')
 
 
+class SopelConfigParser(ConfigParser.RawConfigParser):
+    """A ``RawConfigParser`` that counts its modifications.
+
+    The :attr:`version` is incremented every time an option or a section is
+    added, changed, or removed, and every time a file is read. The settings
+    of a :class:`~sopel.config.types.StaticSection` use it to know when their
+    parsed values must be read again from the parser.
+    """
+    def __init__(self, *args, **kwargs):
+        self.version = 0
+        ConfigParser.RawConfigParser.__init__(self, *args, **kwargs)
+
+    def invalidate(self):
+        """Invalidate the values parsed from this parser."""
+        self.version += 1
+
+    def _read(self, *args, **kwargs):
+        self.invalidate()
+        return ConfigParser.RawConfigParser._read(self, *args, **kwargs)
+
+    def add_section(self, *args, **kwargs):
+        self.invalidate()
+        return ConfigParser.RawConfigParser.add_section(self, *args, **kwargs)
+
+    def remove_section(self, *args, **kwargs):
+        self.invalidate()
+        return ConfigParser.RawConfigParser.remove_section(
+            self, *args, **kwargs)
+
+    def set(self, *args, **kwargs):
+        self.invalidate()
+        return ConfigParser.RawConfigParser.set(self, *args, **kwargs)
+
+    def remove_option(self, *args, **kwargs):
+        self.invalidate()
+        return ConfigParser.RawConfigParser.remove_option(
+            self, *args, **kwargs)
+
+
 class ConfigurationError(Exception):
     """Exception type for configuration errors"""
     def __init__(self, value):
@@ -116,7 +155,7 @@ class Config(object):
         If the filename is ``freenode.config.cfg``, then the ``basename`` will
         be ``freenode.config``.
         """
-        self.parser = ConfigParser.RawConfigParser(allow_no_value=True)
+        self.parser = SopelConfigParser(allow_no_value=True)
         self.parser.read(self.filename)
         self.define_section('core', core_section.CoreSection,
                             validate=validate)
@@ -141,6 +180,35 @@ class Config(object):
         self.parser.write(cfgfile)
         cfgfile.flush()
         cfgfile.close()
+        self._invalidate()
+
+    def reload(self):
+        """Read the config file again, discarding any unsaved change.
+
+        Sections defined with :meth:`define_section` are kept, and their
+        settings will return the values from the file.
+
+        .. versionadded:: 7.0
+        """
+        for section in self.parser.sections():
+            self.parser.remove_section(section)
+        self.parser.read(self.filename)
+
+        for name, value in list(vars(self).items()):
+            if isinstance(value, types.StaticSection):
+                if not self.parser.has_section(name):
+                    self.parser.add_section(name)
+            elif isinstance(value, self.ConfigSection):
+                # undefined sections are created again on access
+                delattr(self, name)
+        self._invalidate()
+
+    def _invalidate(self):
+        # parsed values are cached by settings as long as the parser's
+        # version doesn't change
+        invalidate = getattr(self.parser, 'invalidate', None)
+        if invalidate is not None:
+            invalidate()
 
     def add_section(self, name):
         """Add a section to the config file.
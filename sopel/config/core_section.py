@@ -115,6 +115,12 @@ class CoreSection(StaticSection):
     for plugins.
 
     The default value allows ``http``, ``https``, and ``ftp``.
+
+    .. note::
+
+        The ``url`` plugin shows titles only for ``http``, ``https``, and
+        ``ftp`` URLs, whatever the value of this setting.
+
     """
 
     bind_host = ValidatedAttribute('bind_host')
@@ -204,14 +210,61 @@ class CoreSection(StaticSection):
     Regular expression syntax is used.
     """
 
+    lazy_plugins = ValidatedAttribute('lazy_plugins', bool, default=False)
+    """Whether plugins should be imported on first use only.
+
+    When enabled, plugins are registered from the metadata stored in the
+    plugin manifest the last time they were loaded, and a plugin is imported
+    (and set up) only when one of its callables is called for the first time.
+    Plugins that are new or modified since the last start are loaded as usual.
+
+    The plugin manifest is stored in the homedir, as
+    ``<basename>.plugins.json``; it is written only when this is enabled.
+
+    .. note::
+
+        A plugin's ``setup`` function won't run at startup: plugins that
+        other plugins depend on, or that must check their configuration
+        before the bot connects, should not be loaded lazily. Plugins can be
+        excluded with :attr:`lazy_plugins_exclude`.
+
+    .. versionadded:: 7.0
+    """
+
+    lazy_plugins_exclude = ListAttribute('lazy_plugins_exclude')
+    """A list of plugins which should always be loaded at startup.
+
+    Used only when :attr:`lazy_plugins` is enabled.
+
+    .. versionadded:: 7.0
+    """
+
     log_raw = ValidatedAttribute('log_raw', bool, default=False)
     """Whether a log of raw lines as sent and received should be kept."""
 
+    log_raw_format = ChoiceAttribute('log_raw_format', ['text', 'ndjson'],
+                                     'text')
+    """The format of the raw log.
+
+    With ``text`` (the default), each line is logged with its timestamp and
+    direction (``<<`` for received, ``>>`` for sent). With ``ndjson``, each
+    line is logged as a JSON object, one per line, which is easier to parse::
+
+        {"time": 1571662064.272, "direction": "<<", "line": "PING :server"}
+
+    .. versionadded:: 7.0
+    """
+
     logdir = FilenameAttribute('logdir', directory=True, default='logs')
     """Directory in which to place logs."""
 
     logging_channel = ValidatedAttribute('logging_channel', Identifier)
-    """The channel to send logging messages to."""
+    """The channel to send logging messages to.
+
+    When more than one bot runs in the same process (see the
+    ``--with-config`` option of ``sopel start``), only the main bot's
+    logging channel is used, for the messages of every bot.
+    """
 
     logging_channel_datefmt = ValidatedAttribute('logging_channel_datefmt')
     """The logging format string to use for timestamps in IRC channel logs.
@@ -229,6 +282,19 @@ class CoreSection(StaticSection):
     .. versionadded:: 7.0
     """
 
+    logging_channel_interval = ValidatedAttribute(
+        'logging_channel_interval', int, default=5)
+    """Time (in seconds) between two batches of messages in the log channel.
+
+    Log messages are buffered, and sent to the :attr:`logging_channel` by
+    batches of :attr:`logging_channel_lines` messages at most, so an error
+    that happens again and again can't flood the channel: a message logged
+    many times is sent once, with its count, and messages are dropped (with
+    a summary) when too many are waiting.
+
+    .. versionadded:: 7.0
+    """
+
     logging_channel_level = ChoiceAttribute('logging_channel_level',
                                             ['CRITICAL', 'ERROR', 'WARNING',
                                              'INFO', 'DEBUG'],
@@ -240,6 +306,15 @@ class CoreSection(StaticSection):
     .. versionadded:: 7.0
     """
 
+    logging_channel_lines = ValidatedAttribute(
+        'logging_channel_lines', int, default=3)
+    """How many log messages can be sent to the log channel at once.
+
+    See :attr:`logging_channel_interval`.
+
+    .. versionadded:: 7.0
+    """
+
     logging_datefmt = ValidatedAttribute('logging_datefmt')
     """The logging format string to use for timestamps in logs.
 
@@ -278,6 +353,60 @@ class CoreSection(StaticSection):
     If not specified, this defaults to ``INFO``.
     """
 
+    logging_queue_size = ValidatedAttribute(
+        'logging_queue_size', int, default=10000)
+    """How many log records can wait to be written.
+
+    Log files are written by background threads, so writing to the disk
+    doesn't slow down the bot. When a queue is full, new log records are
+    dropped, and a warning tells how many of them were. Set it to ``0`` to
+    write log files directly instead.
+
+    .. versionadded:: 7.0
+    """
+
+    metrics = ValidatedAttribute('metrics', bool, default=False)
+    """Whether to record the bot's metrics.
+
+    The bot counts the lines it receives and sends, and measures how long its
+    plugins take, how late its jobs are, etc. These metrics are served in the
+    Prometheus text format on :attr:`metrics_port`, and/or written to
+    :attr:`metrics_file`.
+
+    .. versionadded:: 7.0
+    """
+
+    metrics_file = FilenameAttribute('metrics_file')
+    """A file to write the metrics to, every :attr:`metrics_file_interval`.
+
+    Used only when :attr:`metrics` is enabled. For example, Prometheus' node
+    exporter can read it with its textfile collector.
+
+    .. versionadded:: 7.0
+    """
+
+    metrics_file_interval = ValidatedAttribute(
+        'metrics_file_interval', int, default=60)
+    """How often (in seconds) to write the metrics to :attr:`metrics_file`.
+
+    .. versionadded:: 7.0
+    """
+
+    metrics_host = ValidatedAttribute('metrics_host', default='127.0.0.1')
+    """The address to serve the metrics on.
+
+    .. versionadded:: 7.0
+    """
+
+    metrics_port = ValidatedAttribute('metrics_port', int, default=0)
+    """The port to serve the metrics on, at ``/metrics``.
+
+    Used only when :attr:`metrics` is enabled. By default (``0``), the
+    metrics are not served.
+
+    .. versionadded:: 7.0
+    """
+
     modes = ValidatedAttribute('modes', default='B')
     """User modes to be set on connection."""
 
@@ -354,6 +483,16 @@ class CoreSection(StaticSection):
     ``systemd`` or similar.
     """
 
+    plugins_setup_workers = ValidatedAttribute(
+        'plugins_setup_workers', int, default=4)
+    """Number of threads used to run plugins' setup in parallel.
+
+    Only plugins that declare their setup safe to run in parallel (with
+    :func:`sopel.module.parallel_setup`) are set up in these threads.
+
+    .. versionadded:: 7.0
+    """
+
     port = ValidatedAttribute('port', int, default=6667)
     """The port to connect on."""
 
@@ -395,6 +534,31 @@ class CoreSection(StaticSection):
     .. versionadded:: 7.0
     """
 
+    slow_callable_threshold = ValidatedAttribute(
+        'slow_callable_threshold', float, default=5.0)
+    """How long (in seconds) a plugin callable can take before a warning.
+
+    The warning tells the callable's plugin, and the rule that triggered it.
+    A callable that doesn't run in its own thread blocks the bot while it
+    runs, so it should be much faster than this. Set it to ``0`` to disable
+    the warning.
+
+    .. versionadded:: 7.0
+    """
+
+    sampling_profiler_interval = ValidatedAttribute(
+        'sampling_profiler_interval', float, default=0.01)
+    """Time (in seconds) between two samples of the sampling profiler.
+
+    The profiler is off until the bot's owner starts it, with the
+    ``profiler`` command of the ``admin`` plugin; the same command stops it,
+    and writes its samples to :attr:`logdir`, as collapsed stacks for flame
+    graphs. A shorter interval gives more precise results, but slows down
+    the bot more.
+
+    .. versionadded:: 7.0
+    """
+
     throttle_join = ValidatedAttribute('throttle_join', int)
     """Slow down the initial join of channels to prevent getting kicked.
 
@@ -414,6 +578,25 @@ class CoreSection(StaticSection):
     verify_ssl = ValidatedAttribute('verify_ssl', bool, default=True)
     """Whether to require a trusted SSL certificate for SSL connections."""
 
+    watch_plugins = ValidatedAttribute('watch_plugins', bool, default=False)
+    """Whether plugins should be reloaded when their source changes.
+
+    When enabled, the bot checks the source files of its plugins every
+    :attr:`watch_plugins_interval` seconds, and reloads only the plugins that
+    have been modified. Useful while developing plugins.
+
+    .. versionadded:: 7.0
+    """
+
+    watch_plugins_interval = ValidatedAttribute(
+        'watch_plugins_interval', int, default=2)
+    """How often (in seconds) to check the source files of plugins.
+
+    Used only when :attr:`watch_plugins` is enabled.
+
+    .. versionadded:: 7.0
+    """
+
     flood_burst_lines = ValidatedAttribute('flood_burst_lines', int, default=4)
     """How many messages can be sent in burst mode.
 
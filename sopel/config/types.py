@@ -45,6 +45,13 @@ class StaticSection(object):
 
     This class is intended to be subclassed and customized with added
     attributes containing :class:`BaseValidated`-based objects.
+
+    .. versionchanged:: 7.0
+
+        Parsed values are cached until the config parser is modified (or the
+        config is saved or reloaded), so reading a setting is cheap enough
+        for code running on every line received by the bot. Environment
+        variables are read again only when the cache is invalidated.
     """
     def __init__(self, config, section_name, validate=True):
         if not config.parser.has_section(section_name):
@@ -52,6 +59,7 @@ class StaticSection(object):
         self._parent = config
         self._parser = config.parser
         self._section_name = section_name
+        self._cache = {}
         for value in dir(self):
             try:
                 getattr(self, value)
@@ -155,20 +163,38 @@ class BaseValidated(object):
             # instance here.
             return self
 
+        # the parser's version changes with each modification, so a cached
+        # value can be used as long as the parser has not been modified
+        version = getattr(instance._parser, 'version', None)
+        cached = instance._cache.get(self.name)
+        if cached is not None and cached[0] == version:
+            return self._copy(cached[1])
+
         env_name = 'SOPEL_%s_%s' % (instance._section_name.upper(), self.name.upper())
         if env_name in os.environ:
-            value = os.environ.get(env_name)
+            value = self.parse(os.environ.get(env_name))
         elif instance._parser.has_option(instance._section_name, self.name):
-            value = instance._parser.get(instance._section_name, self.name)
+            value = self.parse(
+                instance._parser.get(instance._section_name, self.name))
+        elif self.default is not NO_DEFAULT:
+            value = self.default
         else:
-            if self.default is not NO_DEFAULT:
-                return self.default
             raise AttributeError(
                 "Missing required value for {}.{}".format(
                     instance._section_name, self.name
                 )
             )
-        return self.parse(value)
+
+        if version is not None:
+            instance._cache[self.name] = (version, value)
+        return self._copy(value)
+
+    def _copy(self, value):
+        # parsed values are cached: the caller must not be able to modify
+        # the cached value by modifying the returned one
+        if isinstance(value, (list, dict, set)):
+            return type(value)(value)
+        return value
 
     def __set__(self, instance, value):
         if value is None:
@@ -20,7 +20,6 @@ import sys
 import time
 import sopel
 import sopel.module
-import sopel.tools.web
 from sopel.irc.utils import CapReq
 from sopel.tools import Identifier, iteritems, events
 from sopel.tools.target import User, Channel
@@ -868,9 +867,8 @@ def handle_url_callbacks(bot, trigger):
     For each URL found in the trigger, trigger the URL callback registered by
     the ``@url`` decorator.
     """
-    schemes = bot.config.core.auto_url_schemes
-    # find URLs in the trigger
-    for url in sopel.tools.web.search_urls(trigger, schemes=schemes):
+    # URLs are searched once per line, when the trigger is parsed
+    for url in trigger.urls:
         # find callbacks for said URL
         for function, match in bot.search_url_callbacks(url):
             # trigger callback defined by the `@url` decorator
@@ -3,12 +3,17 @@ from __future__ import unicode_literals, absolute_import, print_function, divisi
 
 import errno
 import json
+import logging
 import os.path
 import sys
+import threading
+import time
 
 from sopel.tools import Identifier
 
-from sqlalchemy import create_engine, Column, ForeignKey, Integer, String
+from sqlalchemy import (
+    create_engine, event, func, literal, select, Column, ForeignKey, Integer,
+    String)
 from sqlalchemy.engine.url import URL
 from sqlalchemy.exc import OperationalError, SQLAlchemyError
 from sqlalchemy.ext.declarative import declarative_base
@@ -18,6 +23,18 @@ if sys.version_info.major >= 3:
     unicode = str
     basestring = str
 
+LOGGER = logging.getLogger(__name__)
+
+_ENGINES = {}
+_ENGINES_LOCK = threading.Lock()
+
+SCHEMA_VERSION = 1
+"""Version of the database schema.
+
+It must be incremented when a table is added or modified, so the tables are
+created again on the next start.
+"""
+
 
 def _deserialize(value):
     if value is None:
@@ -92,6 +109,15 @@ class PluginValues(BASE):
     value = Column(String(255))
 
 
+class SchemaVersion(BASE):
+    """
+    SchemaVersion SQLAlchemy Class
+    """
+    __tablename__ = 'sopel_schema'
+    __table_args__ = MYSQL_TABLE_ARGS
+    version = Column(Integer, primary_key=True)
+
+
 class SopelDB(object):
     """*Availability: 5.0+*
 
@@ -101,6 +127,15 @@ class SopelDB(object):
 
     When configured with a relative filename, it is assumed to be in the directory
     set (or defaulted to) in the core setting ``homedir``.
+
+    .. versionchanged:: 7.0
+
+        The database is not connected to when the object is created, but
+        when it is used for the first time (see :meth:`initialize`), so an
+        unreachable database doesn't prevent the bot from starting.
+
+        Instances using the same database share the same engine, and its
+        connection pool.
     """
 
     def __init__(self, config):
@@ -160,22 +195,166 @@ class SopelDB(object):
                            password=db_pass, host=db_host, port=db_port,
                            database=db_name, query=query)
 
-        self.engine = create_engine(self.url, pool_recycle=3600)
+        # creating the engine doesn't connect to the database
+        self.engine = self._get_engine(self.url)
+        self._ssession = scoped_session(sessionmaker(bind=self.engine))
+        self._initialized = False
+        self._initialize_lock = threading.Lock()
+        self._metrics_listeners = []
 
-        # Catch any errors connecting to database
-        try:
-            self.engine.connect()
-        except OperationalError:
-            print("OperationalError: Unable to connect to database.")
-            raise
+        self.latency = None
+        """The latency of the database, as measured by :meth:`get_latency`.
 
-        # Create our tables
-        BASE.metadata.create_all(self.engine)
+        It is ``None`` until it has been measured.
 
-        self.ssession = scoped_session(sessionmaker(bind=self.engine))
+        .. versionadded:: 7.0
+        """
+
+    @staticmethod
+    def _get_engine(url):
+        # bots running in the same process share their engine (and its pool
+        # of connections) when they use the same database
+        with _ENGINES_LOCK:
+            if url not in _ENGINES:
+                _ENGINES[url] = create_engine(url, pool_recycle=3600)
+            return _ENGINES[url]
+
+    @property
+    def ssession(self):
+        """The database's session factory (:func:`~sqlalchemy.orm.scoped_session`).
+
+        .. versionchanged:: 7.0
+
+            The database is initialized the first time it is used.
+        """
+        self.initialize()
+        return self._ssession
+
+    def initialize(self):
+        """Create the database's tables, unless they are up to date.
+
+        :raise sqlalchemy.exc.OperationalError: when the database can't be
+                                                reached
+
+        The tables are created only if the schema version stored in the
+        database is not :data:`SCHEMA_VERSION`, which saves the inspection of
+        each table on every start. This is done the first time the database is
+        used, and it is safe to call this method more than once, from any
+        thread: only the first successful call does anything.
+
+        .. versionadded:: 7.0
+        """
+        if self._initialized:
+            return
+
+        with self._initialize_lock:
+            if self._initialized:
+                return
+
+            try:
+                if self._get_schema_version() != SCHEMA_VERSION:
+                    BASE.metadata.create_all(self.engine)
+                    self._set_schema_version()
+            except OperationalError:
+                LOGGER.error('Unable to connect to database %r', self.url)
+                raise
+
+            self._initialized = True
+
+    def _get_schema_version(self):
+        with self.engine.connect() as conn:
+            try:
+                return conn.execute(
+                    select([func.max(SchemaVersion.version)])).scalar()
+            except SQLAlchemyError:
+                # the table doesn't exist (yet)
+                return None
+
+    def _set_schema_version(self):
+        table = SchemaVersion.__table__
+        with self.engine.begin() as conn:
+            conn.execute(table.delete())
+            conn.execute(table.insert(), version=SCHEMA_VERSION)
+
+    def get_latency(self):
+        """Measure the time of a round trip to the database.
+
+        :return: the latency, in seconds
+        :rtype: float
+        :raise sqlalchemy.exc.SQLAlchemyError: when the database can't be
+                                               reached
+
+        The database is initialized first if needed, and the result is
+        stored in :attr:`latency`.
+
+        .. versionadded:: 7.0
+        """
+        self.initialize()
+        start = time.time()
+        with self.engine.connect() as conn:
+            conn.execute(select([literal(1)])).scalar()
+        self.latency = time.time() - start
+        return self.latency
+
+    def record_metrics(self, registry):
+        """Record the time taken by each query.
+
+        :param registry: where to record the queries' durations, as the
+                         ``sopel_db_query_seconds`` histogram
+        :type registry: :class:`sopel.tools.metrics.MetricsRegistry`
+
+        Instances using the same database share the same engine, so each of
+        their registries records every query run on this engine, until
+        :meth:`stop_recording_metrics` is called. Calling this method again
+        replaces the previous registry.
+
+        .. versionadded:: 7.0
+        """
+        self.stop_recording_metrics()
+        histogram = registry.histogram(
+            'sopel_db_query_seconds', 'Time spent running database queries.')
+        # each instance times the queries on its own
+        key = 'sopel_query_start_%x' % id(self)
+
+        def before_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+            conn.info.setdefault(key, []).append(time.time())
+
+        def after_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+            start = conn.info[key].pop()
+            histogram.observe(time.time() - start)
+
+        def on_error(exception_context):
+            # a failed query has no "after": forget when it started
+            conn = exception_context.connection
+            if conn is not None and conn.info.get(key):
+                conn.info[key].pop()
+
+        self._metrics_listeners = [
+            ('before_cursor_execute', before_execute),
+            ('after_cursor_execute', after_execute),
+            ('handle_error', on_error),
+        ]
+        for name, listener in self._metrics_listeners:
+            event.listen(self.engine, name, listener)
+
+    def stop_recording_metrics(self):
+        """Stop recording the time taken by each query.
+
+        The engine is shared by every instance using the same database, and
+        lives as long as the process: the bot calls this when it shuts down,
+        so its listeners don't pile up on the engine.
+
+        .. versionadded:: 7.0
+        """
+        listeners, self._metrics_listeners = self._metrics_listeners, []
+        for name, listener in listeners:
+            event.remove(self.engine, name, listener)
 
     def connect(self):
         """Return a raw database connection object."""
+        self.initialize()
         return self.engine.connect()
 
     def execute(self, *args, **kwargs):
@@ -47,6 +47,8 @@ import threading
 from datetime import datetime
 
 from sopel import tools
+from sopel.logger import shutdown_logging
+from sopel.tools import metrics
 from sopel.trigger import PreTrigger
 
 from .backends import AsynchatBackend, SSLAsynchatBackend
@@ -54,6 +56,9 @@ from .utils import safe, CapReq
 
 if sys.version_info.major >= 3:
     unicode = str
+    from queue import Empty, Queue
+else:
+    from Queue import Empty, Queue
 
 __all__ = ['abstract_backends', 'backends', 'utils']
 
@@ -62,6 +67,10 @@ LOGGER = logging.getLogger(__name__)
 
 class AbstractBot(object):
     """Abstract definition of the Sopel's interface."""
+    _recipient_stripes = 16
+    # number of locks for messages' recipients: a recipient's messages are
+    # sent together, and so are those of recipients sharing its lock
+
     def __init__(self, settings):
         # private properties: access as read-only properties
         self._nick = tools.Identifier(settings.core.nick)
@@ -81,12 +90,35 @@ class AbstractBot(object):
 
         # internal machinery
         self.sending = threading.RLock()
+        self._recipient_locks = [
+            threading.Lock() for _ in range(self._recipient_stripes)]
         self.last_error_timestamp = None
         self.error_count = 0
         self.stack = {}
         self.hasquit = False
         self.last_raw_line = ''  # last raw line received
 
+        # simulated echo-messages are dispatched by their own thread
+        self._echo_queue = Queue()
+        self._echo_thread = None
+        self._echo_thread_lock = threading.Lock()
+
+        self.metrics = metrics.MetricsRegistry(enabled=settings.core.metrics)
+        """The bot's metrics, as a :class:`sopel.tools.metrics.MetricsRegistry`.
+
+        Disabled unless :attr:`~sopel.config.core_section.CoreSection.metrics`
+        is enabled.
+
+        .. versionadded:: 7.0
+        """
+        self._metric_received = self.metrics.counter(
+            'sopel_lines_received_total', 'IRC lines received.', ['event'])
+        self._metric_sent = self.metrics.counter(
+            'sopel_lines_sent_total', 'IRC lines sent.', ['event'])
+        self._metric_send_wait = self.metrics.histogram(
+            'sopel_send_wait_seconds',
+            'Time messages wait to be sent (flood protection included).')
+
     @property
     def nick(self):
         """Sopel's current ``Identifier``."""
@@ -169,10 +201,16 @@ class AbstractBot(object):
     def on_message(self, message):
         self.last_raw_line = message
 
-        pretrigger = PreTrigger(self.nick, message)
+        pretrigger = PreTrigger(
+            self.nick,
+            message,
+            url_schemes=self.settings.core.auto_url_schemes,
+        )
         if all(cap not in self.enabled_capabilities for cap in ['account-tag', 'extended-join']):
             pretrigger.tags.pop('account', None)
 
+        self._metric_received.labels(pretrigger.event).inc()
+
         if pretrigger.event == 'PING':
             self.backend.send_pong(pretrigger.args[-1])
         elif pretrigger.event == 'ERROR':
@@ -197,28 +235,108 @@ class AbstractBot(object):
         `echo-message`_ feature of IRCv3.
 
         .. _echo-message: https://ircv3.net/irc/#echo-message
+
+        .. versionchanged:: 7.0
+
+            The echo-message is simulated only if a callable can handle it
+            (see :meth:`has_echo_callables`), and it is dispatched by a
+            separate thread, so the thread sending the message doesn't wait
+            for it.
         """
         # Log raw message
         self.log_raw(raw, '>>')
 
+        if self.metrics.enabled:
+            self._metric_sent.labels(raw.split(' ', 1)[0].upper()).inc()
+
         # Simulate echo-message
-        no_echo = 'echo-message' not in self.enabled_capabilities
-        echoed = ['PRIVMSG', 'NOTICE']
-        if no_echo and any(raw.upper().startswith(cmd) for cmd in echoed):
-            # Use the hostmask we think the IRC server is using for us,
-            # or something reasonable if that's not available
-            host = 'localhost'
-            if self.settings.core.bind_host:
-                host = self.settings.core.bind_host
-            else:
+        if 'echo-message' in self.enabled_capabilities:
+            return
+        if not self.has_echo_callables():
+            return
+        if raw[:7].upper().startswith(('PRIVMSG', 'NOTICE')):
+            self._start_echo_thread()
+            self._echo_queue.put(raw)
+
+    def has_echo_callables(self):
+        """Tell if any callable handles echo-messages.
+
+        :return: ``True`` unless the bot knows that no callable would be
+                 triggered by the bot's own messages
+        :rtype: bool
+
+        Simulating an echo-message for each message sent is costly: a bot
+        that knows its callables should override this method, so it doesn't
+        when none of them would be triggered anyway.
+
+        .. versionadded:: 7.0
+
+        .. seealso::
+
+            The :func:`sopel.module.echo` decorator.
+        """
+        return True
+
+    def _start_echo_thread(self):
+        if self._echo_thread is not None:
+            return
+        with self._echo_thread_lock:
+            if self._echo_thread is None:
+                thread = threading.Thread(
+                    target=self._echo_worker, name='sopel-echo-message')
+                thread.daemon = True
+                thread.start()
+                self._echo_thread = thread
+
+    def _stop_echo_thread(self):
+        with self._echo_thread_lock:
+            if self._echo_thread is None:
+                return
+            self._echo_queue.put(None)
+            if self._echo_thread is not threading.current_thread():
+                self._echo_thread.join(5)
+            self._echo_thread = None
+
+    def _echo_worker(self):
+        while True:
+            batch = [self._echo_queue.get()]
+            # dispatch every message sent meanwhile in one go
+            while True:
                 try:
-                    host = self.hostmask
-                except KeyError:
-                    pass  # we tried, and that's good enough
+                    batch.append(self._echo_queue.get_nowait())
+                except Empty:
+                    break
+
+            try:
+                self._dispatch_echo_messages(
+                    [raw for raw in batch if raw is not None])
+            except Exception:
+                LOGGER.exception('Unable to dispatch echo-messages')
+            finally:
+                for raw in batch:
+                    self._echo_queue.task_done()
+
+            if None in batch:
+                break
+
+    def _dispatch_echo_messages(self, raw_messages):
+        # Use the hostmask we think the IRC server is using for us,
+        # or something reasonable if that's not available
+        host = 'localhost'
+        if self.settings.core.bind_host:
+            host = self.settings.core.bind_host
+        else:
+            try:
+                host = self.hostmask
+            except KeyError:
+                pass  # we tried, and that's good enough
 
+        prefix = ':{0}!{1}@{2} '.format(self.nick, self.user, host)
+        for raw in raw_messages:
             pretrigger = PreTrigger(
                 self.nick,
-                ":{0}!{1}@{2} {3}".format(self.nick, self.user, host, raw)
+                prefix + raw,
+                url_schemes=self.settings.core.auto_url_schemes,
             )
             self.dispatch(pretrigger)
 
@@ -246,6 +364,7 @@ class AbstractBot(object):
             # quit if too many errors
             if (datetime.now() - self.last_error_timestamp).seconds < 5:
                 LOGGER.error('Too many errors, can\'t continue')
+                shutdown_logging()
                 os._exit(1)
             # TODO: should we reset error_count?
 
@@ -269,7 +388,10 @@ class AbstractBot(object):
         if not self.settings.core.log_raw:
             return
         logger = logging.getLogger('sopel.raw')
-        logger.info('\t'.join([prefix, line.strip()]))
+        line = line.strip()
+        # the message is formatted by the logging thread, if any
+        logger.info('%s\t%s', prefix, line,
+                    extra={'raw_prefix': prefix, 'raw_line': line})
 
     def cap_req(self, module_name, capability, arg=None, failure_callback=None,
                 success_callback=None):
@@ -487,16 +609,72 @@ class AbstractBot(object):
         specified number of messages using the above splitting, the final
         message will contain the entire remainder, which may be truncated by
         the server.
+
+        .. versionchanged:: 7.0
+
+            Once the bot knows its own hostmask, messages are split to fit
+            in the 512 bytes of an IRC line, as relayed by the server (see
+            :meth:`get_max_message_length`), rather than in 400 bytes. The
+            messages are sent one after the other, without other messages
+            to the same recipient in between; messages to other recipients
+            (but those sharing its lock, from a fixed pool of locks) can be
+            sent in the meantime, e.g. while flood protection waits.
         """
-        excess = ''
         if not isinstance(text, unicode):
             # Make sure we are dealing with unicode string
             text = text.decode('utf-8')
 
+        messages = [text]
         if max_messages > 1:
             # Manage multi-line only when needed
-            text, excess = tools.get_sendable_message(text)
+            messages = tools.get_sendable_messages(
+                text,
+                self.get_max_message_length(recipient),
+                max_messages) or messages
+
+        queued = time.time()
+
+        # the recipient's lock keeps the messages together, while the
+        # `sending` lock is only held to send each of them
+        with self._get_recipient_lock(recipient):
+            for message in messages:
+                if not self._send_privmsg(message, recipient):
+                    # the message has been discarded, and so is the rest
+                    break
+                self._metric_send_wait.observe(time.time() - queued)
+
+    def _get_recipient_lock(self, recipient):
+        # a fixed pool of locks, rather than one per recipient ever messaged
+        index = hash(tools.Identifier(recipient)) % self._recipient_stripes
+        return self._recipient_locks[index]
+
+    def get_max_message_length(self, recipient):
+        """Get the maximum length of a message to ``recipient``.
 
+        :param str recipient: the message recipient
+        :return: the maximum length of the message, in bytes
+        :rtype: int
+
+        An IRC line can't be longer than 512 bytes, including its ending
+        ``CRLF``, and the server relays a message to its recipient with the
+        bot's hostmask as prefix: ``:nick!user@host PRIVMSG recipient :``.
+        Until the bot knows its hostmask (it learns it from the server, once
+        it has joined a channel), this is 400 bytes.
+
+        .. versionadded:: 7.0
+        """
+        try:
+            hostmask = self.hostmask
+        except (AttributeError, KeyError):
+            return 400
+        prefix = ':%s PRIVMSG %s :' % (hostmask, recipient)
+        return max(1, 510 - len(prefix.encode('utf-8')))
+
+    def _send_privmsg(self, text, recipient):
+        # send one message, with flood and loop protection; return False if
+        # the message has been discarded (the caller must hold the
+        # recipient's lock, but not `self.sending`: it is released while
+        # waiting, so messages to other recipients don't wait as well)
         with self.sending:
             recipient_id = tools.Identifier(recipient)
             recipient_stack = self.stack.setdefault(recipient_id, {
@@ -518,13 +696,16 @@ class AbstractBot(object):
                     self.config.core.flood_burst_lines,
                     int(elapsed) * self.config.core.flood_refill_rate)
 
-            # If it's too soon to send another message, wait
+            wait = 0
             if not recipient_stack['flood_left']:
                 penalty = float(max(0, len(text) - 50)) / 70
                 wait = min(self.config.core.flood_empty_wait + penalty, 2)  # Maximum wait time is 2 sec
-                if elapsed < wait:
-                    time.sleep(wait - elapsed)
 
+        # If it's too soon to send another message, wait
+        if elapsed < wait:
+            time.sleep(wait - elapsed)
+
+        with self.sending:
             # Loop detection
             messages = [m[1] for m in recipient_stack['messages'][-8:]]
 
@@ -534,14 +715,10 @@ class AbstractBot(object):
                 text = '...'
                 if messages.count('...') >= 3:
                     # If we've already said '...' 3 times, discard message
-                    return
+                    return False
 
             self.backend.send_privmsg(recipient, text)
             recipient_stack['flood_left'] = max(0, recipient_stack['flood_left'] - 1)
             recipient_stack['messages'].append((time.time(), safe(text)))
             recipient_stack['messages'] = recipient_stack['messages'][-10:]
-
-        # Now that we've sent the first part, we need to send the rest. Doing
-        # this recursively seems easier to me than iteratively
-        if excess:
-            self.say(excess, recipient, max_messages - 1)
+            return True
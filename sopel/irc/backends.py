@@ -15,6 +15,7 @@ import os
 import socket
 import sys
 
+from sopel.logger import shutdown_logging
 from sopel.tools.jobs import JobScheduler, Job
 from .abstract_backends import AbstractIRCBackend
 from .utils import get_cnames
@@ -67,7 +68,9 @@ _check_timeout.thread = False
 class AsynchatBackend(AbstractIRCBackend, asynchat.async_chat):
     def __init__(self, bot, server_timeout=None, ping_timeout=None, **kwargs):
         AbstractIRCBackend.__init__(self, bot)
-        asynchat.async_chat.__init__(self)
+        # each backend has its own socket map, so several bots can run their
+        # own loop in the same process
+        asynchat.async_chat.__init__(self, map={})
         self.set_terminator(b'\n')
         self.buffer = ''
         self.server_timeout = server_timeout or 120
@@ -85,7 +88,7 @@ class AsynchatBackend(AbstractIRCBackend, asynchat.async_chat):
         self.timeout_scheduler.add_job(timeout_job)
 
     def run_forever(self):
-        asyncore.loop()
+        asyncore.loop(map=self._map)
 
     def initiate_connect(self, host, port, source_address):
         self.host = host
@@ -218,6 +221,7 @@ class SSLAsynchatBackend(AsynchatBackend):
                     if hasattr(self.bot.settings.core, 'pid_file_path'):
                         # TODO: refactor to quit properly (no "os._exit")
                         os.unlink(self.bot.settings.core.pid_file_path)
+                        shutdown_logging()
                         os._exit(1)
         self.set_socket(self.ssl)
         LOGGER.info('Connection accepted by the server...')
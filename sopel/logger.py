@@ -1,28 +1,180 @@
 # coding=utf-8
 from __future__ import unicode_literals, absolute_import, print_function, division
 
+import atexit
+import collections
+import copy
+import json
 import logging
 import os
+import sys
+import threading
+import time
+import traceback
 from logging.config import dictConfig
 
 from sopel import tools
 
+if sys.version_info.major >= 3:
+    from queue import Full, Queue
+else:
+    from Queue import Full, Queue
+
+
+_LISTENERS = []
+_LISTENERS_LOCK = threading.Lock()
+
 
 class IrcLoggingHandler(logging.Handler):
-    def __init__(self, bot, level):
+    """Send log records to the bot's logging channel, a few at a time.
+
+    :param bot: the bot sending the log records
+    :type bot: :class:`sopel.bot.Sopel`
+    :param level: the handler's level
+    :param float interval: time between two batches of messages, in seconds
+    :param int max_lines: maximum number of messages per batch
+    :param int capacity: maximum number of different messages waiting to be
+                         sent
+    :param float drain_timeout: maximum time spent sending the messages still
+                                waiting when the handler is flushed or
+                                closed, in seconds
+
+    .. versionchanged:: 7.0
+
+        Handling a record never blocks: the message is buffered, and a
+        background thread sends the buffered messages, ``max_lines`` every
+        ``interval`` seconds at most. The same message logged again while
+        it waits is sent only once, with the number of times it was logged.
+        When ``capacity`` messages are waiting, new messages are dropped,
+        and the next batch tells how many were, including the messages that
+        couldn't be sent. The bot flushes the handler before it quits.
+
+    """
+    def __init__(self, bot, level, interval=5, max_lines=3, capacity=100,
+                 drain_timeout=5):
         super(IrcLoggingHandler, self).__init__(level)
         self._bot = bot
         self._channel = bot.config.core.logging_channel
+        self.interval = interval
+        self.max_lines = max_lines
+        self.capacity = capacity
+        self.drain_timeout = drain_timeout
+        self._pending = collections.OrderedDict()
+        self._dropped = 0
+        self._buffer_lock = threading.Lock()
+        self._closing = threading.Event()
+        self._thread = None
 
     def emit(self, record):
+        if self._closing.is_set():
+            return  # it wouldn't be sent
         try:
-            msg = self.format(record)
-            self._bot.say(msg, self._channel)
+            # the formatted message can change for the same record (e.g. with
+            # its time), so the raw message tells if it's the same again
+            key = (record.name, record.levelno, record.getMessage())
+            with self._buffer_lock:
+                if key in self._pending:
+                    self._pending[key][1] += 1
+                elif len(self._pending) < self.capacity:
+                    self._pending[key] = [self.format(record), 1]
+                else:
+                    self._dropped = self._dropped + 1
+                    return
+                self._start()
         except (KeyboardInterrupt, SystemExit):
             raise
         except Exception:  # TODO: Be specific
             self.handleError(record)
 
+    def _start(self):
+        if self._thread is None and not self._closing.is_set():
+            self._thread = threading.Thread(
+                target=self._run, name='sopel-logging-channel')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        while not self._closing.wait(self.interval):
+            self.send_pending()
+
+    def get_pending_lines(self):
+        """Take the next batch of messages to send.
+
+        :return: at most :attr:`max_lines` messages, the oldest first, with
+                 the number of times they were logged; and a last line
+                 telling how many messages were dropped, if any
+        :rtype: list
+
+        The messages returned are removed from the buffer.
+        """
+        lines, dropped = self._take_batch()
+        if dropped:
+            lines.append(self._format_dropped(dropped))
+        return lines
+
+    def _take_batch(self):
+        messages = []
+        with self._buffer_lock:
+            while self._pending and len(messages) < self.max_lines:
+                key, (msg, count) = self._pending.popitem(last=False)
+                if count > 1:
+                    msg = '%s (logged %d times)' % (msg, count)
+                messages.append(msg)
+            dropped, self._dropped = self._dropped, 0
+        return messages, dropped
+
+    def _format_dropped(self, dropped):
+        return '%d log messages dropped: too many to send' % dropped
+
+    def send_pending(self):
+        """Send the next batch of messages to the logging channel.
+
+        :return: ``True`` if a batch has been sent entirely, ``False`` if
+                 there was nothing to send, or if sending failed
+        :rtype: bool
+
+        When sending a message fails, the rest of the batch is not sent: it
+        is counted as dropped, and the next batch tells how many messages
+        were.
+        """
+        messages, dropped = self._take_batch()
+        lines = list(messages)
+        if dropped:
+            lines.append(self._format_dropped(dropped))
+
+        for index, line in enumerate(lines):
+            try:
+                self._bot.say(line, self._channel)
+            except Exception:  # TODO: Be specific
+                # this handler can't log its own errors: it would loop
+                if logging.raiseExceptions:
+                    traceback.print_exc(file=sys.stderr)
+                with self._buffer_lock:
+                    # the count of dropped messages is always the last line
+                    self._dropped += max(0, len(messages) - index) + dropped
+                return False
+        return bool(lines)
+
+    def flush(self):
+        """Send the messages still waiting, without waiting between batches.
+
+        This stops after :attr:`drain_timeout` seconds, or when sending
+        fails: the messages that couldn't be sent by then are left in the
+        buffer, or counted as dropped.
+        """
+        deadline = time.time() + self.drain_timeout
+        while time.time() < deadline and self.send_pending():
+            pass
+
+    def close(self):
+        """Stop sending messages, once the messages still waiting are sent.
+
+        See :meth:`flush`: what can't be sent in time is dropped.
+        """
+        self._closing.set()
+        self.flush()
+        super(IrcLoggingHandler, self).close()
+
 
 class ChannelOutputFormatter(logging.Formatter):
     def __init__(self, fmt='[%(filename)s] %(message)s', datefmt=None):
@@ -34,6 +186,169 @@ class ChannelOutputFormatter(logging.Formatter):
         return ' - ' + repr(exc_info[1])
 
 
+class RawJSONFormatter(logging.Formatter):
+    """Format raw IRC lines as JSON objects, one per line.
+
+    .. versionadded:: 7.0
+
+    Each raw line is formatted as an object with the ``time`` it was logged
+    (as a timestamp), its ``direction`` (``<<`` for received, ``>>`` for
+    sent), and the ``line`` itself.
+    """
+    def format(self, record):
+        return json.dumps({
+            'time': round(record.created, 3),
+            'direction': getattr(record, 'raw_prefix', None),
+            'line': getattr(record, 'raw_line', record.getMessage()),
+        }, sort_keys=True)
+
+
+class QueueHandler(logging.Handler):
+    """Send log records to a bounded queue, for a :class:`QueueListener`.
+
+    :param queue: the queue to put log records in
+    :type queue: :class:`queue.Queue`
+
+    .. versionadded:: 7.0
+
+    Putting a record in the queue never blocks: when the queue is full, the
+    record is dropped, and counted in :attr:`dropped`. The next record that
+    fits in the queue is preceded by a warning that tells how many records
+    were dropped.
+    """
+    def __init__(self, queue):
+        super(QueueHandler, self).__init__()
+        self.queue = queue
+        self.dropped = 0
+        """Total number of records dropped because the queue was full."""
+        self._reported = 0
+
+    def prepare(self, record):
+        """Prepare a ``record`` to be handled by another thread.
+
+        :param record: the log record
+        :type record: :class:`logging.LogRecord`
+        :return: a copy of the record, with its message merged with its
+                 arguments, and its exception formatted as text
+
+        Arguments and exceptions can't be kept as they are: they can change,
+        or be released, before the record is handled.
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = logging.Formatter().formatException(
+                    record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            if self.dropped > self._reported:
+                report = logging.makeLogRecord({
+                    'name': record.name,
+                    'levelno': logging.WARNING,
+                    'levelname': 'WARNING',
+                    'msg': '%d log records dropped: logging queue is full'
+                           % (self.dropped - self._reported),
+                })
+                self.queue.put_nowait(report)
+                self._reported = self.dropped
+            self.queue.put_nowait(self.prepare(record))
+        except Full:
+            self.dropped = self.dropped + 1
+        except Exception:
+            self.handleError(record)
+
+
+class QueueListener(object):
+    """Handle the log records of a queue in a background thread.
+
+    :param queue: the queue to get log records from
+    :type queue: :class:`queue.Queue`
+    :param list handlers: the handlers of the log records
+
+    .. versionadded:: 7.0
+
+    As with a logger, a record is handled only by the handlers whose level
+    is lower or equal to the record's level.
+    """
+    def __init__(self, queue, handlers, name='sopel-logging'):
+        self.queue = queue
+        self.handlers = list(handlers)
+        self.name = name
+        self._thread = None
+
+    def start(self):
+        """Start the background thread."""
+        self._thread = threading.Thread(target=self._monitor, name=self.name)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background thread, once every queued record is handled."""
+        if self._thread is None:
+            return
+        # unlike the records, the sentinel must not be dropped
+        self.queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def handle(self, record):
+        """Handle a ``record`` with each of the handlers.
+
+        :param record: the log record
+        :type record: :class:`logging.LogRecord`
+        """
+        for handler in self.handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def _monitor(self):
+        while True:
+            record = self.queue.get()
+            if record is None:
+                break
+            self.handle(record)
+
+
+def _setup_queue(logger, maxsize):
+    # move the logger's handlers to a background thread
+    queue = Queue(maxsize)
+    listener = QueueListener(
+        queue, logger.handlers, name='sopel-logging-%s' % logger.name)
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    queue_handler = QueueHandler(queue)
+    logger.addHandler(queue_handler)
+    listener.start()
+    return logger, queue_handler, listener
+
+
+def shutdown_logging():
+    """Write the pending log records, and stop the logging threads.
+
+    .. versionadded:: 7.0
+
+    This must be called before the process exits without running its exit
+    handlers (with :func:`os._exit`), or the pending log records are lost.
+    It is safe to call more than once. Log records are written directly
+    afterward.
+    """
+    with _LISTENERS_LOCK:
+        while _LISTENERS:
+            logger, queue_handler, listener = _LISTENERS.pop()
+            listener.stop()
+            logger.removeHandler(queue_handler)
+            for handler in listener.handlers:
+                logger.addHandler(handler)
+
+
+atexit.register(shutdown_logging)
+
+
 def setup_logging(settings):
     log_directory = settings.core.logdir
     base_level = settings.core.logging_level or 'WARNING'
@@ -51,6 +366,9 @@ def setup_logging(settings):
                 'format': '%(asctime)s %(message)s',
                 'datefmt': base_datefmt,
             },
+            'raw_json': {
+                '()': RawJSONFormatter,
+            },
         },
         'loggers': {
             # all purpose, sopel root logger
@@ -112,12 +430,25 @@ def setup_logging(settings):
                 'filename': os.path.join(
                     log_directory, settings.basename + '.raw.log'),
                 'when': 'midnight',
-                'formatter': 'raw',
+                'formatter': (
+                    'raw_json'
+                    if settings.core.log_raw_format == 'ndjson'
+                    else 'raw'),
             },
         },
     }
+
+    # the current handlers are about to be closed
+    shutdown_logging()
     dictConfig(logging_config)
 
+    queue_size = settings.core.logging_queue_size
+    if queue_size > 0:
+        with _LISTENERS_LOCK:
+            for name in logging_config['loggers']:
+                _LISTENERS.append(
+                    _setup_queue(logging.getLogger(name), queue_size))
+
 
 def get_logger(name=None):
     """Return a logger for a module, if the name is given.
@@ -17,6 +17,7 @@ __all__ = [
     # decorators
     'action_commands',
     'commands',
+    'depends_on',
     'echo',
     'event',
     'example',
@@ -24,6 +25,7 @@ __all__ = [
     'interval',
     'nickname_commands',
     'output_prefix',
+    'parallel_setup',
     'priority',
     'rate',
     'require_account',
@@ -782,3 +784,62 @@ def output_prefix(prefix):
         function.output_prefix = prefix
         return function
     return add_attribute
+
+
+def parallel_setup(function):
+    """Decorate a plugin's ``setup`` function to run it in parallel.
+
+    By default, Sopel runs plugins' ``setup`` functions one at a time, in
+    the main thread. A ``setup`` that can safely run at the same time as any
+    other plugin's ``setup`` (usually because it does slow network or disk
+    operations, and doesn't depend on other plugins) can be run in a
+    separate thread instead::
+
+        from sopel import module
+
+        @module.parallel_setup
+        def setup(bot):
+            # download or load data
+            pass
+
+    .. seealso::
+
+        The :func:`depends_on` decorator, to set up a plugin after others.
+
+    .. versionadded:: 7.0
+    """
+    function.parallel_setup = True
+    return function
+
+
+def depends_on(*plugin_names):
+    """Decorate a plugin's ``setup`` function to run it after other plugins'.
+
+    :param str plugin_names: one or more plugin names
+
+    The ``setup`` of this plugin will run only once these plugins are loaded
+    and their ``setup`` (if any) has run; if one of them fails, or isn't
+    enabled, this plugin's ``setup`` won't run, and the plugin won't be
+    loaded::
+
+        from sopel import module
+
+        @module.depends_on('safety')
+        def setup(bot):
+            # the safety plugin is set up
+            pass
+
+    With :attr:`~sopel.config.core_section.CoreSection.lazy_plugins`, this
+    plugin and the plugins it depends on are loaded at startup anyway, so
+    their ``setup`` runs in order.
+
+    .. versionadded:: 7.0
+    """
+    def add_attribute(function):
+        if not hasattr(function, 'depends_on'):
+            function.depends_on = []
+        for name in plugin_names:
+            if name not in function.depends_on:
+                function.depends_on.append(name)
+        return function
+    return add_attribute
@@ -247,6 +247,89 @@ def hold_ground(bot, trigger):
             bot.join(channel)
 
 
+def _format_timing(timing):
+    return '{}: {} calls, median {:.3f}s, p95 {:.3f}s, max {:.3f}s'.format(
+        timing.name, timing.count, timing.median, timing.p95, timing.max)
+
+
+@sopel.module.require_privmsg
+@sopel.module.require_admin
+@sopel.module.commands('timings')
+@sopel.module.priority('low')
+@sopel.module.thread(False)
+@sopel.module.example('.timings 10')
+@sopel.module.example('.timings')
+def timings(bot, trigger):
+    """
+    List the slowest and the most frequently called callables (5 of each by
+    default). Can only be done in privmsg by an admin.
+    """
+    limit = trigger.group(3) or '5'
+    if not limit.isdigit() or not int(limit):
+        bot.reply('The number of callables must be a positive integer.')
+        return
+    limit = min(int(limit), 20)
+
+    slowest = bot.callable_timings.get_slowest(limit)
+    if not slowest:
+        bot.say('No callable has been called yet.')
+        return
+
+    bot.say('Slowest callables (by 95th percentile):')
+    for timing in slowest:
+        bot.say(_format_timing(timing))
+
+    bot.say('Most frequently called callables:')
+    for timing in bot.callable_timings.get_most_frequent(limit):
+        bot.say(_format_timing(timing))
+
+
+@sopel.module.require_privmsg
+@sopel.module.require_owner
+@sopel.module.commands('profiler')
+@sopel.module.priority('low')
+@sopel.module.thread(False)
+@sopel.module.example('.profiler start')
+@sopel.module.example('.profiler stop')
+@sopel.module.example('.profiler')
+def profiler(bot, trigger):
+    """
+    Start or stop the sampling profiler, or tell if it is running. When it
+    stops, its samples are written to the log directory. Can only be done in
+    privmsg by the bot owner.
+    """
+    action = (trigger.group(3) or '').lower()
+    sampler = bot.sampling_profiler
+
+    if action == 'start':
+        if sampler.is_running:
+            bot.reply('The profiler is already running.')
+            return
+        bot.start_sampling_profiler()
+        bot.reply('Profiler started (one sample every %.3fs).'
+                  % sampler.interval)
+    elif action == 'stop':
+        if not sampler.is_running:
+            bot.reply('The profiler is not running.')
+            return
+        try:
+            filename = bot.stop_sampling_profiler()
+        except (IOError, OSError) as error:
+            bot.reply('Unable to write the samples: %s' % error)
+            return
+        bot.reply('Profiler stopped: %d samples written to %s'
+                  % (sampler.sample_count, filename))
+    elif not action:
+        if sampler.is_running:
+            bot.reply('The profiler is running, %d samples taken so far.'
+                      % sampler.sample_count)
+        else:
+            bot.reply('The profiler is not running.')
+    else:
+        bot.reply('Usage: {}profiler [start|stop]'.format(
+            bot.config.core.help_prefix))
+
+
 @sopel.module.require_privmsg
 @sopel.module.require_admin
 @sopel.module.commands('mode')
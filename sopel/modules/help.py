@@ -12,32 +12,22 @@ https://sopel.chat
 """
 from __future__ import unicode_literals, absolute_import, print_function, division
 
-import re
-import collections
+import hashlib
 import logging
+import re
 import socket
-import textwrap
 
 import requests
 
 from sopel.config.types import ChoiceAttribute, ValidatedAttribute, StaticSection
 from sopel.module import commands, rule, example, priority
-from sopel.tools import SopelMemory
 
 
-SETTING_CACHE_NAMESPACE = 'help-setting-cache'  # Set top-level memory key name
 LOGGER = logging.getLogger(__name__)
 
-# Settings that should require the help listing to be regenerated, or
-# re-POSTed to paste, if they are changed during runtime.
-# Keys are module names, and values are lists of setting names
-# specific to that module.
-TRACKED_SETTINGS = {
-    'help': [
-        'output',
-        'show_server_host',
-    ]
-}
+# Where the URL of the posted command listing is cached
+CACHE_MEMORY_KEY = 'command-list'
+CACHE_DB_KEY = 'command_list'
 
 
 class PostingException(Exception):
@@ -215,35 +205,43 @@ def configure(config):
 def setup(bot):
     bot.config.define_section('help', HelpSection)
 
-    # Initialize memory
-    if SETTING_CACHE_NAMESPACE not in bot.memory:
-        bot.memory[SETTING_CACHE_NAMESPACE] = SopelMemory()
 
-    # Initialize settings cache
-    for section in TRACKED_SETTINGS:
-        if section not in bot.memory[SETTING_CACHE_NAMESPACE]:
-            bot.memory[SETTING_CACHE_NAMESPACE][section] = SopelMemory()
+def get_list_key(bot, msg):
+    """Get the key of a command listing, to find its URL if it was posted.
 
-    update_cache(bot)  # Populate cache
+    :param bot: the bot
+    :param str msg: the command listing, as it is posted
+    :return: a hash of the pastebin provider and of the listing
 
-    bot.config.define_section('help', HelpSection)
+    The listing includes its header (see :func:`format_list`), so a listing
+    is posted again when the settings that change it change.
+    """
+    content = '\n'.join([bot.config.help.output, msg])
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
 
 
-def update_cache(bot):
-    for section, setting_names_list in TRACKED_SETTINGS.items():
-        for setting_name in setting_names_list:
-            bot.memory[SETTING_CACHE_NAMESPACE][section][setting_name] = getattr(getattr(bot.config, section), setting_name)
+def get_cached_url(bot, key):
+    """Get the URL of the command listing with this ``key``, if posted.
 
+    The URL is kept in the bot's memory, and in its database, so it
+    survives a restart.
+    """
+    cached = bot.memory.get(CACHE_MEMORY_KEY)
+    if cached is None:
+        cached = bot.db.get_plugin_value('help', CACHE_DB_KEY) or {}
+        bot.memory[CACHE_MEMORY_KEY] = cached
+    if cached.get('key') == key:
+        return cached.get('url')
+    return None
 
-def is_cache_valid(bot):
-    for section, setting_names_list in TRACKED_SETTINGS.items():
-        for setting_name in setting_names_list:
-            if bot.memory[SETTING_CACHE_NAMESPACE][section][setting_name] != getattr(getattr(bot.config, section), setting_name):
-                return False
-    return True
 
+def set_cached_url(bot, key, url):
+    cached = {'key': key, 'url': url}
+    bot.memory[CACHE_MEMORY_KEY] = cached
+    bot.db.set_plugin_value('help', CACHE_DB_KEY, cached)
 
-@rule('$nick' r'(?i)(help|doc) +([A-Za-z]+)(?:\?+)?$')
+
+@rule(r'(?i)$nick' r'(help|doc) +([A-Za-z]+)(?:\?+)?$')
 @example('.help tell')
 @commands('help', 'commands')
 @priority('low')
@@ -266,71 +264,59 @@ def help(bot, trigger):
         # number of lines of help to show
         threshold = 3
 
-        if name in bot.doc:
-            # count lines we're going to send
-            # lines in command docstring, plus one line for example(s) if present (they're sent all on one line)
-            if len(bot.doc[name][0]) + int(bool(bot.doc[name][1])) > threshold:
-                if trigger.nick != trigger.sender:  # don't say that if asked in private
-                    bot.reply('The documentation for this command is too long; '
-                              'I\'m sending it to you in a private message.')
-
-                def msgfun(l):
-                    bot.say(l, trigger.nick)
-            else:
-                msgfun = respond
-
-            for line in bot.doc[name][0]:
-                msgfun(line)
-            if bot.doc[name][1]:
-                # Build a nice, grammatically-correct list of examples
-                examples = ', '.join(bot.doc[name][1][:-2] + [' or '.join(bot.doc[name][1][-2:])])
-                msgfun('e.g. ' + examples)
-    else:
-        # This'll probably catch most cases, without having to spend the time
-        # actually creating the list first. Maybe worth storing the link and a
-        # heuristic in the DB, too, so it persists across restarts. Would need a
-        # command to regenerate, too...
-        if (
-            'command-list' in bot.memory and
-            bot.memory['command-list'][0] == len(bot.command_groups) and
-            is_cache_valid(bot)
-        ):
-            url = bot.memory['command-list'][1]
+        lines = bot.command_index.get_doc(name)
+        if lines is None:
+            matches = bot.command_index.find(name)
+            if matches:
+                respond("I don't know the {0} command. Did you mean {1}?"
+                        .format(name, ' or '.join(
+                            bot.config.core.help_prefix + match
+                            for match in matches)))
+            return
+
+        # lines in command docstring, plus one line for example(s) if present
+        # (they're sent all on one line)
+        if len(lines) > threshold:
+            if trigger.nick != trigger.sender:  # don't say that if asked in private
+                bot.reply('The documentation for this command is too long; '
+                          'I\'m sending it to you in a private message.')
+
+            def msgfun(l):
+                bot.say(l, trigger.nick)
         else:
+            msgfun = respond
+
+        for line in lines:
+            msgfun(line)
+    else:
+        msg = format_list(bot, bot.command_index.get_listing())
+        key = get_list_key(bot, msg)
+        url = get_cached_url(bot, key)
+        if not url:
             respond("Hang on, I'm creating a list.")
-            msgs = []
-
-            name_length = max(6, max(len(k) for k in bot.command_groups.keys()))
-            for category, cmds in collections.OrderedDict(sorted(bot.command_groups.items())).items():
-                category = category.upper().ljust(name_length)
-                cmds = set(cmds)  # remove duplicates
-                cmds = '  '.join(cmds)
-                msg = category + '  ' + cmds
-                indent = ' ' * (name_length + 2)
-                # Honestly not sure why this is a list here
-                msgs.append('\n'.join(textwrap.wrap(msg, subsequent_indent=indent)))
-
-            url = create_list(bot, '\n\n'.join(msgs))
+            url = post_list(bot, msg)
             if not url:
                 return
-            bot.memory['command-list'] = (len(bot.command_groups), url)
-            update_cache(bot)
+            set_cached_url(bot, key, url)
         respond("I've posted a list of my commands at {0} - You can see "
                 "more info about any of these commands by doing {1}help "
                 "<command> (e.g. {1}help time)"
                 .format(url, bot.config.core.help_prefix))
 
 
-def create_list(bot, msg):
-    """Creates & uploads the command list.
-
-    Returns the URL from the chosen pastebin provider.
-    """
-    msg = 'Command listing for {}{}\n\n{}'.format(
+def format_list(bot, msg):
+    """Add the header of the command listing to ``msg``."""
+    return 'Command listing for {}{}\n\n{}'.format(
         bot.nick,
         ('@' + bot.config.core.host) if bot.config.help.show_server_host else '',
         msg)
 
+
+def post_list(bot, msg):
+    """Upload the command listing ``msg``.
+
+    Returns the URL from the chosen pastebin provider.
+    """
     try:
         result = PASTEBIN_PROVIDERS[bot.config.help.output](msg)
     except PostingException:
@@ -340,7 +326,7 @@ def create_list(bot, msg):
     return result
 
 
-@rule('$nick' r'(?i)help(?:[?!]+)?$')
+@rule(r'(?i)$nick' r'help(?:[?!]+)?$')
 @priority('low')
 def help2(bot, trigger):
     response = (
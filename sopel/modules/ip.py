@@ -10,31 +10,27 @@ https://sopel.chat
 
 from __future__ import unicode_literals, absolute_import, print_function, division
 
+from contextlib import closing
 import logging
 import os
+import shutil
 import socket
 import tarfile
 
 import geoip2.database
 
 from sopel.config.types import FilenameAttribute, StaticSection
-from sopel.module import commands, example
-
-urlretrieve = None
-try:
-    from urllib import urlretrieve
-except ImportError:
-    try:
-        # urlretrieve has been put under urllib.request in Python 3.
-        # It's also deprecated so this should probably be replaced with
-        # urllib2.
-        from urllib.request import urlretrieve
-    except ImportError:
-        pass
+from sopel.module import commands, example, parallel_setup
 
 
 LOGGER = logging.getLogger(__name__)
 
+GEOLITE_URLS = {
+    'GeoLite2-City.mmdb': 'https://geolite.maxmind.com/download/geoip/database/GeoLite2-City.tar.gz',
+    'GeoLite2-ASN.mmdb': 'https://geolite.maxmind.com/download/geoip/database/GeoLite2-ASN.tar.gz',
+}
+GEOLITE_MAX_AGE = 30 * 24 * 60 * 60  # 30 days
+
 
 class GeoipSection(StaticSection):
     GeoIP_db_path = FilenameAttribute('GeoIP_db_path', directory=True)
@@ -52,62 +48,80 @@ def configure(config):
                                 'Path of the GeoIP db files')
 
 
+@parallel_setup
 def setup(bot):
     bot.config.define_section('ip', GeoipSection)
 
+    if _find_local_geoip_db(bot.config):
+        return
+
+    # serve the last downloaded copy, and refresh it in the background
+    for filename, url in GEOLITE_URLS.items():
+        bot.datasets.register(
+            'ip.' + filename,
+            url,
+            os.path.join(bot.config.core.homedir, filename),
+            GEOLITE_MAX_AGE,
+            process=_decompress)
+
+
+def shutdown(bot):
+    for filename in GEOLITE_URLS:
+        bot.datasets.unregister('ip.' + filename)
 
-def _decompress(source, target, delete_after_decompression=True):
+
+def _has_geoip_db(path):
+    return all(
+        os.path.isfile(os.path.join(path, filename))
+        for filename in GEOLITE_URLS)
+
+
+def _decompress(source, target):
     """Decompress just the database from the archive"""
-    # https://stackoverflow.com/a/16452962
-    tar = tarfile.open(source)
-    for member in tar.getmembers():
-        if ".mmdb" in member.name:
-            member.name = os.path.basename(member.name)
-            tar.extract(member, target)
-    if delete_after_decompression:
-        os.remove(source)
+    with closing(tarfile.open(source)) as tar:
+        for member in tar.getmembers():
+            if member.name.endswith('.mmdb'):
+                database = tar.extractfile(member)
+                with closing(database), open(target, 'wb') as fd:
+                    shutil.copyfileobj(database, fd)
+                return
 
+    raise ValueError('No GeoIP database found in %s' % source)
 
-def _find_geoip_db(bot):
-    """Find the GeoIP database"""
-    config = bot.config
+
+def _find_local_geoip_db(config):
+    """Find a GeoIP database that isn't downloaded by the bot"""
     if config.ip.GeoIP_db_path:
-        cities_db = os.path.join(config.ip.GeoIP_db_path, 'GeoLite2-City.mmdb')
-        ipasnum_db = os.path.join(config.ip.GeoIP_db_path, 'GeoLite2-ASN.mmdb')
-        if (os.path.isfile(cities_db) and os.path.isfile(ipasnum_db)):
+        if _has_geoip_db(config.ip.GeoIP_db_path):
             return config.ip.GeoIP_db_path
         else:
             LOGGER.warning(
                 'GeoIP path configured but DB not found in configured path')
 
-    if (os.path.isfile(os.path.join(config.core.homedir, 'GeoLite2-City.mmdb')) and
-            os.path.isfile(os.path.join(config.core.homedir, 'GeoLite2-ASN.mmdb'))):
-        return config.core.homedir
-    elif (os.path.isfile(os.path.join('/usr/share/GeoIP', 'GeoLite2-City.mmdb')) and
-            os.path.isfile(os.path.join('/usr/share/GeoIP', 'GeoLite2-ASN.mmdb'))):
+    if (not _has_geoip_db(config.core.homedir) and
+            _has_geoip_db('/usr/share/GeoIP')):
         return '/usr/share/GeoIP'
-    elif urlretrieve:
-        LOGGER.info('Downloading GeoIP database')
-        bot.say('Downloading GeoIP database, please wait...')
-        geolite_urls = [
-            'https://geolite.maxmind.com/download/geoip/database/GeoLite2-City.tar.gz',
-            'https://geolite.maxmind.com/download/geoip/database/GeoLite2-ASN.tar.gz'
-        ]
-        for url in geolite_urls:
-            LOGGER.debug('GeoIP Source URL: %s', url)
-            full_path = os.path.join(config.core.homedir, url.split("/")[-1])
-            urlretrieve(url, full_path)
-            _decompress(full_path, config.core.homedir)
+
+    return None
+
+
+def _find_geoip_db(bot):
+    """Find the GeoIP database"""
+    path = _find_local_geoip_db(bot.config)
+    if path:
+        return path
+
+    if _has_geoip_db(bot.config.core.homedir):
         return bot.config.core.homedir
-    else:
-        return False
+
+    return False
 
 
 @commands('iplookup', 'ip')
 @example('.ip 8.8.8.8',
          r'\[IP\/Host Lookup\] Hostname: \S*dns\S*\.google\S* \| Location: United States \| ISP: AS15169 Google LLC',
          re=True,
-         ignore='Downloading GeoIP database, please wait...',
+         ignore='Downloading GeoIP database, please try again later.',
          online=True)
 def ip(bot, trigger):
     """IP Lookup tool"""
@@ -133,7 +147,14 @@ def ip(bot, trigger):
             return bot.say("I\'m not aware of this user.")
 
     db_path = _find_geoip_db(bot)
-    if db_path is False:
+    if db_path is False and any(
+            'ip.' + filename in bot.datasets for filename in GEOLITE_URLS):
+        LOGGER.info('GeoIP database not downloaded yet')
+        bot.say('Downloading GeoIP database, please try again later.')
+        for filename in GEOLITE_URLS:
+            bot.datasets.refresh('ip.' + filename)
+        return False
+    elif db_path is False:
         LOGGER.error('Can\'t find (or download) usable GeoIP database.')
         bot.say('Sorry, I don\'t have a GeoIP database to use for this lookup.')
         return False
@@ -9,10 +9,12 @@ https://sopel.chat
 """
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-import codecs
 import collections
+import io
+import json
 import os
 import re
+import threading
 import time
 from string import punctuation, whitespace
 
@@ -23,6 +25,8 @@ from sopel.modules.url import find_title
 
 
 UNTITLED_MEETING = "Untitled meeting"
+SLUG_SEPARATORS = re.compile("[%s]" % re.escape(punctuation + whitespace))
+FLUSH_INTERVAL = 5
 
 
 class MeetbotSection(StaticSection):
@@ -40,6 +44,15 @@ class MeetbotSection(StaticSection):
     )
     """Base URL for the meeting logs directory"""
 
+    meeting_log_json = ValidatedAttribute(
+        "meeting_log_json", bool, default=False
+    )
+    """Also write a structured log of each meeting, as JSON lines
+
+    Each line is an object with the ``time`` of the event (a timestamp), its
+    ``event`` (``start``, ``message``, ``subject``, ``action``, etc.), the
+    ``nick`` that caused it, and its ``text``."""
+
 
 def configure(config):
     """
@@ -47,6 +60,7 @@ def configure(config):
     | ---- | ------- | ------- |
     | meeting\\_log\\_path | /home/sopel/www/meetings | Path to meeting logs storage directory (should be an absolute path, accessible on a webserver) |
     | meeting\\_log\\_baseurl | http://example.com/~sopel/meetings | Base URL for the meeting logs directory |
+    | meeting\\_log\\_json | False | Also write a structured log of each meeting, as JSON lines |
     """
     config.define_section("meetbot", MeetbotSection)
     config.meetbot.configure_setting(
@@ -55,50 +69,158 @@ def configure(config):
     config.meetbot.configure_setting(
         "meeting_log_baseurl", "Enter the base URL for the meeting logs."
     )
+    config.meetbot.configure_setting(
+        "meeting_log_json", "Also write a structured log (as JSON lines)?"
+    )
 
 
 def setup(bot):
     bot.config.define_section("meetbot", MeetbotSection)
+    # each bot has its own meetings, even in the same process
+    bot.memory["meetbot_meetings"] = collections.defaultdict(dict)
+    bot.memory["meetbot_actions"] = {}
+    bot.memory["meetbot_logs"] = {}
+    bot.memory["meetbot_logs_lock"] = threading.Lock()
 
 
-meetings_dict = collections.defaultdict(dict)  # Saves metadata about currently running meetings
-"""
-meetings_dict is a 2D dict.
-
-Each meeting should have:
-channel
-time of start
-head (can stop the meeting, plus all abilities of chairs)
-chairs (can add infolines to the logs)
-title
-current subject
-comments (what people who aren't voiced want to add)
-
-Using channel as the meeting ID as there can't be more than one meeting in a
-channel at the same time.
-"""
-
-# To be defined on meeting start as part of sanity checks, used by logging
-# functions so we don't have to pass them bot
-meeting_log_path = ""
-meeting_log_baseurl = ""
+def shutdown(bot):
+    # write what's buffered: the meetings can't go on without the bot
+    meeting_logs = bot.memory.get("meetbot_logs")
+    if meeting_logs is None:
+        return
+    with bot.memory["meetbot_logs_lock"]:
+        logs = list(meeting_logs.values())
+        meeting_logs.clear()
+    for meeting_log in logs:
+        meeting_log.close()
+
+
+# The state of the meetings is stored in each bot's memory, as bots running in
+# the same process share this module:
+#
+# meetbot_meetings saves metadata about currently running meetings; it is a 2D
+# dict. Each meeting should have:
+#   channel
+#   time of start
+#   head (can stop the meeting, plus all abilities of chairs)
+#   chairs (can add infolines to the logs)
+#   title
+#   current subject
+#   comments (what people who aren't voiced want to add)
+#   path and base URL of its logs (defined on meeting start as part of sanity
+#   checks)
+#
+# Using channel as the meeting ID as there can't be more than one meeting in a
+# channel at the same time.
+#
+# meetbot_actions is a dict of channels to the actions that have been created
+# in them. This way we can have .listactions spit them back out later on.
+#
+# meetbot_logs is a dict of channels to the MeetingLog of their meeting,
+# guarded by meetbot_logs_lock.
+
+
+class MeetingLog(object):
+    """Write the logs of a meeting
+
+    The files are opened at the first write, and kept open (with buffered
+    writes) until the meeting ends: call :meth:`flush` to write what's
+    buffered, and :meth:`close` at the end of the meeting. Once closed,
+    nothing is written anymore.
+    """
 
-# A dict of channels to the actions that have been created in them. This way
-# we can have .listactions spit them back out later on.
-meeting_actions = {}
+    def __init__(self, directory, name, json_log=False):
+        self.name = name
+        self.filenames = {
+            "log": os.path.join(directory, name + ".log"),
+            "html": os.path.join(directory, name + ".html"),
+        }
+        if json_log:
+            self.filenames["json"] = os.path.join(directory, name + ".json")
+        self._files = {}
+        self._dirty = False
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def write(self, kind, text):
+        """Write ``text`` to the ``kind`` log (``log``, ``html``, or ``json``)
+
+        Nothing is written to a log that isn't enabled."""
+        if kind not in self.filenames:
+            return
+        with self._lock:
+            if self._closed:
+                return  # the meeting has ended
+            logfile = self._files.get(kind)
+            if logfile is None:
+                # newline="": lines are written exactly as they are
+                logfile = self._files[kind] = io.open(
+                    self.filenames[kind], "a", encoding="utf-8", newline=""
+                )
+            logfile.write(text)
+            self._dirty = True
+
+    def write_json(self, event, nick, text):
+        """Write an ``event`` to the JSON log, if enabled"""
+        if "json" not in self.filenames:
+            return
+        self.write("json", json.dumps({
+            "time": round(time.time(), 3),
+            "event": event,
+            "nick": nick,
+            "text": text,
+        }, sort_keys=True) + "\n")
+
+    def flush(self):
+        """Write what's buffered to the files"""
+        with self._lock:
+            if not self._dirty:
+                return
+            for logfile in self._files.values():
+                logfile.flush()
+            self._dirty = False
+
+    def close(self):
+        """Write what's buffered, and close the files"""
+        with self._lock:
+            for logfile in self._files.values():
+                logfile.close()
+            self._files = {}
+            self._dirty = False
+            self._closed = True
+
+
+def get_meeting_log(bot, channel):
+    """Get the MeetingLog of the meeting in ``channel``
+
+    Return ``None`` if there is no meeting running in ``channel``."""
+    meetings_dict = bot.memory["meetbot_meetings"]
+    meeting_logs = bot.memory["meetbot_logs"]
+    with bot.memory["meetbot_logs_lock"]:
+        meeting_log = meeting_logs.get(channel)
+        if meeting_log is None:
+            if not is_meeting_running(bot, channel):
+                # e.g. the meeting has just ended
+                return None
+            meeting_log = meeting_logs[channel] = MeetingLog(
+                meetings_dict[channel]["log_path"] + channel,
+                figure_logfile_name(bot, channel),
+                meetings_dict[channel].get("json_log", False),
+            )
+    return meeting_log
 
 
 # Get the logfile name for the meeting in the requested channel
 # Used by all logging functions and web path
-def figure_logfile_name(channel):
+def figure_logfile_name(bot, channel):
+    meetings_dict = bot.memory["meetbot_meetings"]
     if meetings_dict[channel]["title"] == UNTITLED_MEETING:
         name = "untitled"
     else:
         name = meetings_dict[channel]["title"]
     # Real simple sluggifying.
     # May not handle unicode or unprintables well. Close enough.
-    for character in punctuation + whitespace:
-        name = name.replace(character, "-")
+    name = SLUG_SEPARATORS.sub("-", name)
     name = name.strip("-")
     timestring = time.strftime(
         "%Y-%m-%d-%H:%M", time.gmtime(meetings_dict[channel]["start"])
@@ -108,74 +230,87 @@ def figure_logfile_name(channel):
 
 
 # Start HTML log
-def log_html_start(channel):
-    logfile_filename = os.path.join(
-        meeting_log_path + channel, figure_logfile_name(channel) + ".html"
-    )
-    logfile = codecs.open(logfile_filename, "a", encoding="utf-8")
+def log_html_start(bot, channel):
+    meetings_dict = bot.memory["meetbot_meetings"]
     timestring = time.strftime(
         "%Y-%m-%d %H:%M", time.gmtime(meetings_dict[channel]["start"])
     )
     title = "%s at %s, %s" % (meetings_dict[channel]["title"], channel, timestring)
-    logfile.write(
+    meeting_log = get_meeting_log(bot, channel)
+    if meeting_log is None:
+        return
+    meeting_log.write(
+        "html",
         (
             "<!doctype html><html><head><meta charset='utf-8'>\n"
             "<title>{title}</title>\n</head><body>\n<h1>{title}</h1>\n"
         ).format(title=title)
     )
-    logfile.write(
+    meeting_log.write(
+        "html",
         "<h4>Meeting started by %s</h4><ul>\n" % meetings_dict[channel]["head"]
     )
-    logfile.close()
 
 
 # Write a list item in the HTML log
-def log_html_listitem(item, channel):
-    logfile_filename = os.path.join(
-        meeting_log_path + channel, figure_logfile_name(channel) + ".html"
-    )
-    logfile = codecs.open(logfile_filename, "a", encoding="utf-8")
-    logfile.write("<li>" + item + "</li>\n")
-    logfile.close()
+def log_html_listitem(bot, item, channel):
+    meeting_log = get_meeting_log(bot, channel)
+    if meeting_log is not None:
+        meeting_log.write("html", "<li>" + item + "</li>\n")
 
 
 # End the HTML log
-def log_html_end(channel):
-    logfile_filename = os.path.join(
-        meeting_log_path + channel, figure_logfile_name(channel) + ".html"
-    )
-    logfile = codecs.open(logfile_filename, "a", encoding="utf-8")
+def log_html_end(bot, channel):
+    meeting_log = get_meeting_log(bot, channel)
+    if meeting_log is None:
+        return
     current_time = time.strftime("%H:%M:%S", time.gmtime())
-    logfile.write("</ul>\n<h4>Meeting ended at %s UTC</h4>\n" % current_time)
-    plainlog_url = meeting_log_baseurl + tools.web.quote(
-        channel + "/" + figure_logfile_name(channel) + ".log"
+    meeting_log.write(
+        "html", "</ul>\n<h4>Meeting ended at %s UTC</h4>\n" % current_time
+    )
+    plainlog_url = bot.memory["meetbot_meetings"][channel]["log_baseurl"] + tools.web.quote(
+        channel + "/" + meeting_log.name + ".log"
     )
-    logfile.write('<a href="%s">Full log</a>' % plainlog_url)
-    logfile.write("\n</body>\n</html>\n")
-    logfile.close()
+    meeting_log.write("html", '<a href="%s">Full log</a>' % plainlog_url)
+    meeting_log.write("html", "\n</body>\n</html>\n")
 
 
 # Write a string to the plain text log
-def log_plain(item, channel):
-    logfile_filename = os.path.join(
-        meeting_log_path + channel, figure_logfile_name(channel) + ".log"
-    )
-    logfile = codecs.open(logfile_filename, "a", encoding="utf-8")
+def log_plain(bot, item, channel):
+    meeting_log = get_meeting_log(bot, channel)
+    if meeting_log is None:
+        return
     current_time = time.strftime("%H:%M:%S", time.gmtime())
-    logfile.write("[" + current_time + "] " + item + "\r\n")
-    logfile.close()
+    meeting_log.write("log", "[" + current_time + "] " + item + "\r\n")
+
+
+# Write an event to the JSON log, if enabled
+def log_json(bot, event, nick, text, channel):
+    meeting_log = get_meeting_log(bot, channel)
+    if meeting_log is not None:
+        meeting_log.write_json(event, nick, text)
+
+
+# Write what's buffered in the logs of the running meetings
+@module.interval(FLUSH_INTERVAL)
+def flush_meeting_logs(bot):
+    with bot.memory["meetbot_logs_lock"]:
+        logs = list(bot.memory["meetbot_logs"].values())
+    for meeting_log in logs:
+        meeting_log.flush()
 
 
 # Check if a meeting is currently running
-def is_meeting_running(channel):
+def is_meeting_running(bot, channel):
     try:
-        return meetings_dict[channel]["running"]
+        return bot.memory["meetbot_meetings"][channel]["running"]
     except KeyError:
         return False
 
 
 # Check if nick is a chair or head of the meeting
-def is_chair(nick, channel):
+def is_chair(bot, nick, channel):
+    meetings_dict = bot.memory["meetbot_meetings"]
     try:
         return (
             nick.lower() == meetings_dict[channel]["head"] or
@@ -195,7 +330,8 @@ def startmeeting(bot, trigger):
     Start a meeting.\
     See [meetbot module usage]({% link _usage/meetbot-module.md %})
     """
-    if is_meeting_running(trigger.sender):
+    meetings_dict = bot.memory["meetbot_meetings"]
+    if is_meeting_running(bot, trigger.sender):
         bot.say("There is already an active meeting here!")
         return
     # Start the meeting
@@ -207,17 +343,18 @@ def startmeeting(bot, trigger):
     meetings_dict[trigger.sender]["head"] = trigger.nick.lower()
     meetings_dict[trigger.sender]["running"] = True
     meetings_dict[trigger.sender]["comments"] = []
+    meetings_dict[trigger.sender]["json_log"] = bot.config.meetbot.meeting_log_json
 
     # Set up paths and URLs
-    global meeting_log_path
     meeting_log_path = bot.config.meetbot.meeting_log_path
     if not meeting_log_path.endswith(os.sep):
         meeting_log_path += os.sep
+    meetings_dict[trigger.sender]["log_path"] = meeting_log_path
 
-    global meeting_log_baseurl
     meeting_log_baseurl = bot.config.meetbot.meeting_log_baseurl
     if not meeting_log_baseurl.endswith("/"):
         meeting_log_baseurl = meeting_log_baseurl + "/"
+    meetings_dict[trigger.sender]["log_baseurl"] = meeting_log_baseurl
 
     channel_log_path = meeting_log_path + trigger.sender
     if not os.path.isdir(channel_log_path):
@@ -230,9 +367,13 @@ def startmeeting(bot, trigger):
             meetings_dict[trigger.sender] = collections.defaultdict(dict)
             raise
     # Okay, meeting started!
-    log_plain("Meeting started by " + trigger.nick.lower(), trigger.sender)
-    log_html_start(trigger.sender)
-    meeting_actions[trigger.sender] = []
+    log_plain(bot, "Meeting started by " + trigger.nick.lower(), trigger.sender)
+    log_html_start(bot, trigger.sender)
+    log_json(
+        bot,
+        "start", trigger.nick, meetings_dict[trigger.sender]["title"], trigger.sender
+    )
+    bot.memory["meetbot_actions"][trigger.sender] = []
     bot.say(
         (
             formatting.bold("Meeting started!") + " use {0}action, {0}agreed, "
@@ -256,26 +397,25 @@ def meetingsubject(bot, trigger):
     Change the meeting subject.\
     See [meetbot module usage]({% link _usage/meetbot-module.md %})
     """
-    if not is_meeting_running(trigger.sender):
+    if not is_meeting_running(bot, trigger.sender):
         bot.say("There is no active meeting")
         return
     if not trigger.group(2):
         bot.say("What is the subject?")
         return
-    if not is_chair(trigger.nick, trigger.sender):
+    if not is_chair(bot, trigger.nick, trigger.sender):
         bot.say("Only meeting head or chairs can do that")
         return
-    meetings_dict[trigger.sender]["current_subject"] = trigger.group(2)
-    logfile_filename = os.path.join(
-        meeting_log_path + trigger.sender, figure_logfile_name(trigger.sender) + ".html"
+    bot.memory["meetbot_meetings"][trigger.sender]["current_subject"] = trigger.group(2)
+    get_meeting_log(bot, trigger.sender).write(
+        "html", "</ul><h3>" + trigger.group(2) + "</h3><ul>"
     )
-    logfile = codecs.open(logfile_filename, "a", encoding="utf-8")
-    logfile.write("</ul><h3>" + trigger.group(2) + "</h3><ul>")
-    logfile.close()
     log_plain(
+        bot,
         "Current subject: {} (set by {})".format(trigger.group(2), trigger.nick),
         trigger.sender,
     )
+    log_json(bot, "subject", trigger.nick, trigger.group(2), trigger.sender)
     bot.say(formatting.bold("Current subject:") + " " + trigger.group(2))
 
 
@@ -287,29 +427,37 @@ def endmeeting(bot, trigger):
     End a meeting.\
     See [meetbot module usage]({% link _usage/meetbot-module.md %})
     """
-    if not is_meeting_running(trigger.sender):
+    if not is_meeting_running(bot, trigger.sender):
         bot.say("There is no active meeting")
         return
-    if not is_chair(trigger.nick, trigger.sender):
+    if not is_chair(bot, trigger.nick, trigger.sender):
         bot.say("Only meeting head or chairs can do that")
         return
+    meetings_dict = bot.memory["meetbot_meetings"]
     meeting_length = time.time() - meetings_dict[trigger.sender]["start"]
     bot.say(
         formatting.bold("Meeting ended!") +
         " Total meeting length %d minutes" % (meeting_length // 60)
     )
-    log_html_end(trigger.sender)
-    htmllog_url = meeting_log_baseurl + tools.web.quote(
-        trigger.sender + "/" + figure_logfile_name(trigger.sender) + ".html"
+    log_html_end(bot, trigger.sender)
+    htmllog_url = meetings_dict[trigger.sender]["log_baseurl"] + tools.web.quote(
+        trigger.sender + "/" + figure_logfile_name(bot, trigger.sender) + ".html"
     )
     log_plain(
+        bot,
         "Meeting ended by %s. Total meeting length: %d minutes"
         % (trigger.nick, meeting_length // 60),
         trigger.sender,
     )
+    log_json(bot, "end", trigger.nick, None, trigger.sender)
+    with bot.memory["meetbot_logs_lock"]:
+        # from now on, messages in the channel are not logged anymore
+        meetings_dict[trigger.sender] = collections.defaultdict(dict)
+        meeting_log = bot.memory["meetbot_logs"].pop(trigger.sender, None)
+    if meeting_log is not None:
+        meeting_log.close()
     bot.say("Meeting minutes: " + htmllog_url)
-    meetings_dict[trigger.sender] = collections.defaultdict(dict)
-    del meeting_actions[trigger.sender]
+    del bot.memory["meetbot_actions"][trigger.sender]
 
 
 # Set meeting chairs (people who can control the meeting)
@@ -320,7 +468,7 @@ def chairs(bot, trigger):
     Set the meeting chairs.\
     See [meetbot module usage]({% link _usage/meetbot-module.md %})
     """
-    if not is_meeting_running(trigger.sender):
+    if not is_meeting_running(bot, trigger.sender):
         bot.say("There is no active meeting")
         return
     if not trigger.group(2):
@@ -330,11 +478,14 @@ def chairs(bot, trigger):
             )
         )
         return
+    meetings_dict = bot.memory["meetbot_meetings"]
     if trigger.nick.lower() == meetings_dict[trigger.sender]["head"]:
         meetings_dict[trigger.sender]["chairs"] = trigger.group(2).lower().split(" ")
         chairs_readable = trigger.group(2).lower().replace(" ", ", ")
-        log_plain("Meeting chairs are: " + chairs_readable, trigger.sender)
+        log_plain(bot, "Meeting chairs are: " + chairs_readable, trigger.sender)
+        log_json(bot, "chairs", trigger.nick, chairs_readable, trigger.sender)
         log_html_listitem(
+            bot,
             "<span style='font-weight: bold'>Meeting chairs are:</span> %s"
             % chairs_readable,
             trigger.sender,
@@ -352,7 +503,7 @@ def meetingaction(bot, trigger):
     Log an action in the meeting log.\
     See [meetbot module usage]({% link _usage/meetbot-module.md %})
     """
-    if not is_meeting_running(trigger.sender):
+    if not is_meeting_running(bot, trigger.sender):
         bot.say("There is no active meeting")
         return
     if not trigger.group(2):
@@ -360,25 +511,27 @@ def meetingaction(bot, trigger):
             "Try `{}action Bob will do something`".format(bot.config.core.help_prefix)
         )
         return
-    if not is_chair(trigger.nick, trigger.sender):
+    if not is_chair(bot, trigger.nick, trigger.sender):
         bot.say("Only meeting head or chairs can do that")
         return
-    log_plain("ACTION: " + trigger.group(2), trigger.sender)
+    log_plain(bot, "ACTION: " + trigger.group(2), trigger.sender)
+    log_json(bot, "action", trigger.nick, trigger.group(2), trigger.sender)
     log_html_listitem(
+        bot,
         "<span style='font-weight: bold'>Action: </span>" + trigger.group(2),
         trigger.sender,
     )
-    meeting_actions[trigger.sender].append(trigger.group(2))
+    bot.memory["meetbot_actions"][trigger.sender].append(trigger.group(2))
     bot.say(formatting.bold("ACTION:") + " " + trigger.group(2))
 
 
 @module.commands("listactions")
 @module.example(".listactions")
 def listactions(bot, trigger):
-    if not is_meeting_running(trigger.sender):
+    if not is_meeting_running(bot, trigger.sender):
         bot.say("There is no active meeting")
         return
-    for action in meeting_actions[trigger.sender]:
+    for action in bot.memory["meetbot_actions"][trigger.sender]:
         bot.say(formatting.bold("ACTION:") + " " + action)
 
 
@@ -390,17 +543,19 @@ def meetingagreed(bot, trigger):
     Log an agreement in the meeting log.\
     See [meetbot module usage]({% link _usage/meetbot-module.md %})
     """
-    if not is_meeting_running(trigger.sender):
+    if not is_meeting_running(bot, trigger.sender):
         bot.say("There is no active meeting")
         return
     if not trigger.group(2):
         bot.say("Try `{}agreed Bowties are cool`".format(bot.config.core.help_prefix))
         return
-    if not is_chair(trigger.nick, trigger.sender):
+    if not is_chair(bot, trigger.nick, trigger.sender):
         bot.say("Only meeting head or chairs can do that")
         return
-    log_plain("AGREED: " + trigger.group(2), trigger.sender)
+    log_plain(bot, "AGREED: " + trigger.group(2), trigger.sender)
+    log_json(bot, "agreed", trigger.nick, trigger.group(2), trigger.sender)
     log_html_listitem(
+        bot,
         "<span style='font-weight: bold'>Agreed: </span>" + trigger.group(2),
         trigger.sender,
     )
@@ -415,7 +570,7 @@ def meetinglink(bot, trigger):
     Log a link in the meeing log.\
     See [meetbot module usage]({% link _usage/meetbot-module.md %})
     """
-    if not is_meeting_running(trigger.sender):
+    if not is_meeting_running(bot, trigger.sender):
         bot.say("There is no active meeting")
         return
     if not trigger.group(2):
@@ -425,7 +580,7 @@ def meetinglink(bot, trigger):
             )
         )
         return
-    if not is_chair(trigger.nick, trigger.sender):
+    if not is_chair(bot, trigger.nick, trigger.sender):
         bot.say("Only meeting head or chairs can do that")
         return
     link = trigger.group(2)
@@ -435,8 +590,9 @@ def meetinglink(bot, trigger):
         title = find_title(link)
     except Exception:  # TODO: Be specific
         title = ""
-    log_plain("LINK: %s [%s]" % (link, title), trigger.sender)
-    log_html_listitem('<a href="%s">%s</a>' % (link, title), trigger.sender)
+    log_plain(bot, "LINK: %s [%s]" % (link, title), trigger.sender)
+    log_json(bot, "link", trigger.nick, link, trigger.sender)
+    log_html_listitem(bot, '<a href="%s">%s</a>' % (link, title), trigger.sender)
     bot.say(formatting.bold("LINK:") + " " + link)
 
 
@@ -448,7 +604,7 @@ def meetinginfo(bot, trigger):
     Log an informational item in the meeting log.\
     See [meetbot module usage]({% link _usage/meetbot-module.md %})
     """
-    if not is_meeting_running(trigger.sender):
+    if not is_meeting_running(bot, trigger.sender):
         bot.say("There is no active meeting")
         return
     if not trigger.group(2):
@@ -456,11 +612,12 @@ def meetinginfo(bot, trigger):
             "Try `{}info some informative thing`".format(bot.config.core.help_prefix)
         )
         return
-    if not is_chair(trigger.nick, trigger.sender):
+    if not is_chair(bot, trigger.nick, trigger.sender):
         bot.say("Only meeting head or chairs can do that")
         return
-    log_plain("INFO: " + trigger.group(2), trigger.sender)
-    log_html_listitem(trigger.group(2), trigger.sender)
+    log_plain(bot, "INFO: " + trigger.group(2), trigger.sender)
+    log_json(bot, "info", trigger.nick, trigger.group(2), trigger.sender)
+    log_html_listitem(bot, trigger.group(2), trigger.sender)
     bot.say(formatting.bold("INFO:") + " " + trigger.group(2))
 
 
@@ -469,7 +626,7 @@ def meetinginfo(bot, trigger):
 @module.rule("(.*)")
 @module.priority("low")
 def log_meeting(bot, trigger):
-    if not is_meeting_running(trigger.sender):
+    if not is_meeting_running(bot, trigger.sender):
         return
 
     # Handle live prefix changes with cached regex
@@ -497,7 +654,8 @@ def log_meeting(bot, trigger):
 
     if bot.memory["meetbot_command_regex"].match(trigger):
         return
-    log_plain("<" + trigger.nick + "> " + trigger, trigger.sender)
+    log_plain(bot, "<" + trigger.nick + "> " + trigger, trigger.sender)
+    log_json(bot, "message", trigger.nick, trigger, trigger.sender)
 
 
 @module.commands("comment")
@@ -520,9 +678,10 @@ def take_comment(bot, trigger):
         )
         return
 
+    meetings_dict = bot.memory["meetbot_meetings"]
     target, message = trigger.group(2).split(None, 1)
     target = tools.Identifier(target)
-    if not is_meeting_running(target):
+    if not is_meeting_running(bot, target):
         bot.say("There is no active meeting in that channel.")
     else:
         meetings_dict[trigger.group(3)]["comments"].append((trigger.nick, message))
@@ -542,20 +701,22 @@ def show_comments(bot, trigger):
 
     See [meetbot module usage]({% link _usage/meetbot-module.md %})
     """
-    if not is_meeting_running(trigger.sender):
+    if not is_meeting_running(bot, trigger.sender):
         return
-    if not is_chair(trigger.nick, trigger.sender):
+    if not is_chair(bot, trigger.nick, trigger.sender):
         bot.say("Only meeting head or chairs can do that")
         return
+    meetings_dict = bot.memory["meetbot_meetings"]
     comments = meetings_dict[trigger.sender]["comments"]
     if comments:
         msg = "The following comments were made:"
         bot.say(msg)
-        log_plain("<%s> %s" % (bot.nick, msg), trigger.sender)
+        log_plain(bot, "<%s> %s" % (bot.nick, msg), trigger.sender)
         for comment in comments:
             msg = "<%s> %s" % comment
             bot.say(msg)
-            log_plain("<%s> %s" % (bot.nick, msg), trigger.sender)
+            log_plain(bot, "<%s> %s" % (bot.nick, msg), trigger.sender)
+            log_json(bot, "comment", comment[0], comment[1], trigger.sender)
         meetings_dict[trigger.sender]["comments"] = []
     else:
         bot.say("No comments have been recorded")
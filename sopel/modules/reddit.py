@@ -20,7 +20,9 @@ import prawcore
 import requests
 
 from sopel.formatting import bold, color, colors
-from sopel.module import commands, example, require_chanmsg, rule, url, NOLIMIT, OP
+from sopel.module import (
+    commands, example, parallel_setup, require_chanmsg, rule, url, NOLIMIT, OP
+)
 from sopel.tools import time
 from sopel.tools.web import USER_AGENT
 
@@ -47,6 +49,7 @@ image_url = r'https?://i\.redd\.it/\S+'
 video_url = r'https?://v\.redd\.it/([\w-]+)'
 
 
+@parallel_setup
 def setup(bot):
     if 'reddit_praw' not in bot.memory:
         # Create a PRAW instance just once, at load time
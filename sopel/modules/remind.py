@@ -125,6 +125,7 @@ def create_reminder(bot, trigger, duration, message):
     return timestamp
 
 
+@module.parallel_setup
 def setup(bot):
     """Load the remind database"""
     bot.rfn = get_filename(bot)
@@ -8,9 +8,12 @@ This module uses virustotal.com
 """
 from __future__ import unicode_literals, absolute_import, print_function, division
 
+from collections import OrderedDict
 import logging
+import mmap
 import os.path
 import re
+import struct
 import sys
 import threading
 import time
@@ -19,8 +22,9 @@ import requests
 
 from sopel.config.types import StaticSection, ValidatedAttribute, ListAttribute
 from sopel.formatting import color, bold
-from sopel.module import OP
+from sopel.module import OP, parallel_setup
 import sopel.tools
+from sopel.tools import datasets
 
 try:
     # This is done separately from the below version if/else because JSONDecodeError
@@ -32,19 +36,247 @@ except ImportError:
 
 if sys.version_info.major > 2:
     unicode = str
-    from urllib.request import urlretrieve
     from urllib.parse import urlparse
 else:
-    from urllib import urlretrieve
     from urlparse import urlparse
 
 
 LOGGER = logging.getLogger(__name__)
 
 vt_base_api_url = 'https://www.virustotal.com/vtapi/v2/url/'
-malware_domains = set()
-known_good = []
+malware_domains_url = 'https://mirror1.malwaredomains.com/files/justdomains'
 cache_limit = 512
+cache_ttl = 7 * 24 * 60 * 60  # 7 days
+malware_domains_max_age = 7 * 24 * 60 * 60  # 7 days
+
+
+class DomainList(object):
+    """A sorted list of domains, read from a memory-mapped file.
+
+    :param str path: path to the compiled domain list
+    :param on_invalid: optional function called (without arguments) when the
+                       file exists but is truncated or corrupted
+    :type on_invalid: :term:`function`
+
+    The file is only opened on first use, and its content is never loaded in
+    memory all at once: lookups are binary searches in the mapped file. Use
+    :meth:`build` to compile a list of domains into such a file.
+
+    An invalid file is treated as an empty list until :meth:`reload` is
+    called, e.g. once ``on_invalid`` has rebuilt it.
+
+    The file starts with a header (magic string and number of domains),
+    followed by the offset of each domain in the data (plus the end offset),
+    then the domains themselves, encoded in UTF-8 and sorted.
+    """
+    MAGIC = b'SOPELDL1'
+    HEADER = struct.Struct(str('>8sI'))
+    OFFSET = struct.Struct(str('>I'))
+
+    def __init__(self, path, on_invalid=None):
+        self.path = path
+        self.on_invalid = on_invalid
+        self._lock = threading.Lock()
+        self._data = None
+
+    @classmethod
+    def build(cls, domains, path):
+        """Compile ``domains`` into a domain list file at ``path``.
+
+        :param domains: iterable of domain names
+        :param str path: where to write the domain list file
+
+        Domains are lowercased, deduplicated, and sorted. The file is written
+        next to ``path`` first, then moved in place, so readers never see a
+        partially written file.
+        """
+        entries = sorted(set(
+            domain.strip().lower().encode('utf-8')
+            for domain in domains
+            if domain.strip()
+        ))
+        offsets = []
+        position = 0
+        for entry in entries:
+            offsets.append(position)
+            position = position + len(entry)
+        offsets.append(position)
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as fd:
+            fd.write(cls.HEADER.pack(cls.MAGIC, len(entries)))
+            for offset in offsets:
+                fd.write(cls.OFFSET.pack(offset))
+            for entry in entries:
+                fd.write(entry)
+        datasets.replace_file(tmp_path, path)
+
+    def _get_data(self):
+        data = self._data
+        if data is not None:
+            return data
+
+        with self._lock:
+            if self._data is None:
+                self._data = self._open()
+            return self._data
+
+    def _open(self):
+        if not os.path.isfile(self.path):
+            return (None, 0, 0)
+
+        with open(self.path, 'rb') as fd:
+            try:
+                mapped = mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ)
+            except (ValueError, EnvironmentError):
+                # ValueError: the file is empty
+                LOGGER.warning('Unable to map domain list %s', self.path)
+                return self._invalid()
+
+        try:
+            magic, count = self.HEADER.unpack_from(mapped, 0)
+            base = self.HEADER.size + (count + 1) * self.OFFSET.size
+            end = self.OFFSET.unpack_from(mapped, base - self.OFFSET.size)[0]
+        except struct.error:
+            # too short for its header, or for its offsets
+            LOGGER.warning('Truncated domain list %s', self.path)
+            return self._invalid()
+
+        if magic != self.MAGIC or base + end != len(mapped):
+            LOGGER.warning('Invalid domain list %s', self.path)
+            return self._invalid()
+
+        return (mapped, count, base)
+
+    def _invalid(self):
+        if self.on_invalid is not None:
+            try:
+                self.on_invalid()
+            except Exception:
+                LOGGER.exception(
+                    'Unable to rebuild domain list %s', self.path)
+        return (None, 0, 0)
+
+    def reload(self):
+        """Forget the current file, so it's opened again on next lookup.
+
+        The previous mapping is left for the garbage collector to close, as
+        another thread might still be reading it.
+        """
+        with self._lock:
+            self._data = None
+
+    def _entry(self, data, index):
+        mapped, _count, base = data
+        position = self.HEADER.size + index * self.OFFSET.size
+        start = self.OFFSET.unpack_from(mapped, position)[0]
+        end = self.OFFSET.unpack_from(mapped, position + self.OFFSET.size)[0]
+        return mapped[base + start:base + end]
+
+    def __len__(self):
+        return self._get_data()[1]
+
+    def __contains__(self, domain):
+        data = self._get_data()
+        mapped, count, _base = data
+        if mapped is None:
+            return False
+
+        key = domain.lower().encode('utf-8')
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            entry = self._entry(data, middle)
+            if entry < key:
+                low = middle + 1
+            elif entry > key:
+                high = middle
+            else:
+                return True
+        return False
+
+    def match(self, hostname):
+        """Find the listed domain ``hostname`` belongs to, if any.
+
+        :param str hostname: the hostname to look for
+        :return: the matching domain, or ``None``
+        :rtype: str
+
+        The ``hostname`` matches if it is listed, or if any of its parent
+        domains is listed (``evil.example.com`` matches ``example.com``).
+        """
+        labels = hostname.lower().rstrip('.').split('.')
+        for index in range(len(labels)):
+            domain = '.'.join(labels[index:])
+            if domain in self:
+                return domain
+        return None
+
+
+class SafetyCache(object):
+    """A thread-safe cache of VirusTotal results, with a TTL and LRU eviction.
+
+    :param int limit: maximum number of results to keep
+    :param int ttl: number of seconds a result is kept
+
+    Results older than ``ttl`` are treated as missing, and once there are
+    ``limit`` results, adding one evicts the least recently used.
+    """
+    def __init__(self, limit=cache_limit, ttl=cache_ttl):
+        self.limit = limit
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def _is_fresh(self, data):
+        return data['fetched'] > time.time() - self.ttl
+
+    def get(self, key, default=None):
+        """Get the fresh result for ``key``, or ``default``."""
+        with self._lock:
+            data = self._data.pop(key, None)
+            if data is None or not self._is_fresh(data):
+                return default
+            # re-insert as the most recently used
+            self._data[key] = data
+            return data
+
+    def __getitem__(self, key):
+        data = self.get(key)
+        if data is None:
+            raise KeyError(key)
+        return data
+
+    def __contains__(self, key):
+        with self._lock:
+            data = self._data.get(key)
+            return data is not None and self._is_fresh(data)
+
+    def __setitem__(self, key, data):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = data
+            while len(self._data) > self.limit:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+    def expire(self):
+        """Remove the results that are not fresh anymore.
+
+        :return: the number of results removed
+        :rtype: int
+        """
+        with self._lock:
+            stale = [
+                key for key, data in self._data.items()
+                if not self._is_fresh(data)
+            ]
+            for key in stale:
+                del self._data[key]
+        return len(stale)
 
 
 class SafetySection(StaticSection):
@@ -80,39 +312,62 @@ def configure(config):
     )
 
 
+@parallel_setup
 def setup(bot):
     bot.config.define_section('safety', SafetySection)
 
     if 'safety_cache' not in bot.memory:
-        bot.memory['safety_cache'] = sopel.tools.SopelMemory()
-    if 'safety_cache_lock' not in bot.memory:
-        bot.memory['safety_cache_lock'] = threading.Lock()
-    for item in bot.config.safety.known_good:
-        known_good.append(re.compile(item, re.I))
-
-    loc = os.path.join(bot.config.homedir, 'malwaredomains.txt')
-    if os.path.isfile(loc):
-        if os.path.getmtime(loc) < time.time() - 24 * 60 * 60 * 7:
-            # File exists but older than one week — update it
-            _download_malwaredomains_db(loc)
-    else:
-        _download_malwaredomains_db(loc)
-    with open(loc, 'r') as f:
-        for line in f:
-            clean_line = unicode(line).strip().lower()
-            if clean_line != '':
-                malware_domains.add(clean_line)
+        bot.memory['safety_cache'] = SafetyCache()
+
+    # in the bot's memory: bots running in the same process share this module
+    bot.memory['safety_known_good'] = _compile_known_good(
+        bot.config.safety.known_good)
+
+    malware_domains = DomainList(
+        os.path.join(bot.config.homedir, 'malwaredomains.db'),
+        on_invalid=lambda: bot.datasets.refresh(
+            'safety.malwaredomains', force=True))
+    bot.memory['safety_malware_domains'] = malware_domains
+    # serve the last good copy now, and refresh it in the background
+    bot.datasets.register(
+        'safety.malwaredomains',
+        malware_domains_url,
+        malware_domains.path,
+        malware_domains_max_age,
+        process=_build_malwaredomains_db,
+        callback=lambda dataset: _reload_malwaredomains_db(malware_domains))
 
 
 def shutdown(bot):
     bot.memory.pop('safety_cache', None)
-    bot.memory.pop('safety_cache_lock', None)
+    bot.memory.pop('safety_known_good', None)
+    bot.memory.pop('safety_malware_domains', None)
+    bot.datasets.unregister('safety.malwaredomains')
 
 
-def _download_malwaredomains_db(path):
-    url = 'https://mirror1.malwaredomains.com/files/justdomains'
-    LOGGER.info('Downloading malwaredomains db from %s', url)
-    urlretrieve(url, path)
+def _compile_known_good(domains):
+    """Compile the "known good" patterns, in one regex if possible."""
+    if not domains:
+        return []
+
+    try:
+        return [re.compile(
+            '|'.join('(?:%s)' % domain for domain in domains), re.I)]
+    except re.error:
+        # e.g. a pattern with inline flags: keep them separate
+        return [re.compile(domain, re.I) for domain in domains]
+
+
+def _build_malwaredomains_db(source, target):
+    """Compile the downloaded malwaredomains list into a DomainList file."""
+    with open(source, 'r') as f:
+        DomainList.build((unicode(line) for line in f), target)
+
+
+def _reload_malwaredomains_db(malware_domains):
+    malware_domains.reload()
+    LOGGER.info(
+        'Loaded %d domains from malwaredomains db', len(malware_domains))
 
 
 @sopel.module.rule(r'(?u).*(https?://\S+).*')
@@ -121,8 +376,6 @@ def url_handler(bot, trigger):
     """Checks for malicious URLs"""
     check = True    # Enable URL checking
     strict = False  # Strict mode: kick on malicious URL
-    positives = 0   # Number of engines saying it's malicious
-    total = 0       # Number of total engines
     use_vt = True   # Use VirusTotal
     check = bot.config.safety.enabled_by_default
     if check is None:
@@ -143,22 +396,43 @@ def url_handler(bot, trigger):
     if not check:
         return  # Not overridden by DB, configured default off
 
+    # URLs were already searched when the line was parsed
+    for url in trigger.urls:
+        if not url.lower().startswith(('http://', 'https://')):
+            continue
+        if _check_url(bot, trigger, url, use_vt, strict):
+            # the user has been kicked: no need to check further
+            break
+
+
+def _check_url(bot, trigger, url, use_vt, strict):
+    """Check ``url`` and warn the channel if it's possibly malicious.
+
+    :return: ``True`` if the user has been kicked, ``False`` otherwise
+    """
+    positives = 0   # Number of engines saying it's malicious
+    total = 0       # Number of total engines
+
     try:
-        netloc = urlparse(trigger.group(1)).netloc
+        parsed = urlparse(url)
+        netloc = parsed.netloc
+        hostname = parsed.hostname or ''
     except ValueError:
-        return  # Invalid IPv6 URL
+        return False  # Invalid IPv6 URL
 
+    known_good = bot.memory.get('safety_known_good', [])
     if any(regex.search(netloc) for regex in known_good):
-        return  # Whitelisted
+        return False  # Whitelisted
 
     apikey = bot.config.safety.vt_api_key
     try:
         if apikey is not None and use_vt:
-            payload = {'resource': unicode(trigger),
+            payload = {'resource': unicode(url),
                        'apikey': apikey,
                        'scan': '1'}
 
-            if trigger not in bot.memory['safety_cache']:
+            result = bot.memory['safety_cache'].get(url)
+            if result is None:
                 r = requests.post(vt_base_api_url + 'report', data=payload)
                 r.raise_for_status()
                 result = r.json()
@@ -166,12 +440,9 @@ def url_handler(bot, trigger):
                 data = {'positives': result['positives'],
                         'total': result['total'],
                         'fetched': fetched}
-                bot.memory['safety_cache'][trigger] = data
-                if len(bot.memory['safety_cache']) >= (2 * cache_limit):
-                    _clean_cache(bot)
+                bot.memory['safety_cache'][url] = data
             else:
-                print('using cache')
-                result = bot.memory['safety_cache'][trigger]
+                LOGGER.debug('[VirusTotal] Using cached result for %s', url)
             positives = result['positives']
             total = result['total']
     except requests.exceptions.RequestException:
@@ -181,7 +452,8 @@ def url_handler(bot, trigger):
         # Ignoring exceptions with VT so MalwareDomains will always work
         LOGGER.debug('[VirusTotal] Malformed response (invalid JSON).', exc_info=True)
 
-    if unicode(netloc).lower() in malware_domains:
+    malware_domains = bot.memory.get('safety_malware_domains')
+    if malware_domains is not None and malware_domains.match(hostname):
         # malwaredomains is more trustworthy than some VT engines
         # therefore it gets a weight of 10 engines when calculating confidence
         positives += 10
@@ -195,6 +467,9 @@ def url_handler(bot, trigger):
         bot.say('[' + bold(color('WARNING', 'red')) + '] ' + msg)
         if strict:
             bot.kick(trigger.nick, trigger.sender, 'Posted a malicious link')
+            return True
+
+    return False
 
 
 @sopel.module.commands('safety')
@@ -215,37 +490,10 @@ def toggle_safety(bot, trigger):
 
 
 # Clean the cache every day
-# Code above also calls this if there are too many cache entries
 @sopel.module.interval(24 * 60 * 60)
 def _clean_cache(bot):
     """Cleans up old entries in URL safety cache."""
-    if bot.memory['safety_cache_lock'].acquire(False):
+    if 'safety_cache' in bot.memory:
         LOGGER.info('Starting safety cache cleanup...')
-        try:
-            # clean up by age first
-            cutoff = time.time() - (7 * 24 * 60 * 60)  # 7 days ago
-            old_keys = []
-            for key, data in sopel.tools.iteritems(bot.memory['safety_cache']):
-                if data['fetched'] <= cutoff:
-                    old_keys.append(key)
-            for key in old_keys:
-                bot.memory['safety_cache'].pop(key, None)
-
-            # clean up more values if the cache is still too big
-            overage = bot.memory['safety_cache'] - cache_limit
-            if overage > 0:
-                extra_keys = sorted(
-                    (data.fetched, key)
-                    for (key, data)
-                    in bot.memory['safety_cache'].items())[:overage]
-                for (_, key) in extra_keys:
-                    bot.memory['safety_cache'].pop(key, None)
-        finally:
-            # No matter what errors happen (or not), release the lock
-            bot.memory['safety_cache_lock'].release()
-
-        LOGGER.info('Safety cache cleanup finished.')
-    else:
-        LOGGER.info(
-            'Skipping safety cache cleanup: Cache is locked, '
-            'cleanup already running.')
+        removed = bot.memory['safety_cache'].expire()
+        LOGGER.info('Safety cache cleanup finished: %d removed.', removed)
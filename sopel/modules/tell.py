@@ -87,6 +87,7 @@ def dump_reminders(filename, data):
     return True
 
 
+@module.parallel_setup
 def setup(bot):
     bot.config.define_section('tell', TellSection)
     fn = bot.config.basename + '.tell.db'
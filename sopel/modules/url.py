@@ -28,6 +28,8 @@ except ImportError:
     from urlparse import urlparse
 
 USER_AGENT = 'Sopel/{} (https://sopel.chat)'.format(__version__)
+# URL schemes shown by title_auto, independently of core.auto_url_schemes
+TITLE_SCHEMES = ('http', 'https', 'ftp')
 default_headers = {'User-Agent': USER_AGENT}
 # These are used to clean up the title tag before actually parsing it. Not the
 # world's best way to do this, but it'll do for now.
@@ -176,13 +178,15 @@ def title_auto(bot, trigger):
     if re.match(bot.config.core.prefix + 'title', trigger):
         return
 
-    # Avoid fetching known malicious links
-    if 'safety_cache' in bot.memory and trigger in bot.memory['safety_cache']:
-        if bot.memory['safety_cache'][trigger]['positives'] > 1:
-            return
+    urls = _get_trigger_urls(bot, trigger)
 
-    urls = web.search_urls(
-        trigger, exclusion_char=bot.config.url.exclusion_char, clean=True)
+    # Avoid fetching known malicious links
+    if 'safety_cache' in bot.memory:
+        safety_cache = bot.memory['safety_cache']
+        urls = [
+            url for url in urls
+            if (safety_cache.get(url) or {}).get('positives', 0) <= 1
+        ]
 
     for url, title, domain, tinyurl in process_urls(bot, trigger, urls):
         message = '[ %s ] - %s' % (title, domain)
@@ -194,6 +198,41 @@ def title_auto(bot, trigger):
             bot.memory['last_seen_url'][trigger.sender] = url
 
 
+def _get_trigger_urls(bot, trigger):
+    """Get the cleaned URLs from ``trigger`` that can be auto-titled.
+
+    :param bot: Sopel instance
+    :param trigger: the trigger with URLs
+    :return: a list of unique URLs, in order of appearance
+
+    URLs are taken from :attr:`sopel.trigger.Trigger.urls`, which are searched
+    once when the line is received, using ``core.auto_url_schemes``. Titles
+    are shown only for ``http``, ``https``, and ``ftp`` URLs, whatever the
+    value of that setting: other schemes are filtered out, and the line is
+    searched again when one of these schemes is not in the setting. The line
+    is also searched again when it contains the ``exclusion_char``, to
+    respect it.
+    """
+    exclusion_char = bot.config.url.exclusion_char
+    searched_schemes = set(bot.config.core.auto_url_schemes)
+    if (exclusion_char and exclusion_char in trigger) or (
+            not searched_schemes.issuperset(TITLE_SCHEMES)):
+        return list(web.search_urls(
+            trigger,
+            exclusion_char=exclusion_char,
+            clean=True,
+            schemes=TITLE_SCHEMES))
+
+    urls = []
+    for url in trigger.urls:
+        if url.split(':', 1)[0].lower() not in TITLE_SCHEMES:
+            continue
+        url = web.trim_url(url)
+        if url not in urls:
+            urls.append(url)
+    return urls
+
+
 def process_urls(bot, trigger, urls):
     """
     For each URL in the list, ensure that it isn't handled by another module.
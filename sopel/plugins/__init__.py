@@ -31,13 +31,12 @@ exist for each type of plugin.
 from __future__ import unicode_literals, absolute_import, print_function, division
 
 import collections
-import imp
 import itertools
 import os
 
 import pkg_resources
 
-from . import exceptions, handlers  # noqa
+from . import exceptions, handlers, startup, watcher  # noqa
 
 
 def _list_plugin_filenames(directory):
@@ -62,13 +61,12 @@ def find_internal_plugins():
     :return: Yield instance of :class:`~.handlers.PyModulePlugin`
              configured for ``sopel.modules.*``
     """
-    plugin_dir = imp.find_module(
-        'modules',
-        [imp.find_module('sopel')[1]]
-    )[1]
+    # the package is empty: importing it doesn't import any plugin
+    from sopel import modules
 
-    for name, _ in _list_plugin_filenames(plugin_dir):
-        yield handlers.PyModulePlugin(name, 'sopel.modules')
+    for plugin_dir in set(modules.__path__):
+        for name, _ in _list_plugin_filenames(plugin_dir):
+            yield handlers.PyModulePlugin(name, 'sopel.modules')
 
 
 def find_sopel_modules_plugins():
@@ -87,15 +85,48 @@ def find_sopel_modules_plugins():
             yield handlers.PyModulePlugin(name, 'sopel_modules')
 
 
-def find_entry_point_plugins(group='sopel.plugins'):
+def _iter_entry_points(group, manifest=None):
+    if manifest is not None:
+        specs = manifest.get_entry_points(group)
+        if specs is not None:
+            try:
+                entry_points = [
+                    pkg_resources.EntryPoint.parse(
+                        spec,
+                        dist=(pkg_resources.get_distribution(project_name)
+                              if project_name else None))
+                    for spec, project_name in specs
+                ]
+            except (ValueError, pkg_resources.DistributionNotFound):
+                pass  # obsolete: look up the entry points again
+            else:
+                return entry_points
+
+    entry_points = list(pkg_resources.iter_entry_points(group))
+    if manifest is not None:
+        manifest.set_entry_points(group, [
+            (str(entry_point), getattr(entry_point.dist, 'project_name', None))
+            for entry_point in entry_points
+        ])
+    return entry_points
+
+
+def find_entry_point_plugins(group='sopel.plugins', manifest=None):
     """List plugins from a setuptools entry point group
 
     :param str group: setuptools entry point group to look for
                       (defaults to ``sopel.plugins``)
+    :param manifest: optional plugin manifest, to reuse the entry points
+                     found the last time
+    :type manifest: :class:`~.manifest.PluginManifest`
     :return: Yield instance of :class:`~.handlers.EntryPointPlugin`
              created from setuptools entry point given ``group``
+
+    .. versionchanged:: 7.0
+
+        The ``manifest`` parameter was added.
     """
-    for entry_point in pkg_resources.iter_entry_points(group):
+    for entry_point in _iter_entry_points(group, manifest):
         yield handlers.EntryPointPlugin(entry_point)
 
 
@@ -110,11 +141,14 @@ def find_directory_plugins(directory):
         yield handlers.PyFilePlugin(abspath)
 
 
-def enumerate_plugins(settings):
+def enumerate_plugins(settings, manifest=None):
     """Yield Sopel's plugins
 
     :param settings: Sopel's configuration
     :type settings: :class:`sopel.config.Config`
+    :param manifest: optional plugin manifest, to reuse the entry points
+                     found the last time
+    :type manifest: :class:`~.manifest.PluginManifest`
     :return: yield 2-value tuple: an instance of
              :class:`~.handlers.AbstractPluginHandler`, and if the plugin is
              active or not
@@ -144,7 +178,7 @@ def enumerate_plugins(settings):
     """
     from_internals = find_internal_plugins()
     from_sopel_modules = find_sopel_modules_plugins()
-    from_entry_points = find_entry_point_plugins()
+    from_entry_points = find_entry_point_plugins(manifest=manifest)
     # load from directories
     source_dirs = [
         os.path.join(settings.homedir, 'modules'),
@@ -180,11 +214,14 @@ def enumerate_plugins(settings):
     yield handlers.PyModulePlugin('coretasks', 'sopel'), True
 
 
-def get_usable_plugins(settings):
+def get_usable_plugins(settings, manifest=None):
     """Get usable plugins, unique per name
 
     :param settings: Sopel's configuration
     :type settings: :class:`sopel.config.Config`
+    :param manifest: optional plugin manifest, to reuse the entry points
+                     found the last time
+    :type manifest: :class:`~.manifest.PluginManifest`
     :return: an ordered dict of usable plugins
     :rtype: collections.OrderedDict
 
@@ -207,13 +244,17 @@ def get_usable_plugins(settings):
         of all possible plugins, and its return value is used to populate
         the :class:`ordered dict<collections.OrderedDict>`.
 
+    .. versionchanged:: 7.0
+
+        The ``manifest`` parameter was added.
+
     """
     # Use an OrderedDict to get one and only one plugin per name
     # based on what plugins.enumerate_plugins does, external plugins are
     # allowed to override internal plugins
     plugins_info = collections.OrderedDict(
         (plugin.name, (plugin, is_enabled))
-        for plugin, is_enabled in enumerate_plugins(settings))
+        for plugin, is_enabled in enumerate_plugins(settings, manifest))
     # reset coretasks's position at the end of the loading queue
     # Python 2's OrderedDict does not have a `move_to_end` method
     # TODO: replace by plugins_info.move_to_end('coretasks') for Python 3
@@ -34,21 +34,37 @@ away from the rest of the application.
 from __future__ import unicode_literals, absolute_import, print_function, division
 
 import inspect
-import imp
 import importlib
+import logging
 import os
+import pkgutil
+import sys
+import threading
+import time
 
 from sopel import loader
-from . import exceptions
+from . import exceptions, manifest
 
-try:
+if sys.version_info.major >= 3:
+    import importlib.util
+    from importlib.util import find_spec
     reload = importlib.reload
-except AttributeError:
-    # py2: no reload function
+    imp = None
+else:
+    # py2: no reload, find_spec, nor spec-based loading
     # TODO: imp is deprecated, to be removed when py2 support is dropped
+    import imp
+    find_spec = None
     reload = imp.reload
 
 
+LOGGER = logging.getLogger(__name__)
+
+# types of plugin handled by PyFilePlugin (same values as imp's constants)
+PY_SOURCE = 1
+PKG_DIRECTORY = 5
+
+
 class AbstractPluginHandler(object):
     """Base class for plugin handlers.
 
@@ -103,9 +119,31 @@ class AbstractPluginHandler(object):
         * type: the plugin's type
         * source: the plugin's source
           (filesystem path, python import path, etc.)
+
+        Optional keys:
+
+        * load_time: how long (in seconds) it took to import the plugin the
+          last time it was loaded or reloaded, or ``None`` if it wasn't
+
+        .. versionchanged:: 7.0
+
+            The optional ``load_time`` key was added.
         """
         raise NotImplementedError
 
+    def get_source_path(self):
+        """Retrieve the path to the plugin's source
+
+        :return: the path to the plugin's file or directory, if any
+        :rtype: str
+
+        This is used to know when the plugin has changed. By default, a
+        plugin handler doesn't provide its source path, and returns ``None``.
+
+        .. versionadded:: 7.0
+        """
+        return None
+
     def is_loaded(self):
         """Tell if the plugin is loaded or not
 
@@ -133,6 +171,39 @@ class AbstractPluginHandler(object):
         """
         raise NotImplementedError
 
+    def is_setup_parallel(self):
+        """Tell if the plugin's setup can run in parallel with others'
+
+        :return: ``True`` if the plugin's setup can run in a separate thread,
+                 ``False`` otherwise
+        :rtype: boolean
+
+        By default, it returns ``False``: the setup runs in the main thread.
+
+        .. seealso::
+
+            The :func:`sopel.module.parallel_setup` decorator.
+
+        .. versionadded:: 7.0
+        """
+        return False
+
+    def get_dependencies(self):
+        """Get the names of the plugins that must be set up before this one
+
+        :return: the plugins' names
+        :rtype: list
+
+        By default, it returns an empty list.
+
+        .. seealso::
+
+            The :func:`sopel.module.depends_on` decorator.
+
+        .. versionadded:: 7.0
+        """
+        return []
+
     def register(self, bot):
         """Register the plugin with the ``bot``
 
@@ -222,6 +293,7 @@ class PyModulePlugin(AbstractPluginHandler):
             self.module_name = name
 
         self._module = None
+        self._load_time = None
 
     def get_label(self):
         default_label = '%s module' % self.name
@@ -239,13 +311,76 @@ class PyModulePlugin(AbstractPluginHandler):
             'type': self.PLUGIN_TYPE,
             'name': self.name,
             'source': self.module_name,
+            'load_time': self._load_time,
         }
 
+    def get_source_path(self):
+        if self.is_loaded():
+            filename = getattr(self._module, '__file__', None)
+        elif find_spec is not None:
+            try:
+                spec = find_spec(self.module_name)
+            except (ImportError, ValueError):
+                spec = None
+            filename = spec.origin if spec and spec.has_location else None
+        else:
+            try:
+                module_loader = pkgutil.get_loader(self.module_name)
+            except ImportError:
+                module_loader = None
+            filename = getattr(module_loader, 'get_filename', lambda: None)()
+
+        if not filename:
+            return None
+
+        filename = os.path.abspath(filename)
+        basename = os.path.splitext(os.path.basename(filename))[0]
+        if basename == '__init__':
+            # a package: its whole directory is the source
+            return os.path.dirname(filename)
+        if filename.endswith(('.pyc', '.pyo')):
+            return filename[:-1]
+        return filename
+
+    def get_metadata(self, settings):
+        """Retrieve the metadata of the plugin's callables
+
+        :param settings: Sopel's configuration
+        :type settings: :class:`sopel.config.Config`
+        :return: the plugin's metadata, for the plugin manifest
+        :rtype: dict
+
+        The plugin must be loaded first.
+
+        .. seealso::
+
+            The metadata are used to register a :class:`LazyPlugin`.
+        """
+        relevant_parts = loader.clean_module(self._module, settings)
+        metadata = manifest.describe_module_parts(*relevant_parts)
+        metadata.update({
+            'label': self.get_label(),
+            'has_setup': self.has_setup(),
+            'has_configure': self.has_configure(),
+            'dependencies': self.get_dependencies(),
+        })
+        return metadata
+
+    def _load(self):
+        return importlib.import_module(self.module_name)
+
+    def _reload(self):
+        return reload(self._module)
+
     def load(self):
-        self._module = importlib.import_module(self.module_name)
+        start = time.time()
+        self._module = self._load()
+        self._load_time = time.time() - start
 
     def reload(self):
-        self._module = reload(self._module)
+        start = time.time()
+        self._module = self._reload()
+        self._load_time = time.time() - start
 
     def is_loaded(self):
         return self._module is not None
@@ -257,6 +392,16 @@ class PyModulePlugin(AbstractPluginHandler):
     def has_setup(self):
         return hasattr(self._module, 'setup')
 
+    def is_setup_parallel(self):
+        return bool(
+            self.has_setup() and
+            getattr(self._module.setup, 'parallel_setup', False))
+
+    def get_dependencies(self):
+        if not self.has_setup():
+            return []
+        return list(getattr(self._module.setup, 'depends_on', []))
+
     def register(self, bot):
         relevant_parts = loader.clean_module(self._module, bot.config)
         bot.add_plugin(self, *relevant_parts)
@@ -295,6 +440,13 @@ class PyFilePlugin(PyModulePlugin):
 
     In this example, the plugin ``custom`` is loaded from its filename despite
     not being in the Python path.
+
+    .. versionchanged:: 7.0
+
+        The plugin is loaded with :mod:`importlib`'s spec-based API: its
+        bytecode is cached (in a ``__pycache__`` directory, like any imported
+        module), and it is compiled again only when its source changes. On
+        reload, it is always compiled from its source.
     """
     PLUGIN_TYPE = 'python-file'
 
@@ -310,10 +462,10 @@ class PyFilePlugin(PyModulePlugin):
 
         if good_file:
             name = os.path.basename(filename)[:-3]
-            module_type = imp.PY_SOURCE
+            module_type = PY_SOURCE
         elif good_dir:
             name = os.path.basename(filename)
-            module_type = imp.PKG_DIRECTORY
+            module_type = PKG_DIRECTORY
         else:
             raise exceptions.PluginError('Invalid Sopel plugin: %s' % filename)
 
@@ -323,26 +475,73 @@ class PyFilePlugin(PyModulePlugin):
 
         super(PyFilePlugin, self).__init__(name)
 
+    def _get_spec(self):
+        if self.module_type == PY_SOURCE:
+            return importlib.util.spec_from_file_location(
+                self.name, self.path)
+        elif self.module_type == PKG_DIRECTORY:
+            return importlib.util.spec_from_file_location(
+                self.name,
+                os.path.join(self.path, '__init__.py'),
+                submodule_search_locations=[self.path])
+        raise TypeError('Unsupported module type')
+
+    def _exec_module(self, module, spec, from_source=False):
+        # like an import: the module is available in sys.modules while its
+        # code runs, and the source file loader uses (and writes) the cached
+        # bytecode, unless the source changed since it was compiled
+        previous = sys.modules.get(self.name)
+        sys.modules[self.name] = module
+        try:
+            if from_source:
+                loader = spec.loader
+                code = loader.source_to_code(
+                    loader.get_data(spec.origin), spec.origin)
+                exec(code, module.__dict__)
+            else:
+                spec.loader.exec_module(module)
+        except BaseException:
+            if previous is None:
+                sys.modules.pop(self.name, None)
+            else:
+                sys.modules[self.name] = previous
+            raise
+        return module
+
     def _load(self):
-        # The current implementation uses `imp.load_module` to perform the
-        # load action, which also reload the module. However, `imp` is
-        # deprecated in Python 3, so that might need to be changed when the
-        # support for Python 2 is dropped.
-        #
-        # However, the solution for Python 3 is non-trivial, since the
-        # `importlib` built-in module does not have a similar function,
-        # therefore requires to dive into its public internals
-        # (``importlib.machinery`` and ``importlib.util``).
-        #
-        # All of that is doable, but represents a lot of work. As long as
-        # Python 2 is supported, we can keep it for now.
-        #
-        # TODO: switch to ``importlib`` when Python2 support is dropped.
-        if self.module_type == imp.PY_SOURCE:
+        if imp is not None:
+            return self._imp_load()
+
+        spec = self._get_spec()
+        return self._exec_module(importlib.util.module_from_spec(spec), spec)
+
+    def _reload(self):
+        if imp is not None:
+            return self._imp_load()
+
+        # like importlib.reload: run the new code in the same module object
+        spec = self._get_spec()
+        self._module.__spec__ = spec
+        self._module.__loader__ = spec.loader
+
+        # the cached bytecode is checked against the source's mtime (in
+        # seconds) and size only: a quick edit of the same size would not be
+        # seen, so the source is compiled again, and the cache removed
+        if spec.cached:
+            try:
+                os.remove(spec.cached)
+            except OSError:
+                pass  # no cache, or not writable: nothing to invalidate
+        return self._exec_module(self._module, spec, from_source=True)
+
+    def _imp_load(self):
+        # py2: `imp.load_module` both loads and reloads the module
+        # TODO: remove when py2 support is dropped
+        if self.module_type == PY_SOURCE:
             with open(self.path) as mod:
                 description = ('.py', 'U', self.module_type)
                 mod = imp.load_module(self.name, mod, self.path, description)
-        elif self.module_type == imp.PKG_DIRECTORY:
+        elif self.module_type == PKG_DIRECTORY:
             description = ('', '', self.module_type)
             mod = imp.load_module(self.name, None, self.path, description)
         else:
@@ -357,17 +556,18 @@ class PyFilePlugin(PyModulePlugin):
         })
         return data
 
-    def load(self):
-        self._module = self._load()
+    def get_source_path(self):
+        return os.path.abspath(self.path)
 
     def reload(self):
         """Reload the plugin
 
         Unlike :class:`PyModulePlugin`, it is not possible to use the
         ``reload`` function (either from `imp` or `importlib`), because the
-        module might not be available through ``sys.path``.
+        module might not be available through ``sys.path``: its code is run
+        again in the same module object instead.
         """
-        self._module = self._load()
+        super(PyFilePlugin, self).reload()
 
 
 class EntryPointPlugin(PyModulePlugin):
@@ -427,8 +627,8 @@ class EntryPointPlugin(PyModulePlugin):
         self.entry_point = entry_point
         super(EntryPointPlugin, self).__init__(entry_point.name)
 
-    def load(self):
-        self._module = self.entry_point.load()
+    def _load(self):
+        return self.entry_point.load()
 
     def get_meta_description(self):
         data = super(EntryPointPlugin, self).get_meta_description()
@@ -436,3 +636,143 @@ class EntryPointPlugin(PyModulePlugin):
             'source': str(self.entry_point),
         })
         return data
+
+
+class LazyPlugin(AbstractPluginHandler):
+    """Sopel plugin registered without being imported
+
+    :param plugin: the plugin handler to load lazily
+    :type plugin: :class:`PyModulePlugin`
+    :param dict metadata: the plugin's metadata, from the plugin manifest
+
+    This handler registers :class:`~sopel.plugins.manifest.LazyCallable`
+    objects built from the plugin's ``metadata``, without importing the
+    plugin: the plugin is loaded and set up the first time one of its
+    callables is called (a trigger, a job, or a URL callback).
+
+    Once reloaded, the plugin is no longer lazy: the bot uses the wrapped
+    ``plugin`` handler as usual.
+
+    .. seealso::
+
+        The :class:`~sopel.plugins.manifest.PluginManifest` stores the
+        metadata of each plugin, from the previous time it has been loaded.
+
+    """
+    PLUGIN_TYPE = 'lazy'
+
+    def __init__(self, plugin, metadata):
+        self.plugin = plugin
+        self.name = plugin.name
+        self.metadata = metadata
+        self._bot = None
+        self._activated = False
+        self._reloaded = False
+        self._lock = threading.Lock()
+        self._parts = None
+
+    def get_label(self):
+        return self.metadata.get('label') or self.plugin.get_label()
+
+    def get_meta_description(self):
+        data = self.plugin.get_meta_description()
+        data['label'] = self.get_label()
+        return data
+
+    def get_source_path(self):
+        return self.plugin.get_source_path()
+
+    def is_activated(self):
+        """Tell if the plugin has been imported and set up
+
+        :return: ``True`` if one of the plugin's callables has been called
+                 (or if the plugin has been reloaded), ``False`` otherwise
+        :rtype: boolean
+        """
+        return self._activated
+
+    def activate(self):
+        """Load and set up the plugin, if it isn't already
+
+        The plugin is set up with the bot it has been registered with.
+        """
+        if self._activated:
+            return
+
+        with self._lock:
+            if self._activated:
+                return
+            LOGGER.info('Loading plugin %s on first use', self.name)
+            self.plugin.load()
+            if self.plugin.has_setup():
+                self.plugin.setup(self._bot)
+            self._activated = True
+
+    def get_callable(self, name):
+        """Get a callable from the plugin, loading the plugin if needed
+
+        :param str name: name of the callable in the plugin's module
+        :return: the plugin's callable
+        """
+        self.activate()
+        return getattr(self.plugin._module, name)
+
+    def load(self):
+        # loading is deferred until a callable is called
+        pass
+
+    def reload(self):
+        if self.plugin.is_loaded():
+            self.plugin.reload()
+        else:
+            self.plugin.load()
+        self._reloaded = True
+
+    def is_loaded(self):
+        return self.plugin.is_loaded()
+
+    def setup(self, bot):
+        self._bot = bot
+        if self._reloaded:
+            self.plugin.setup(bot)
+            self._activated = True
+
+    def has_setup(self):
+        return bool(self.metadata.get('has_setup'))
+
+    def get_dependencies(self):
+        return list(self.metadata.get('dependencies') or [])
+
+    def register(self, bot):
+        if self._reloaded:
+            # no longer lazy: the wrapped plugin takes over
+            self.plugin.register(bot)
+            return
+
+        self._bot = bot
+        if self._parts is None:
+            self._parts = tuple(
+                [manifest.LazyCallable(self.get_callable, data)
+                 for data in self.metadata[key]]
+                for key in ('callables', 'jobs', 'shutdowns', 'urls'))
+        bot.add_plugin(self, *self._parts)
+
+    def unregister(self, bot):
+        if self._parts is not None:
+            bot.remove_plugin(self, *self._parts)
+
+    def shutdown(self, bot):
+        # no need to import the plugin only to shut it down
+        if self._activated:
+            self.plugin.shutdown(bot)
+
+    def has_shutdown(self):
+        return bool(self.metadata.get('shutdowns'))
+
+    def configure(self, settings):
+        if not self.plugin.is_loaded():
+            self.plugin.load()
+        self.plugin.configure(settings)
+
+    def has_configure(self):
+        return bool(self.metadata.get('has_configure'))
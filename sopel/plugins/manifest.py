@@ -0,0 +1,435 @@
+# coding=utf-8
+"""Sopel's plugin manifest
+
+.. versionadded:: 7.0
+
+To register a plugin, Sopel needs its callables' metadata: the rules,
+commands, events, intervals, URL patterns, and so on that tell the bot when
+to call them. Getting them requires importing the plugin, which can be slow
+(some plugins import large libraries), even if the plugin is rarely used.
+
+The plugin manifest stores these metadata in a file, so they can be reused
+on the next start: the bot can register :class:`LazyCallable` objects that
+import the plugin (and run its setup) only the first time they are called.
+Each plugin's metadata are associated with its source file's signature
+(modification time and size) and hash, and discarded when the source file
+changes. The manifest also stores the plugins found through setuptools entry
+points, which are slow to look up when many distributions are installed.
+
+.. seealso::
+
+    The :class:`~sopel.plugins.handlers.LazyPlugin` handler uses the
+    manifest's metadata to register a plugin without importing it.
+
+"""
+# Licensed under the Eiffel Forum License 2.
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import sys
+
+import sopel
+from sopel.tools import datasets
+
+
+LOGGER = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 3
+"""Version of the manifest's format.
+
+A manifest with another version is discarded when it is loaded.
+"""
+
+CALLABLE_ATTRIBUTES = (
+    'rule',
+    'event',
+    'intents',
+    'commands',
+    'nickname_commands',
+    'action_commands',
+    'priority',
+    'thread',
+    'unblockable',
+    'echo',
+    'rate',
+    'channel_rate',
+    'global_rate',
+    'output_prefix',
+    'category',
+    'interval',
+    'url_regex',
+)
+"""Attributes of a plugin's callables stored in the manifest."""
+
+REGEX_ATTRIBUTES = ('rule', 'intents', 'url_regex')
+"""Callable attributes that are lists of compiled regexes."""
+
+_regex_type = type(re.compile(''))
+
+
+def _dump_regex(regex):
+    if isinstance(regex, _regex_type):
+        return {'pattern': regex.pattern, 'flags': regex.flags}
+    return {'pattern': regex, 'flags': 0}
+
+
+def _load_regex(data):
+    return re.compile(data['pattern'], data['flags'])
+
+
+def describe_callable(obj):
+    """Describe a plugin's callable with JSON serializable metadata.
+
+    :param obj: a callable cleaned by :func:`sopel.loader.clean_module`
+    :return: the callable's metadata
+    :rtype: dict
+    """
+    attributes = {}
+    for name in CALLABLE_ATTRIBUTES:
+        if not hasattr(obj, name):
+            continue
+        value = getattr(obj, name)
+        if name in REGEX_ATTRIBUTES:
+            value = [_dump_regex(regex) for regex in value]
+        attributes[name] = value
+
+    return {
+        'name': getattr(obj, '__name__', 'UNKNOWN'),
+        'module': getattr(obj, '__module__', None),
+        'doc': getattr(obj, '__doc__', None),
+        'docs': getattr(obj, '_docs', {}),
+        'attributes': attributes,
+    }
+
+
+def describe_module_parts(callables, jobs, shutdowns, urls):
+    """Describe the parts of a plugin with JSON serializable metadata.
+
+    :return: the metadata of each type of callable
+    :rtype: dict
+
+    The arguments are the lists returned by
+    :func:`sopel.loader.clean_module`.
+    """
+    return {
+        'callables': [describe_callable(obj) for obj in callables],
+        'jobs': [describe_callable(obj) for obj in jobs],
+        'shutdowns': [describe_callable(obj) for obj in shutdowns],
+        'urls': [describe_callable(obj) for obj in urls],
+    }
+
+
+class LazyCallable(object):
+    """A plugin's callable that has not been imported yet.
+
+    :param get_callable: a function that returns the actual callable, given
+                         its name; it will import the plugin if needed
+    :type get_callable: :term:`function`
+    :param dict metadata: the callable's metadata, as returned by
+                          :func:`describe_callable`
+
+    A :class:`LazyCallable` has the same attributes as the callable it
+    replaces, so the bot can register it without importing its plugin. When
+    called, it gets the actual callable and calls it with the same arguments.
+    """
+    def __init__(self, get_callable, metadata):
+        self._get_callable = get_callable
+        self.__name__ = metadata['name']
+        self.__module__ = metadata['module']
+        self.__doc__ = metadata['doc']
+        self._docs = dict(
+            (command, (doc, examples))
+            for command, (doc, examples) in metadata['docs'].items())
+
+        for name, value in metadata['attributes'].items():
+            if name in REGEX_ATTRIBUTES:
+                value = [_load_regex(data) for data in value]
+            setattr(self, name, value)
+
+    def __repr__(self):
+        return '<LazyCallable %s.%s>' % (self.__module__, self.__name__)
+
+    def __call__(self, *args, **kwargs):
+        return self._get_callable(self.__name__)(*args, **kwargs)
+
+
+def _iter_source_files(path):
+    # yield the Python files of a plugin's source, in a stable order
+    if not os.path.isdir(path):
+        yield path
+        return
+
+    for dirpath, dirnames, filenames in os.walk(path):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.endswith('.py'):
+                yield os.path.join(dirpath, filename)
+
+
+def get_source_signature(path):
+    """Get the signature of a plugin's source, from its files' stats.
+
+    :param str path: path to the plugin's file or directory
+    :return: the last modification time and the size of the source, or
+             ``None`` if it doesn't exist
+    :rtype: list
+
+    For a directory, this is the last modification time and the total size
+    of all the Python files it contains. The signature is cheap to get, but
+    it can change even when the content doesn't (e.g. on ``touch``).
+
+    .. seealso::
+
+        :func:`get_source_hash` to compare the content itself.
+    """
+    if not os.path.exists(path):
+        return None
+
+    mtime = os.path.getmtime(path)
+    size = 0
+    for filename in _iter_source_files(path):
+        stat = os.stat(filename)
+        mtime = max(mtime, stat.st_mtime)
+        size = size + stat.st_size
+    return [mtime, size]
+
+
+def get_source_hash(path):
+    """Get the hash of a plugin's source content.
+
+    :param str path: path to the plugin's file or directory
+    :return: the SHA-1 hex digest of the source, or ``None`` if it doesn't
+             exist
+    :rtype: str
+
+    For a directory, both the relative path and the content of each Python
+    file it contains are hashed.
+    """
+    if not os.path.exists(path):
+        return None
+
+    digest = hashlib.sha1()
+    for filename in _iter_source_files(path):
+        digest.update(os.path.relpath(filename, path).encode('utf-8'))
+        with open(filename, 'rb') as fd:
+            digest.update(fd.read())
+    return digest.hexdigest()
+
+
+def _get_path_signature(paths):
+    # signature of the directories where distributions are installed:
+    # (un)installing a distribution modifies the directory's mtime
+    return [
+        [path, os.path.getmtime(path)]
+        for path in paths
+        if os.path.isdir(path)
+    ]
+
+
+class PluginManifest(object):
+    """Plugins' metadata, stored in a JSON file.
+
+    :param str filename: path to the manifest file
+    :param settings: Sopel's configuration
+    :type settings: :class:`sopel.config.Config`
+
+    The manifest stores:
+
+    * the metadata of each plugin, associated with its source's path,
+      signature, and hash: they are reused as long as the source doesn't
+      change
+    * the plugins found through setuptools entry points, associated with the
+      signature of the directories in ``sys.path``
+
+    Callables' metadata depend on a few settings (such as the bot's nick and
+    the command prefix); when these settings change, all the plugins'
+    metadata are discarded.
+    """
+    def __init__(self, filename, settings):
+        self.filename = filename
+        self.fingerprint = [
+            sopel.__version__,
+            '%s' % settings.core.nick,
+            settings.core.alias_nicks,
+            settings.core.prefix,
+            settings.core.help_prefix,
+        ]
+        self._plugins = {}
+        self._entry_points = {}
+        self._modified = False
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Get the manifest for this configuration.
+
+        :param settings: Sopel's configuration
+        :type settings: :class:`sopel.config.Config`
+        :rtype: :class:`PluginManifest`
+
+        The manifest is stored in the homedir, next to the configuration's
+        other files.
+        """
+        filename = os.path.join(
+            settings.core.homedir, '%s.plugins.json' % settings.basename)
+        return cls(filename, settings)
+
+    def load(self):
+        """Load the manifest from its file, if it is valid."""
+        self._plugins = {}
+        self._entry_points = {}
+        self._modified = False
+        if not os.path.isfile(self.filename):
+            return
+
+        try:
+            with io.open(self.filename, 'r', encoding='utf-8') as fd:
+                data = json.load(fd)
+        except (IOError, OSError, ValueError) as error:
+            LOGGER.warning(
+                'Unable to read plugin manifest %s: %s', self.filename, error)
+            return
+
+        if data.get('version') != MANIFEST_VERSION:
+            LOGGER.debug('Plugin manifest discarded: format has changed')
+            return
+
+        self._entry_points = data.get('entry_points', {})
+        if data.get('fingerprint') != self.fingerprint:
+            LOGGER.debug(
+                'Plugin metadata discarded: settings have changed')
+            self._modified = True
+        else:
+            self._plugins = data.get('plugins', {})
+
+    def save(self):
+        """Save the manifest to its file, if it has been modified."""
+        if not self._modified:
+            return
+
+        data = {
+            'version': MANIFEST_VERSION,
+            'fingerprint': self.fingerprint,
+            'plugins': self._plugins,
+            'entry_points': self._entry_points,
+        }
+        tmp_filename = self.filename + '.tmp'
+        try:
+            with io.open(tmp_filename, 'w', encoding='utf-8') as fd:
+                fd.write(json.dumps(data, ensure_ascii=False))
+            datasets.replace_file(tmp_filename, self.filename)
+        except (IOError, OSError) as error:
+            LOGGER.warning(
+                'Unable to write plugin manifest %s: %s', self.filename, error)
+        else:
+            self._modified = False
+
+    def get(self, plugin):
+        """Get the metadata of a ``plugin``, if they are up to date.
+
+        :param plugin: a plugin handler
+        :type plugin: :class:`~sopel.plugins.handlers.AbstractPluginHandler`
+        :return: the plugin's metadata, or ``None`` if there are no metadata
+                 for the plugin's current source
+        :rtype: dict
+
+        The source's signature is checked first; if it has changed, the
+        source's hash is compared, so metadata are reused when a file has
+        been touched but not modified.
+        """
+        entry = self._plugins.get(plugin.name)
+        path = plugin.get_source_path()
+        if entry is None or path is None or entry['source'] != path:
+            return None
+
+        signature = get_source_signature(path)
+        if signature is None:
+            return None
+
+        if entry['signature'] != signature:
+            if entry['hash'] != get_source_hash(path):
+                return None
+            # same content: no need to check the hash next time
+            entry['signature'] = signature
+            self._modified = True
+
+        return entry['metadata']
+
+    def set(self, plugin, metadata):
+        """Store the ``metadata`` of a ``plugin``.
+
+        :param plugin: a plugin handler
+        :type plugin: :class:`~sopel.plugins.handlers.AbstractPluginHandler`
+        :param dict metadata: the plugin's metadata
+
+        Nothing is stored for a plugin without a source file, or with
+        metadata that can't be serialized.
+        """
+        path = plugin.get_source_path()
+        if path is None or not os.path.exists(path):
+            return
+
+        try:
+            json.dumps(metadata)
+        except (TypeError, ValueError) as error:
+            LOGGER.debug(
+                'Metadata of plugin %s cannot be stored: %s',
+                plugin.name, error)
+            self.discard(plugin.name)
+            return
+
+        self._plugins[plugin.name] = {
+            'source': path,
+            'signature': get_source_signature(path),
+            'hash': get_source_hash(path),
+            'metadata': metadata,
+        }
+        self._modified = True
+
+    def discard(self, plugin_name):
+        """Discard the metadata of the plugin ``plugin_name``, if any."""
+        if self._plugins.pop(plugin_name, None) is not None:
+            self._modified = True
+
+    def get_entry_points(self, group, paths=None):
+        """Get the entry points found in ``group`` the last time.
+
+        :param str group: setuptools entry point group
+        :param list paths: directories where distributions are installed;
+                           defaults to ``sys.path``
+        :return: the entry points' specifications (see
+                 :meth:`set_entry_points`), or ``None`` if distributions may
+                 have been installed or removed since then
+        :rtype: list
+        """
+        entry = self._entry_points.get(group)
+        if entry is None:
+            return None
+
+        signature = _get_path_signature(sys.path if paths is None else paths)
+        if entry['signature'] != signature:
+            return None
+
+        return entry['entry_points']
+
+    def set_entry_points(self, group, entry_points, paths=None):
+        """Store the entry points found in ``group``.
+
+        :param str group: setuptools entry point group
+        :param list entry_points: the entry points' specifications, as
+                                  2-value tuples: the ``str`` representation
+                                  of the entry point, and the project name of
+                                  its distribution (if any)
+        :param list paths: directories where distributions are installed;
+                           defaults to ``sys.path``
+        """
+        signature = _get_path_signature(sys.path if paths is None else paths)
+        self._entry_points[group] = {
+            'signature': signature,
+            'entry_points': [list(item) for item in entry_points],
+        }
+        self._modified = True
@@ -0,0 +1,196 @@
+# coding=utf-8
+"""Sopel's plugins setup runner
+
+.. versionadded:: 7.0
+
+When the bot starts, each plugin's ``setup`` function runs before the plugin
+is registered. By default, setups run one at a time, in the main thread, in
+the order plugins are loaded. Some setups are slow because they download or
+read data; a plugin can declare its setup safe to run in parallel with
+:func:`sopel.module.parallel_setup`, and declare the plugins it must be set
+up after with :func:`sopel.module.depends_on`.
+
+The :class:`SetupRunner` runs parallel setups in a bounded pool of worker
+threads while the other setups run in the main thread, and it respects the
+dependencies between plugins. The ``coretasks`` plugin is always set up last.
+"""
+# Licensed under the Eiffel Forum License 2.
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import collections
+import logging
+import sys
+import threading
+import time
+
+from . import exceptions
+
+if sys.version_info.major >= 3:
+    from queue import Empty, Queue
+else:
+    from Queue import Empty, Queue
+
+
+LOGGER = logging.getLogger(__name__)
+
+SetupResult = collections.namedtuple('SetupResult', 'error duration')
+"""Result of a plugin's setup: its exception (if any) and its duration."""
+
+
+class SetupRunner(object):
+    """Run plugins' setup, in parallel when possible.
+
+    :param bot: instance of Sopel
+    :type bot: :class:`sopel.bot.Sopel`
+    :param int max_workers: maximum number of threads for parallel setups
+
+    A plugin's setup runs once all of its dependencies have been set up. If
+    a dependency's setup fails, or if a dependency is not in the list, the
+    plugin's setup doesn't run and fails with a
+    :exc:`~sopel.plugins.exceptions.PluginError`. Circular dependencies are
+    broken by running the first plugin of the cycle anyway.
+
+    A plugin without a setup is done as soon as its dependencies are: it
+    must still be in the list, for the plugins that depend on it.
+    """
+    def __init__(self, bot, max_workers=4):
+        self.bot = bot
+        self.max_workers = max(1, max_workers)
+
+    def _setup(self, name, plugin):
+        start = time.time()
+        error = None
+        try:
+            plugin.setup(self.bot)
+        except Exception as e:
+            error = e
+            LOGGER.exception('Error in %s setup: %s', name, e)
+        return SetupResult(error, time.time() - start)
+
+    def _work(self, tasks, done):
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            name, plugin = task
+            done.put((name, self._setup(name, plugin)))
+
+    def get_dependencies(self, plugins):
+        """Get the dependencies of each plugin.
+
+        :param plugins: plugin handlers, by name, in loading order
+        :type plugins: :class:`collections.OrderedDict`
+        :return: the names of each plugin's dependencies
+        :rtype: dict
+
+        ``coretasks`` depends on every other plugin. Dependencies on plugins
+        that are not in ``plugins`` are included as well.
+        """
+        dependencies = {}
+        for name, plugin in plugins.items():
+            if name == 'coretasks':
+                requires = set(plugins) - set([name])
+            else:
+                requires = set(plugin.get_dependencies())
+            dependencies[name] = requires
+        return dependencies
+
+    def run(self, plugins):
+        """Run the setup of these ``plugins``.
+
+        :param plugins: every loaded plugin handler, by name, in loading
+                        order
+        :type plugins: :class:`collections.OrderedDict`
+        :return: the result of each plugin's setup, by name
+        :rtype: dict of :class:`SetupResult`
+        """
+        dependencies = self.get_dependencies(plugins)
+        pending = list(plugins)
+        results = {}
+
+        for name in list(pending):
+            missing = sorted(dependencies[name].difference(plugins))
+            if missing:
+                # its setup would fail anyway, and so would its dependents'
+                pending.remove(name)
+                error = exceptions.PluginError(
+                    'Plugin %s setup skipped: %s not loaded' % (
+                        name, ', '.join(missing)))
+                LOGGER.error('%s', error)
+                results[name] = SetupResult(error, 0)
+
+        parallel = [name for name in pending
+                    if plugins[name].is_setup_parallel()]
+        tasks = Queue()
+        done = Queue()
+        workers = []
+        for index in range(min(self.max_workers, len(parallel))):
+            worker = threading.Thread(
+                target=self._work,
+                args=(tasks, done),
+                name='sopel-plugin-setup-%d' % index)
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+
+        running = 0
+        try:
+            while pending or running:
+                # collect the setups done in the meantime
+                while running:
+                    try:
+                        name, result = done.get_nowait()
+                    except Empty:
+                        break
+                    results[name] = result
+                    running = running - 1
+
+                ready = [name for name in pending
+                         if dependencies[name].issubset(results)]
+
+                if pending and not ready and not running:
+                    name = pending[0]
+                    LOGGER.warning(
+                        'Circular dependencies between plugins %s; '
+                        'setting up %s first',
+                        ', '.join(sorted(pending)), name)
+                    dependencies[name] = set()
+                    continue
+
+                inline = None
+                for name in ready:
+                    failed = [dependency
+                              for dependency in sorted(dependencies[name])
+                              if results[dependency].error is not None]
+                    if failed:
+                        pending.remove(name)
+                        error = exceptions.PluginError(
+                            'Plugin %s setup skipped: %s failed' % (
+                                name, ', '.join(failed)))
+                        LOGGER.error('%s', error)
+                        results[name] = SetupResult(error, 0)
+                    elif not plugins[name].has_setup():
+                        # nothing to run: done for its dependents
+                        pending.remove(name)
+                        results[name] = SetupResult(None, 0)
+                    elif name in parallel:
+                        pending.remove(name)
+                        tasks.put((name, plugins[name]))
+                        running = running + 1
+                    elif inline is None:
+                        inline = name
+
+                if inline is not None:
+                    pending.remove(inline)
+                    results[inline] = self._setup(inline, plugins[inline])
+                elif running:
+                    name, result = done.get()
+                    results[name] = result
+                    running = running - 1
+        finally:
+            for worker in workers:
+                tasks.put(None)
+            for worker in workers:
+                worker.join()
+
+        return results
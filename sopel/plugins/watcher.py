@@ -0,0 +1,106 @@
+# coding=utf-8
+"""Sopel's plugins watcher
+
+.. versionadded:: 7.0
+
+When :attr:`~sopel.config.core_section.CoreSection.watch_plugins` is enabled,
+the bot watches the source files of its plugins, and reloads a plugin as soon
+as its source changes, without an admin having to use the ``reload`` command.
+
+Only the plugins that changed are reloaded, and the bot's dispatch tables are
+swapped at once when a plugin is reloaded: messages received meanwhile are
+dispatched either to the old or to the new version of the plugin's callables,
+never to a partially registered plugin.
+
+The watcher polls the source files' modification time and size (see
+:func:`sopel.plugins.manifest.get_source_signature`) at a regular interval,
+and compares their content (see :func:`~sopel.plugins.manifest.get_source_hash`)
+only when these change, so a file that has been touched but not modified
+doesn't trigger a reload.
+"""
+# Licensed under the Eiffel Forum License 2.
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import logging
+import threading
+
+from sopel import module
+from . import manifest
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PluginWatcher(object):
+    """Watch the source files of a bot's plugins.
+
+    The :meth:`check` method is meant to be run periodically, as a job of the
+    bot's scheduler (see :meth:`sopel.bot.Sopel.setup`). The plugins'
+    current sources are used as reference the first time it runs.
+    """
+    def __init__(self):
+        self._sources = {}
+        self._lock = threading.Lock()
+
+    def get_changed_plugins(self, bot):
+        """Get the names of the plugins whose source changed since last time.
+
+        :param bot: instance of Sopel
+        :type bot: :class:`sopel.bot.Sopel`
+        :return: the names of the plugins to reload
+        :rtype: list
+
+        A plugin is considered changed only if the content of its source
+        changed. New plugins (not seen before) are not considered changed.
+        """
+        changed = []
+        sources = {}
+        for name, plugin in list(bot._plugins.items()):
+            path = plugin.get_source_path()
+            if path is None:
+                continue
+
+            signature = manifest.get_source_signature(path)
+            if signature is None:
+                # file removed: keep the plugin as it is
+                continue
+
+            previous = self._sources.get(name)
+            if previous is None or previous[0] != path:
+                source_hash = manifest.get_source_hash(path)
+            elif previous[1] == signature:
+                source_hash = previous[2]
+            else:
+                source_hash = manifest.get_source_hash(path)
+                if source_hash != previous[2]:
+                    changed.append(name)
+
+            sources[name] = (path, signature, source_hash)
+
+        self._sources = sources
+        return changed
+
+    @module.thread(True)
+    def check(self, bot):
+        """Reload the plugins whose source changed.
+
+        :param bot: instance of Sopel
+        :type bot: :class:`sopel.bot.Sopel`
+
+        A check is skipped if the previous one isn't over yet. An error while
+        reloading a plugin is logged, and doesn't prevent other plugins from
+        being reloaded.
+        """
+        if not self._lock.acquire(False):
+            return
+
+        try:
+            for name in self.get_changed_plugins(bot):
+                LOGGER.info('Source of plugin %s changed, reloading', name)
+                try:
+                    bot.reload_plugin(name)
+                except Exception as error:
+                    LOGGER.exception(
+                        'Unable to reload plugin %s: %s', name, error)
+        finally:
+            self._lock.release()
@@ -0,0 +1,245 @@
+# coding=utf-8
+"""Sopel's supervisor: run several bots in one process
+
+.. versionadded:: 7.0
+
+The ``sopel start`` command can run more than one bot, each with its own
+configuration, usually to connect to more than one IRC network (see its
+``--with-config`` option). Instead of one process per network, the
+:class:`Supervisor` runs one bot per configuration in the same process, in
+its own thread, and reconnects it when it is disconnected.
+
+Each bot has its own memory, channels, scheduler, and the rate limits of its
+plugins. What the process would load once anyway is shared:
+
+* plugins are imported once, and each bot registers them (a plugin's
+  ``setup`` runs for each bot),
+* bots using the same database share the same engine, and its connection
+  pool (see :class:`sopel.db.SopelDB`),
+* logging is configured by the first configuration only.
+
+.. warning::
+
+    As plugins are imported once, their module globals are shared by every
+    bot: a plugin that keeps its state in globals mixes the state of the
+    bots, and the last bot set up wins. Built-in plugins keep their state in
+    ``bot.memory``, which each bot has its own, and so should other plugins.
+    The supervisor warns when a plugin enabled for more than one bot assigns
+    module globals in its functions (see :func:`get_assigned_globals`); it
+    can't tell when a plugin modifies a global object in place, such as a
+    module-level list or dict.
+
+    Likewise, only the main bot sends log messages to its
+    ``logging_channel``, for every bot: the ``logging_channel`` of the other
+    configurations is ignored.
+"""
+# Licensed under the Eiffel Forum License 2.
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import dis
+import inspect
+import logging
+import threading
+
+from sopel import bot
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _iter_code(code):
+    # the code object, and the code of the functions defined in it
+    yield code
+    for const in code.co_consts:
+        if inspect.iscode(const):
+            for nested in _iter_code(const):
+                yield nested
+
+
+def get_assigned_globals(plugin):
+    """Get the module globals a plugin's functions assign.
+
+    :param plugin: a loaded plugin handler
+    :type plugin: :class:`~sopel.plugins.handlers.AbstractPluginHandler`
+    :return: the names of the globals, sorted
+    :rtype: list
+
+    Such globals are shared by every bot the plugin is enabled for. They are
+    found by looking at the bytecode of the functions (and methods) defined
+    in the plugin's module, for ``global`` assignments: globals modified in
+    place (e.g. ``items.append(item)``) are not found. The bytecode can't be
+    read on Python 2: the list is always empty there.
+    """
+    module = getattr(plugin, '_module', None)
+    if module is None or not hasattr(dis, 'get_instructions'):
+        return []
+
+    functions = []
+    for value in vars(module).values():
+        if inspect.isclass(value):
+            functions.extend(vars(value).values())
+        else:
+            functions.append(value)
+
+    names = set()
+    for function in functions:
+        code = getattr(function, '__code__', None)
+        if (code is None or
+                getattr(function, '__module__', None) != module.__name__):
+            continue  # not a function, or imported from another module
+        for nested in _iter_code(code):
+            names.update(
+                instruction.argval
+                for instruction in dis.get_instructions(nested)
+                if instruction.opname == 'STORE_GLOBAL')
+    return sorted(names)
+
+
+class Supervisor(object):
+    """Run one bot per configuration, in the same process.
+
+    :param list settings: the configuration of each bot
+    :param bool daemon: whether the bots run as a daemon
+    :param int delay: how long to wait (in seconds) before reconnecting a
+                      bot that has been disconnected
+
+    The first bot is the main one: its configuration sets up logging. A bot
+    that quits (for example, with the ``quit`` admin command) stops on its
+    own network only, while a bot that asks for a restart restarts the whole
+    process: the supervisor stops every bot, and :attr:`wantsrestart` is set.
+    """
+    def __init__(self, settings, daemon=False, delay=20):
+        self.settings = list(settings)
+        self.daemon = daemon
+        self.delay = delay
+        self.bots = [None] * len(self.settings)
+        """The bot currently running for each configuration."""
+        self.wantsrestart = False
+        """Whether a restart has been asked."""
+        self._threads = []
+        self._stopping = threading.Event()
+
+    def _create_bot(self, index):
+        instance = bot.Sopel(self.settings[index], daemon=self.daemon)
+        instance.setup(with_logging=(index == 0))
+        self.bots[index] = instance
+        return instance
+
+    def setup(self):
+        """Create and set up a bot for each configuration.
+
+        Bots are set up one at a time, in the main thread, starting with the
+        main one.
+        """
+        for index in range(len(self.settings)):
+            self._create_bot(index)
+        self.check_shared_state()
+
+    def check_shared_state(self):
+        """Warn about the state the bots share, and shouldn't.
+
+        A warning is logged for each plugin enabled for more than one bot
+        that stores its state in module globals (see
+        :func:`get_assigned_globals`), and for each configuration (but the
+        main one) with a ``logging_channel``.
+        """
+        bots = [instance for instance in self.bots if instance is not None]
+        for instance in bots[1:]:
+            if instance.settings.core.logging_channel:
+                LOGGER.warning(
+                    'Bot %s: logging_channel is ignored, only the main bot '
+                    'sends log messages to its logging channel',
+                    instance.settings.basename)
+
+        plugins = {}
+        for instance in bots:
+            for name, plugin in instance._plugins.items():
+                plugins.setdefault(name, []).append(plugin)
+
+        for name, handlers in sorted(plugins.items()):
+            if len(handlers) < 2:
+                continue
+            names = get_assigned_globals(handlers[0])
+            if names:
+                LOGGER.warning(
+                    'Plugin %s is enabled for %d bots, but it stores its '
+                    'state in module globals (%s): the bots share it',
+                    name, len(handlers), ', '.join(names))
+
+    def _run_bot(self, index):
+        settings = self.settings[index]
+        instance = self.bots[index]
+        while True:
+            try:
+                instance.run(settings.core.host, int(settings.core.port))
+            except Exception:
+                err_log = logging.getLogger('sopel.exceptions')
+                err_log.exception(
+                    'Critical exception in core (%s)', settings.basename)
+                err_log.error('----------------------------------------')
+
+            if instance.wantsrestart:
+                self.restart('Restarting')
+                break
+            if instance.hasquit or self._stopping.is_set():
+                break
+
+            LOGGER.warning(
+                'Bot %s disconnected. Reconnecting in %s seconds...',
+                settings.basename, self.delay)
+            if self._stopping.wait(self.delay):
+                break
+
+            try:
+                instance = self._create_bot(index)
+            except Exception:
+                LOGGER.exception(
+                    'Unable to set up bot %s again', settings.basename)
+                break
+
+    def run(self):
+        """Run the bots until they all quit.
+
+        :return: ``-1`` if a restart has been asked, ``0`` otherwise
+        :rtype: int
+
+        Each bot runs in its own thread, which this method waits for.
+        """
+        for index, settings in enumerate(self.settings):
+            thread = threading.Thread(
+                target=self._run_bot,
+                args=(index,),
+                name='sopel-%s' % settings.basename)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+        for thread in self._threads:
+            # a timeout keeps the main thread responsive to signals
+            while thread.is_alive():
+                thread.join(1)
+
+        return -1 if self.wantsrestart else 0
+
+    def quit(self, message):
+        """Make every bot quit.
+
+        :param str message: the quit message
+        """
+        self._stopping.set()
+        for instance in self.bots:
+            if instance is None or instance.hasquit:
+                continue
+            try:
+                instance.quit(message)
+            except Exception as error:
+                LOGGER.error(
+                    'Unable to quit %s: %s', instance.settings.basename, error)
+
+    def restart(self, message):
+        """Make every bot quit, and ask for a restart.
+
+        :param str message: the quit message
+        """
+        self.wantsrestart = True
+        self.quit(message)
@@ -10,16 +10,12 @@ import re
 import sys
 import tempfile
 
-try:
-    import ConfigParser
-except ImportError:
-    import configparser as ConfigParser
-
 from sopel.bot import SopelWrapper
 import sopel.config
 import sopel.config.core_section
 import sopel.plugins
 import sopel.tools
+import sopel.tools.datasets
 import sopel.tools.target
 import sopel.trigger
 
@@ -41,7 +37,7 @@ if sys.version_info.major >= 3:
 class MockConfig(sopel.config.Config):
     def __init__(self):
         self.filename = tempfile.mkstemp()[1]
-        self.parser = ConfigParser.RawConfigParser(allow_no_value=True)
+        self.parser = sopel.config.SopelConfigParser(allow_no_value=True)
         self.parser.add_section('core')
         self.parser.set('core', 'owner', 'Embolalia')
         self.define_section('core', sopel.config.core_section.CoreSection)
@@ -67,6 +63,7 @@ class MockSopel(object):
 
         self.memory = sopel.tools.SopelMemory()
         self.memory['url_callbacks'] = sopel.tools.SopelMemory()
+        self.datasets = sopel.tools.datasets.DatasetManager()
 
         self.config = MockConfig()
         self._init_config()
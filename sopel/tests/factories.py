@@ -92,7 +92,10 @@ class TriggerFactory(object):
     def __call__(self, mockbot, raw, pattern=None):
         return trigger.Trigger(
             mockbot.settings,
-            trigger.PreTrigger(mockbot.nick, raw),
+            trigger.PreTrigger(
+                mockbot.nick,
+                raw,
+                url_schemes=mockbot.settings.core.auto_url_schemes),
             re.match(pattern or r'.*', raw))
 
 
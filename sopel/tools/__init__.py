@@ -15,6 +15,7 @@
 from __future__ import unicode_literals, absolute_import, print_function, division
 
 import codecs
+import contextlib
 import functools
 import logging
 import os
@@ -26,9 +27,20 @@ from collections import defaultdict
 
 from sopel.tools._events import events  # NOQA
 
+try:
+    # Python 3.11+ deprecates the top-level module
+    from re import _parser as sre_parse
+except ImportError:
+    try:
+        import sre_parse
+    except ImportError:
+        # private API: URL patterns' hostnames can't be read without it
+        sre_parse = None
+
 if sys.version_info.major >= 3:
     raw_input = input
     unicode = str
+    unichr = chr
     iteritems = dict.items
     itervalues = dict.values
     iterkeys = dict.keys
@@ -37,11 +49,18 @@ else:
     itervalues = dict.itervalues
     iterkeys = dict.iterkeys
 
+LOGGER = logging.getLogger(__name__)
+
 _channel_prefixes = ('#', '&', '+', '!')
 
 # Can be implementation-dependent
 _regex_type = type(re.compile(''))
 
+# IRC color codes, with their colors: a message must not be split inside
+_color_code = re.compile(
+    r'\x03(?:[0-9]{1,2}(?:,[0-9]{1,2})?)?'
+    r'|\x04(?:[0-9a-fA-F]{6}(?:,[0-9a-fA-F]{6})?)?')
+
 
 def get_input(prompt):
     """Get decoded input from the terminal (equivalent to Python 3's ``input``).
@@ -217,6 +236,65 @@ def get_action_command_pattern(command):
         """.format(command=command)
 
 
+def _utf8_length(char):
+    code = ord(char)
+    if code < 0x80:
+        return 1
+    elif code < 0x800:
+        return 2
+    elif 0xD800 <= code < 0xDC00:
+        # high surrogate (narrow Python 2 build): counts for the whole pair
+        return 4
+    elif 0xDC00 <= code < 0xE000:
+        # low surrogate: already counted with the high surrogate
+        return 0
+    elif code < 0x10000:
+        return 3
+    return 4
+
+
+def _split_message(text, start, max_length):
+    # Find where the message starting at ``start`` ends, and where the next
+    # one starts, in one pass over the characters that fit in ``max_length``
+    # bytes. The message is split at its last space if possible; otherwise,
+    # at its last character, without cutting a color code or a surrogate pair
+    length = len(text)
+    size = 0
+    last_space = -1
+    index = start
+    while index < length:
+        char = text[index]
+        end = index + 1
+        if char in '\x03\x04':
+            end = _color_code.match(text, index).end()
+        elif '\ud800' <= char < '\udc00' and end < length:
+            end = end + 1
+
+        unit_size = sum(_utf8_length(c) for c in text[index:end])
+        if size + unit_size > max_length:
+            if index == start:
+                # a single unit longer than max_length: send it anyway
+                index = end
+            break
+
+        size = size + unit_size
+        if char == ' ' and index > start:
+            last_space = index
+        index = end
+    else:
+        return length, length
+
+    split = index
+    if last_space != -1 and index < length and not text[index].isspace():
+        split = last_space
+
+    next_start = split
+    while next_start < length and text[next_start].isspace():
+        next_start = next_start + 1
+
+    return split, next_start
+
+
 def get_sendable_message(text, max_length=400):
     """Get a sendable ``text`` message, with its excess when needed.
 
@@ -232,24 +310,48 @@ def get_sendable_message(text, max_length=400):
     The ``max_length`` is the max length of text in **bytes**, but we take
     care of Unicode 2-byte characters by working on the Unicode string,
     then making sure the bytes version is smaller than the max length.
+
+    .. versionchanged:: 7.0
+
+        The text is split in one pass over its characters, and never inside
+        a multibyte character or an IRC color code.
+
+    .. seealso::
+
+        :func:`get_sendable_messages` to split a text into all of its
+        sendable messages at once.
     """
-    unicode_max_length = max_length
-    excess = ''
-
-    while len(text.encode('utf-8')) > max_length:
-        last_space = text.rfind(' ', 0, unicode_max_length)
-        if last_space == -1:
-            # No last space, just split where it is possible
-            excess = text[unicode_max_length:] + excess
-            text = text[:unicode_max_length]
-            # Decrease max length for the unicode string
-            unicode_max_length = unicode_max_length - 1
-        else:
-            # Split at the last best space found
-            excess = text[last_space:]
-            text = text[:last_space]
+    split, next_start = _split_message(text, 0, max_length)
+    return text[:split], text[next_start:]
+
+
+def get_sendable_messages(text, max_length=400, max_messages=None):
+    """Split a ``text`` into sendable messages.
 
-    return text, excess.lstrip()
+    :param str text: text to send (expects Unicode-encoded string)
+    :param int max_length: maximum length of each message, in bytes
+    :param int max_messages: maximum number of messages (optional)
+    :return: the sendable messages
+    :rtype: list
+
+    The text is split as with :func:`get_sendable_message`, in one pass over
+    the whole text. When there would be more than ``max_messages`` messages,
+    the last one contains the whole remainder of the text, without regard
+    to ``max_length``.
+
+    .. versionadded:: 7.0
+    """
+    messages = []
+    start = 0
+    length = len(text)
+    while start < length:
+        if max_messages is not None and len(messages) >= max_messages - 1:
+            messages.append(text[start:])
+            break
+        split, next_start = _split_message(text, start, max_length)
+        messages.append(text[start:split])
+        start = next_start
+    return messages
 
 
 def deprecated(reason=None, version=None, removed_in=None, func=None):
@@ -598,7 +700,134 @@ def get_logger(plugin_name):
     return logging.getLogger('sopel.externals.%s' % plugin_name)
 
 
-class SopelMemory(dict):
+_missing = object()
+
+
+class _StripedLocksMixin(object):
+    """Thread-safe writes for a ``dict``, with one lock per stripe of keys.
+
+    Reads are not locked: each read of a ``dict`` is atomic already. Writes
+    lock the stripe of their key only, so writes to other keys are not
+    blocked, and compound operations (:meth:`setdefault`,
+    :meth:`get_or_create`, :meth:`compare_and_set`) are atomic with regard
+    to any other write to the same key.
+    """
+    stripes = 16
+    """Number of locks for the keys."""
+
+    def _init_locks(self):
+        self.lock = threading.Lock()
+        """Lock kept for backward compatibility.
+
+        Writes don't use this lock anymore, but plugins can still use it to
+        synchronize their own operations.
+        """
+        self._stripe_locks = [threading.RLock() for _ in range(self.stripes)]
+
+    def _get_lock(self, key):
+        return self._stripe_locks[hash(key) % self.stripes]
+
+    @contextlib.contextmanager
+    def _all_locks(self):
+        # always acquired in the same order, so no deadlock is possible
+        for lock in self._stripe_locks:
+            lock.acquire()
+        try:
+            yield
+        finally:
+            for lock in reversed(self._stripe_locks):
+                lock.release()
+
+    def __setitem__(self, key, value):
+        """Set a key equal to a value.
+
+        Other writes to keys of the same stripe are locked while doing so.
+        """
+        with self._get_lock(key):
+            return super(_StripedLocksMixin, self).__setitem__(key, value)
+
+    def __delitem__(self, key):
+        with self._get_lock(key):
+            return super(_StripedLocksMixin, self).__delitem__(key)
+
+    def pop(self, key, *args):
+        with self._get_lock(key):
+            return super(_StripedLocksMixin, self).pop(key, *args)
+
+    def popitem(self):
+        with self._all_locks():
+            return super(_StripedLocksMixin, self).popitem()
+
+    def clear(self):
+        with self._all_locks():
+            return super(_StripedLocksMixin, self).clear()
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def setdefault(self, key, default=None):
+        """Get the value of ``key``, after setting it to ``default`` if needed.
+
+        This is atomic: concurrent calls all get the same value.
+        """
+        with self._get_lock(key):
+            return super(_StripedLocksMixin, self).setdefault(key, default)
+
+    def get_or_create(self, key, factory):
+        """Get the value of ``key``, or create it by calling ``factory``.
+
+        :param key: the key to get the value of
+        :param callable factory: a callable without arguments, returning
+                                 the value to set when there is none
+        :return: the value of ``key``
+
+        This is atomic: the ``factory`` is called at most once per missing
+        key, and concurrent calls all get the same value. For example, to
+        get a plugin's namespace in the bot's memory::
+
+            cache = bot.memory.get_or_create('my_plugin_cache', SopelMemory)
+
+        .. versionadded:: 7.0
+        """
+        value = dict.get(self, key, _missing)
+        if value is not _missing:
+            return value
+        with self._get_lock(key):
+            value = dict.get(self, key, _missing)
+            if value is _missing:
+                value = factory()
+                self[key] = value
+            return value
+
+    def compare_and_set(self, key, expected, value):
+        """Set ``key`` to ``value``, only if its value is ``expected``.
+
+        :param key: the key to set
+        :param expected: the value ``key`` must be equal to
+        :param value: the new value of ``key``
+        :return: ``True`` if the value has been set, ``False`` otherwise
+                 (including when ``key`` has no value)
+        :rtype: bool
+
+        This is atomic, so it can be used to update a value without losing
+        concurrent updates, e.g. to count something::
+
+            count = bot.memory.setdefault('count', 0)
+            while not bot.memory.compare_and_set('count', count, count + 1):
+                count = bot.memory['count']
+
+        .. versionadded:: 7.0
+        """
+        with self._get_lock(key):
+            current = dict.get(self, key, _missing)
+            if current is _missing or current != expected:
+                return False
+            self[key] = value
+            return True
+
+
+class SopelMemory(_StripedLocksMixin, dict):
     """A simple thread-safe ``dict`` implementation.
 
     In order to prevent exceptions when iterating over the values and changing
@@ -611,30 +840,17 @@ class SopelMemory(dict):
         Moved to ``tools.WillieMemory``
     .. versionchanged:: 6.0
         Renamed from ``WillieMemory`` to ``SopelMemory``
+    .. versionchanged:: 7.0
+
+        Reads (including ``in``) don't lock anymore, and writes lock only
+        the keys of the same stripe (one of :attr:`stripes`), so threads
+        don't wait for each other to use different keys. The atomic
+        :meth:`get_or_create` and :meth:`compare_and_set` methods have been
+        added.
     """
     def __init__(self, *args):
         dict.__init__(self, *args)
-        self.lock = threading.Lock()
-
-    def __setitem__(self, key, value):
-        """Set a key equal to a value.
-
-        The dict is locked for other writes while doing so.
-        """
-        self.lock.acquire()
-        result = dict.__setitem__(self, key, value)
-        self.lock.release()
-        return result
-
-    def __contains__(self, key):
-        """Check if a key is in the dict.
-
-        The dict is locked for writes while doing so.
-        """
-        self.lock.acquire()
-        result = dict.__contains__(self, key)
-        self.lock.release()
-        return result
+        self._init_locks()
 
     # Needed to make it explicit that we don't care about the `lock` attribute
     # when comparing/hashing SopelMemory objects.
@@ -655,38 +871,277 @@ class SopelMemory(dict):
         return self.__contains__(key)
 
 
-class SopelMemoryWithDefault(defaultdict):
-    """Same as SopelMemory, but subclasses from collections.defaultdict.
+def _can_match_in(items, char):
+    """Tell if the character set ``items`` can match ``char``."""
+    negate = False
+    matched = False
+    for op, av in items:
+        if op == sre_parse.NEGATE:
+            negate = True
+        elif op == sre_parse.LITERAL:
+            matched = matched or av == char
+        elif op == sre_parse.RANGE:
+            matched = matched or av[0] <= char <= av[1]
+        elif op == sre_parse.CATEGORY:
+            # only the negated categories (\D, \W, \S) can match punctuation
+            matched = matched or 'not' in str(av).lower()
+        else:
+            matched = True
+    return matched != negate
+
+
+def _can_match(items, char):
+    """Tell if any part of the parsed pattern ``items`` can match ``char``."""
+    repeats = (
+        sre_parse.MAX_REPEAT,
+        sre_parse.MIN_REPEAT,
+        getattr(sre_parse, 'POSSESSIVE_REPEAT', None),
+    )
+    for op, av in items:
+        if op == sre_parse.LITERAL:
+            if av == char:
+                return True
+        elif op == sre_parse.NOT_LITERAL:
+            if av != char:
+                return True
+        elif op == sre_parse.IN:
+            if _can_match_in(av, char):
+                return True
+        elif op in repeats:
+            if _can_match(av[2], char):
+                return True
+        elif op == sre_parse.SUBPATTERN:
+            if _can_match(av[-1], char):
+                return True
+        elif op == sre_parse.BRANCH:
+            if any(_can_match(branch, char) for branch in av[1]):
+                return True
+        elif op in (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            continue  # zero-width
+        else:
+            return True  # can't tell, so assume it can
+    return False
 
-    .. versionadded:: 4.3
-        As ``WillieMemoryWithDefault``
-    .. versionchanged:: 6.0
-        Renamed to ``SopelMemoryWithDefault``
+
+def _flatten_pattern(items):
+    """Yield the parsed pattern ``items`` with groups inlined.
+
+    Groups are always matched, so their content can be read as if it was
+    part of the main sequence. Literals are yielded as characters, and
+    everything else as its ``(op, av)`` pair.
+    """
+    for op, av in items:
+        if op == sre_parse.SUBPATTERN:
+            for item in _flatten_pattern(av[-1]):
+                yield item
+        elif op == sre_parse.LITERAL:
+            yield unichr(av)
+        else:
+            yield (op, av)
+
+
+def get_url_pattern_host_suffix(pattern):
+    """Get the hostname suffix required by a URL ``pattern``, if any.
+
+    :param pattern: compiled regex pattern for URLs
+    :type pattern: :ref:`re.Pattern <python:re-objects>`
+    :return: the lowercase suffix, or ``None`` if it can't be determined
+    :rtype: str
+
+    The suffix is the literal text that ends the hostname part of the
+    pattern, i.e. what's between a literal ``://`` and the next literal
+    ``/``. For example, ``https?://(?:www\\.)?example\\.com/.*`` requires a
+    hostname that ends with ``example.com``.
+
+    To be safe, no suffix is returned when anything in the hostname part
+    could match a ``/``, as the pattern could then match somewhere else in
+    the URL.
+
+    The pattern is read with Python's private regex parser, whose output
+    changes between Python versions: if it can't be read, no suffix is
+    returned, and the pattern is always checked.
+
+    .. versionadded:: 7.0
+    """
+    if sre_parse is None or not isinstance(pattern.pattern, unicode):
+        return None
+
+    try:
+        return _get_url_pattern_host_suffix(pattern)
+    except Exception:  # can't parse, can't tell
+        LOGGER.debug(
+            'Unable to read the hostname of URL pattern %r', pattern.pattern,
+            exc_info=True)
+        return None
+
+
+def _get_url_pattern_host_suffix(pattern):
+    items = list(_flatten_pattern(
+        sre_parse.parse(pattern.pattern, pattern.flags)))
+
+    for index in range(len(items) - 2):
+        if items[index:index + 3] == [':', '/', '/']:
+            break
+    else:
+        return None  # no scheme separator
+
+    host = []
+    for item in items[index + 3:]:
+        if item == '/':
+            break
+        host.append(item)
+    else:
+        return None  # hostname isn't followed by a slash
+
+    if _can_match([item for item in host if not isinstance(item, unicode)],
+                  ord('/')):
+        return None
+
+    suffix = []
+    for item in reversed(host):
+        if not isinstance(item, unicode):
+            break
+        suffix.append(item)
+
+    return ''.join(reversed(suffix)).lower() or None
+
+
+class SopelURLCallbacks(SopelMemory):
+    """A :class:`SopelMemory` for URL callbacks, indexed by hostname.
+
+    Keys are compiled regex patterns, and values are their callbacks, as
+    registered with :meth:`sopel.bot.Sopel.register_url_callback`. Patterns
+    are grouped by the hostname suffix they require (see
+    :func:`get_url_pattern_host_suffix`), so :meth:`search` tests a URL only
+    against the patterns that could match its hostname, plus the patterns
+    without a known hostname.
+
+    .. versionadded:: 7.0
     """
     def __init__(self, *args):
-        defaultdict.__init__(self, *args)
-        self.lock = threading.Lock()
+        SopelMemory.__init__(self, *args)
+        self._version = 0
+        self._index = None
+
+    def _invalidate(self):
+        self._version = self._version + 1
 
     def __setitem__(self, key, value):
-        """Set a key equal to a value.
+        result = SopelMemory.__setitem__(self, key, value)
+        self._invalidate()
+        return result
 
-        The dict is locked for other writes while doing so.
-        """
-        self.lock.acquire()
-        result = defaultdict.__setitem__(self, key, value)
-        self.lock.release()
+    def __delitem__(self, key):
+        result = SopelMemory.__delitem__(self, key)
+        self._invalidate()
         return result
 
-    def __contains__(self, key):
-        """Check if a key is in the dict.
+    def pop(self, *args):
+        result = SopelMemory.pop(self, *args)
+        self._invalidate()
+        return result
 
-        The dict is locked for writes while doing so.
-        """
-        self.lock.acquire()
-        result = defaultdict.__contains__(self, key)
-        self.lock.release()
+    def popitem(self):
+        result = SopelMemory.popitem(self)
+        self._invalidate()
         return result
 
+    def setdefault(self, *args):
+        result = SopelMemory.setdefault(self, *args)
+        self._invalidate()
+        return result
+
+    def update(self, *args, **kwargs):
+        result = SopelMemory.update(self, *args, **kwargs)
+        self._invalidate()
+        return result
+
+    def clear(self):
+        result = SopelMemory.clear(self)
+        self._invalidate()
+        return result
+
+    __eq__ = dict.__eq__
+    __ne__ = dict.__ne__
+    __hash__ = dict.__hash__
+
+    def _get_index(self):
+        index = self._index
+        if index is not None and index[0] == self._version:
+            return index
+
+        version = self._version
+        order = {}
+        suffixes = {}  # reversed suffix trie; '' holds the patterns
+        generic = []
+        for position, pattern in enumerate(list(self.keys())):
+            order[pattern] = position
+            suffix = get_url_pattern_host_suffix(pattern)
+            if suffix is None:
+                generic.append(pattern)
+                continue
+
+            node = suffixes
+            for char in reversed(suffix):
+                node = node.setdefault(char, {})
+            node.setdefault('', []).append(pattern)
+
+        index = (version, order, suffixes, generic)
+        self._index = index
+        return index
+
+    def get_candidates(self, url):
+        """Get the patterns that could match ``url``, in registration order.
+
+        :param str url: the URL to look for
+        :return: a list of compiled regex patterns
+        """
+        _version, order, suffixes, generic = self._get_index()
+        candidates = set(generic)
+
+        start = url.find('://')
+        while start != -1:
+            end = url.find('/', start + 3)
+            if end == -1:
+                end = len(url)
+            node = suffixes
+            for char in reversed(url[start + 3:end].lower()):
+                node = node.get(char)
+                if node is None:
+                    break
+                candidates.update(node.get('', []))
+            start = url.find('://', end)
+
+        return sorted(candidates, key=order.get)
+
+    def search(self, url):
+        """Yield callbacks for ``url`` with their match, in registration order.
+
+        :param str url: the URL to look for
+        :return: yield 2-value tuples of ``(callback, match)``
+        """
+        for pattern in self.get_candidates(url):
+            match = pattern.search(url)
+            if match:
+                callback = self.get(pattern)
+                if callback is not None:
+                    yield callback, match
+
+
+class SopelMemoryWithDefault(_StripedLocksMixin, defaultdict):
+    """Same as SopelMemory, but subclasses from collections.defaultdict.
+
+    .. versionadded:: 4.3
+        As ``WillieMemoryWithDefault``
+    .. versionchanged:: 6.0
+        Renamed to ``SopelMemoryWithDefault``
+    .. versionchanged:: 7.0
+        Same changes as :class:`SopelMemory`.
+    """
+    def __init__(self, *args):
+        defaultdict.__init__(self, *args)
+        self._init_locks()
+
     @deprecated
     def contains(self, key):
         """Check if ``key`` is in the memory
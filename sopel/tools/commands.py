@@ -0,0 +1,216 @@
+# coding=utf-8
+"""Sopel's command index: internal tool for the ``help`` plugin.
+
+.. versionadded:: 7.0
+
+The bot keeps a :class:`CommandIndex` of its plugins' commands, updated as
+plugins are registered and unregistered, so the ``help`` plugin doesn't have
+to build anything when it is asked for help:
+
+* the commands' documentation is formatted once, when they are registered,
+* the listing of every command, by category, is rendered once, and only
+  again after a plugin is loaded, reloaded, or unloaded,
+* commands can be found even with a typo in their name, with a
+  "deletion" index: a name and a command match when removing at most one
+  character from each gives the same string.
+
+.. note::
+
+    As :mod:`sopel.tools.jobs`, this is an internal tool. Therefore, it is
+    not shown in the public documentation.
+
+"""
+# Licensed under the Eiffel Forum License 2.
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import collections
+import difflib
+import textwrap
+import threading
+
+
+def get_category(func):
+    """Get the category of a command callable.
+
+    :param func: a callable with commands
+    :return: the callable's ``category`` if it has one, or else the name of
+             its plugin
+    :rtype: str
+    """
+    plugin_name = func.__module__.rsplit('.', 1)[-1]
+    # TODO doc and make decorator for this. Not sure if this is how
+    # it should work yet, so not making it public for 6.0.
+    return getattr(func, 'category', plugin_name)
+
+
+def format_doc(doc):
+    """Format a command's documentation, as it is sent to users.
+
+    :param tuple doc: the command's docstring lines, and its examples
+    :return: the docstring's lines, then one line with the examples (if any)
+    :rtype: list
+    """
+    lines, examples = doc
+    lines = list(lines)
+    if examples:
+        # Build a nice, grammatically-correct list of examples
+        lines.append('e.g. ' + ', '.join(
+            examples[:-2] + [' or '.join(examples[-2:])]))
+    return lines
+
+
+def _deletions(name):
+    # the name, and the name without one of its characters
+    keys = set([name])
+    keys.update(name[:index] + name[index + 1:] for index in range(len(name)))
+    keys.discard('')
+    return keys
+
+
+class CommandIndex(object):
+    """Index of the bot's commands, and of their documentation.
+
+    The callables are added and removed as the bot registers and unregisters
+    them (see :meth:`add` and :meth:`remove`); everything else is read-only,
+    and safe to use from any thread.
+    """
+    def __init__(self):
+        self.groups = collections.defaultdict(list)
+        """A mapping of categories to the commands in each of them."""
+        self.docs = {}
+        """A mapping of command names to their docstring and examples.
+
+        This is the bot's :attr:`~sopel.bot.Sopel.doc`.
+        """
+        self._docs_owners = {}
+        self._formatted_docs = {}
+        self._fuzzy = collections.defaultdict(set)
+        self._listing = None
+        self._lock = threading.RLock()
+
+    def add(self, func):
+        """Add the commands and documentation of the callable ``func``.
+
+        :param func: a callable registered by the bot
+
+        The callable's first command is listed in its category; each of its
+        commands with documentation can be looked up by name. When another
+        callable already documents a command, ``func`` replaces it.
+        """
+        commands = getattr(func, 'commands', [])
+        docs = getattr(func, '_docs', {})
+        if not commands and not docs:
+            return
+
+        with self._lock:
+            if commands:
+                self.groups[get_category(func)].append(commands[0])
+                self._listing = None
+            for command, doc in docs.items():
+                self.docs[command] = doc
+                self._docs_owners[command] = func
+                self._formatted_docs[command] = format_doc(doc)
+                for key in _deletions(command):
+                    self._fuzzy[key].add(command)
+
+    def remove(self, func):
+        """Remove the commands and documentation of the callable ``func``.
+
+        :param func: a callable unregistered by the bot
+
+        Only the documentation ``func`` added is removed: not the one of
+        another callable that replaced it since.
+        """
+        commands = getattr(func, 'commands', [])
+        docs = getattr(func, '_docs', {})
+        if not commands and not docs:
+            return
+
+        with self._lock:
+            if commands:
+                category = get_category(func)
+                group = self.groups.get(category)
+                if group and commands[0] in group:
+                    group.remove(commands[0])
+                    if not group:
+                        del self.groups[category]
+                    self._listing = None
+            for command in docs:
+                if self._docs_owners.get(command) is not func:
+                    continue
+                del self.docs[command]
+                del self._docs_owners[command]
+                del self._formatted_docs[command]
+                for key in _deletions(command):
+                    names = self._fuzzy.get(key)
+                    if names is not None:
+                        names.discard(command)
+                        if not names:
+                            del self._fuzzy[key]
+
+    def get_doc(self, name):
+        """Get the formatted documentation of the command ``name``.
+
+        :param str name: the name of a command
+        :return: the lines to send (see :func:`format_doc`), or ``None`` if
+                 the command isn't documented
+        :rtype: list
+        """
+        with self._lock:
+            lines = self._formatted_docs.get(name)
+            if lines is None and name in self.docs:
+                # documented directly in the bot's ``doc``
+                lines = format_doc(self.docs[name])
+        return lines
+
+    def find(self, name, limit=3):
+        """Find the documented commands with a name close to ``name``.
+
+        :param str name: a command name, maybe with a typo
+        :param int limit: maximum number of commands to find
+        :return: the commands found, the closest first; only ``name`` itself
+                 if it is documented
+        :rtype: list
+        """
+        with self._lock:
+            if name in self.docs:
+                return [name]
+            candidates = set()
+            for key in _deletions(name):
+                candidates.update(self._fuzzy.get(key, ()))
+
+        return sorted(
+            candidates,
+            key=lambda command: (
+                -difflib.SequenceMatcher(None, name, command).ratio(),
+                command),
+        )[:limit]
+
+    def get_listing(self):
+        """Get the listing of every command, by category.
+
+        :return: one paragraph per category (sorted by name), with its name
+                 in upper case, then its commands (sorted), wrapped to 70
+                 characters per line
+        :rtype: str
+
+        The listing is rendered only when it is first asked for after a
+        callable with commands has been added or removed.
+        """
+        with self._lock:
+            if self._listing is None:
+                self._listing = self._render_listing()
+            return self._listing
+
+    def _render_listing(self):
+        if not self.groups:
+            return ''
+        name_length = max(6, max(len(category) for category in self.groups))
+        indent = ' ' * (name_length + 2)
+        paragraphs = []
+        for category, commands in sorted(self.groups.items()):
+            text = category.upper().ljust(name_length) + '  ' + '  '.join(
+                sorted(set(commands)))  # remove duplicates
+            paragraphs.append(
+                '\n'.join(textwrap.wrap(text, subsequent_indent=indent)))
+        return '\n\n'.join(paragraphs)
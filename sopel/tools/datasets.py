@@ -0,0 +1,307 @@
+# coding=utf-8
+"""Sopel's Dataset Manager: downloadable files used by plugins.
+
+Some plugins need data files that are downloaded from the Internet, such as
+a list of malicious domains or a GeoIP database. These files must be
+refreshed from time to time, but downloading them must not block the bot's
+startup (or any command).
+
+The :class:`DatasetManager` keeps track of these :class:`Dataset`\\s: plugins
+register them (usually in their ``setup``), then they can use the last good
+copy right away, while a background worker downloads the ones that are
+missing or too old. New files are moved in place only once complete, so a
+failed or partial download never replaces a good copy.
+
+.. note::
+
+    :mod:`sopel.tools.datasets` is an internal tool, available to plugins
+    through the bot's ``datasets`` attribute.
+
+"""
+# Licensed under the Eiffel Forum License 2.
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+from contextlib import closing
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+
+if sys.version_info.major >= 3:
+    from queue import Empty, Queue
+    from urllib.request import Request, urlopen
+else:
+    from Queue import Empty, Queue
+    from urllib2 import Request, urlopen
+
+
+LOGGER = logging.getLogger(__name__)
+
+if hasattr(os, 'replace'):
+    replace_file = os.replace
+else:
+    # Python 2: rename is atomic on POSIX systems, which is all we need
+    replace_file = os.rename
+
+
+class Dataset(object):
+    """A file downloaded from ``url`` and stored at ``path``.
+
+    :param str name: unique name of the dataset
+    :param str url: where to download the dataset from
+    :param str path: where the dataset is stored
+    :param int max_age: number of seconds after which the dataset must be
+                        downloaded again
+    :param process: optional function to turn the downloaded file into the
+                    dataset; it is called with the path of the downloaded
+                    file and the path where to write the result
+    :type process: :term:`function`
+    :param callback: optional function called with the dataset when it has
+                     been updated
+    :type callback: :term:`function`
+
+    Without ``process``, the downloaded file is the dataset.
+    """
+    def __init__(self, name, url, path, max_age,
+                 process=None, callback=None):
+        self.name = name
+        self.url = url
+        self.path = path
+        self.max_age = max_age
+        self.process = process
+        self.callback = callback
+        self.last_error = None
+        """The last exception raised while updating the dataset, if any."""
+
+    def __repr__(self):
+        return '<Dataset %s path=%r>' % (self.name, self.path)
+
+    def is_available(self):
+        """Tell if a copy of the dataset is available.
+
+        :rtype: bool
+        """
+        return os.path.isfile(self.path)
+
+    def is_stale(self, now=None):
+        """Tell if the dataset is missing or older than its ``max_age``.
+
+        :param float now: optional timestamp to compare to; defaults to now
+        :rtype: bool
+        """
+        if not self.is_available():
+            return True
+        now = time.time() if now is None else now
+        return os.path.getmtime(self.path) < now - self.max_age
+
+    def update(self, timeout=None):
+        """Download and store the dataset now, in the current thread.
+
+        :param int timeout: optional timeout for the download, in seconds
+
+        The file is downloaded (and processed) next to :attr:`path`, then
+        moved in place. Temporary files are removed on error.
+        """
+        download_path = self.path + '.download'
+        processed_path = self.path + '.tmp'
+        try:
+            request = Request(self.url, headers={
+                'User-Agent': 'Sopel (https://sopel.chat)'})
+            with closing(urlopen(request, timeout=timeout)) as response:
+                with open(download_path, 'wb') as fd:
+                    shutil.copyfileobj(response, fd)
+
+            if self.process is not None:
+                self.process(download_path, processed_path)
+                replace_file(processed_path, self.path)
+            else:
+                replace_file(download_path, self.path)
+        finally:
+            for path in (download_path, processed_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+class DatasetManager(object):
+    """Register datasets and refresh them in a background worker.
+
+    :param int timeout: timeout for each download, in seconds
+    :param int check_interval: how often (in seconds) registered datasets
+                               are checked, to refresh the stale ones
+
+    The worker is a daemon thread started on the first refresh; it downloads
+    one dataset at a time, so a slow mirror never blocks the bot. Another
+    daemon thread, started when the first dataset is registered, checks
+    every ``check_interval`` seconds for datasets that became stale.
+    """
+    def __init__(self, timeout=60, check_interval=60 * 60):
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self._datasets = {}
+        self._queue = Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._worker = None
+        self._checker = None
+        self._stopping = threading.Event()
+
+    def __contains__(self, name):
+        return name in self._datasets
+
+    def get(self, name):
+        """Get the registered dataset ``name``.
+
+        :param str name: name of the dataset
+        :rtype: :class:`Dataset`
+        :raise KeyError: when there is no such dataset
+        """
+        return self._datasets[name]
+
+    def get_path(self, name):
+        """Get the path to the last good copy of the dataset ``name``.
+
+        :param str name: name of the dataset
+        :return: the path, or ``None`` if no copy is available yet
+        :rtype: str
+        """
+        dataset = self._datasets.get(name)
+        if dataset is None or not dataset.is_available():
+            return None
+        return dataset.path
+
+    def register(self, name, url, path, max_age, process=None, callback=None):
+        """Register a dataset, and refresh it if it's stale.
+
+        :return: the registered dataset
+        :rtype: :class:`Dataset`
+
+        See :class:`Dataset` for the arguments. Registering a dataset with
+        the same ``name`` replaces the previous one.
+        """
+        dataset = Dataset(name, url, path, max_age, process, callback)
+        self._datasets[name] = dataset
+        with self._lock:
+            self._start_checker()
+        if dataset.is_stale():
+            self.refresh(name)
+        return dataset
+
+    def unregister(self, name):
+        """Unregister the dataset ``name``, if it exists.
+
+        Its files are kept, and a refresh already started will complete.
+        """
+        self._datasets.pop(name, None)
+
+    def refresh(self, name, force=False):
+        """Ask the worker to update the dataset ``name``.
+
+        :param str name: name of the dataset
+        :param bool force: update even if the dataset isn't stale
+        :return: ``True`` if an update has been scheduled
+        :rtype: bool
+        """
+        dataset = self._datasets[name]
+        if not force and not dataset.is_stale():
+            return False
+
+        with self._lock:
+            if name in self._pending:
+                return True  # already scheduled
+            self._pending.add(name)
+            self._queue.put(name)
+            self._start_worker()
+        return True
+
+    def refresh_stale(self):
+        """Ask the worker to update every stale dataset."""
+        for name in list(self._datasets):
+            try:
+                self.refresh(name)
+            except KeyError:
+                pass  # unregistered in the meantime
+
+    def _start_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        self._stopping.clear()
+        self._worker = threading.Thread(target=self._run)
+        self._worker.name = 'sopel-datasets'
+        self._worker.daemon = True
+        self._worker.start()
+
+    def _start_checker(self):
+        if self._checker is not None and self._checker.is_alive():
+            return
+        self._stopping.clear()
+        self._checker = threading.Thread(target=self._check)
+        self._checker.name = 'sopel-datasets-check'
+        self._checker.daemon = True
+        self._checker.start()
+
+    def _check(self):
+        while not self._stopping.wait(self.check_interval):
+            try:
+                self.refresh_stale()
+            except Exception:
+                LOGGER.exception('Unable to check datasets')
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                name = self._queue.get(timeout=1)
+            except Empty:
+                continue
+
+            if name is None:
+                self._queue.task_done()
+                continue  # woken up to stop
+
+            try:
+                self._update(name)
+            finally:
+                with self._lock:
+                    self._pending.discard(name)
+                self._queue.task_done()
+
+    def _update(self, name):
+        dataset = self._datasets.get(name)
+        if dataset is None:
+            return  # unregistered in the meantime
+
+        LOGGER.info('Downloading dataset %s from %s', name, dataset.url)
+        start = time.time()
+        try:
+            dataset.update(timeout=self.timeout)
+        except Exception as error:
+            dataset.last_error = error
+            LOGGER.exception('Unable to update dataset %s', name)
+            return
+
+        dataset.last_error = None
+        LOGGER.info(
+            'Dataset %s updated in %.2fs', name, time.time() - start)
+
+        if dataset.callback is not None:
+            try:
+                dataset.callback(dataset)
+            except Exception:
+                LOGGER.exception('Error in callback for dataset %s', name)
+
+    def join(self):
+        """Wait until all scheduled updates are done."""
+        self._queue.join()
+
+    def stop(self):
+        """Stop checking datasets, and ask the worker to stop.
+
+        The worker stops once its current download (if any) is done. This
+        doesn't wait for it: it is a daemon thread, so it won't prevent the
+        bot from exiting.
+        """
+        self._stopping.set()
+        worker = self._worker
+        if worker is not None and worker.is_alive():
+            self._queue.put(None)
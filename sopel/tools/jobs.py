@@ -17,6 +17,8 @@ import logging
 import threading
 import time
 
+from sopel.tools.metrics import MetricsRegistry
+
 
 LOGGER = logging.getLogger(__name__)
 
@@ -31,13 +33,23 @@ class JobScheduler(threading.Thread):
 
     It runs forever until the :attr:`stopping` event is set using the
     :meth:`stop` method.
+
+    .. versionchanged:: 7.0
+
+        The optional ``metrics`` parameter: a
+        :class:`~sopel.tools.metrics.MetricsRegistry` to record how late the
+        jobs run.
     """
-    def __init__(self, manager):
+    def __init__(self, manager, metrics=None):
         threading.Thread.__init__(self)
         self.manager = manager
         self.stopping = threading.Event()
         self._jobs = []
         self._mutex = threading.Lock()
+        registry = metrics or MetricsRegistry(enabled=False)
+        self._metric_lateness = registry.histogram(
+            'sopel_job_lateness_seconds',
+            'How late jobs run, compared to when they should.')
 
     def add_job(self, job):
         """Add a Job to the current job queue."""
@@ -103,6 +115,7 @@ class JobScheduler(threading.Thread):
         return jobs
 
     def _run_job(self, job):
+        self._metric_lateness.observe(max(0, time.time() - job.next_time))
         if job.func.thread:
             t = threading.Thread(
                 target=self._call, args=(job,)
@@ -0,0 +1,479 @@
+# coding=utf-8
+"""Sopel's metrics: internal tool to measure what the bot is doing.
+
+.. versionadded:: 7.0
+
+The bot records metrics (how many lines it receives and sends, how long its
+plugins' callables take, how late its jobs are, etc.) in a
+:class:`MetricsRegistry`. There are three kinds of metrics:
+
+* a :class:`Counter` only goes up, e.g. the number of lines received,
+* a :class:`Gauge` goes up and down, e.g. the number of running threads,
+* a :class:`Histogram` counts observations (usually durations) in buckets.
+
+A metric can have labels, to record one value per label's value, for
+example one counter per IRC event::
+
+    received = registry.counter(
+        'sopel_lines_received_total', 'Lines received.', ['event'])
+    received.labels('PRIVMSG').inc()
+
+The registry renders its metrics in the `Prometheus text format`__, served
+by a :class:`MetricsServer`, or written to a file.
+
+When the registry is disabled, it gives metrics that do nothing, so
+recording a metric costs almost nothing; code that needs to do more than
+that (like measuring a duration) can check :attr:`MetricsRegistry.enabled`
+first.
+
+.. __: https://prometheus.io/docs/instrumenting/exposition_formats/
+
+.. note::
+
+    As :mod:`sopel.tools.jobs`, this is an internal tool. Therefore, it is
+    not shown in the public documentation.
+
+"""
+# Licensed under the Eiffel Forum License 2.
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import bisect
+import collections
+import contextlib
+import io
+import logging
+import os
+import sys
+import threading
+import time
+
+if sys.version_info.major >= 3:
+    unicode = str
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+else:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+
+
+LOGGER = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+"""Content type of the Prometheus text format."""
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+    1.0, 2.5, 5.0, 7.5, 10.0, float('inf'))
+"""Default buckets of a :class:`Histogram`, in seconds."""
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if value == float('-inf'):
+        return '-Inf'
+    if isinstance(value, float):
+        return repr(value)
+    return unicode(value)
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{%s}' % ','.join(
+        '%s="%s"' % (name, unicode(value)
+                     .replace('\\', '\\\\')
+                     .replace('\n', '\\n')
+                     .replace('"', '\\"'))
+        for name, value in labels)
+
+
+class _CounterValue(object):
+    def __init__(self):
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        if amount < 0:
+            raise ValueError('A counter can only go up.')
+        with self._lock:
+            self._value += amount
+
+    def get(self):
+        return self._value
+
+    def samples(self):
+        yield '', (), self._value
+
+
+class _GaugeValue(object):
+    def __init__(self):
+        self._value = 0
+        self._function = None
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount=1):
+        with self._lock:
+            self._value -= amount
+
+    def set(self, value):
+        self._value = value
+
+    def set_function(self, function):
+        self._function = function
+
+    def get(self):
+        if self._function is not None:
+            return self._function()
+        return self._value
+
+    def samples(self):
+        yield '', (), self.get()
+
+
+class _HistogramValue(object):
+    def __init__(self, buckets):
+        self._buckets = buckets
+        self._counts = [0] * len(buckets)
+        self._sum = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self._buckets, value)
+        with self._lock:
+            self._sum += value
+            if index < len(self._counts):
+                self._counts[index] += 1
+
+    @contextlib.contextmanager
+    def time(self):
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.observe(time.time() - start)
+
+    def get(self):
+        """Get the cumulative counts of each bucket, and the sum."""
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        cumulative = []
+        count = 0
+        for bucket, bucket_count in zip(self._buckets, counts):
+            count += bucket_count
+            cumulative.append((bucket, count))
+        return cumulative, total
+
+    def samples(self):
+        cumulative, total = self.get()
+        for bucket, count in cumulative:
+            yield '_bucket', (('le', _format_value(bucket)),), count
+        yield '_count', (), cumulative[-1][1] if cumulative else 0
+        yield '_sum', (), total
+
+
+class _Metric(object):
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        self._value = None if self.labelnames else self._new_value()
+
+    def _new_value(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Get the metric's value for these labels' values.
+
+        :param values: one value per label, in the order of the labels
+        :return: the value, with the same methods as the metric
+        """
+        if len(values) != len(self.labelnames):
+            raise ValueError(
+                '%s expects %d label values, got %d' % (
+                    self.name, len(self.labelnames), len(values)))
+        key = tuple(unicode(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, self._new_value())
+        return child
+
+    def _get_value(self):
+        if self._value is None:
+            raise ValueError('%s has labels: use labels()' % self.name)
+        return self._value
+
+    def collect(self):
+        """Get the metric's samples.
+
+        :return: 3-value tuples: the sample's name, its labels (as a tuple of
+                 name-value pairs), and its value
+        :rtype: list
+        """
+        if self._value is not None:
+            children = [((), self._value)]
+        else:
+            with self._lock:
+                children = sorted(self._children.items())
+        samples = []
+        for values, child in children:
+            labels = tuple(zip(self.labelnames, values))
+            for suffix, extra_labels, value in child.samples():
+                samples.append(
+                    (self.name + suffix, labels + extra_labels, value))
+        return samples
+
+
+class Counter(_Metric):
+    """A metric that only goes up."""
+    type = 'counter'
+
+    def _new_value(self):
+        return _CounterValue()
+
+    def inc(self, amount=1):
+        """Increment the counter by ``amount`` (``1`` by default)."""
+        self._get_value().inc(amount)
+
+
+class Gauge(_Metric):
+    """A metric that goes up and down."""
+    type = 'gauge'
+
+    def _new_value(self):
+        return _GaugeValue()
+
+    def inc(self, amount=1):
+        """Increment the gauge by ``amount`` (``1`` by default)."""
+        self._get_value().inc(amount)
+
+    def dec(self, amount=1):
+        """Decrement the gauge by ``amount`` (``1`` by default)."""
+        self._get_value().dec(amount)
+
+    def set(self, value):
+        """Set the gauge to ``value``."""
+        self._get_value().set(value)
+
+    def set_function(self, function):
+        """Get the gauge's value from ``function`` when it is collected.
+
+        :param callable function: a callable without arguments returning the
+                                  gauge's current value
+        """
+        self._get_value().set_function(function)
+
+
+class Histogram(_Metric):
+    """A metric counting observations in buckets.
+
+    :param tuple buckets: upper bounds of the buckets, in increasing order
+                          (:data:`DEFAULT_BUCKETS` by default)
+
+    The last bucket is always ``+Inf``, so every observation is counted.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=None):
+        buckets = sorted(buckets or DEFAULT_BUCKETS)
+        if buckets[-1] != float('inf'):
+            buckets.append(float('inf'))
+        self.buckets = tuple(buckets)
+        super(Histogram, self).__init__(name, documentation, labelnames)
+
+    def _new_value(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value):
+        """Count an observation of ``value``."""
+        self._get_value().observe(value)
+
+    def time(self):
+        """Observe how long the ``with`` block takes, in seconds."""
+        return self._get_value().time()
+
+
+class _NullMetric(object):
+    """A metric that does nothing, given by a disabled registry."""
+    def labels(self, *values):
+        return self
+
+    def inc(self, amount=1):
+        pass
+
+    def dec(self, amount=1):
+        pass
+
+    def set(self, value):
+        pass
+
+    def set_function(self, function):
+        pass
+
+    def observe(self, value):
+        pass
+
+    @contextlib.contextmanager
+    def time(self):
+        yield
+
+    def collect(self):
+        return []
+
+
+NULL_METRIC = _NullMetric()
+
+
+class MetricsRegistry(object):
+    """A set of metrics, by name.
+
+    :param bool enabled: whether the metrics are recorded (default to
+                         ``True``)
+
+    Getting a metric that already exists (for example, when a plugin is
+    reloaded) returns it, as long as it is of the same type.
+    """
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        """Whether the metrics are recorded."""
+        self._metrics = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_metric(self, metric_class, name, *args, **kwargs):
+        if not self.enabled:
+            return NULL_METRIC
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = metric_class(name, *args, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, metric_class):
+                raise ValueError(
+                    'Metric %s is already a %s' % (name, metric.type))
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        """Get the :class:`Counter` ``name``, or create it."""
+        return self._get_metric(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        """Get the :class:`Gauge` ``name``, or create it."""
+        return self._get_metric(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=None):
+        """Get the :class:`Histogram` ``name``, or create it."""
+        return self._get_metric(
+            Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        """Get the metric ``name``, or ``None`` if there is none."""
+        return self._metrics.get(name)
+
+    def render(self):
+        """Render the metrics in the Prometheus text format.
+
+        :rtype: str
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append('# HELP %s %s' % (
+                metric.name,
+                metric.documentation.replace('\\', '\\\\')
+                .replace('\n', '\\n')))
+            lines.append('# TYPE %s %s' % (metric.name, metric.type))
+            for name, labels, value in metric.collect():
+                lines.append('%s%s %s' % (
+                    name, _format_labels(labels), _format_value(value)))
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def write(self, filename):
+        """Write the metrics to ``filename``, in the Prometheus text format.
+
+        :param str filename: where to write the metrics
+
+        The metrics are written to a temporary file first, which then
+        replaces ``filename``, so a reader never sees a partial file.
+        """
+        tmp_filename = '%s.tmp' % filename
+        with io.open(tmp_filename, 'w', encoding='utf-8') as metrics_file:
+            metrics_file.write(self.render())
+        if hasattr(os, 'replace'):
+            os.replace(tmp_filename, filename)
+        else:
+            # TODO: Remove when dropping Python 2 support
+            if os.path.exists(filename) and sys.platform.startswith('win'):
+                os.remove(filename)
+            os.rename(tmp_filename, filename)
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+
+        body = self.server.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        LOGGER.debug('Metrics request: ' + format, *args)
+
+
+class _MetricsHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class MetricsServer(object):
+    """Serve a registry's metrics over HTTP, from a background thread.
+
+    :param registry: the metrics to serve
+    :type registry: :class:`MetricsRegistry`
+    :param str host: the address to listen on
+    :param int port: the port to listen on (``0`` to pick any free port)
+
+    The metrics are served on ``/metrics``, for Prometheus to scrape them.
+    As the bot's metrics tell a lot about its activity, it listens on the
+    local host only by default.
+    """
+    def __init__(self, registry, host='127.0.0.1', port=0):
+        self.registry = registry
+        self._server = _MetricsHTTPServer((host, port), _MetricsRequestHandler)
+        self._server.registry = registry
+        self._thread = None
+
+    @property
+    def address(self):
+        """The ``(host, port)`` the server listens on."""
+        return self._server.server_address[:2]
+
+    def start(self):
+        """Start serving the metrics, in a daemon thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name='sopel-metrics')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop serving the metrics."""
+        if self._thread is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._thread = None
@@ -0,0 +1,362 @@
+# coding=utf-8
+"""Sopel's profiler: internal tools to measure the bot's startup and callables.
+
+.. versionadded:: 7.0
+
+The bot records how long each phase of its startup takes (logging setup,
+plugins loading, etc.), and how long each plugin takes to be imported and set
+up, in a :class:`StartupProfile`. The ``--profile-startup`` option of
+``sopel start``, and the ``sopel-plugins profile`` command, print its report.
+
+Then, the bot records how long each of its plugins' callables takes, in
+:class:`CallableTimings`. The ``timings`` command of the ``admin`` plugin
+shows the slowest and the most frequently called ones.
+
+Finally, the :class:`SamplingProfiler` can be started and stopped while the
+bot runs, by its owner, to see where a sluggish bot spends its time.
+
+.. note::
+
+    As :mod:`sopel.tools.jobs`, this is an internal tool. Therefore, it is
+    not shown in the public documentation.
+
+"""
+# Licensed under the Eiffel Forum License 2.
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import collections
+import contextlib
+import io
+import math
+import re
+import sys
+import threading
+import time
+
+try:
+    import cProfile as profile
+except ImportError:
+    import profile
+
+
+class StartupProfile(object):
+    """Timings of the bot's startup.
+
+    Phases are recorded with the :meth:`phase` context manager, and plugins'
+    timings with :meth:`add_plugin`. Optionally, :meth:`start_profiler` and
+    :meth:`stop_profiler` capture a :mod:`cProfile <profile>` of the startup.
+    """
+    def __init__(self):
+        self.started = time.time()
+        self.phases = collections.OrderedDict()
+        self.plugins = collections.OrderedDict()
+        self._profiler = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Measure the duration of the phase ``name``.
+
+        :param str name: name of the phase
+
+        A phase can be measured more than once: its durations are added.
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            self.phases[name] = (
+                self.phases.get(name, 0) + time.time() - start)
+
+    def add_plugin(self, name, load_time, setup_time):
+        """Record how long the plugin ``name`` took to start.
+
+        :param str name: name of the plugin
+        :param float load_time: how long it took to import the plugin
+        :param float setup_time: how long its setup took
+        """
+        self.plugins[name] = (load_time, setup_time)
+
+    def get_plugin_times(self):
+        """Get the plugins' timings, slowest first.
+
+        :return: 4-value tuples: the plugin's total time, name, import time,
+                 and setup time
+        :rtype: list
+        """
+        return sorted(
+            ((load_time + setup_time, name, load_time, setup_time)
+             for name, (load_time, setup_time) in self.plugins.items()),
+            reverse=True)
+
+    def start_profiler(self):
+        """Start capturing a profile of the startup."""
+        self._profiler = profile.Profile()
+        self._profiler.enable()
+
+    def stop_profiler(self, filename):
+        """Stop capturing the profile, and write it to ``filename``.
+
+        :param str filename: where to write the profile's statistics
+
+        The file can be read with :class:`pstats.Stats`, or any tool that
+        reads ``cProfile``'s output. Nothing is written if the profiler was
+        not started.
+        """
+        if self._profiler is None:
+            return
+        self._profiler.disable()
+        self._profiler.dump_stats(filename)
+        self._profiler = None
+
+    def get_report(self, limit=None):
+        """Get a report of the startup's timings.
+
+        :param int limit: maximum number of plugins to report (optional)
+        :return: the report's lines
+        :rtype: list
+
+        Phases and plugins are sorted by duration, the slowest first.
+        """
+        lines = ['Startup time: %.3fs' % (time.time() - self.started)]
+
+        if self.phases:
+            lines.append('Phases:')
+            phases = sorted(
+                self.phases.items(), key=lambda item: item[1], reverse=True)
+            width = max(len(name) for name, duration in phases)
+            for name, duration in phases:
+                lines.append('  %s  %.3fs' % (name.ljust(width), duration))
+
+        plugin_times = self.get_plugin_times()[:limit]
+        if plugin_times:
+            lines.append('Plugins:')
+            width = max(len(timing[1]) for timing in plugin_times)
+            for total, name, load_time, setup_time in plugin_times:
+                lines.append('  %s  %.3fs (import: %.3fs, setup: %.3fs)' % (
+                    name.ljust(width), total, load_time, setup_time))
+
+        return lines
+
+
+CallableTiming = collections.namedtuple(
+    'CallableTiming', ['name', 'count', 'median', 'p95', 'max'])
+"""Summary of a callable's execution times, in seconds.
+
+The ``median`` and ``p95`` (95th percentile) are computed from its most
+recent calls only, while ``count`` and ``max`` cover all of them.
+"""
+
+
+def _percentile(ordered, percent):
+    # nearest-rank percentile of a sorted list
+    rank = int(math.ceil(percent / 100 * len(ordered)))
+    return ordered[max(0, rank - 1)]
+
+
+class _CallableStats(object):
+    def __init__(self, window):
+        self.count = 0
+        self.max = 0
+        self.durations = collections.deque(maxlen=window)
+
+
+class CallableTimings(object):
+    """Execution times of the bot's callables.
+
+    :param int window: how many of its most recent calls are kept for each
+                       callable, to compute its percentiles
+
+    Recording a call (with :meth:`add`) is cheap; percentiles are computed
+    only when a summary is asked for.
+    """
+    def __init__(self, window=100):
+        self.window = window
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, duration):
+        """Record a call of the callable ``name``.
+
+        :param str name: name of the callable
+        :param float duration: how long the call took, in seconds
+        """
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                stats = self._stats[name] = _CallableStats(self.window)
+            stats.count += 1
+            stats.max = max(stats.max, duration)
+            stats.durations.append(duration)
+
+    def clear(self):
+        """Forget every call recorded so far."""
+        with self._lock:
+            self._stats = {}
+
+    def get_timings(self):
+        """Get the summary of each callable's execution times.
+
+        :return: one summary per callable
+        :rtype: list of :class:`CallableTiming`
+        """
+        with self._lock:
+            items = [
+                (name, stats.count, stats.max, sorted(stats.durations))
+                for name, stats in self._stats.items()
+            ]
+        return [
+            CallableTiming(
+                name, count,
+                _percentile(durations, 50), _percentile(durations, 95),
+                max_duration)
+            for name, count, max_duration, durations in items
+        ]
+
+    def get_slowest(self, limit=None):
+        """Get the slowest callables, by 95th percentile.
+
+        :param int limit: maximum number of callables (optional)
+        :rtype: list of :class:`CallableTiming`
+        """
+        return sorted(
+            self.get_timings(),
+            key=lambda timing: (timing.p95, timing.median),
+            reverse=True)[:limit]
+
+    def get_most_frequent(self, limit=None):
+        """Get the most frequently called callables.
+
+        :param int limit: maximum number of callables (optional)
+        :rtype: list of :class:`CallableTiming`
+        """
+        return sorted(
+            self.get_timings(),
+            key=lambda timing: timing.count,
+            reverse=True)[:limit]
+
+
+_CALLABLE_THREAD = re.compile(r'^Thread-\d+(?: \([^)]*\))?-(?P<callable>.+)$')
+_GENERIC_THREAD = re.compile(r'^Thread-\d+(?: \([^)]*\))?$')
+
+
+def _thread_label(name):
+    # the bot names the threads of its callables after them (see `dispatch`)
+    match = _CALLABLE_THREAD.match(name)
+    if match:
+        return 'callable:%s' % match.group('callable')
+    if _GENERIC_THREAD.match(name):
+        return 'thread'
+    return name
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    module = frame.f_globals.get('__name__', '?')
+    return '%s.%s' % (module, code.co_name)
+
+
+class SamplingProfiler(object):
+    """Sample the stacks of the bot's threads, to find where time is spent.
+
+    :param float interval: time between two samples, in seconds
+
+    Once started, a background thread takes a snapshot of every other
+    thread's stack (with :func:`sys._current_frames`) every ``interval``
+    seconds, until the profiler is stopped. Its overhead depends on the
+    interval, not on what the bot does, so it can run on a bot in production.
+
+    Samples are counted per stack, and each stack starts with its thread: a
+    thread running a plugin's callable is labelled ``callable:`` followed by
+    the callable's name. :meth:`get_collapsed` gives them in the "collapsed
+    stacks" format used to draw flame graphs (e.g. with ``flamegraph.pl``,
+    or speedscope).
+
+    .. versionadded:: 7.0
+    """
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.started = None
+        self.sample_count = 0
+        self._stacks = collections.Counter()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    @property
+    def is_running(self):
+        """Whether the profiler is sampling."""
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start sampling, forgetting the previous samples.
+
+        :raise RuntimeError: when the profiler is already running
+        """
+        if self.is_running:
+            raise RuntimeError('The profiler is already running.')
+        self.clear()
+        self.started = time.time()
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name='sopel-sampling-profiler')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stop sampling; the samples are kept."""
+        self._stopping.set()
+        if self._thread is not None:
+            if self._thread is not threading.current_thread():
+                self._thread.join()
+            self._thread = None
+
+    def clear(self):
+        """Forget every sample taken so far."""
+        with self._lock:
+            self._stacks = collections.Counter()
+            self.sample_count = 0
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """Take one sample of every thread's stack, but the calling one's."""
+        names = dict(
+            (thread.ident, thread.name) for thread in threading.enumerate())
+        own_ident = threading.current_thread().ident
+        stacks = []
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_label(frame))
+                frame = frame.f_back
+            stack.append(_thread_label(names.get(ident, 'unknown')))
+            stacks.append(';'.join(reversed(stack)))
+
+        with self._lock:
+            self._stacks.update(stacks)
+            self.sample_count += 1
+
+    def get_collapsed(self):
+        """Get the samples as collapsed stacks.
+
+        :return: one line per stack, most frequent first: the stack's frames
+                 from its thread down to the sampled function, separated by
+                 ``;``, then the number of samples of that stack
+        :rtype: list
+        """
+        with self._lock:
+            items = self._stacks.most_common()
+        return ['%s %d' % item for item in items]
+
+    def write(self, filename):
+        """Write the samples to ``filename``, as collapsed stacks.
+
+        :param str filename: where to write the samples
+        """
+        with io.open(filename, 'w', encoding='utf-8') as collapsed_file:
+            for line in self.get_collapsed():
+                collapsed_file.write(line + '\n')
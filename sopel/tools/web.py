@@ -233,6 +233,34 @@ def trim_url(url):
     return url
 
 
+_url_regexes = {}
+"""Cache of compiled URL patterns, keyed by ``(schemes, exclusion_char)``."""
+
+
+def _get_url_regex(schemes, exclusion_char=None):
+    """Get the compiled URL pattern for ``schemes`` and ``exclusion_char``.
+
+    :param tuple schemes: URL schemes to look for
+    :param str exclusion_char: optional character that, if placed before a
+        URL, excludes it from being matched
+    :return: the compiled regex pattern
+
+    Patterns are compiled once and kept in a module-level cache, as the same
+    few combinations are used for every line the bot receives.
+    """
+    key = (schemes, exclusion_char)
+    regex = _url_regexes.get(key)
+    if regex is None:
+        schemes_patterns = '|'.join(re.escape(scheme) for scheme in schemes)
+        re_url = r'((?:%s)(?::\/\/\S+))' % schemes_patterns
+        if exclusion_char is not None:
+            re_url = r'((?<!%s)(?:%s)(?::\/\/\S+))' % (
+                exclusion_char, schemes_patterns)
+        regex = re.compile(re_url, re.IGNORECASE | re.UNICODE)
+        _url_regexes[key] = regex
+    return regex
+
+
 def search_urls(text, exclusion_char=None, clean=False, schemes=None):
     """Extracts all URLs in ``text``.
 
@@ -249,17 +277,17 @@ def search_urls(text, exclusion_char=None, clean=False, schemes=None):
 
         list(search_urls(text))
 
-    """
-    schemes = schemes or ['http', 'https', 'ftp']
-    schemes_patterns = '|'.join(re.escape(scheme) for scheme in schemes)
-    re_url = r'((?:%s)(?::\/\/\S+))' % schemes_patterns
-    if exclusion_char is not None:
-        re_url = r'((?<!%s)(?:%s)(?::\/\/\S+))' % (
-            exclusion_char, schemes_patterns)
+    .. note::
 
-    r = re.compile(re_url, re.IGNORECASE | re.UNICODE)
+        URLs found in messages received by the bot are already available as
+        :attr:`sopel.trigger.Trigger.urls`, which avoids searching the same
+        line again in each plugin.
+
+    """
+    schemes = tuple(schemes or ('http', 'https', 'ftp'))
+    r = _get_url_regex(schemes, exclusion_char)
 
-    urls = re.findall(r, text)
+    urls = r.findall(text)
     if clean:
         urls = (trim_url(url) for url in urls)
 
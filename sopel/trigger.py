@@ -7,6 +7,7 @@ import sys
 import datetime
 
 from sopel import tools
+from sopel.tools import web
 
 
 __all__ = [
@@ -25,10 +26,11 @@ class PreTrigger(object):
     component_regex = re.compile(r'([^!]*)!?([^@]*)@?(.*)')
     intent_regex = re.compile('\x01(\\S+) ?(.*)\x01')
 
-    def __init__(self, own_nick, line):
+    def __init__(self, own_nick, line, url_schemes=None):
         """own_nick is the bot's nick, needed to correctly parse sender.
         line is the full line from the server or from simulated echo
-        message."""
+        message. url_schemes is the optional list of URL schemes to look
+        for in the message's text (see :attr:`urls`)."""
         line = line.strip('\r\n')
         self.line = line
 
@@ -103,6 +105,12 @@ class PreTrigger(object):
                 self.tags['intent'] = intent
                 self.args[-1] = message or ''
 
+        # Search URLs only once per line, for every plugin that needs them
+        self.urls = tuple()
+        if self.event == 'PRIVMSG' or self.event == 'NOTICE':
+            self.urls = tuple(
+                web.search_urls(self.args[-1], schemes=url_schemes))
+
         # Populate account from extended-join messages
         if self.event == 'JOIN' and len(self.args) == 3:
             # Account is the second arg `...JOIN #Sopel account :realname`
@@ -166,6 +174,16 @@ class Trigger(unicode):
     """
     tags = property(lambda self: self._pretrigger.tags)
     """A map of the IRCv3 message tags on the message."""
+    urls = property(lambda self: self._pretrigger.urls)
+    """A tuple of the URLs found in the message, in order of appearance.
+
+    Only ``PRIVMSG`` and ``NOTICE`` messages are searched, using the schemes
+    from :attr:`~sopel.config.core_section.CoreSection.auto_url_schemes`. The
+    search is done once per line, so plugins should prefer this over calling
+    :func:`sopel.tools.web.search_urls` on the trigger themselves.
+
+    .. versionadded:: 7.0
+    """
     admin = property(lambda self: self._admin)
     """True if the nick which triggered the command is one of the bot's admins.
     """
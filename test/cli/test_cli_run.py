@@ -12,6 +12,7 @@ from sopel import config
 from sopel.cli.run import (
     build_parser,
     get_configuration,
+    get_other_configurations,
     get_pid_filename,
     get_running_pid
 )
@@ -220,6 +221,30 @@ def test_build_parser_start_quiet():
     assert options.quiet is True
 
 
+def test_build_parser_start_profile_startup():
+    parser = build_parser()
+
+    options = parser.parse_args(['start'])
+    assert options.profile_startup is False
+    assert options.profile_output is None
+
+    options = parser.parse_args([
+        'start', '--profile-startup', '--profile-output', 'startup.prof'])
+    assert options.profile_startup is True
+    assert options.profile_output == 'startup.prof'
+
+
+def test_build_parser_start_with_config():
+    parser = build_parser()
+
+    options = parser.parse_args(['start'])
+    assert options.with_configs == []
+
+    options = parser.parse_args([
+        'start', '--with-config', 'spam', '--with-config', 'eggs'])
+    assert options.with_configs == ['spam', 'eggs']
+
+
 def test_build_parser_stop():
     """Assert parser's namespace exposes stop's options (default values)"""
     parser = build_parser()
@@ -366,6 +391,30 @@ def test_get_configuration(tmpdir):
         assert result.core.owner == 'TestName'
 
 
+def test_get_other_configurations(tmpdir):
+    """Assert function returns a ``Config`` object for each --with-config"""
+    working_dir = tmpdir.mkdir("working")
+    for name in ['spam', 'eggs']:
+        working_dir.join('%s.cfg' % name).write('\n'.join([
+            '[core]',
+            'owner = %s' % name,
+        ]))
+
+    parser = build_parser()
+    options = parser.parse_args([
+        'start', '--config-dir', working_dir.strpath,
+        '--with-config', 'spam', '--with-config', 'eggs'])
+
+    result = get_other_configurations(options)
+    assert [settings.core.owner for settings in result] == ['spam', 'eggs']
+
+    options = parser.parse_args([
+        'start', '--config-dir', working_dir.strpath,
+        '--with-config', 'unknown'])
+    with pytest.raises(config.ConfigurationNotFound):
+        get_other_configurations(options)
+
+
 def test_get_pid_filename_default():
     """Assert function returns the default filename from given ``pid_dir``"""
     pid_dir = '/pid'
@@ -0,0 +1,94 @@
+# coding=utf-8
+"""Tests for Sopel's ``admin`` plugin"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import pytest
+
+from sopel.tests import rawlist
+
+
+TMP_CONFIG = """
+[core]
+owner = testnick
+nick = TestBot
+enable = coretasks, admin
+"""
+
+
+@pytest.fixture
+def tmpconfig(configfactory):
+    return configfactory('test.cfg', TMP_CONFIG)
+
+
+@pytest.fixture
+def mockbot(tmpconfig, botfactory):
+    return botfactory.preloaded(tmpconfig, ['admin'])
+
+
+def test_timings(mockbot, ircfactory, userfactory):
+    irc = ircfactory(mockbot)
+    owner = userfactory('testnick')
+    mockbot.callable_timings.add('spam.slow', 2.0)
+    mockbot.callable_timings.add('spam.fast', 0.1)
+    mockbot.callable_timings.add('spam.fast', 0.1)
+
+    irc.pm(owner, '.timings 1')
+
+    assert mockbot.backend.message_sent == rawlist(
+        'PRIVMSG testnick :Slowest callables (by 95th percentile):',
+        'PRIVMSG testnick :spam.slow: 1 calls, median 2.000s, p95 2.000s, '
+        'max 2.000s',
+        'PRIVMSG testnick :Most frequently called callables:',
+        'PRIVMSG testnick :spam.fast: 2 calls, median 0.100s, p95 0.100s, '
+        'max 0.100s',
+    )
+
+
+def test_timings_invalid(mockbot, ircfactory, userfactory):
+    irc = ircfactory(mockbot)
+    irc.pm(userfactory('testnick'), '.timings spam')
+
+    assert mockbot.backend.message_sent == rawlist(
+        'PRIVMSG testnick :testnick: '
+        'The number of callables must be a positive integer.',
+    )
+
+
+def test_timings_not_admin(mockbot, ircfactory, userfactory):
+    irc = ircfactory(mockbot)
+    irc.pm(userfactory('Someone'), '.timings')
+
+    assert mockbot.backend.message_sent == []
+
+
+def test_profiler(mockbot, ircfactory, userfactory, tmpdir):
+    mockbot.settings.core.logdir = tmpdir.strpath
+    irc = ircfactory(mockbot)
+    owner = userfactory('testnick')
+
+    irc.pm(owner, '.profiler start')
+    assert mockbot.sampling_profiler.is_running
+    irc.pm(owner, '.profiler start')
+    irc.pm(owner, '.profiler stop')
+    assert not mockbot.sampling_profiler.is_running
+    irc.pm(owner, '.profiler')
+
+    sent = mockbot.backend.message_sent
+    assert sent[:2] == rawlist(
+        'PRIVMSG testnick :testnick: Profiler started (one sample every '
+        '0.010s).',
+        'PRIVMSG testnick :testnick: The profiler is already running.',
+    )
+    assert sent[2].startswith(
+        b'PRIVMSG testnick :testnick: Profiler stopped: ')
+    assert tmpdir.strpath.encode('utf-8') in sent[2]
+    assert sent[3:] == rawlist(
+        'PRIVMSG testnick :testnick: The profiler is not running.',
+    )
+
+
+def test_profiler_not_owner(mockbot, ircfactory, userfactory):
+    irc = ircfactory(mockbot)
+    irc.pm(userfactory('Someone'), '.profiler start')
+
+    assert not mockbot.sampling_profiler.is_running
@@ -0,0 +1,132 @@
+# coding=utf-8
+"""Tests for Sopel's ``help`` plugin"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import pytest
+import requests
+
+from sopel.tests import rawlist
+
+
+TMP_CONFIG = """
+[core]
+owner = testnick
+nick = TestBot
+host = irc.example.com
+enable = coretasks, help, admin
+"""
+
+
+@pytest.fixture
+def tmpconfig(configfactory):
+    return configfactory('test.cfg', TMP_CONFIG)
+
+
+@pytest.fixture
+def mockbot(tmpconfig, botfactory):
+    return botfactory.preloaded(tmpconfig, ['help', 'admin'])
+
+
+class MockResponse(object):
+    def __init__(self, text):
+        self.text = text
+
+    def raise_for_status(self):
+        pass
+
+
+def pm(bot, irc, user, text):
+    # the help command runs in a thread: wait for its replies
+    irc.pm(user, text)
+    for thread in list(bot.running_triggers):
+        thread.join()
+
+
+@pytest.fixture
+def posted(monkeypatch):
+    posted = []
+
+    def post(url, data=None, **kwargs):
+        posted.append(data['clbin'])
+        return MockResponse('https://clbin.com/%d' % len(posted))
+
+    # the plugin's module isn't the one imported here: patch requests
+    monkeypatch.setattr(requests, 'post', post)
+    return posted
+
+
+def test_help_command(mockbot, ircfactory, userfactory):
+    irc = ircfactory(mockbot)
+    pm(mockbot, irc, userfactory('Someone'), '.help join')
+
+    assert mockbot.backend.message_sent == rawlist(
+        'PRIVMSG Someone :Join the specified channel. This is an admin-only '
+        'command.',
+        'PRIVMSG Someone :e.g. .join #example or .join #example key',
+    )
+
+
+def test_help_command_typo(mockbot, ircfactory, userfactory):
+    irc = ircfactory(mockbot)
+    pm(mockbot, irc, userfactory('Someone'), '.help jion')
+
+    assert mockbot.backend.message_sent == rawlist(
+        "PRIVMSG Someone :I don't know the jion command. Did you mean .join?",
+    )
+
+
+def test_help_command_unknown(mockbot, ircfactory, userfactory):
+    irc = ircfactory(mockbot)
+    pm(mockbot, irc, userfactory('Someone'), '.help spam')
+
+    assert mockbot.backend.message_sent == []
+
+
+def test_help_list(mockbot, ircfactory, userfactory, posted):
+    irc = ircfactory(mockbot)
+    user = userfactory('Someone')
+
+    pm(mockbot, irc, user, '.help')
+    pm(mockbot, irc, user, '.help')
+
+    # the listing is posted once
+    assert len(posted) == 1
+    assert posted[0].startswith(
+        'Command listing for TestBot@irc.example.com\n\nADMIN ')
+    url_message = (
+        "PRIVMSG Someone :I've posted a list of my commands at "
+        "https://clbin.com/1 - You can see more info about any of these "
+        "commands by doing .help <command> (e.g. .help time)")
+    assert mockbot.backend.message_sent == rawlist(
+        "PRIVMSG Someone :Hang on, I'm creating a list.",
+        url_message,
+        url_message,
+    )
+
+
+def test_help_list_after_restart(
+        tmpconfig, botfactory, ircfactory, userfactory, posted):
+    first = botfactory.preloaded(tmpconfig, ['help', 'admin'])
+    pm(first, ircfactory(first), userfactory('Someone'), '.help')
+
+    # the URL is kept in the database
+    second = botfactory.preloaded(tmpconfig, ['help', 'admin'])
+    pm(second, ircfactory(second), userfactory('Someone'), '.help')
+
+    assert len(posted) == 1
+    assert second.backend.message_sent[0].startswith(
+        b"PRIVMSG Someone :I've posted a list of my commands at "
+        b"https://clbin.com/1 ")
+
+
+def test_help_list_changed(mockbot, ircfactory, userfactory, posted):
+    irc = ircfactory(mockbot)
+    user = userfactory('Someone')
+
+    pm(mockbot, irc, user, '.help')
+    mockbot.config.help.show_server_host = False
+    pm(mockbot, irc, user, '.help')
+
+    # a change of the listing (here, of its header) posts it again
+    assert len(posted) == 2
+    assert posted[1].startswith('Command listing for TestBot\n\n')
@@ -0,0 +1,36 @@
+# coding=utf-8
+"""Tests for Sopel's ``ip`` plugin"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import tarfile
+
+import pytest
+
+from sopel.modules import ip
+
+
+def test_decompress(tmpdir):
+    database = tmpdir.join('GeoLite2-City_20200101', 'GeoLite2-City.mmdb')
+    database.write('database', ensure=True)
+    tmpdir.join('GeoLite2-City_20200101', 'README.txt').write('readme')
+
+    source = tmpdir.join('GeoLite2-City.tar.gz').strpath
+    with tarfile.open(source, 'w:gz') as tar:
+        tar.add(database.dirpath().strpath, arcname='GeoLite2-City_20200101')
+
+    target = tmpdir.join('GeoLite2-City.mmdb.tmp')
+    ip._decompress(source, target.strpath)
+
+    assert target.read() == 'database'
+
+
+def test_decompress_no_database(tmpdir):
+    readme = tmpdir.join('README.txt')
+    readme.write('readme')
+
+    source = tmpdir.join('GeoLite2-City.tar.gz').strpath
+    with tarfile.open(source, 'w:gz') as tar:
+        tar.add(readme.strpath, arcname='README.txt')
+
+    with pytest.raises(ValueError):
+        ip._decompress(source, tmpdir.join('target').strpath)
@@ -0,0 +1,174 @@
+# coding=utf-8
+"""Tests for Sopel's ``meetbot`` plugin"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import io
+import json
+
+import pytest
+
+from sopel.modules import meetbot
+
+
+TMP_CONFIG = """
+[core]
+owner = testnick
+nick = TestBot
+enable = coretasks, meetbot
+flood_burst_lines = 100
+
+[meetbot]
+meeting_log_path = {logdir}
+meeting_log_baseurl = https://example.com/meetings
+meeting_log_json = true
+"""
+
+
+@pytest.fixture
+def logdir(tmpdir):
+    return tmpdir.mkdir('meetings')
+
+
+@pytest.fixture
+def mockbot(configfactory, botfactory, logdir):
+    settings = configfactory(
+        'test.cfg', TMP_CONFIG.format(logdir=logdir.strpath))
+    return botfactory.preloaded(settings, ['meetbot'])
+
+
+def say(bot, irc, user, text):
+    # the plugin's callables run in threads: wait for them
+    irc.say(user, '#meeting', text)
+    for thread in list(bot.running_triggers):
+        thread.join()
+
+
+def read(filename):
+    with io.open(filename, encoding='utf-8', newline='') as logfile:
+        return logfile.read()
+
+
+def test_meeting_log(tmpdir):
+    meeting_log = meetbot.MeetingLog(tmpdir.strpath, 'spam', json_log=True)
+    meeting_log.write('log', 'line\r\n')
+    meeting_log.write('html', '<li>item</li>\n')
+    meeting_log.write_json('message', 'Alice', 'Hello')
+
+    # writes are buffered
+    assert read(meeting_log.filenames['log']) == ''
+
+    meeting_log.flush()
+    assert read(meeting_log.filenames['log']) == 'line\r\n'
+    assert read(meeting_log.filenames['html']) == '<li>item</li>\n'
+    event = json.loads(read(meeting_log.filenames['json']))
+    assert event['event'] == 'message'
+    assert event['nick'] == 'Alice'
+    assert event['text'] == 'Hello'
+
+    meeting_log.write('log', 'more\r\n')
+    meeting_log.close()
+    assert read(meeting_log.filenames['log']) == 'line\r\nmore\r\n'
+
+    # the meeting has ended: nothing is written anymore
+    meeting_log.write('log', 'late\r\n')
+    meeting_log.flush()
+    assert read(meeting_log.filenames['log']) == 'line\r\nmore\r\n'
+
+
+def test_meeting_log_no_json(tmpdir):
+    meeting_log = meetbot.MeetingLog(tmpdir.strpath, 'spam')
+    meeting_log.write_json('message', 'Alice', 'Hello')
+    meeting_log.close()
+
+    assert 'json' not in meeting_log.filenames
+    assert tmpdir.listdir() == []
+
+
+def test_meeting(mockbot, ircfactory, userfactory, logdir):
+    irc = ircfactory(mockbot)
+    alice = userfactory('Alice')
+    bob = userfactory('Bob')
+
+    say(mockbot, irc, alice, '.startmeeting Spam & eggs: a meeting')
+    say(mockbot, irc, bob, 'Hello!')
+    say(mockbot, irc, alice, '.action Bob will buy spam')
+    say(mockbot, irc, alice, '.endmeeting')
+
+    channel_dir = logdir.join('#meeting')
+    names = sorted(path.basename for path in channel_dir.listdir())
+    assert len(names) == 3
+    assert names[0].endswith('_Spam---eggs--a-meeting.html')
+    assert names[1].endswith('_Spam---eggs--a-meeting.json')
+    assert names[2].endswith('_Spam---eggs--a-meeting.log')
+
+    plain = read(channel_dir.join(names[2]).strpath).split('\r\n')
+    assert [line[11:] for line in plain] == [
+        'Meeting started by alice',
+        '<Bob> Hello!',
+        'ACTION: Bob will buy spam',
+        'Meeting ended by Alice. Total meeting length: 0 minutes',
+        '',
+    ]
+
+    html = read(channel_dir.join(names[0]).strpath)
+    assert '<h4>Meeting started by alice</h4>' in html
+    assert 'Action: </span>Bob will buy spam</li>' in html
+    assert html.endswith('</html>\n')
+
+    events = [
+        json.loads(line)
+        for line in read(channel_dir.join(names[1]).strpath).splitlines()
+    ]
+    assert [(event['event'], event['nick'], event['text'])
+            for event in events] == [
+        ('start', 'Alice', 'Spam & eggs: a meeting'),
+        ('message', 'Bob', 'Hello!'),
+        ('action', 'Alice', 'Bob will buy spam'),
+        ('end', 'Alice', None),
+    ]
+
+    # no meeting anymore: nothing to log
+    plugin = mockbot._plugins['meetbot']._module
+    assert plugin.get_meeting_log(mockbot, '#meeting') is None
+    say(mockbot, irc, bob, 'Bye!')
+    assert '#meeting' not in mockbot.memory['meetbot_logs']
+
+
+def test_meeting_per_bot(configfactory, botfactory, ircfactory, userfactory,
+                         tmpdir):
+    # two bots in the same process, on networks with the same channel
+    bots = []
+    for name in ('spam', 'eggs'):
+        logdir = tmpdir.mkdir(name)
+        settings = configfactory(
+            '%s.cfg' % name, TMP_CONFIG.format(logdir=logdir.strpath))
+        bots.append((botfactory.preloaded(settings, ['meetbot']), logdir))
+    (spam, spam_logdir), (eggs, eggs_logdir) = bots
+    spam_irc, eggs_irc = ircfactory(spam), ircfactory(eggs)
+    alice = userfactory('Alice')
+
+    say(spam, spam_irc, alice, '.startmeeting Spam')
+    assert spam.memory['meetbot_meetings']['#meeting']['running']
+    assert not eggs.memory['meetbot_meetings']['#meeting'].get('running')
+
+    say(eggs, eggs_irc, alice, '.startmeeting Eggs')
+    say(spam, spam_irc, alice, 'Hello spam')
+    say(eggs, eggs_irc, alice, 'Hello eggs')
+
+    # one bot's shutdown doesn't close the other bot's logs
+    spam._plugins['meetbot'].shutdown(spam)
+    assert spam.memory['meetbot_logs'] == {}
+    meeting_log = eggs.memory['meetbot_logs']['#meeting']
+    say(eggs, eggs_irc, alice, 'Still here')
+    meeting_log.flush()
+
+    spam_log, = spam_logdir.join('#meeting').listdir('*.log')
+    eggs_log, = eggs_logdir.join('#meeting').listdir('*.log')
+    assert spam_log.basename.endswith('_Spam.log')
+    assert eggs_log.basename.endswith('_Eggs.log')
+    assert 'Hello spam' in read(spam_log.strpath)
+    assert 'eggs' not in read(spam_log.strpath).lower()
+    eggs_lines = read(eggs_log.strpath)
+    assert 'Hello eggs' in eggs_lines
+    assert 'Still here' in eggs_lines
+    assert 'spam' not in eggs_lines.lower()
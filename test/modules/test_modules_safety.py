@@ -0,0 +1,129 @@
+# coding=utf-8
+"""Tests for Sopel's ``safety`` plugin"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import time
+
+import pytest
+
+from sopel.modules import safety
+
+
+@pytest.fixture
+def domain_list(tmpdir):
+    path = tmpdir.join('malwaredomains.db').strpath
+    safety.DomainList.build([
+        'example.com\n',
+        'EVIL.example.org\n',
+        '\n',
+        'b.test\n',
+        'a.test\n',
+        'example.com\n',
+    ], path)
+    return safety.DomainList(path)
+
+
+def test_domain_list_contains(domain_list):
+    assert len(domain_list) == 4
+    assert 'example.com' in domain_list
+    assert 'EXAMPLE.com' in domain_list
+    assert 'evil.example.org' in domain_list
+    assert 'a.test' in domain_list
+    assert 'b.test' in domain_list
+
+    assert 'example.org' not in domain_list
+    assert 'c.test' not in domain_list
+    assert 'test' not in domain_list
+    assert '' not in domain_list
+
+
+def test_domain_list_match(domain_list):
+    assert domain_list.match('example.com') == 'example.com'
+    assert domain_list.match('www.example.com') == 'example.com'
+    assert domain_list.match('a.b.evil.example.org.') == 'evil.example.org'
+
+    assert domain_list.match('example.org') is None
+    assert domain_list.match('notexample.com') is None
+    assert domain_list.match('example.com.au') is None
+
+
+def test_domain_list_missing_file(tmpdir):
+    domain_list = safety.DomainList(tmpdir.join('missing.db').strpath)
+    assert len(domain_list) == 0
+    assert 'example.com' not in domain_list
+    assert domain_list.match('example.com') is None
+
+
+@pytest.mark.parametrize('size', [0, 4, 12, 16, -1])
+def test_domain_list_invalid_file(domain_list, size):
+    with open(domain_list.path, 'rb') as fd:
+        content = fd.read()
+    with open(domain_list.path, 'wb') as fd:
+        fd.write(content[:size])
+
+    invalid = []
+    domain_list.on_invalid = lambda: invalid.append(True)
+    assert len(domain_list) == 0
+    assert 'example.com' not in domain_list
+    assert domain_list.match('example.com') is None
+    assert invalid == [True]  # only once, until reloaded
+
+    safety.DomainList.build(['example.com'], domain_list.path)
+    domain_list.reload()
+    assert 'example.com' in domain_list
+    assert invalid == [True]
+
+
+def test_domain_list_reload(domain_list):
+    assert 'example.net' not in domain_list
+
+    safety.DomainList.build(['example.net'], domain_list.path)
+    # still using the previous file until reloaded
+    assert 'example.com' in domain_list
+
+    domain_list.reload()
+    assert 'example.net' in domain_list
+    assert 'example.com' not in domain_list
+
+
+def test_safety_cache_lru():
+    cache = safety.SafetyCache(limit=2)
+    fetched = time.time()
+    cache['a'] = {'positives': 0, 'total': 1, 'fetched': fetched}
+    cache['b'] = {'positives': 0, 'total': 1, 'fetched': fetched}
+
+    # use "a", so "b" is now the least recently used
+    assert cache['a']['total'] == 1
+
+    cache['c'] = {'positives': 0, 'total': 1, 'fetched': fetched}
+    assert len(cache) == 2
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+
+
+def test_safety_cache_ttl():
+    cache = safety.SafetyCache(ttl=60)
+    cache['old'] = {'positives': 0, 'total': 1, 'fetched': time.time() - 120}
+    cache['new'] = {'positives': 0, 'total': 1, 'fetched': time.time()}
+
+    assert 'old' not in cache
+    assert cache.get('old') is None
+    with pytest.raises(KeyError):
+        cache['old']
+    assert 'new' in cache
+
+    assert cache.expire() == 0  # "old" was already removed by get
+    cache['old'] = {'positives': 0, 'total': 1, 'fetched': time.time() - 120}
+    assert cache.expire() == 1
+    assert len(cache) == 1
+
+
+def test_compile_known_good():
+    regexes = safety._compile_known_good(['sopel\\.chat', 'example\\.com'])
+    assert len(regexes) == 1
+    assert regexes[0].search('SOPEL.chat')
+    assert regexes[0].search('www.example.com')
+    assert not regexes[0].search('example.org')
+
+    assert safety._compile_known_good([]) == []
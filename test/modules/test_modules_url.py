@@ -0,0 +1,45 @@
+# coding=utf-8
+"""Tests for Sopel's ``url`` plugin"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import pytest
+
+from sopel.modules import url
+
+
+TMP_CONFIG = """
+[core]
+owner = testnick
+nick = TestBot
+auto_url_schemes = {schemes}
+"""
+
+LINE = (
+    ':Foo!foo@example.com PRIVMSG #channel '
+    ':http://example.com/a gopher://example.com/b ftp://example.com/c')
+
+
+@pytest.fixture
+def mockbot(configfactory, botfactory):
+    def factory(schemes):
+        settings = configfactory(
+            'test.cfg', TMP_CONFIG.format(schemes=schemes))
+        settings.define_section('url', url.UrlSection)
+        return botfactory(settings)
+    return factory
+
+
+@pytest.mark.parametrize('schemes', [
+    'http,https,ftp',
+    'http,https,ftp,gopher',
+    'https',
+])
+def test_get_trigger_urls_schemes(mockbot, triggerfactory, schemes):
+    bot = mockbot(schemes)
+    trigger = triggerfactory(bot, LINE)
+
+    # titles are shown only for the default schemes, whatever the setting
+    assert url._get_trigger_urls(bot, trigger) == [
+        'http://example.com/a',
+        'ftp://example.com/c',
+    ]
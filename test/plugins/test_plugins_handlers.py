@@ -82,3 +82,80 @@ def test_get_label_entrypoint(plugin_tmpfile):
     assert meta['label'] == 'module label'
     assert meta['type'] == handlers.EntryPointPlugin.PLUGIN_TYPE
     assert meta['source'] == 'test_plugin = file_mod'
+
+
+def test_get_meta_description_load_time(plugin_tmpfile):
+    plugin = handlers.PyFilePlugin(plugin_tmpfile.strpath)
+    assert plugin.get_meta_description()['load_time'] is None
+
+    plugin.load()
+    load_time = plugin.get_meta_description()['load_time']
+    assert load_time is not None
+    assert load_time >= 0
+
+
+def test_pyfile_load_package(tmpdir):
+    package_dir = tmpdir.mkdir('loader_mods').mkdir('dir_mod')
+    package_dir.join('__init__.py').write(
+        'from .sub import VALUE\n"""ignored"""\n')
+    package_dir.join('sub.py').write('VALUE = "spam"\n')
+
+    plugin = handlers.PyFilePlugin(package_dir.strpath)
+    try:
+        plugin.load()
+        assert plugin.name == 'dir_mod'
+        assert plugin._module.VALUE == 'spam'
+        assert 'dir_mod.sub' in sys.modules
+    finally:
+        sys.modules.pop('dir_mod', None)
+        sys.modules.pop('dir_mod.sub', None)
+
+
+@pytest.mark.skipif(
+    sys.version_info.major < 3, reason='spec-based loading requires py3')
+def test_pyfile_reload_bytecode_cache(plugin_tmpfile, monkeypatch):
+    from importlib import machinery
+
+    monkeypatch.setattr(sys, 'dont_write_bytecode', False)
+    compiled = []
+    source_to_code = machinery.SourceFileLoader.source_to_code
+
+    def counting_source_to_code(self, *args, **kwargs):
+        compiled.append(self.path)
+        return source_to_code(self, *args, **kwargs)
+
+    monkeypatch.setattr(
+        machinery.SourceFileLoader, 'source_to_code', counting_source_to_code)
+
+    plugin = handlers.PyFilePlugin(plugin_tmpfile.strpath)
+    try:
+        plugin.load()
+        assert compiled == [plugin_tmpfile.strpath]
+        assert plugin_tmpfile.dirpath().join('__pycache__').check(dir=True)
+        module = plugin._module
+
+        # loaded again: the cached bytecode is used
+        sys.modules.pop('file_mod', None)
+        plugin = handlers.PyFilePlugin(plugin_tmpfile.strpath)
+        plugin.load()
+        assert compiled == [plugin_tmpfile.strpath]
+        module = plugin._module
+
+        # modified source, with the same size and mtime: compiled again
+        stat = os.stat(plugin_tmpfile.strpath)
+        plugin_tmpfile.write(MOCK_MODULE_CONTENT.replace('label', 'LABEL'))
+        os.utime(plugin_tmpfile.strpath, (stat.st_atime, stat.st_mtime))
+        assert os.stat(plugin_tmpfile.strpath).st_size == stat.st_size
+        plugin.reload()
+        assert compiled == [plugin_tmpfile.strpath] * 2
+        assert plugin.get_label() == 'module LABEL'
+        assert plugin._module is module
+
+        # the cached bytecode is obsolete
+        sys.modules.pop('file_mod', None)
+        plugin = handlers.PyFilePlugin(plugin_tmpfile.strpath)
+        plugin.load()
+        assert compiled == [plugin_tmpfile.strpath] * 3
+        assert plugin.get_label() == 'module LABEL'
+    finally:
+        sys.modules.pop('file_mod', None)
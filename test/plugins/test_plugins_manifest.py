@@ -0,0 +1,332 @@
+# coding=utf-8
+"""Tests for the ``sopel.plugins.manifest`` module."""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import json
+import os
+import re
+import sys
+
+import pytest
+
+from sopel.plugins import handlers, manifest
+
+
+TMP_CONFIG = """
+[core]
+owner = testnick
+nick = TestBot
+enable = coretasks
+"""
+
+MOCK_MODULE_CONTENT = """# coding=utf-8
+\"\"\"Lazy plugin for tests\"\"\"
+import sopel.module
+
+CALLS = []
+
+
+def setup(bot):
+    CALLS.append('setup')
+
+
+@sopel.module.commands('lazy')
+@sopel.module.example('.lazy')
+def lazy_command(bot, trigger):
+    \"\"\"A lazy command.\"\"\"
+    CALLS.append('lazy')
+
+
+@sopel.module.interval(3600)
+def lazy_job(bot):
+    CALLS.append('job')
+
+
+@sopel.module.url(r'https?://example\\.com/lazy')
+def lazy_url(bot, trigger, match):
+    CALLS.append('url')
+"""
+
+MODULE_NAME = 'sopel_lazy_test_plugin'
+
+
+@pytest.fixture
+def tmpconfig(configfactory):
+    return configfactory('test.cfg', TMP_CONFIG)
+
+
+@pytest.fixture
+def plugin_module(tmpdir, monkeypatch):
+    root = tmpdir.mkdir('lazy_mods')
+    mod_file = root.join(MODULE_NAME + '.py')
+    mod_file.write(MOCK_MODULE_CONTENT)
+    monkeypatch.syspath_prepend(root.strpath)
+
+    yield mod_file
+
+    sys.modules.pop(MODULE_NAME, None)
+
+
+def get_metadata(settings):
+    plugin = handlers.PyModulePlugin(MODULE_NAME)
+    plugin.load()
+    metadata = plugin.get_metadata(settings)
+    # forget the module, like the next time the bot starts
+    del sys.modules[MODULE_NAME]
+    return metadata
+
+
+def test_lazy_callable():
+    def command(bot, trigger):
+        """Command's doc."""
+        return 'called %s %s' % (bot, trigger)
+
+    command.__module__ = 'sopel_plugin'
+    command.rule = [re.compile(r'\.spam', re.IGNORECASE)]
+    command.commands = ['spam']
+    command.priority = 'high'
+    command._docs = {'spam': (['Command\'s doc.'], ['.spam'])}
+
+    metadata = manifest.describe_callable(command)
+    lazy = manifest.LazyCallable({'command': command}.get, metadata)
+
+    assert lazy.__name__ == 'command'
+    assert lazy.__module__ == 'sopel_plugin'
+    assert lazy.__doc__ == 'Command\'s doc.'
+    assert lazy.rule == command.rule
+    assert lazy.commands == ['spam']
+    assert lazy.priority == 'high'
+    assert lazy._docs == command._docs
+    assert lazy('bot', 'trigger') == 'called bot trigger'
+
+
+def test_get_source_signature(tmpdir):
+    mod_file = tmpdir.join('mod.py')
+    mod_file.write('spam')
+    os.utime(mod_file.strpath, (1000, 1000))
+    assert manifest.get_source_signature(mod_file.strpath) == [1000, 4]
+
+    mod_dir = tmpdir.mkdir('pkg')
+    init_file = mod_dir.join('__init__.py')
+    init_file.write('egg')
+    sub_file = mod_dir.mkdir('sub').join('thing.py')
+    sub_file.write('bacon')
+    os.utime(mod_dir.strpath, (1000, 1000))
+    os.utime(mod_dir.join('sub').strpath, (1000, 1000))
+    os.utime(init_file.strpath, (1000, 1000))
+    os.utime(sub_file.strpath, (2000, 2000))
+    assert manifest.get_source_signature(mod_dir.strpath) == [2000, 8]
+
+    assert manifest.get_source_signature(
+        tmpdir.join('nope.py').strpath) is None
+
+
+def test_get_source_hash(tmpdir):
+    mod_dir = tmpdir.mkdir('pkg')
+    init_file = mod_dir.join('__init__.py')
+    init_file.write('egg')
+    sub_file = mod_dir.mkdir('sub').join('thing.py')
+    sub_file.write('bacon')
+
+    digest = manifest.get_source_hash(mod_dir.strpath)
+    assert digest == manifest.get_source_hash(mod_dir.strpath)
+
+    sub_file.write('spam')
+    assert manifest.get_source_hash(mod_dir.strpath) != digest
+
+    assert manifest.get_source_hash(tmpdir.join('nope.py').strpath) is None
+
+
+def test_manifest_save_load(tmpconfig, plugin_module):
+    metadata = get_metadata(tmpconfig)
+    plugin = handlers.PyModulePlugin(MODULE_NAME)
+    assert plugin.get_source_path() == plugin_module.strpath
+
+    saved = manifest.PluginManifest.from_settings(tmpconfig)
+    saved.set(plugin, metadata)
+    saved.save()
+    assert os.path.isfile(saved.filename)
+
+    loaded = manifest.PluginManifest.from_settings(tmpconfig)
+    loaded.load()
+    # tuples are stored as lists
+    assert loaded.get(plugin) == json.loads(json.dumps(metadata))
+
+    # source file touched, but not modified: metadata are still valid
+    os.utime(plugin_module.strpath, (1000, 1000))
+    assert loaded.get(plugin) == json.loads(json.dumps(metadata))
+
+    # source file modified: metadata are obsolete
+    plugin_module.write(MOCK_MODULE_CONTENT + '\n# modified\n')
+    assert loaded.get(plugin) is None
+
+
+def test_manifest_load_previous_version(tmpconfig, plugin_module):
+    plugin = handlers.PyModulePlugin(MODULE_NAME)
+    current = manifest.PluginManifest.from_settings(tmpconfig)
+
+    # version 1 stored the source's mtime, without signature or hash
+    with open(current.filename, 'w') as fd:
+        json.dump({
+            'version': 1,
+            'fingerprint': current.fingerprint,
+            'plugins': {
+                MODULE_NAME: {
+                    'source': plugin_module.strpath,
+                    'mtime': os.path.getmtime(plugin_module.strpath),
+                    'metadata': get_metadata(tmpconfig),
+                },
+            },
+            'entry_points': {},
+        }, fd)
+
+    current.load()
+    assert current.get(plugin) is None
+    assert current.get_entry_points('sopel.plugins') is None
+
+
+def test_manifest_settings_changed(tmpconfig, plugin_module):
+    plugin = handlers.PyModulePlugin(MODULE_NAME)
+    saved = manifest.PluginManifest.from_settings(tmpconfig)
+    saved.set(plugin, get_metadata(tmpconfig))
+    saved.save()
+
+    saved.set_entry_points('sopel.plugins', [['spam = sopel_spam', None]])
+    saved.save()
+
+    tmpconfig.core.prefix = '!'
+    loaded = manifest.PluginManifest.from_settings(tmpconfig)
+    loaded.load()
+    assert loaded.get(plugin) is None
+    # entry points don't depend on settings
+    assert loaded.get_entry_points('sopel.plugins') == [
+        ['spam = sopel_spam', None]]
+
+
+def test_manifest_entry_points(tmpdir, tmpconfig):
+    site_dir = tmpdir.mkdir('site-packages')
+    paths = [site_dir.strpath, tmpdir.join('nope').strpath]
+    stored = manifest.PluginManifest.from_settings(tmpconfig)
+
+    assert stored.get_entry_points('sopel.plugins', paths) is None
+
+    stored.set_entry_points(
+        'sopel.plugins', [('spam = sopel_spam', 'sopel-spam')], paths)
+    assert stored.get_entry_points('sopel.plugins', paths) == [
+        ['spam = sopel_spam', 'sopel-spam']]
+    assert stored.get_entry_points('other.group', paths) is None
+
+    # a distribution has been installed
+    os.utime(site_dir.strpath, (1000, 1000))
+    assert stored.get_entry_points('sopel.plugins', paths) is None
+
+
+def test_lazy_plugin(tmpconfig, plugin_module, botfactory, triggerfactory):
+    metadata = get_metadata(tmpconfig)
+    mockbot = botfactory(tmpconfig)
+
+    plugin = handlers.LazyPlugin(
+        handlers.PyModulePlugin(MODULE_NAME), metadata)
+    plugin.load()
+    plugin.setup(mockbot)
+    plugin.register(mockbot)
+
+    assert MODULE_NAME not in sys.modules
+    assert not plugin.is_activated()
+    assert mockbot.has_plugin(MODULE_NAME)
+    assert mockbot.doc['lazy'] == (['A lazy command.'], ['.lazy'])
+    assert len(mockbot.scheduler._jobs) == 1
+
+    wrapper = triggerfactory.wrapper(
+        mockbot, ':Test!test@example.com PRIVMSG #channel :.lazy')
+    callables = [
+        func
+        for func, trigger, is_blocked in mockbot.get_triggered_callables(
+            'medium', wrapper._trigger._pretrigger, False)
+    ]
+    assert len(callables) == 1
+    assert isinstance(callables[0], manifest.LazyCallable)
+
+    callables[0](wrapper, wrapper._trigger)
+
+    assert plugin.is_activated()
+    module = sys.modules[MODULE_NAME]
+    assert module.CALLS == ['setup', 'lazy']
+
+    results = list(mockbot.search_url_callbacks('https://example.com/lazy'))
+    assert len(results) == 1
+    results[0][0](mockbot, None, results[0][1])
+    assert module.CALLS == ['setup', 'lazy', 'url']
+
+    plugin.unregister(mockbot)
+    assert not mockbot.has_plugin(MODULE_NAME)
+    assert 'lazy' not in [
+        func.__name__
+        for funcs in mockbot._callables['medium'].values()
+        for func in funcs
+    ]
+
+
+def test_lazy_plugin_reload(tmpconfig, plugin_module, botfactory):
+    metadata = get_metadata(tmpconfig)
+    mockbot = botfactory(tmpconfig)
+
+    plugin = handlers.LazyPlugin(
+        handlers.PyModulePlugin(MODULE_NAME), metadata)
+    plugin.setup(mockbot)
+    plugin.register(mockbot)
+    mockbot.reload_plugin(MODULE_NAME)
+
+    # once reloaded, the plugin isn't lazy anymore
+    assert sys.modules[MODULE_NAME].CALLS == ['setup']
+    assert mockbot._plugins[MODULE_NAME] is plugin.plugin
+
+
+def test_setup_plugins_no_manifest(tmpconfig, botfactory):
+    tmpconfig.core.enable = ['coretasks', 'choose']
+
+    mockbot = botfactory(tmpconfig)
+    mockbot.setup_plugins()
+
+    # not loaded lazily: no manifest
+    stored = manifest.PluginManifest.from_settings(tmpconfig)
+    assert not os.path.exists(stored.filename)
+
+
+def test_setup_plugins_manifest(tmpconfig, botfactory):
+    tmpconfig.core.lazy_plugins = True
+    tmpconfig.core.enable = ['coretasks', 'choose']
+
+    mockbot = botfactory(tmpconfig)
+    mockbot.setup_plugins(save_manifest=False)
+    stored = manifest.PluginManifest.from_settings(tmpconfig)
+    assert not os.path.exists(stored.filename)
+
+    mockbot = botfactory(tmpconfig)
+    mockbot.setup_plugins()
+
+    stored.load()
+    metadata = stored.get(mockbot._plugins['choose'])
+    assert metadata is not None
+    assert metadata['label'] == mockbot._plugins['choose'].get_label()
+    assert stored.get_entry_points('sopel.plugins') is not None
+
+
+def test_setup_plugins_lazy(tmpconfig, botfactory):
+    tmpconfig.core.lazy_plugins = True
+    tmpconfig.core.enable = ['coretasks', 'choose']
+
+    mockbot = botfactory(tmpconfig)
+    mockbot.setup_plugins()
+    assert isinstance(mockbot._plugins['choose'], handlers.PyModulePlugin)
+
+    stored = manifest.PluginManifest.from_settings(tmpconfig)
+    stored.load()
+    assert stored.get(mockbot._plugins['choose']) is not None
+
+    mockbot = botfactory(tmpconfig)
+    mockbot.setup_plugins()
+    assert isinstance(mockbot._plugins['choose'], handlers.LazyPlugin)
+    # coretasks is never lazy
+    assert isinstance(mockbot._plugins['coretasks'], handlers.PyModulePlugin)
+    assert 'choose' in mockbot.doc
@@ -0,0 +1,255 @@
+# coding=utf-8
+"""Tests for the ``sopel.plugins.startup`` module."""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import collections
+import sys
+import threading
+
+import pytest
+
+from sopel import module
+from sopel.plugins import exceptions, handlers, startup
+
+
+TMP_CONFIG = """
+[core]
+owner = testnick
+nick = TestBot
+enable = coretasks
+"""
+
+BASE_PLUGIN = """# coding=utf-8
+import sopel.module
+
+
+@sopel.module.commands('base')
+def base(bot, trigger):
+    pass
+"""
+
+DEPENDENT_PLUGIN = """# coding=utf-8
+import sopel.module
+
+
+@sopel.module.depends_on('startup_base')
+def setup(bot):
+    bot.memory['dependent_setup'] = True
+
+
+@sopel.module.commands('dependent')
+def dependent(bot, trigger):
+    pass
+"""
+
+
+class MockPlugin(handlers.AbstractPluginHandler):
+    def __init__(self, name, calls, parallel=False, dependencies=None,
+                 error=None, event=None, with_setup=True):
+        self.name = name
+        self.calls = calls
+        self.parallel = parallel
+        self.with_setup = with_setup
+        self.dependencies = dependencies or []
+        self.error = error
+        self.event = event
+        self.thread = None
+
+    def setup(self, bot):
+        if self.event is not None:
+            # wait for another setup to run at the same time
+            assert self.event.wait(5)
+        self.thread = threading.current_thread()
+        self.calls.append(self.name)
+        if self.error is not None:
+            raise self.error
+
+    def has_setup(self):
+        return self.with_setup
+
+    def is_setup_parallel(self):
+        return self.parallel
+
+    def get_dependencies(self):
+        return self.dependencies
+
+
+def make_plugins(*plugins):
+    return collections.OrderedDict(
+        (plugin.name, plugin) for plugin in plugins)
+
+
+@pytest.fixture
+def tmpconfig(configfactory):
+    return configfactory('test.cfg', TMP_CONFIG)
+
+
+@pytest.fixture
+def plugins_dir(tmpdir):
+    plugins_dir = tmpdir.mkdir('plugins')
+    plugins_dir.join('startup_base.py').write(BASE_PLUGIN)
+    plugins_dir.join('startup_dependent.py').write(DEPENDENT_PLUGIN)
+
+    yield plugins_dir
+
+    # file plugins are added to sys.modules when loaded
+    sys.modules.pop('startup_base', None)
+    sys.modules.pop('startup_dependent', None)
+
+
+def test_decorators():
+    @module.depends_on('spam', 'eggs')
+    @module.parallel_setup
+    def setup(bot):
+        pass
+
+    assert setup.parallel_setup is True
+    assert setup.depends_on == ['spam', 'eggs']
+
+
+def test_runner_order():
+    calls = []
+    plugins = make_plugins(
+        MockPlugin('coretasks', calls),
+        MockPlugin('spam', calls, dependencies=['eggs']),
+        MockPlugin('eggs', calls),
+        MockPlugin('bacon', calls),
+    )
+    results = startup.SetupRunner(None).run(plugins)
+
+    assert calls == ['eggs', 'spam', 'bacon', 'coretasks']
+    assert sorted(results) == ['bacon', 'coretasks', 'eggs', 'spam']
+    assert all(result.error is None for result in results.values())
+    # sequential setups run in the main thread
+    assert all(plugin.thread is threading.current_thread()
+               for plugin in plugins.values())
+
+
+def test_runner_parallel():
+    calls = []
+    event = threading.Event()
+    plugins = make_plugins(
+        # waits for bacon's setup, which can run only in parallel
+        MockPlugin('spam', calls, parallel=True, event=event),
+        MockPlugin('eggs', calls, dependencies=['spam']),
+        MockPlugin('bacon', calls, parallel=True),
+        MockPlugin('coretasks', calls),
+    )
+    plugins['bacon'].setup = lambda bot: (
+        calls.append('bacon'), event.set())
+
+    results = startup.SetupRunner(None, max_workers=2).run(plugins)
+
+    assert calls == ['bacon', 'spam', 'eggs', 'coretasks']
+    assert all(result.error is None for result in results.values())
+    assert plugins['spam'].thread is not threading.current_thread()
+    assert plugins['eggs'].thread is threading.current_thread()
+
+
+def test_runner_error():
+    calls = []
+    error = RuntimeError('spam failed')
+    plugins = make_plugins(
+        MockPlugin('spam', calls, parallel=True, error=error),
+        MockPlugin('eggs', calls, dependencies=['spam']),
+        MockPlugin('bacon', calls, dependencies=['eggs']),
+        MockPlugin('ham', calls),
+    )
+    results = startup.SetupRunner(None).run(plugins)
+
+    assert sorted(calls) == ['ham', 'spam']
+    assert results['spam'].error is error
+    assert isinstance(results['eggs'].error, exceptions.PluginError)
+    assert isinstance(results['bacon'].error, exceptions.PluginError)
+    assert results['ham'].error is None
+
+
+def test_runner_unknown_dependencies():
+    calls = []
+    plugins = make_plugins(
+        MockPlugin('spam', calls, dependencies=['unknown']),
+        MockPlugin('eggs', calls, parallel=True, dependencies=['spam']),
+        MockPlugin('bacon', calls, dependencies=['unknown', 'missing']),
+        MockPlugin('ham', calls),
+    )
+    results = startup.SetupRunner(None).run(plugins)
+
+    assert calls == ['ham']
+    assert isinstance(results['spam'].error, exceptions.PluginError)
+    assert 'unknown not loaded' in str(results['spam'].error)
+    assert isinstance(results['eggs'].error, exceptions.PluginError)
+    assert 'spam failed' in str(results['eggs'].error)
+    assert 'missing, unknown not loaded' in str(results['bacon'].error)
+    assert results['ham'].error is None
+
+
+def test_runner_dependency_without_setup():
+    calls = []
+    plugins = make_plugins(
+        MockPlugin('spam', calls, dependencies=['base']),
+        MockPlugin('base', calls, with_setup=False),
+        MockPlugin('eggs', calls, dependencies=['base', 'spam']),
+    )
+    results = startup.SetupRunner(None).run(plugins)
+
+    assert calls == ['spam', 'eggs']
+    assert all(result.error is None for result in results.values())
+
+
+def test_runner_circular_dependencies():
+    calls = []
+    plugins = make_plugins(
+        MockPlugin('spam', calls, dependencies=['eggs']),
+        MockPlugin('eggs', calls, dependencies=['spam']),
+    )
+    results = startup.SetupRunner(None).run(plugins)
+
+    assert calls == ['spam', 'eggs']
+    assert all(result.error is None for result in results.values())
+
+
+def test_setup_plugins_parallel(tmpconfig, botfactory):
+    tmpconfig.core.enable = ['coretasks', 'remind', 'tell']
+    mockbot = botfactory(tmpconfig)
+    mockbot.setup_plugins()
+
+    assert mockbot._plugins['remind'].is_setup_parallel()
+    assert mockbot.has_plugin('remind')
+    assert mockbot.has_plugin('tell')
+    assert mockbot.has_plugin('coretasks')
+
+
+def test_runner_parallel_only():
+    calls = []
+    plugins = make_plugins(*[
+        MockPlugin('plugin%d' % index, calls, parallel=True)
+        for index in range(20)
+    ])
+    for _ in range(20):
+        del calls[:]
+        results = startup.SetupRunner(None).run(plugins)
+        assert sorted(calls) == sorted(plugins)
+        assert all(result.error is None for result in results.values())
+
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_setup_plugins_dependency_without_setup(
+        plugins_dir, tmpconfig, botfactory, lazy):
+    tmpconfig.core.extra = [plugins_dir.strpath]
+    tmpconfig.core.enable = [
+        'coretasks', 'startup_base', 'startup_dependent']
+    tmpconfig.core.lazy_plugins = lazy
+
+    # the second start uses the plugin manifest, when lazy
+    for _ in range(2):
+        mockbot = botfactory(tmpconfig)
+        mockbot.setup_plugins()
+
+        assert mockbot.has_plugin('startup_base')
+        assert mockbot.has_plugin('startup_dependent')
+        assert mockbot.memory.get('dependent_setup') is True
+        # both must be set up at startup, in order
+        assert not isinstance(
+            mockbot._plugins['startup_base'], handlers.LazyPlugin)
+        assert not isinstance(
+            mockbot._plugins['startup_dependent'], handlers.LazyPlugin)
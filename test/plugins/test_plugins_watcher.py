@@ -0,0 +1,102 @@
+# coding=utf-8
+"""Tests for the ``sopel.plugins.watcher`` module."""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import os
+import sys
+
+import pytest
+
+from sopel.plugins import handlers, watcher
+
+
+TMP_CONFIG = """
+[core]
+owner = testnick
+nick = TestBot
+enable = coretasks
+"""
+
+MOCK_MODULE_CONTENT = """# coding=utf-8
+import sopel.module
+
+
+@sopel.module.commands('%s')
+def command(bot, trigger):
+    pass
+"""
+
+MODULE_NAME = 'sopel_watched_test_plugin'
+
+
+@pytest.fixture
+def tmpconfig(configfactory):
+    return configfactory('test.cfg', TMP_CONFIG)
+
+
+@pytest.fixture
+def plugin_module(tmpdir, monkeypatch):
+    root = tmpdir.mkdir('watched_mods')
+    mod_file = root.join(MODULE_NAME + '.py')
+    mod_file.write(MOCK_MODULE_CONTENT % 'before')
+    os.utime(mod_file.strpath, (1000, 1000))
+    monkeypatch.syspath_prepend(root.strpath)
+    # don't let an outdated bytecode file be used on reload
+    monkeypatch.setattr(sys, 'dont_write_bytecode', True)
+
+    yield mod_file
+
+    sys.modules.pop(MODULE_NAME, None)
+
+
+@pytest.fixture
+def mockbot(tmpconfig, botfactory, plugin_module):
+    bot = botfactory(tmpconfig)
+    plugin = handlers.PyModulePlugin(MODULE_NAME)
+    plugin.load()
+    plugin.register(bot)
+    return bot
+
+
+def get_commands(bot):
+    return [
+        command
+        for funcs in bot._callables['medium'].values()
+        for func in funcs
+        for command in getattr(func, 'commands', [])
+    ]
+
+
+def test_get_changed_plugins(mockbot, plugin_module):
+    plugin_watcher = watcher.PluginWatcher()
+    assert plugin_watcher.get_changed_plugins(mockbot) == []
+
+    # touched, but not modified
+    os.utime(plugin_module.strpath, (2000, 2000))
+    assert plugin_watcher.get_changed_plugins(mockbot) == []
+
+    plugin_module.write(MOCK_MODULE_CONTENT % 'after')
+    assert plugin_watcher.get_changed_plugins(mockbot) == [MODULE_NAME]
+    # changes are reported only once
+    assert plugin_watcher.get_changed_plugins(mockbot) == []
+
+
+def test_check(mockbot, plugin_module):
+    plugin_watcher = watcher.PluginWatcher()
+    plugin_watcher.check(mockbot)
+    assert get_commands(mockbot) == ['before']
+
+    plugin_module.write(MOCK_MODULE_CONTENT % 'after')
+    os.utime(plugin_module.strpath, (3000, 3000))
+    plugin_watcher.check(mockbot)
+
+    assert mockbot.has_plugin(MODULE_NAME)
+    assert get_commands(mockbot) == ['after']
+
+
+def test_setup_plugins_watcher(mockbot):
+    mockbot.setup_plugins_watcher()
+    jobs = mockbot.scheduler._jobs
+    assert len(jobs) == 1
+    assert jobs[0].interval == 2
+    assert jobs[0].func.thread is True
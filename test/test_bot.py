@@ -2,12 +2,16 @@
 """Tests for core ``sopel.bot`` module"""
 from __future__ import unicode_literals, absolute_import, print_function, division
 
+import logging
 import re
+import time
 
 import pytest
 
-from sopel import bot, plugins
+from sopel import bot, loader, logger, module, plugins, tools
 from sopel.tests import rawlist
+from sopel.tests.mocks import MockIRCBackend
+from sopel.trigger import PreTrigger, Trigger
 
 
 TMP_CONFIG = """
@@ -205,6 +209,251 @@ def test_register_unregister_plugin(tmpconfig):
     assert not sopel.has_plugin('coretasks')
 
 
+def test_register_unregister_copy_on_write(tmpconfig):
+    sopel = bot.Sopel(tmpconfig, daemon=False)
+    plugin = plugins.handlers.PyModulePlugin('coretasks', 'sopel')
+    plugin.load()
+
+    # a dispatch in progress keeps the tables it started with
+    table = sopel._callables['medium']
+    plugin.register(sopel)
+    assert sopel._callables['medium'] is not table
+    assert not table
+
+    registered = sopel._callables['medium']
+    registered_items = dict(
+        (regex, list(funcs)) for regex, funcs in registered.items())
+    plugin.unregister(sopel)
+    assert dict(registered.items()) == registered_items
+    assert not any(sopel._callables['medium'].values())
+
+
+def test_register_unregister_plugin_commands(tmpconfig):
+    sopel = bot.Sopel(tmpconfig, daemon=False)
+    plugin = plugins.handlers.PyModulePlugin('admin', 'sopel.modules')
+    plugin.load()
+    plugin.setup(sopel)
+
+    plugin.register(sopel)
+    assert 'join' in sopel.doc
+    assert 'join' in sopel.command_groups['admin']
+    assert sopel.command_index.get_doc('join')
+
+    # unloading a plugin removes its commands from the help
+    plugin.unregister(sopel)
+    assert 'join' not in sopel.doc
+    assert 'admin' not in sopel.command_groups
+    assert sopel.command_index.get_doc('join') is None
+
+
+def test_update_callables_nested(tmpconfig):
+    sopel = bot.Sopel(tmpconfig, daemon=False)
+    plugin = plugins.handlers.PyModulePlugin('coretasks', 'sopel')
+    plugin.load()
+
+    table = sopel._callables['medium']
+    with sopel._update_callables():
+        plugin.register(sopel)
+        # not visible until the outermost update is done
+        assert sopel._callables['medium'] is table
+        assert not table
+
+    assert sopel._callables['medium'] is not table
+    assert sopel._callables['medium']
+
+
+def test_update_callables_error(tmpconfig):
+    sopel = bot.Sopel(tmpconfig, daemon=False)
+    plugin = plugins.handlers.PyModulePlugin('coretasks', 'sopel')
+    plugin.load()
+
+    table = sopel._callables['medium']
+    with pytest.raises(RuntimeError):
+        with sopel._update_callables():
+            plugin.register(sopel)
+            raise RuntimeError('registration failed')
+
+    # the partial changes are discarded
+    assert sopel._callables['medium'] is table
+    assert not table
+    assert sopel._callables_update is None
+
+    # and the next update starts from the published tables
+    with sopel._update_callables():
+        plugin.register(sopel)
+    assert sopel._callables['medium']
+
+
+def test_setup_database_check(tmpconfig):
+    sopel = bot.Sopel(tmpconfig, daemon=False)
+    assert sopel.db.latency is None
+
+    thread = sopel.setup_database_check()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert sopel.db.latency is not None
+
+
+def test_echo_callables(tmpconfig):
+    sopel = bot.Sopel(tmpconfig, daemon=False)
+    sopel.backend = MockIRCBackend(sopel)
+    plugin = plugins.handlers.PyModulePlugin('coretasks', 'sopel')
+    plugin.load()
+    plugin.register(sopel)
+
+    assert not sopel.has_echo_callables()
+    sopel.say('Hello!', '#sopel')
+    # no callable to trigger: the echo-message is not even simulated
+    assert sopel._echo_thread is None
+
+    triggered = []
+
+    @module.echo
+    @module.rule('Hello!')
+    def echoed(bot, trigger):
+        triggered.append(trigger.nick)
+
+    loader.clean_callable(echoed, tmpconfig)
+    sopel.register([echoed], [], [], [])
+    assert sopel.has_echo_callables()
+    assert sum(len(funcs) for funcs in sopel._echo_callables['medium'].values()) == 1
+
+    sopel.say('Hello!', '#sopel')
+    sopel._echo_queue.join()
+    assert triggered == [sopel.nick]
+
+    sopel.unregister(echoed)
+    assert not sopel.has_echo_callables()
+
+    sopel._shutdown()
+    assert sopel._echo_thread is None
+
+
+def test_call_slow_callable(tmpconfig, triggerfactory, caplog):
+    tmpconfig.core.slow_callable_threshold = 0.01
+    sopel = bot.Sopel(tmpconfig, daemon=False)
+    sopel.backend = MockIRCBackend(sopel)
+
+    @module.thread(False)
+    @module.rule('Hello!')
+    def hello(bot, trigger):
+        time.sleep(0.02)
+
+    loader.clean_callable(hello, tmpconfig)
+    trigger = triggerfactory(
+        sopel, ':Test!test@example.com PRIVMSG #sopel :Hello!', r'.*Hello!')
+
+    sopel.call(hello, bot.SopelWrapper(sopel, trigger), trigger)
+
+    name = '%s.hello' % __name__
+    timing = sopel.callable_timings.get_timings()[0]
+    assert timing.name == name
+    assert timing.count == 1
+    assert timing.max >= 0.02
+
+    warnings = [
+        record.getMessage() for record in caplog.records
+        if record.levelname == 'WARNING']
+    assert len(warnings) == 1
+    assert warnings[0].startswith(
+        "Slow callable %s (plugin %s, rule '.*Hello!') took " % (
+            name, __name__))
+    assert warnings[0].endswith(', blocking the bot')
+
+
+def test_describe_match(tmpconfig):
+    sopel = bot.Sopel(tmpconfig, daemon=False)
+    pretrigger = PreTrigger(
+        sopel.nick, ':Test!test@example.com PRIVMSG #sopel :.hi there')
+
+    @module.commands('hello', 'hi')
+    def hello(bot, trigger):
+        pass
+
+    loader.clean_callable(hello, tmpconfig)
+    match = hello.rule[1].match('.hi there')
+    trigger = Trigger(sopel.settings, pretrigger, match)
+    assert sopel._describe_match(hello, trigger) == "command 'hi'"
+
+    # a long verbose pattern, on one line and truncated
+    regex = re.compile(r"""
+        (?P<start>\s*)     # whitespaces
+        (?P<word>[a-z]+)   # a word
+        (?P<rest>.*)       # then anything
+    """, re.VERBOSE)
+    trigger = Trigger(sopel.settings, pretrigger, regex.match('hi there'))
+    assert sopel._describe_match(hello, trigger) == (
+        "rule '(?P<start>\\\\s*) # whitespaces (?P<word>[a-z]+) # a word (?...'")
+
+
+def test_metrics(tmpconfig):
+    tmpconfig.core.metrics = True
+    sopel = bot.Sopel(tmpconfig, daemon=False)
+    sopel.backend = MockIRCBackend(sopel)
+
+    @module.rate(user=100)
+    @module.thread(False)
+    @module.rule('Hello!')
+    def hello(bot, trigger):
+        bot.say('Hi!')
+
+    loader.clean_callable(hello, tmpconfig)
+    sopel.register([hello], [], [], [])
+
+    sopel.on_message(':Test!test@example.com PRIVMSG #sopel :Hello!')
+    sopel.on_message(':Test!test@example.com PRIVMSG #sopel :Hello!')
+
+    name = '%s.hello' % __name__
+    samples = dict(
+        ((sample_name, labels), value)
+        for metric in ['sopel_lines_received_total',
+                       'sopel_lines_sent_total',
+                       'sopel_callable_seconds',
+                       'sopel_rate_limited_total']
+        for sample_name, labels, value in sopel.metrics.get(metric).collect())
+    assert samples[
+        ('sopel_lines_received_total', (('event', 'PRIVMSG'),))] == 2
+    assert samples[('sopel_lines_sent_total', (('event', 'PRIVMSG'),))] == 1
+    assert samples[
+        ('sopel_callable_seconds_count', (('callable', name),))] == 1
+    assert samples[
+        ('sopel_rate_limited_total', (('callable', name), ('limit', 'user')))
+    ] == 1
+    assert 'sopel_threads ' in sopel.metrics.render()
+
+
+def test_quit_flush_logging_channel(tmpconfig):
+    tmpconfig.core.logging_channel = '#logs'
+    sopel = bot.Sopel(tmpconfig, daemon=False)
+    sopel.backend = MockIRCBackend(sopel)
+    sopel.backend.connected = True
+    handler = logger.IrcLoggingHandler(sopel, logging.WARNING, interval=3600)
+    sopel._logging_channel_handler = handler
+    try:
+        handler.handle(logging.makeLogRecord({
+            'name': 'sopel.test', 'levelno': logging.WARNING,
+            'levelname': 'WARNING', 'msg': 'spam',
+        }))
+        sopel.quit('Bye')
+    finally:
+        handler.close()
+
+    assert sopel.backend.message_sent == rawlist(
+        'PRIVMSG #logs :spam',
+        'QUIT :Bye',
+    )
+
+
+def test_metrics_disabled(tmpconfig):
+    sopel = bot.Sopel(tmpconfig, daemon=False)
+    sopel.backend = MockIRCBackend(sopel)
+    sopel.on_message(':Test!test@example.com PRIVMSG #sopel :Hello!')
+
+    assert not sopel.metrics.enabled
+    assert sopel.metrics.render() == ''
+
+
 def test_remove_plugin_unknown_plugin(tmpconfig):
     sopel = bot.Sopel(tmpconfig, daemon=False)
 
@@ -308,6 +557,35 @@ def test_search_url_callbacks_not_found(tmpconfig):
     assert not list(results), 'URL must not match any pattern'
 
 
+def test_search_url_callbacks_manual_memory(tmpconfig):
+    """Test search_url_callbacks with URL callbacks managed by a plugin."""
+    sopel = bot.Sopel(tmpconfig, daemon=False)
+
+    def url_handler(*args, **kwargs):
+        return None
+
+    def url_handler_other(*args, **kwargs):
+        return None
+
+    # old-style management of URL callbacks
+    sopel.memory['url_callbacks'] = tools.SopelMemory()
+    regex = re.compile(r'https://(www\.)?example\.com/')
+    sopel.memory['url_callbacks'][regex] = url_handler
+
+    results = list(sopel.search_url_callbacks('https://example.com/'))
+    assert len(results) == 1, 'Expected 1 handler; found %d' % len(results)
+    assert url_handler in results[0], 'Once registered, handler must be found'
+
+    # registering another callback keeps the previous one
+    sopel.register_url_callback(r'https://example\.com/a', url_handler_other)
+    assert isinstance(sopel.memory['url_callbacks'], tools.SopelURLCallbacks)
+
+    results = list(sopel.search_url_callbacks('https://example.com/a'))
+    assert len(results) == 2, 'Expected 2 handlers; found %d' % len(results)
+    assert [result[0] for result in results] == [
+        url_handler, url_handler_other]
+
+
 def test_register_url_callback_twice(tmpconfig):
     """Test register_url_callback replace URL callbacks for a pattern."""
     test_pattern = r'https://(www\.)?example\.com'
@@ -343,3 +343,63 @@ def test_save_modified_config(multi_fakeconfig):
         '&endquote"',
         '"&quoted"',  # doesn't start with a # so it isn't escaped
     ]
+
+
+def test_parsed_value_cache(multi_fakeconfig, monkeypatch):
+    section = multi_fakeconfig.spam
+    parsed = []
+    original_parse = SpamSection.eggs.parse
+
+    def parse(value):
+        parsed.append(value)
+        return original_parse(value)
+
+    monkeypatch.setattr(SpamSection.eggs, 'parse', parse, raising=False)
+    multi_fakeconfig.parser.invalidate()
+
+    assert section.eggs == ['one', 'two', 'three', 'four', 'and a half']
+    assert section.eggs == ['one', 'two', 'three', 'four', 'and a half']
+    assert len(parsed) == 1, 'The parsed value must be cached'
+
+    # modifying the returned value doesn't modify the cached one
+    section.eggs.append('spam')
+    assert section.eggs == ['one', 'two', 'three', 'four', 'and a half']
+    assert len(parsed) == 1
+
+    # any modification of the parser invalidates the cache
+    multi_fakeconfig.parser.set('spam', 'eggs', 'one, two')
+    assert section.eggs == ['one', 'two']
+    assert len(parsed) == 2
+
+    multi_fakeconfig.save()
+    assert section.eggs == ['one', 'two']
+    assert len(parsed) == 3
+
+
+def test_parsed_value_cache_set_delete(multi_fakeconfig):
+    section = multi_fakeconfig.spam
+    assert section.eggs == ['one', 'two', 'three', 'four', 'and a half']
+
+    section.eggs = ['spam']
+    assert section.eggs == ['spam']
+
+    del section.eggs
+    assert section.eggs == []
+
+
+def test_reload(multi_fakeconfig):
+    multi_fakeconfig.spam.eggs = ['spam']
+    multi_fakeconfig.fake.valattr = 'bacon'
+    assert multi_fakeconfig.spam.eggs == ['spam']
+    assert multi_fakeconfig.fake.valattr == 'bacon'
+
+    multi_fakeconfig.reload()
+
+    assert multi_fakeconfig.spam.eggs == [
+        'one', 'two', 'three', 'four', 'and a half']
+    assert multi_fakeconfig.fake.valattr is None
+    assert multi_fakeconfig.core.owner == 'dgw'
+
+    # sections defined but not in the file can still be modified
+    multi_fakeconfig.fake.valattr = 'bacon'
+    assert multi_fakeconfig.fake.valattr == 'bacon'
@@ -13,10 +13,13 @@ import sys
 import tempfile
 
 import pytest
+from sqlalchemy import event
 
+from sopel import db as db_module
 from sopel.db import SopelDB
 from sopel.test_tools import MockConfig
 from sopel.tools import Identifier
+from sopel.tools.metrics import MetricsRegistry
 
 db_filename = tempfile.mkstemp()[1]
 if sys.version_info.major >= 3:
@@ -36,7 +39,8 @@ def db():
     config = MockConfig()
     config.core.db_filename = db_filename
     db = SopelDB(config)
-    # TODO add tests to ensure db creation works properly, too.
+    # tables are created on first use: some tests use them directly
+    db.initialize()
     return db
 
 
@@ -44,6 +48,96 @@ def teardown_function(function):
     os.remove(db_filename)
 
 
+def test_initialize_lazy(monkeypatch):
+    config = MockConfig()
+    config.core.db_filename = db_filename
+    calls = []
+    create_all = db_module.BASE.metadata.create_all
+
+    def mock_create_all(*args, **kwargs):
+        calls.append(args)
+        return create_all(*args, **kwargs)
+
+    monkeypatch.setattr(
+        db_module.BASE.metadata, 'create_all', mock_create_all)
+
+    db = SopelDB(config)
+    assert calls == [], 'Tables must not be created before first use'
+
+    db.set_nick_value('Embolalia', 'foo', 'bar')
+    assert len(calls) == 1
+    db.initialize()
+    assert len(calls) == 1, 'Tables must be created only once'
+
+    # the schema version is stored: tables are not created again
+    db = SopelDB(config)
+    assert db.get_nick_value('Embolalia', 'foo') == 'bar'
+    assert len(calls) == 1
+
+
+def test_initialize_outdated_schema(db):
+    conn = sqlite3.connect(db_filename)
+    with conn:
+        conn.execute('UPDATE sopel_schema SET version = 0')
+    conn.close()
+
+    config = MockConfig()
+    config.core.db_filename = db_filename
+    SopelDB(config).initialize()
+
+    conn = sqlite3.connect(db_filename)
+    version = conn.execute('SELECT version FROM sopel_schema').fetchall()
+    conn.close()
+    assert version == [(db_module.SCHEMA_VERSION,)]
+
+
+def test_get_latency(db):
+    assert db.latency is None
+    latency = db.get_latency()
+    assert latency >= 0
+    assert db.latency == latency
+
+
+def get_query_count(registry):
+    samples = dict(
+        (name, value)
+        for name, labels, value in registry.get(
+            'sopel_db_query_seconds').collect())
+    return samples['sopel_db_query_seconds_count']
+
+
+def test_record_metrics(db):
+    registry = MetricsRegistry()
+    db.record_metrics(registry)
+    listeners = list(db._metrics_listeners)
+    db.get_latency()
+
+    count = get_query_count(registry)
+    assert count >= 1
+
+    db.stop_recording_metrics()
+    for name, listener in listeners:
+        assert not event.contains(db.engine, name, listener)
+
+    # not recorded anymore
+    db.get_latency()
+    assert get_query_count(registry) == count
+
+
+def test_record_metrics_again(db):
+    first, second = MetricsRegistry(), MetricsRegistry()
+    db.record_metrics(first)
+    db.record_metrics(second)
+    try:
+        db.get_latency()
+    finally:
+        db.stop_recording_metrics()
+
+    # the second registry replaces the first one
+    assert get_query_count(first) == 0
+    assert get_query_count(second) >= 1
+
+
 def test_get_nick_id(db):
     conn = sqlite3.connect(db_filename)
     tests = [
@@ -313,3 +407,14 @@ def test_delete_plugin_value(db):
     assert db.get_plugin_value('plugin', 'wasd') == 'uldr'
     db.delete_plugin_value('plugin', 'wasd')
     assert db.get_plugin_value('plugin', 'wasd') is None
+
+
+def test_engine_shared(db):
+    config = MockConfig()
+    config.core.db_filename = db_filename
+    other = SopelDB(config)
+    assert other.engine is db.engine
+
+    config.core.db_filename = db_filename + '.other'
+    other = SopelDB(config)
+    assert other.engine is not db.engine
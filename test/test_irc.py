@@ -2,9 +2,13 @@
 """Tests for core ``sopel.irc``"""
 from __future__ import unicode_literals, absolute_import, print_function, division
 
+import threading
+import time
+
 import pytest
 
 from sopel.tests import rawlist
+from sopel.tools import target
 
 
 TMP_CONFIG = """
@@ -219,6 +223,47 @@ def test_say_safe(bot):
     )
 
 
+def test_say_flood_wait_other_recipient(bot):
+    bot.settings.core.flood_burst_lines = 1
+    bot.settings.core.flood_empty_wait = 0.5
+    # a recipient that doesn't share the lock of #spam
+    other = next(
+        name for name in ['#eggs'] + ['#eggs%d' % i for i in range(100)]
+        if bot._get_recipient_lock(name) is not
+        bot._get_recipient_lock('#spam'))
+    bot.say('one', '#spam')
+
+    # flood protection: the next message to #spam waits
+    thread = threading.Thread(target=bot.say, args=('two', '#spam'))
+    thread.start()
+    time.sleep(0.1)
+
+    # but not the messages to another recipient
+    start = time.time()
+    bot.say('hello', other)
+    assert time.time() - start < 0.3
+
+    thread.join()
+    assert bot.backend.message_sent == rawlist(
+        'PRIVMSG #spam :one',
+        'PRIVMSG %s :hello' % other,
+        'PRIVMSG #spam :two',
+    )
+
+
+def test_say_recipient_locks(bot):
+    locks = list(bot._recipient_locks)
+    for index in range(100):
+        bot.say('hello', '#channel%d' % index)
+
+    # the pool of locks doesn't grow with the number of recipients
+    assert bot._recipient_locks == locks
+    assert len(locks) == bot._recipient_stripes
+    # the same lock for the same recipient, whatever its case
+    assert bot._get_recipient_lock('#Channel') is bot._get_recipient_lock(
+        '#channel')
+
+
 def test_say_long_fit(bot):
     """Test a long message that fits into the 512 bytes limit."""
     text = 'a' * (512 - len('PRIVMSG #sopel :\r\n'))
@@ -250,6 +295,21 @@ def test_say_long_extra_multi_message(bot):
     )
 
 
+def test_say_long_extra_multi_message_hostmask(bot):
+    """Test a long message split to fit with the bot's hostmask."""
+    bot.users[bot.nick] = target.User(bot.nick, 'sopel', 'example.com')
+    prefix = ':Sopel!sopel@example.com PRIVMSG #sopel :'
+    assert bot.get_max_message_length('#sopel') == 510 - len(prefix)
+
+    text = 'a' * (510 - len(prefix))
+    bot.say(text + ' b', '#sopel', max_messages=3)
+
+    assert bot.backend.message_sent == rawlist(
+        'PRIVMSG #sopel :%s' % text,
+        'PRIVMSG #sopel :b',
+    )
+
+
 def test_say_no_repeat_protection(bot):
     # five is fine
     bot.say('hello', '#sopel')
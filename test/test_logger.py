@@ -0,0 +1,310 @@
+# coding=utf-8
+"""Tests for the ``sopel.logger`` module."""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import json
+import logging
+import sys
+import time
+
+import pytest
+
+from sopel import logger
+from sopel.tests import rawlist
+
+if sys.version_info.major >= 3:
+    from queue import Queue
+else:
+    from Queue import Queue
+
+
+TMP_CONFIG = """
+[core]
+owner = testnick
+nick = TestBot
+enable = coretasks
+logdir = {logdir}
+log_raw = true
+"""
+
+CHANNEL_CONFIG = """
+[core]
+owner = testnick
+nick = TestBot
+enable = coretasks
+logging_channel = #logs
+"""
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, level=logging.NOTSET):
+        super(ListHandler, self).__init__(level)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def tmpconfig(configfactory, tmpdir):
+    logdir = tmpdir.mkdir('logs')
+    return configfactory('test.cfg', TMP_CONFIG.format(logdir=logdir.strpath))
+
+
+@pytest.fixture(autouse=True)
+def reset_logging():
+    yield
+    logger.shutdown_logging()
+    for name in ['sopel', 'sopel.raw', 'sopel.exceptions']:
+        log = logging.getLogger(name)
+        for handler in list(log.handlers):
+            log.removeHandler(handler)
+            handler.close()
+
+
+def make_record(msg, args=None, level=logging.INFO):
+    return logging.makeLogRecord({
+        'name': 'sopel.test',
+        'levelno': level,
+        'levelname': logging.getLevelName(level),
+        'msg': msg,
+        'args': args,
+    })
+
+
+@pytest.fixture
+def channel_handler(configfactory, botfactory):
+    settings = configfactory('channel.cfg', CHANNEL_CONFIG)
+    mockbot = botfactory(settings)
+    handler = logger.IrcLoggingHandler(
+        mockbot, logging.WARNING, interval=3600, max_lines=2, capacity=3)
+    handler.setFormatter(logging.Formatter('%(levelname)s %(message)s'))
+    yield handler
+    handler.close()
+
+
+def test_irc_logging_handler(channel_handler):
+    channel_handler.handle(make_record('spam', level=logging.WARNING))
+    channel_handler.handle(make_record('%s', ('eggs',), level=logging.ERROR))
+    channel_handler.handle(make_record('spam', level=logging.WARNING))
+
+    # nothing is sent by the emitting thread
+    mockbot = channel_handler._bot
+    assert mockbot.backend.message_sent == []
+
+    channel_handler.send_pending()
+    assert mockbot.backend.message_sent == rawlist(
+        'PRIVMSG #logs :WARNING spam (logged 2 times)',
+        'PRIVMSG #logs :ERROR eggs',
+    )
+
+    channel_handler.send_pending()
+    assert len(mockbot.backend.message_sent) == 2
+
+
+def test_irc_logging_handler_batches(channel_handler):
+    for msg in ['spam', 'eggs', 'ham']:
+        channel_handler.handle(make_record(msg, level=logging.WARNING))
+
+    assert channel_handler.get_pending_lines() == [
+        'WARNING spam', 'WARNING eggs']
+    assert channel_handler.get_pending_lines() == ['WARNING ham']
+    assert channel_handler.get_pending_lines() == []
+
+
+def test_irc_logging_handler_saturated(channel_handler):
+    for number in range(10):
+        channel_handler.handle(
+            make_record('error %d', (number,), level=logging.ERROR))
+    # a message already waiting is still counted
+    channel_handler.handle(make_record('error %d', (0,), level=logging.ERROR))
+
+    assert channel_handler.get_pending_lines() == [
+        'ERROR error 0 (logged 2 times)',
+        'ERROR error 1',
+        '7 log messages dropped: too many to send',
+    ]
+    assert channel_handler.get_pending_lines() == ['ERROR error 2']
+
+
+def test_irc_logging_handler_send_error(channel_handler, monkeypatch):
+    for msg in ['spam', 'eggs', 'ham']:
+        channel_handler.handle(make_record(msg, level=logging.WARNING))
+
+    mockbot = channel_handler._bot
+    say = mockbot.say
+    sent = []
+
+    def fail_say(text, recipient, max_messages=1):
+        if text == 'WARNING eggs':
+            raise RuntimeError('connection lost')
+        sent.append(text)
+        say(text, recipient, max_messages)
+
+    monkeypatch.setattr(mockbot, 'say', fail_say)
+    assert not channel_handler.send_pending()
+    assert sent == ['WARNING spam']
+
+    # the rest of the batch is counted as dropped
+    assert channel_handler.get_pending_lines() == [
+        'WARNING ham',
+        '1 log messages dropped: too many to send',
+    ]
+
+
+def test_irc_logging_handler_close(channel_handler):
+    for msg in ['spam', 'eggs', 'ham']:
+        channel_handler.handle(make_record(msg, level=logging.WARNING))
+
+    # the messages still waiting are sent at once
+    channel_handler.close()
+    assert channel_handler._bot.backend.message_sent == rawlist(
+        'PRIVMSG #logs :WARNING spam',
+        'PRIVMSG #logs :WARNING eggs',
+        'PRIVMSG #logs :WARNING ham',
+    )
+
+    # nothing is buffered after that
+    channel_handler.handle(make_record('bacon', level=logging.WARNING))
+    assert channel_handler.get_pending_lines() == []
+
+
+def test_irc_logging_handler_flush_timeout(channel_handler):
+    for msg in ['spam', 'eggs', 'ham']:
+        channel_handler.handle(make_record(msg, level=logging.WARNING))
+
+    channel_handler.drain_timeout = 0
+    channel_handler.flush()
+    assert channel_handler._bot.backend.message_sent == []
+    assert len(channel_handler.get_pending_lines()) == 2
+
+
+def test_irc_logging_handler_thread(configfactory, botfactory):
+    settings = configfactory('channel.cfg', CHANNEL_CONFIG)
+    mockbot = botfactory(settings)
+    handler = logger.IrcLoggingHandler(mockbot, logging.WARNING, interval=0.01)
+    try:
+        handler.handle(make_record('spam', level=logging.WARNING))
+        for _ in range(100):
+            if mockbot.backend.message_sent:
+                break
+            time.sleep(0.01)
+    finally:
+        handler.close()
+
+    assert mockbot.backend.message_sent == rawlist('PRIVMSG #logs :spam')
+
+
+def test_queue_handler_prepare():
+    handler = logger.QueueHandler(Queue())
+    record = make_record('%s and %s', ('spam', 'eggs'))
+
+    try:
+        raise ValueError('spam')
+    except ValueError:
+        record.exc_info = sys.exc_info()
+
+    prepared = handler.prepare(record)
+    assert prepared is not record
+    assert prepared.msg == 'spam and eggs'
+    assert prepared.args is None
+    assert prepared.exc_info is None
+    assert 'ValueError: spam' in prepared.exc_text
+
+
+def test_queue_handler_dropped():
+    queue = Queue(2)
+    handler = logger.QueueHandler(queue)
+
+    for index in range(4):
+        handler.handle(make_record('record %d' % index))
+
+    assert handler.dropped == 2
+    assert queue.get_nowait().msg == 'record 0'
+    assert queue.get_nowait().msg == 'record 1'
+
+    # dropped records are reported before the next record
+    handler.handle(make_record('record 4'))
+    report = queue.get_nowait()
+    assert report.levelno == logging.WARNING
+    assert report.msg == '2 log records dropped: logging queue is full'
+    assert queue.get_nowait().msg == 'record 4'
+    assert handler.dropped == 2
+
+
+def test_queue_listener():
+    queue = Queue()
+    everything = ListHandler()
+    errors = ListHandler(logging.ERROR)
+    listener = logger.QueueListener(queue, [everything, errors])
+    listener.start()
+
+    handler = logger.QueueHandler(queue)
+    handler.handle(make_record('info'))
+    handler.handle(make_record('error', level=logging.ERROR))
+    listener.stop()
+
+    assert [record.msg for record in everything.records] == ['info', 'error']
+    assert [record.msg for record in errors.records] == ['error']
+
+
+def test_raw_json_formatter():
+    formatter = logger.RawJSONFormatter()
+    record = make_record('>>\tPRIVMSG #sopel :Hi!')
+    record.raw_prefix = '>>'
+    record.raw_line = 'PRIVMSG #sopel :Hi!'
+
+    result = json.loads(formatter.format(record))
+    assert result['direction'] == '>>'
+    assert result['line'] == 'PRIVMSG #sopel :Hi!'
+    assert result['time'] == round(record.created, 3)
+
+
+def test_setup_logging_queue(tmpconfig):
+    logger.setup_logging(tmpconfig)
+
+    for name in ['sopel', 'sopel.raw', 'sopel.exceptions']:
+        handlers = logging.getLogger(name).handlers
+        assert len(handlers) == 1
+        assert isinstance(handlers[0], logger.QueueHandler)
+
+    logging.getLogger('sopel.test').error('queued error')
+    logger.shutdown_logging()
+
+    with open(tmpconfig.core.logdir + '/test.error.log') as error_file:
+        assert 'queued error' in error_file.read()
+
+
+def test_setup_logging_no_queue(tmpconfig):
+    tmpconfig.core.logging_queue_size = 0
+    logger.setup_logging(tmpconfig)
+
+    handlers = logging.getLogger('sopel').handlers
+    assert len(handlers) == 3
+    assert not any(
+        isinstance(handler, logger.QueueHandler) for handler in handlers)
+
+
+def test_setup_logging_raw_ndjson(tmpconfig, botfactory):
+    tmpconfig.core.log_raw_format = 'ndjson'
+    logger.setup_logging(tmpconfig)
+    mockbot = botfactory(tmpconfig)
+
+    mockbot.log_raw('PING :irc.example.com\r\n', '<<')
+    logger.shutdown_logging()
+
+    with open(tmpconfig.core.logdir + '/test.raw.log') as raw_file:
+        result = json.loads(raw_file.readline())
+    assert result['direction'] == '<<'
+    assert result['line'] == 'PING :irc.example.com'
+
+
+def test_shutdown_logging(tmpconfig):
+    logger.setup_logging(tmpconfig)
+    logger.shutdown_logging()
+
+    # handlers are back, and log records are written directly
+    handlers = logging.getLogger('sopel').handlers
+    assert len(handlers) == 3
+    assert not any(
+        isinstance(handler, logger.QueueHandler) for handler in handlers)
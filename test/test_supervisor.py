@@ -0,0 +1,197 @@
+# coding=utf-8
+"""Tests for the ``sopel.supervisor`` module."""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import logging
+import sys
+
+import pytest
+
+from sopel import bot, plugins, supervisor
+
+
+TMP_CONFIG = """
+[core]
+owner = testnick
+nick = %s
+enable = coretasks
+"""
+
+
+@pytest.fixture
+def tmpconfigs(configfactory):
+    return [
+        configfactory('%s.cfg' % name, TMP_CONFIG % name)
+        for name in ['spam', 'eggs']
+    ]
+
+
+@pytest.fixture
+def mocksetup(monkeypatch):
+    calls = []
+
+    def setup(self, with_logging=True):
+        calls.append((self.settings.basename, with_logging))
+
+    monkeypatch.setattr(bot.Sopel, 'setup', setup)
+    return calls
+
+
+def test_supervisor_setup(tmpconfigs, mocksetup):
+    supervised = supervisor.Supervisor(tmpconfigs)
+    supervised.setup()
+
+    # only the main bot sets up logging
+    assert mocksetup == [('spam', True), ('eggs', False)]
+    assert [instance.nick for instance in supervised.bots] == ['spam', 'eggs']
+    # each bot has its own state
+    spam, eggs = supervised.bots
+    assert spam.memory is not eggs.memory
+    assert spam.channels is not eggs.channels
+
+
+SHARED_PLUGIN = """
+from sopel import module
+
+counter = 0
+items = []
+
+
+def setup(bot):
+    global counter
+    counter = 0
+
+
+@module.commands('count')
+def count(bot, trigger):
+    global counter, last_nick
+    counter = counter + 1
+    last_nick = trigger.nick
+    items.append(trigger.nick)  # modified in place: not found
+
+
+class Helper(object):
+    def reset(self):
+        global items
+        items = []
+"""
+
+
+@pytest.fixture
+def sharedplugin(tmpdir):
+    plugin_file = tmpdir.join('sharedplugin.py')
+    plugin_file.write(SHARED_PLUGIN)
+    plugin = plugins.handlers.PyFilePlugin(plugin_file.strpath)
+    plugin.load()
+    yield plugin
+    sys.modules.pop('sharedplugin', None)
+
+
+@pytest.mark.skipif(sys.version_info.major < 3,
+                    reason='bytecode instructions require Python 3')
+def test_get_assigned_globals(sharedplugin):
+    assert supervisor.get_assigned_globals(sharedplugin) == [
+        'counter', 'items', 'last_nick']
+
+    # built-in plugins keep their state in bot.memory
+    for name in ['safety', 'meetbot']:
+        plugin = plugins.handlers.PyModulePlugin(name, 'sopel.modules')
+        plugin.load()
+        assert supervisor.get_assigned_globals(plugin) == []
+    coretasks = plugins.handlers.PyModulePlugin('coretasks', 'sopel')
+    coretasks.load()
+    assert supervisor.get_assigned_globals(coretasks) == []
+
+    # not loaded yet
+    assert supervisor.get_assigned_globals(
+        plugins.handlers.PyModulePlugin('meetbot', 'sopel.modules')) == []
+
+
+@pytest.mark.skipif(sys.version_info.major < 3,
+                    reason='bytecode instructions require Python 3')
+def test_supervisor_check_shared_state(
+        tmpconfigs, mocksetup, sharedplugin, caplog):
+    tmpconfigs[1].core.logging_channel = '#eggs-logs'
+    safety = plugins.handlers.PyModulePlugin('safety', 'sopel.modules')
+    safety.load()
+
+    supervised = supervisor.Supervisor(tmpconfigs)
+    supervised.setup()
+    spam, eggs = supervised.bots
+    spam._plugins = {'safety': safety, 'sharedplugin': sharedplugin}
+    eggs._plugins = {'safety': safety, 'sharedplugin': sharedplugin}
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING, logger='sopel.supervisor'):
+        supervised.check_shared_state()
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages == [
+        'Bot eggs: logging_channel is ignored, only the main bot sends '
+        'log messages to its logging channel',
+        'Plugin sharedplugin is enabled for 2 bots, but it stores its '
+        'state in module globals (counter, items, last_nick): the bots '
+        'share it',
+    ]
+
+
+def test_supervisor_run_quit(tmpconfigs, mocksetup, monkeypatch):
+    runs = []
+
+    def run(self, host, port=6667):
+        runs.append(self.settings.basename)
+        self.hasquit = True
+
+    monkeypatch.setattr(bot.Sopel, 'run', run)
+
+    supervised = supervisor.Supervisor(tmpconfigs)
+    supervised.setup()
+
+    assert supervised.run() == 0
+    assert sorted(runs) == ['eggs', 'spam']
+    assert not supervised.wantsrestart
+
+
+def test_supervisor_run_reconnect(tmpconfigs, mocksetup, monkeypatch):
+    runs = []
+
+    def run(self, host, port=6667):
+        runs.append(self.settings.basename)
+        # spam is disconnected once, then quits
+        if self.settings.basename == 'eggs' or runs.count('spam') > 1:
+            self.hasquit = True
+
+    monkeypatch.setattr(bot.Sopel, 'run', run)
+
+    supervised = supervisor.Supervisor(tmpconfigs, delay=0)
+    supervised.setup()
+
+    assert supervised.run() == 0
+    assert sorted(runs) == ['eggs', 'spam', 'spam']
+    # spam has been set up again; as the main bot, it sets up logging
+    assert mocksetup == [('spam', True), ('eggs', False), ('spam', True)]
+
+
+def test_supervisor_run_restart(tmpconfigs, mocksetup, monkeypatch):
+    quits = []
+
+    def run(self, host, port=6667):
+        if self.settings.basename == 'spam':
+            self.wantsrestart = True
+            self.hasquit = True
+        else:
+            supervised._stopping.wait(5)
+
+    def quit(self, message):
+        quits.append((self.settings.basename, message))
+        self.hasquit = True
+
+    monkeypatch.setattr(bot.Sopel, 'run', run)
+    monkeypatch.setattr(bot.Sopel, 'quit', quit)
+
+    supervised = supervisor.Supervisor(tmpconfigs)
+    supervised.setup()
+
+    assert supervised.run() == -1
+    assert supervised.wantsrestart
+    assert quits == [('eggs', 'Restarting')]
@@ -3,7 +3,12 @@
 from __future__ import unicode_literals, absolute_import, print_function, division
 
 
+import re
+import threading
 from datetime import timedelta
+
+import pytest
+
 from sopel import tools
 from sopel.tools.time import seconds_to_human
 
@@ -95,6 +100,47 @@ def test_get_sendable_message_two_bytes():
     assert excess == 'α α'
 
 
+def test_get_sendable_message_spaces_in_multibyte():
+    text, excess = tools.get_sendable_message('α α α', 4)
+    assert text == 'α'
+    assert excess == 'α α'
+
+
+def test_get_sendable_message_color_code():
+    # the color code and its colors are never split
+    text, excess = tools.get_sendable_message('\x0304,05spam', 5)
+    assert text == '\x0304,05'
+    assert excess == 'spam'
+
+    text, excess = tools.get_sendable_message('a\x0304,05spam', 6)
+    assert text == 'a'
+    assert excess == '\x0304,05spam'
+
+
+def test_get_sendable_messages():
+    assert tools.get_sendable_messages('') == []
+    assert tools.get_sendable_messages('aaaa') == ['aaaa']
+    assert tools.get_sendable_messages('aa bb cc', 3) == ['aa', 'bb', 'cc']
+    assert tools.get_sendable_messages('αααα α', 4) == ['αα', 'αα', 'α']
+    assert tools.get_sendable_messages('😀😀😀', 5) == ['😀', '😀', '😀']
+
+
+def test_get_sendable_messages_max_messages():
+    result = tools.get_sendable_messages('aa bb cc dd', 3, max_messages=2)
+    assert result == ['aa', 'bb cc dd']
+
+    result = tools.get_sendable_messages('aa bb cc dd', 3, max_messages=1)
+    assert result == ['aa bb cc dd']
+
+
+def test_get_sendable_messages_long():
+    text = '漢字 ' * 10000
+    result = tools.get_sendable_messages(text)
+
+    assert all(len(message.encode('utf-8')) <= 400 for message in result)
+    assert ' '.join(result) == text
+
+
 def test_time_timedelta_formatter():
     payload = 10000
     assert seconds_to_human(payload) == '2 hours, 46 minutes ago'
@@ -107,3 +153,195 @@ def test_time_timedelta_formatter():
 
     payload = timedelta(hours=-4)
     assert seconds_to_human(payload) == 'in 4 hours'
+
+
+def test_get_url_pattern_host_suffix():
+    def get_suffix(pattern):
+        return tools.get_url_pattern_host_suffix(re.compile(pattern))
+
+    assert get_suffix(r'https?://example\.com/.*') == 'example.com'
+    assert get_suffix(
+        r'(https?:\/\/(?:www\.){0,1}example\.com\/p\/\w+)') == 'example.com'
+    assert get_suffix(
+        r'https?://(?:www\.|[a-z]{2}\.)?Example\.com/r/') == 'example.com'
+    assert get_suffix(r'https?://[a-z]+\.example\.com/') == '.example.com'
+
+
+def test_get_url_pattern_host_suffix_unknown():
+    def get_suffix(pattern):
+        return tools.get_url_pattern_host_suffix(re.compile(pattern))
+
+    # no scheme separator
+    assert get_suffix(r'/([a-z]+\.example\.org)/wiki/') is None
+    # nothing after the hostname
+    assert get_suffix(r'https?://example\.com') is None
+    assert get_suffix(r'https?://example\.com\S*') is None
+    # hostname part could match a slash
+    assert get_suffix(r'https?://\S+example\.com/') is None
+    assert get_suffix(r'https?://.*\.com/') is None
+    # no literal hostname
+    assert get_suffix(r'https?://(a\.com|b\.com)/') is None
+
+
+@pytest.mark.parametrize('parsed', [
+    # the parser fails
+    ValueError('unknown opcode'),
+    # the parser's output changed
+    [('SUBPATTERN', None)],
+    ['://', ('MAX_REPEAT', None), '/'],
+])
+def test_get_url_pattern_host_suffix_fallback(monkeypatch, parsed):
+    sre_parse = tools.sre_parse
+
+    def parse(*args, **kwargs):
+        if isinstance(parsed, Exception):
+            raise parsed
+        items = []
+        for item in parsed:
+            if isinstance(item, tuple):
+                items.append((getattr(sre_parse, item[0]), item[1]))
+            else:
+                items.extend((sre_parse.LITERAL, ord(c)) for c in item)
+        return items
+
+    regex = re.compile(r'https?://example\.com/(\w+)')
+    monkeypatch.setattr(tools.sre_parse, 'parse', parse)
+    assert tools.get_url_pattern_host_suffix(regex) is None
+
+    # the pattern is always checked
+    memory = tools.SopelURLCallbacks()
+
+    def handler(*args, **kwargs):
+        return None
+
+    memory[regex] = handler
+    assert [result[0] for result in memory.search(
+        'https://example.com/test')] == [handler]
+
+
+def test_get_url_pattern_host_suffix_no_parser(monkeypatch):
+    regex = re.compile(r'https?://example\.com/(\w+)')
+    monkeypatch.setattr(tools, 'sre_parse', None)
+    assert tools.get_url_pattern_host_suffix(regex) is None
+
+
+def test_sopel_url_callbacks_search():
+    memory = tools.SopelURLCallbacks()
+
+    def handler_a(*args, **kwargs):
+        return None
+
+    def handler_b(*args, **kwargs):
+        return None
+
+    def handler_any(*args, **kwargs):
+        return None
+
+    memory[re.compile(r'https?://(www\.)?a\.com/(\w+)')] = handler_a
+    memory[re.compile(r'https?://b\.com/(\w+)')] = handler_b
+    memory[re.compile(r'https?://\S+/(\w+)')] = handler_any
+
+    url = 'https://www.a.com/test'
+    assert len(memory.get_candidates(url)) == 2
+    results = list(memory.search(url))
+    assert [result[0] for result in results] == [handler_a, handler_any]
+    assert results[0][1].group(2) == 'test'
+
+    # URL in the query string of another one
+    url = 'https://c.com/?u=https://b.com/test'
+    assert [result[0] for result in memory.search(url)] == [
+        handler_b, handler_any]
+
+    # similar hostname
+    url = 'https://notb.com/test'
+    assert [result[0] for result in memory.search(url)] == [handler_any]
+
+
+def test_sopel_url_callbacks_invalidate():
+    memory = tools.SopelURLCallbacks()
+    regex = re.compile(r'https?://a\.com/(\w+)')
+
+    def handler(*args, **kwargs):
+        return None
+
+    assert not list(memory.search('https://a.com/test'))
+
+    memory[regex] = handler
+    assert list(memory.search('https://a.com/test'))
+
+    del memory[regex]
+    assert not list(memory.search('https://a.com/test'))
+
+    memory.update({regex: handler})
+    assert list(memory.search('https://a.com/test'))
+
+    memory.pop(regex)
+    assert not list(memory.search('https://a.com/test'))
+
+
+def test_sopel_memory_get_or_create():
+    memory = tools.SopelMemory()
+    calls = []
+
+    def factory():
+        calls.append(1)
+        return []
+
+    value = memory.get_or_create('spam', factory)
+    assert value == []
+    assert memory.get_or_create('spam', factory) is value
+    assert len(calls) == 1
+
+
+def test_sopel_memory_with_default_get_or_create():
+    memory = tools.SopelMemoryWithDefault(int)
+
+    # the default factory is not used
+    assert memory.get_or_create('spam', lambda: 42) == 42
+    assert memory['spam'] == 42
+
+
+def test_sopel_memory_compare_and_set():
+    memory = tools.SopelMemory({'spam': 1})
+
+    assert memory.compare_and_set('spam', 1, 2)
+    assert memory['spam'] == 2
+    assert not memory.compare_and_set('spam', 1, 3)
+    assert memory['spam'] == 2
+    # a missing key is never set
+    assert not memory.compare_and_set('eggs', None, 1)
+    assert 'eggs' not in memory
+
+
+def test_sopel_memory_concurrent_writes():
+    memory = tools.SopelMemory()
+    created = []
+
+    def factory():
+        created.append(1)
+        return tools.SopelMemory()
+
+    def worker():
+        for _ in range(200):
+            memory.get_or_create('cache', factory)
+            count = memory.setdefault('count', 0)
+            while not memory.compare_and_set('count', count, count + 1):
+                count = memory['count']
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert memory['count'] == 1600
+    assert len(created) == 1
+
+
+def test_sopel_memory_clear_update():
+    memory = tools.SopelMemory()
+    memory.update({'spam': 1}, eggs=2)
+    assert memory == {'spam': 1, 'eggs': 2}
+
+    memory.clear()
+    assert memory == {}
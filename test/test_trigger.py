@@ -140,6 +140,30 @@ def test_ctcp_data_pretrigger(nick):
     assert pretrigger.sender == Identifier('Foo')
 
 
+def test_urls_pretrigger(nick):
+    line = (
+        ':Foo!foo@example.com PRIVMSG #Sopel :'
+        'see http://example.com/a and ftp://example.com/b, http://example.com/a'
+    )
+    pretrigger = PreTrigger(nick, line)
+    assert pretrigger.urls == (
+        'http://example.com/a',
+        'ftp://example.com/b,',
+    )
+
+
+def test_urls_pretrigger_schemes(nick):
+    line = ':Foo!foo@example.com PRIVMSG #Sopel :http://a.com steam://portal2'
+    pretrigger = PreTrigger(nick, line, url_schemes=['steam'])
+    assert pretrigger.urls == ('steam://portal2',)
+
+
+def test_urls_pretrigger_not_a_message(nick):
+    line = ':Foo!foo@example.com PART #Sopel :http://example.com'
+    pretrigger = PreTrigger(nick, line)
+    assert pretrigger.urls == tuple()
+
+
 def test_ircv3_extended_join_pretrigger(nick):
     line = ':Foo!foo@example.com JOIN #Sopel bar :Real Name'
     pretrigger = PreTrigger(nick, line)
@@ -207,6 +231,7 @@ def test_ircv3_intents_trigger(nick):
     assert trigger.groupdict == fakematch.groupdict
     assert trigger.args == ['#Sopel', 'Hello, world']
     assert trigger.tags == {'intent': 'ACTION'}
+    assert trigger.urls == tuple()
     assert trigger.admin is True
     assert trigger.owner is True
 
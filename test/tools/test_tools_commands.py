@@ -0,0 +1,110 @@
+# coding=utf-8
+"""Tests for Sopel's command index"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+from sopel.tools import commands
+
+
+def make_callable(names, doc=None, examples=None, category=None):
+    def func(bot, trigger):
+        pass
+    func.commands = names
+    func._docs = dict(
+        (name, (doc or [], examples or []))
+        for name in names
+        if doc or examples)
+    if category:
+        func.category = category
+    return func
+
+
+def test_format_doc():
+    assert commands.format_doc((['Spam.'], [])) == ['Spam.']
+    assert commands.format_doc((['Spam.'], ['.spam'])) == [
+        'Spam.', 'e.g. .spam']
+    assert commands.format_doc(([], ['.spam', '.spam eggs', '.spam ham'])) == [
+        'e.g. .spam, .spam eggs or .spam ham']
+
+
+def test_add_remove():
+    index = commands.CommandIndex()
+    spam = make_callable(['spam', 'sp'], ['Spam.'], ['.spam'], 'food')
+    index.add(spam)
+
+    assert index.groups == {'food': ['spam']}
+    assert index.docs == {
+        'spam': (['Spam.'], ['.spam']),
+        'sp': (['Spam.'], ['.spam']),
+    }
+    assert index.get_doc('sp') == ['Spam.', 'e.g. .spam']
+
+    index.remove(spam)
+    assert not index.groups
+    assert not index.docs
+    assert index.get_doc('sp') is None
+    assert index.find('spam') == []
+
+
+def test_remove_replaced_doc():
+    index = commands.CommandIndex()
+    old = make_callable(['spam'], ['Old spam.'])
+    new = make_callable(['spam'], ['New spam.'])
+    index.add(old)
+    index.add(new)
+
+    # the old callable doesn't remove the documentation of the new one
+    index.remove(old)
+    assert index.get_doc('spam') == ['New spam.']
+
+
+def test_get_doc_direct():
+    index = commands.CommandIndex()
+    index.docs['spam'] = (['Spam.'], ['.spam'])
+
+    assert index.get_doc('spam') == ['Spam.', 'e.g. .spam']
+
+
+def test_find():
+    index = commands.CommandIndex()
+    for name in ['time', 'tell', 'title', 'weather']:
+        index.add(make_callable([name], ['Does %s.' % name]))
+
+    assert index.find('time') == ['time']
+    assert index.find('tiem') == ['time']
+    assert index.find('tme') == ['time']
+    assert index.find('timee') == ['time']
+    assert index.find('wether') == ['weather']
+    assert index.find('tile') == ['title', 'time']
+    assert index.find('tile', limit=1) == ['title']
+    assert index.find('spam') == []
+
+
+def test_listing():
+    index = commands.CommandIndex()
+    index.add(make_callable(['spam'], category='food'))
+    index.add(make_callable(['eggs'], category='food'))
+    index.add(make_callable(['eggs'], category='food'))
+    index.add(make_callable(['ping'], category='net'))
+
+    listing = index.get_listing()
+    assert listing == 'FOOD    eggs  spam\n\nNET     ping'
+    # rendered once, until a command is added or removed
+    assert index.get_listing() is listing
+
+    index.add(make_callable(['pong'], category='net'))
+    assert index.get_listing() == 'FOOD    eggs  spam\n\nNET     ping  pong'
+
+
+def test_listing_wrapped():
+    index = commands.CommandIndex()
+    for number in range(20):
+        index.add(make_callable(['command%02d' % number], category='numbers'))
+
+    lines = index.get_listing().splitlines()
+    assert len(lines) > 1
+    assert all(len(line) <= 70 for line in lines)
+    assert all(line.startswith(' ' * 9) for line in lines[1:])
+
+
+def test_listing_empty():
+    assert commands.CommandIndex().get_listing() == ''
@@ -0,0 +1,198 @@
+# coding=utf-8
+"""Tests for Sopel's Dataset Manager, using a local HTTP server"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from sopel.tools import datasets
+
+if sys.version_info.major >= 3:
+    from http.server import HTTPServer, SimpleHTTPRequestHandler
+else:
+    from BaseHTTPServer import HTTPServer
+    from SimpleHTTPServer import SimpleHTTPRequestHandler
+
+
+@pytest.fixture
+def served(tmpdir):
+    """Directory served by a local HTTP server."""
+    return tmpdir.mkdir('served')
+
+
+@pytest.fixture
+def server_url(served):
+    root = served.strpath
+
+    class Handler(SimpleHTTPRequestHandler):
+        def translate_path(self, path):
+            return os.path.join(root, path.lstrip('/'))
+
+        def log_message(self, *args):
+            pass  # keep the test output clean
+
+    server = HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+
+    yield 'http://127.0.0.1:%d' % server.server_address[1]
+
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def storage(tmpdir):
+    return tmpdir.mkdir('storage')
+
+
+def test_dataset_is_stale(storage):
+    path = storage.join('data.txt')
+    dataset = datasets.Dataset('data', 'http://localhost/', path.strpath, 60)
+    assert not dataset.is_available()
+    assert dataset.is_stale()
+
+    path.write('content')
+    assert dataset.is_available()
+    assert not dataset.is_stale()
+    assert dataset.is_stale(now=time.time() + 120)
+
+
+def test_dataset_update(served, server_url, storage):
+    served.join('data.txt').write('new content')
+    path = storage.join('data.txt')
+    path.write('old content')
+
+    dataset = datasets.Dataset(
+        'data', server_url + '/data.txt', path.strpath, 60)
+    dataset.update(timeout=5)
+
+    assert path.read() == 'new content'
+    assert sorted(os.listdir(storage.strpath)) == ['data.txt']
+
+
+def test_dataset_update_process(served, server_url, storage):
+    served.join('data.txt').write('new content')
+    path = storage.join('data.txt')
+
+    def process(source, target):
+        with open(source, 'r') as src, open(target, 'w') as dst:
+            dst.write(src.read().upper())
+
+    dataset = datasets.Dataset(
+        'data', server_url + '/data.txt', path.strpath, 60, process=process)
+    dataset.update(timeout=5)
+
+    assert path.read() == 'NEW CONTENT'
+    assert sorted(os.listdir(storage.strpath)) == ['data.txt']
+
+
+def test_dataset_update_error_keeps_last_copy(server_url, storage):
+    path = storage.join('data.txt')
+    path.write('old content')
+
+    dataset = datasets.Dataset(
+        'data', server_url + '/missing.txt', path.strpath, 60)
+    with pytest.raises(Exception):
+        dataset.update(timeout=5)
+
+    assert path.read() == 'old content'
+    assert sorted(os.listdir(storage.strpath)) == ['data.txt']
+
+
+def test_manager_register_refresh(served, server_url, storage):
+    served.join('data.txt').write('content')
+    path = storage.join('data.txt')
+    updated = []
+
+    manager = datasets.DatasetManager(timeout=5)
+    dataset = manager.register(
+        'data', server_url + '/data.txt', path.strpath, 60,
+        callback=updated.append)
+
+    assert 'data' in manager
+    assert manager.get('data') is dataset
+
+    manager.join()
+    manager.stop()
+
+    assert path.read() == 'content'
+    assert manager.get_path('data') == path.strpath
+    assert updated == [dataset]
+    assert dataset.last_error is None
+
+
+def test_manager_register_fresh(served, server_url, storage):
+    served.join('data.txt').write('new content')
+    path = storage.join('data.txt')
+    path.write('old content')
+
+    manager = datasets.DatasetManager(timeout=5)
+    manager.register('data', server_url + '/data.txt', path.strpath, 60)
+
+    # the last good copy is used right away, and not downloaded again
+    assert manager.get_path('data') == path.strpath
+    assert not manager.refresh('data')
+    assert path.read() == 'old content'
+
+    assert manager.refresh('data', force=True)
+    manager.join()
+    manager.stop()
+
+    assert path.read() == 'new content'
+
+
+def test_manager_refresh_error(server_url, storage):
+    path = storage.join('data.txt')
+
+    manager = datasets.DatasetManager(timeout=5)
+    dataset = manager.register(
+        'data', server_url + '/missing.txt', path.strpath, 60)
+    manager.join()
+    manager.stop()
+
+    assert manager.get_path('data') is None
+    assert dataset.last_error is not None
+
+
+def test_manager_unregister(storage):
+    manager = datasets.DatasetManager()
+    path = storage.join('data.txt')
+    path.write('content')
+    manager.register('data', 'http://localhost/', path.strpath, 60)
+
+    manager.unregister('data')
+    assert 'data' not in manager
+    assert manager.get_path('data') is None
+
+    # no error for unknown datasets
+    manager.unregister('data')
+
+
+def test_manager_check_stale(served, server_url, storage):
+    served.join('data.txt').write('new content')
+    path = storage.join('data.txt')
+    path.write('old content')
+    updated = threading.Event()
+
+    manager = datasets.DatasetManager(timeout=5, check_interval=0.1)
+    dataset = manager.register(
+        'data', server_url + '/data.txt', path.strpath, 60,
+        callback=lambda dataset: updated.set())
+
+    # fresh at registration: nothing to download
+    assert not manager.refresh('data')
+
+    # stale later: refreshed by the periodic check
+    dataset.max_age = 0
+    try:
+        assert updated.wait(5)
+    finally:
+        manager.stop()
+
+    assert path.read() == 'new content'
@@ -9,6 +9,7 @@ import pytest
 
 from sopel import test_tools
 from sopel.tools import jobs
+from sopel.tools.metrics import MetricsRegistry
 
 
 @pytest.fixture
@@ -26,6 +27,28 @@ def test_jobscheduler_stop(sopel):
     assert scheduler.stopping.is_set(), 'Stopping must have been set'
 
 
+def test_jobscheduler_metrics(sopel):
+    registry = MetricsRegistry()
+    scheduler = jobs.JobScheduler(sopel, metrics=registry)
+    calls = []
+
+    def func(bot):
+        calls.append(bot)
+    func.thread = False
+
+    job = jobs.Job(5, func)
+    job.next_time = time.time() - 2
+    scheduler._run_job(job)
+
+    assert calls == [sopel]
+    samples = dict(
+        (name, value)
+        for name, labels, value in registry.get(
+            'sopel_job_lateness_seconds').collect())
+    assert samples['sopel_job_lateness_seconds_count'] == 1
+    assert samples['sopel_job_lateness_seconds_sum'] >= 2
+
+
 def test_job_is_ready_to_run():
     now = time.time()
     job = jobs.Job(5, None)
@@ -0,0 +1,150 @@
+# coding=utf-8
+"""Tests for Sopel's metrics"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import io
+import sys
+
+import pytest
+
+from sopel.tools import metrics
+
+if sys.version_info.major >= 3:
+    from urllib.error import HTTPError
+    from urllib.request import urlopen
+else:
+    from urllib2 import HTTPError, urlopen
+
+
+def test_counter():
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter('spam_total', 'Spam counted.')
+    counter.inc()
+    counter.inc(2)
+
+    assert registry.render() == (
+        '# HELP spam_total Spam counted.\n'
+        '# TYPE spam_total counter\n'
+        'spam_total 3\n'
+    )
+
+    with pytest.raises(ValueError):
+        counter.inc(-1)
+
+
+def test_counter_labels():
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter('lines_total', 'Lines.', ['event'])
+    counter.labels('PRIVMSG').inc()
+    counter.labels('PRIVMSG').inc()
+    counter.labels('JOIN').inc()
+    counter.labels('with "quotes"\\').inc()
+
+    assert registry.render().splitlines()[2:] == [
+        'lines_total{event="JOIN"} 1',
+        'lines_total{event="PRIVMSG"} 2',
+        'lines_total{event="with \\"quotes\\"\\\\"} 1',
+    ]
+
+    with pytest.raises(ValueError):
+        counter.inc()
+
+    with pytest.raises(ValueError):
+        counter.labels('PRIVMSG', 'extra')
+
+
+def test_gauge():
+    registry = metrics.MetricsRegistry()
+    gauge = registry.gauge('spam', 'Spam.')
+    gauge.set(5)
+    gauge.inc()
+    gauge.dec(3)
+    assert registry.render().splitlines()[-1] == 'spam 3'
+
+    gauge.set_function(lambda: 42)
+    assert registry.render().splitlines()[-1] == 'spam 42'
+
+
+def test_histogram():
+    registry = metrics.MetricsRegistry()
+    histogram = registry.histogram('spam_seconds', 'Spam.', buckets=[0.1, 1])
+    histogram.observe(0.05)
+    histogram.observe(0.1)
+    histogram.observe(0.5)
+    histogram.observe(5)
+
+    assert histogram.buckets == (0.1, 1, float('inf'))
+    assert registry.render().splitlines()[2:] == [
+        'spam_seconds_bucket{le="0.1"} 2',
+        'spam_seconds_bucket{le="1"} 3',
+        'spam_seconds_bucket{le="+Inf"} 4',
+        'spam_seconds_count 4',
+        'spam_seconds_sum 5.65',
+    ]
+
+
+def test_histogram_time():
+    registry = metrics.MetricsRegistry()
+    histogram = registry.histogram('spam_seconds', 'Spam.', ['plugin'])
+    with histogram.labels('eggs').time():
+        pass
+
+    samples = dict(
+        (name, value)
+        for name, labels, value in histogram.collect())
+    assert samples['spam_seconds_count'] == 1
+
+
+def test_registry_get_metric():
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter('spam_total', 'Spam.')
+
+    assert registry.counter('spam_total', 'Spam.') is counter
+    assert registry.get('spam_total') is counter
+    assert registry.get('eggs_total') is None
+
+    with pytest.raises(ValueError):
+        registry.gauge('spam_total', 'Spam.')
+
+
+def test_registry_disabled():
+    registry = metrics.MetricsRegistry(enabled=False)
+    counter = registry.counter('spam_total', 'Spam.', ['label'])
+    counter.labels('value').inc()
+    histogram = registry.histogram('eggs_seconds', 'Eggs.')
+    with histogram.time():
+        pass
+
+    assert counter is metrics.NULL_METRIC
+    assert histogram is metrics.NULL_METRIC
+    assert registry.render() == ''
+
+
+def test_registry_write(tmpdir):
+    registry = metrics.MetricsRegistry()
+    registry.counter('spam_total', 'Spam.').inc()
+    filename = tmpdir.join('sopel.prom').strpath
+
+    registry.write(filename)
+    registry.write(filename)
+
+    with io.open(filename, encoding='utf-8') as metrics_file:
+        assert metrics_file.read() == registry.render()
+    assert tmpdir.listdir() == [tmpdir.join('sopel.prom')]
+
+
+def test_metrics_server():
+    registry = metrics.MetricsRegistry()
+    registry.counter('spam_total', 'Spam.').inc()
+    server = metrics.MetricsServer(registry)
+    server.start()
+    try:
+        url = 'http://%s:%d' % server.address
+        response = urlopen(url + '/metrics')
+        assert response.read().decode('utf-8') == registry.render()
+        assert response.info()['Content-Type'] == metrics.CONTENT_TYPE
+
+        with pytest.raises(HTTPError):
+            urlopen(url + '/spam')
+    finally:
+        server.stop()
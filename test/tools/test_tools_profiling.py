@@ -0,0 +1,205 @@
+# coding=utf-8
+"""Tests for Sopel's startup profiler"""
+from __future__ import unicode_literals, absolute_import, print_function, division
+
+import io
+import os
+import pstats
+import threading
+
+import pytest
+
+from sopel.tools import profiling
+
+
+TMP_CONFIG = """
+[core]
+owner = testnick
+nick = TestBot
+enable = coretasks
+"""
+
+
+def test_startup_profile_phases():
+    profile = profiling.StartupProfile()
+    with profile.phase('spam'):
+        pass
+    with profile.phase('eggs'):
+        pass
+    first = profile.phases['spam']
+    with profile.phase('spam'):
+        pass
+
+    assert list(profile.phases) == ['spam', 'eggs']
+    assert profile.phases['spam'] >= first
+
+
+def test_startup_profile_report():
+    profile = profiling.StartupProfile()
+    profile.phases['plugins'] = 2
+    profile.phases['configuration'] = 0.5
+    profile.add_plugin('spam', 0.25, 0.5)
+    profile.add_plugin('eggs', 1, 0)
+    profile.add_plugin('bacon', 0.001, 0)
+
+    assert profile.get_plugin_times() == [
+        (1, 'eggs', 1, 0),
+        (0.75, 'spam', 0.25, 0.5),
+        (0.001, 'bacon', 0.001, 0),
+    ]
+
+    report = profile.get_report(limit=2)
+    assert report[0].startswith('Startup time: ')
+    assert report[1:] == [
+        'Phases:',
+        '  plugins        2.000s',
+        '  configuration  0.500s',
+        'Plugins:',
+        '  eggs  1.000s (import: 1.000s, setup: 0.000s)',
+        '  spam  0.750s (import: 0.250s, setup: 0.500s)',
+    ]
+
+
+def test_startup_profile_profiler(tmpdir):
+    filename = tmpdir.join('startup.prof').strpath
+    profile = profiling.StartupProfile()
+    profile.stop_profiler(filename)
+    assert not tmpdir.join('startup.prof').check()
+
+    profile.start_profiler()
+    sorted(range(100))
+    profile.stop_profiler(filename)
+
+    stats = pstats.Stats(filename)
+    assert stats.total_calls > 0
+
+
+def test_bot_startup_profile(configfactory, botfactory):
+    settings = configfactory('test.cfg', TMP_CONFIG)
+    mockbot = botfactory(settings)
+    mockbot.setup_plugins()
+
+    assert 'coretasks' in mockbot.startup_profile.plugins
+
+
+def test_callable_timings():
+    timings = profiling.CallableTimings()
+    for duration in [0.1, 0.2, 0.3, 0.4, 1.0]:
+        timings.add('spam', duration)
+    timings.add('eggs', 0.5)
+
+    spam, eggs = sorted(timings.get_timings(), reverse=True)
+    assert spam == profiling.CallableTiming('spam', 5, 0.3, 1.0, 1.0)
+    assert eggs == profiling.CallableTiming('eggs', 1, 0.5, 0.5, 0.5)
+
+    assert [timing.name for timing in timings.get_slowest()] == [
+        'spam', 'eggs']
+    assert [timing.name for timing in timings.get_most_frequent(1)] == [
+        'spam']
+
+    timings.clear()
+    assert timings.get_timings() == []
+
+
+def test_callable_timings_window():
+    timings = profiling.CallableTimings(window=3)
+    for duration in [5.0, 0.1, 0.2, 0.3]:
+        timings.add('spam', duration)
+
+    timing = timings.get_timings()[0]
+    # percentiles cover the most recent calls only
+    assert timing.p95 == 0.3
+    assert timing.median == 0.2
+    assert timing.count == 4
+    assert timing.max == 5.0
+
+
+def _wait_for(event):
+    event.wait()
+
+
+def test_thread_label():
+    assert profiling._thread_label(
+        'Thread-3-sopel.modules.spam.eggs') == 'callable:sopel.modules.spam.eggs'
+    assert profiling._thread_label(
+        'Thread-3 (call)-sopel.modules.spam.eggs') == (
+            'callable:sopel.modules.spam.eggs')
+    assert profiling._thread_label('Thread-12') == 'thread'
+    assert profiling._thread_label('MainThread') == 'MainThread'
+
+
+def test_sampling_profiler_sample(tmpdir):
+    profiler = profiling.SamplingProfiler()
+    done = threading.Event()
+    thread = threading.Thread(
+        target=_wait_for, args=(done,), name='Thread-1-spam.eggs')
+    thread.start()
+    try:
+        profiler.sample()
+        profiler.sample()
+    finally:
+        done.set()
+        thread.join()
+
+    assert profiler.sample_count == 2
+    collapsed = profiler.get_collapsed()
+    stacks = dict(line.rsplit(' ', 1) for line in collapsed)
+    callable_stacks = [
+        stack for stack in stacks if stack.startswith('callable:spam.eggs;')]
+    assert len(callable_stacks) == 1
+    assert stacks[callable_stacks[0]] == '2'
+    assert __name__ + '._wait_for' in callable_stacks[0].split(';')
+    # the calling thread is not sampled
+    assert not any(
+        'test_sampling_profiler_sample' in stack for stack in stacks)
+
+    filename = tmpdir.join('samples.collapsed').strpath
+    profiler.write(filename)
+    with io.open(filename, encoding='utf-8') as collapsed_file:
+        assert collapsed_file.read().splitlines() == collapsed
+
+    profiler.clear()
+    assert profiler.get_collapsed() == []
+    assert profiler.sample_count == 0
+
+
+def test_sampling_profiler_start_stop():
+    profiler = profiling.SamplingProfiler(interval=0.001)
+    assert not profiler.is_running
+
+    profiler.start()
+    try:
+        assert profiler.is_running
+        while profiler.sample_count < 3:
+            threading.Event().wait(0.001)
+        with pytest.raises(RuntimeError):
+            profiler.start()
+    finally:
+        profiler.stop()
+
+    assert not profiler.is_running
+    count = profiler.sample_count
+    assert count >= 3
+    # the profiler doesn't sample itself
+    assert not any(
+        'sopel-sampling-profiler' in line for line in profiler.get_collapsed())
+
+    profiler.start()
+    profiler.stop()
+    # starting again forgets the previous samples
+    assert profiler.sample_count < count
+
+
+def test_bot_sampling_profiler(configfactory, botfactory, tmpdir):
+    settings = configfactory('test.cfg', TMP_CONFIG)
+    settings.core.logdir = tmpdir.strpath
+    settings.core.sampling_profiler_interval = 0.001
+    mockbot = botfactory(settings)
+
+    mockbot.start_sampling_profiler()
+    filename = mockbot.stop_sampling_profiler()
+
+    assert not mockbot.sampling_profiler.is_running
+    assert filename.startswith(tmpdir.join('test.').strpath)
+    assert filename.endswith('.collapsed')
+    assert os.path.isfile(filename)
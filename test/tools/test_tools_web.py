@@ -4,7 +4,8 @@ from __future__ import unicode_literals, absolute_import, print_function, divisi
 
 import pytest
 
-from sopel.tools.web import quote, search_urls, trim_url, unquote
+from sopel.tools.web import (
+    _get_url_regex, quote, search_urls, trim_url, unquote)
 
 
 QUOTED_STRINGS = [
@@ -156,6 +157,21 @@ def test_search_urls_defined_schemes(scheme):
     assert expected in urls
 
 
+def test_search_urls_compiled_pattern_cache():
+    list(search_urls('http://a.com', schemes=['steam'], exclusion_char='!'))
+    regex = _get_url_regex(('steam',), '!')
+
+    # same arguments, same compiled pattern
+    assert _get_url_regex(('steam',), '!') is regex
+    assert _get_url_regex(('steam',)) is not regex
+    assert _get_url_regex(('http', 'steam'), '!') is not regex
+
+    urls = list(
+        search_urls('!steam://a steam://b', schemes=['steam'],
+                    exclusion_char='!'))
+    assert urls == ['steam://b']
+
+
 TRAILING_CHARS = list('.,?!\'":;')
 ENCLOSING_PAIRS = [('(', ')'), ('[', ']'), ('{', '}'), ('<', '>')]
 